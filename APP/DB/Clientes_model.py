@@ -9,7 +9,7 @@ class Clientes(Base):
     Nombre = Column(String(150), nullable=False)
     Apellido = Column(String(150), nullable=True)
     CUIT_CUIL = Column(String(13), nullable=True, unique=True, index=True)
-    Tipo_Cliente = Column(String(20), nullable=False, default='Consumidor Final', index=True)
+    Tipo_Cliente = Column(String(30), nullable=False, default='Consumidor Final', index=True)
     Condicion_IVA = Column(String(50), nullable=True)
     Direccion = Column(String(200), nullable=False)
     Localidad = Column(String(100), nullable=False)
@@ -1,12 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, Path, Security
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Optional
 from database import get_db
 from APP.schemas.Auditoria_Cambios_schema import (
     AuditoriaCambiosBase,
     AuditoriaCambiosCreate,
-    AuditoriaCambiosSimple,
     AuditoriaCambiosCompleta,
+    AuditoriaCambiosList,
     EstadisticasAuditoria,
     BusquedaAuditoria
 )
@@ -15,6 +15,7 @@ from APP.DB.Usuarios_model import Usuarios
 from sqlalchemy import func, and_, case, distinct, or_, cast, JSON
 from datetime import datetime, timedelta
 from APP.routers.Usuarios_router import get_current_user
+from APP.services.Paginacion_service import es_paginacion_cursor, aplicar_cursor, armar_pagina, calcular_total, total_paginas
 import json
 
 router = APIRouter(
@@ -23,10 +24,13 @@ router = APIRouter(
 )
 
 # Obtener registros de auditoría con filtros
-@router.get("/", response_model=List[AuditoriaCambiosSimple])
-async def get_auditoria(
+@router.get("/", response_model=AuditoriaCambiosList)
+def get_auditoria(
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
+    paginacion: Optional[str] = Query("offset", enum=["offset", "cursor"], description="Tipo de paginación"),
+    after: Optional[str] = Query(None, description="Cursor de la página siguiente (next_cursor)"),
+    modo_total: str = Query("exact", alias="total", enum=["exact", "estimate", "none"], description="Total: exacto, estimado o sin contar"),
     tabla: Optional[str] = Query(None, description="Filtrar por tabla afectada"),
     tipo_operacion: Optional[str] = Query(None, description="Filtrar por tipo de operación"),
     usuario_id: Optional[int] = Query(None, description="Filtrar por usuario"),
@@ -58,30 +62,44 @@ async def get_auditoria(
     if hasta:
         query = query.filter(Auditoria_Cambios.Fecha_Operacion <= hasta)
     
-    total = query.count()
-    registros = query.order_by(Auditoria_Cambios.Fecha_Operacion.desc()).offset(skip).limit(limit).all()
+    # Paginación por cursor: sin COUNT ni OFFSET
+    por_cursor = es_paginacion_cursor(paginacion, after)
+    if por_cursor:
+        orden_pagina = [(Auditoria_Cambios.Fecha_Operacion, True), (Auditoria_Cambios.ID_Auditoria, True)]
+        registros, next_cursor = armar_pagina(
+            aplicar_cursor(query, orden_pagina, after, limit).all(), orden_pagina, limit
+        )
+    else:
+        total = calcular_total(db, query, modo_total)
+        registros = query.order_by(Auditoria_Cambios.Fecha_Operacion.desc()).offset(skip).limit(limit).all()
+    
+    items = [
+        {
+            "id_auditoria": r.Auditoria_Cambios.ID_Auditoria,
+            "tabla_afectada": r.Auditoria_Cambios.Tabla_Afectada,
+            "id_registro": r.Auditoria_Cambios.ID_Registro,
+            "tipo_operacion": r.Auditoria_Cambios.Tipo_Operacion,
+            "fecha_operacion": r.Auditoria_Cambios.Fecha_Operacion,
+            "id_usuario": r.Auditoria_Cambios.ID_Usuario,
+            "usuario_nombre": f"{r.nombre_usuario} {r.apellido_usuario}",
+            "ip_cliente": r.Auditoria_Cambios.IP_Cliente
+        }
+        for r in registros
+    ]
+    
+    if por_cursor:
+        return {"items": items, "next_cursor": next_cursor}
     
     return {
         "total": total,
-        "items": [
-            {
-                "id_auditoria": r.Auditoria_Cambios.ID_Auditoria,
-                "tabla": r.Auditoria_Cambios.Tabla_Afectada,
-                "id_registro": r.Auditoria_Cambios.ID_Registro,
-                "tipo_operacion": r.Auditoria_Cambios.Tipo_Operacion,
-                "fecha": r.Auditoria_Cambios.Fecha_Operacion,
-                "usuario": f"{r.nombre_usuario} {r.apellido_usuario}",
-                "ip_cliente": r.Auditoria_Cambios.IP_Cliente
-            }
-            for r in registros
-        ],
+        "items": items,
         "pagina": skip // limit + 1,
-        "paginas": (total + limit - 1) // limit
+        "paginas": total_paginas(total, limit)
     }
 
 # Buscar cambios por registro
 @router.get("/buscar", response_model=BusquedaAuditoria)
-async def buscar_cambios(
+def buscar_cambios(
     tabla: str = Query(..., description="Nombre de la tabla"),
     id_registro: int = Query(..., gt=0, description="ID del registro a buscar"),
     desde: Optional[datetime] = None,
@@ -157,7 +175,7 @@ async def buscar_cambios(
 
 # Obtener estadísticas de auditoría
 @router.get("/estadisticas", response_model=EstadisticasAuditoria)
-async def get_estadisticas_auditoria(
+def get_estadisticas_auditoria(
     desde: Optional[datetime] = None,
     hasta: Optional[datetime] = None,
     db: Session = Depends(get_db),
@@ -259,7 +277,7 @@ async def get_estadisticas_auditoria(
 
 # Obtener un registro específico de auditoría
 @router.get("/{auditoria_id}", response_model=AuditoriaCambiosCompleta)
-async def get_registro_auditoria(
+def get_registro_auditoria(
     auditoria_id: int = Path(..., gt=0),
     db: Session = Depends(get_db),
     current_user: Usuarios = Depends(get_current_user)
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Path
+from fastapi import APIRouter, Depends, HTTPException, Query, Path, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from database import get_db
@@ -14,6 +14,8 @@ from APP.schemas.Categorias_schema import (
 from APP.DB.Categorias_model import Categorias
 from sqlalchemy import func, and_
 from APP.DB.Productos_model import Productos
+from APP.services.Categorias_service import obtener_arbol_serializado
+from APP.services.Paginacion_service import es_paginacion_cursor, orden_cursor, aplicar_cursor, armar_pagina, calcular_total, total_paginas
 
 router = APIRouter(
     prefix="/categorias",
@@ -22,9 +24,12 @@ router = APIRouter(
 
 # Obtener todas las categorías con paginación y filtros
 @router.get("/", response_model=CategoriaList)
-async def get_categorias(
+def get_categorias(
     skip: int = Query(0, ge=0, description="Número de registros a saltar"),
     limit: int = Query(10, ge=1, le=100, description="Número de registros a retornar"),
+    paginacion: Optional[str] = Query("offset", enum=["offset", "cursor"], description="Tipo de paginación"),
+    after: Optional[str] = Query(None, description="Cursor de la página siguiente (next_cursor)"),
+    modo_total: str = Query("exact", alias="total", enum=["exact", "estimate", "none"], description="Total: exacto, estimado o sin contar"),
     activo: Optional[bool] = Query(None, description="Filtrar por estado activo/inactivo"),
     categoria_padre: Optional[int] = Query(None, description="Filtrar por categoría padre"),
     buscar: Optional[str] = Query(None, description="Buscar por nombre o descripción"),
@@ -62,26 +67,35 @@ async def get_categorias(
             (Categorias.Descripcion.ilike(search))
         )
     
-    # Contar total de registros (necesitamos una subquery para el conteo total)
-    total = db.query(func.count(Categorias.ID_Categoria)).scalar()
+    # Paginación por cursor: sin COUNT ni OFFSET
+    por_cursor = es_paginacion_cursor(paginacion, after)
+    if por_cursor:
+        columna = Categorias.Fecha_Creacion if ordenar_por == "fecha_creacion" else Categorias.Nombre
+        orden_pagina = orden_cursor(columna, Categorias.ID_Categoria, orden == "desc")
+        resultados, next_cursor = armar_pagina(
+            aplicar_cursor(query, orden_pagina, after, limit).all(), orden_pagina, limit
+        )
+    else:
+        # Contar total de registros (necesitamos una subquery para el conteo total)
+        total = calcular_total(db, query, modo_total, contar=lambda: db.query(func.count(Categorias.ID_Categoria)).scalar())
     
-    # Aplicar ordenamiento
-    if ordenar_por == "nombre":
-        if orden == "desc":
-            query = query.order_by(Categorias.Nombre.desc())
+        # Aplicar ordenamiento
+        if ordenar_por == "nombre":
+            if orden == "desc":
+                query = query.order_by(Categorias.Nombre.desc())
+            else:
+                query = query.order_by(Categorias.Nombre.asc())
+        elif ordenar_por == "fecha_creacion":
+            if orden == "desc":
+                query = query.order_by(Categorias.Fecha_Creacion.desc())
+            else:
+                query = query.order_by(Categorias.Fecha_Creacion.asc())
         else:
+            # Ordenamiento por defecto
             query = query.order_by(Categorias.Nombre.asc())
-    elif ordenar_por == "fecha_creacion":
-        if orden == "desc":
-            query = query.order_by(Categorias.Fecha_Creacion.desc())
-        else:
-            query = query.order_by(Categorias.Fecha_Creacion.asc())
-    else:
-        # Ordenamiento por defecto
-        query = query.order_by(Categorias.Nombre.asc())
     
-    # Aplicar paginación
-    resultados = query.offset(skip).limit(limit).all()
+        # Aplicar paginación
+        resultados = query.offset(skip).limit(limit).all()
     
     # Procesar resultados
     categorias_procesadas = []
@@ -96,55 +110,27 @@ async def get_categorias(
         }
         categorias_procesadas.append(categoria_dict)
     
+    if por_cursor:
+        return {"categorias": categorias_procesadas, "next_cursor": next_cursor}
+    
     return {
         "total_registros": total,
         "pagina_actual": skip // limit + 1,
-        "total_paginas": (total + limit - 1) // limit,
+        "total_paginas": total_paginas(total, limit),
         "categorias": categorias_procesadas
     }
 
-# Obtener árbol de categorías
+# Obtener árbol de categorías (una sola consulta; el JSON queda cacheado hasta que
+# cambien las categorías o la categoría de algún producto)
 @router.get("/arbol", response_model=List[dict])
-async def get_arbol_categorias(
+def get_arbol_categorias(
     db: Session = Depends(get_db)
 ):
-    def construir_arbol(categoria_padre=None):
-        categorias = db.query(
-            Categorias,
-            func.count(Productos.ID_Producto).label('productos_count')
-        ).outerjoin(
-            Productos, and_(
-                Productos.ID_Categoria == Categorias.ID_Categoria,
-                Productos.Activo == True
-            )
-        ).filter(
-            Categorias.Categoria_Padre == categoria_padre,
-            Categorias.Activo == True
-        ).group_by(
-            Categorias.ID_Categoria,
-            Categorias.Nombre,
-            Categorias.Descripcion,
-            Categorias.Categoria_Padre,
-            Categorias.Activo,
-            Categorias.Fecha_Creacion
-        ).all()
-        
-        return [
-            {
-                "id": cat.ID_Categoria,
-                "nombre": cat.Nombre,
-                "descripcion": cat.Descripcion,
-                "productos_count": productos_count,
-                "subcategorias": construir_arbol(cat.ID_Categoria)
-            }
-            for cat, productos_count in categorias
-        ]
-    
-    return construir_arbol()
+    return Response(content=obtener_arbol_serializado(db), media_type="application/json")
 
 # Obtener estadísticas de categorías
 @router.get("/estadisticas", response_model=CategoriaEstadisticas)
-async def get_estadisticas_categorias(
+def get_estadisticas_categorias(
     db: Session = Depends(get_db)
 ):
     # Total de categorías
@@ -193,7 +179,7 @@ async def get_estadisticas_categorias(
 
 # Obtener una categoría por ID
 @router.get("/{categoria_id}", response_model=CategoriaCompleta)
-async def get_categoria(
+def get_categoria(
     categoria_id: int = Path(..., gt=0, description="ID de la categoría"),
     db: Session = Depends(get_db)
 ):
@@ -269,7 +255,7 @@ async def get_categoria(
 
 # Crear nueva categoría
 @router.post("/", response_model=CategoriaCompleta)
-async def create_categoria(
+def create_categoria(
     categoria: CategoriaCreate,
     db: Session = Depends(get_db)
 ):
@@ -309,7 +295,7 @@ async def create_categoria(
 
 # Actualizar categoría
 @router.put("/{categoria_id}", response_model=CategoriaCompleta)
-async def update_categoria(
+def update_categoria(
     categoria: CategoriaUpdate,
     categoria_id: int = Path(..., gt=0),
     db: Session = Depends(get_db)
@@ -395,7 +381,7 @@ async def update_categoria(
 
 # Eliminar categoría (soft delete)
 @router.delete("/{categoria_id}")
-async def delete_categoria(
+def delete_categoria(
     categoria_id: int = Path(..., gt=0),
     db: Session = Depends(get_db)
 ):
@@ -426,7 +412,7 @@ async def delete_categoria(
 
 # Obtener subcategorías
 @router.get("/{categoria_id}/subcategorias", response_model=List[CategoriaSimple])
-async def get_subcategorias(
+def get_subcategorias(
     categoria_id: int = Path(..., gt=0),
     db: Session = Depends(get_db)
 ):
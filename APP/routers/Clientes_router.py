@@ -6,7 +6,7 @@ from APP.schemas.Clientes_schema import (
     ClienteBase,
     ClienteCreate,
     ClienteUpdate,
-    ClienteSimple,
+    ClienteList,
     ClienteCompleta
 )
 from APP.DB.Clientes_model import Clientes
@@ -15,6 +15,7 @@ from APP.DB.Usuarios_model import Usuarios
 from sqlalchemy import func, and_, case
 from datetime import datetime, timedelta
 from APP.routers.Usuarios_router import get_current_user
+from APP.services.Paginacion_service import es_paginacion_cursor, orden_cursor, aplicar_cursor, armar_pagina, calcular_total, total_paginas, columnas_en_minusculas
 
 router = APIRouter(
     prefix="/clientes",
@@ -22,10 +23,13 @@ router = APIRouter(
 )
 
 # Obtener todos los clientes con paginación y filtros
-@router.get("/", response_model=List[ClienteSimple])
-async def get_clientes(
+@router.get("/", response_model=ClienteList)
+def get_clientes(
     skip: int = Query(0, ge=0, description="Número de registros a saltar"),
     limit: int = Query(10, ge=1, le=100, description="Número de registros a retornar"),
+    paginacion: Optional[str] = Query("offset", enum=["offset", "cursor"], description="Tipo de paginación"),
+    after: Optional[str] = Query(None, description="Cursor de la página siguiente (next_cursor)"),
+    modo_total: str = Query("exact", alias="total", enum=["exact", "estimate", "none"], description="Total: exacto, estimado o sin contar"),
     activo: Optional[bool] = Query(None, description="Filtrar por estado activo/inactivo"),
     tipo_cliente: Optional[str] = Query(None, description="Filtrar por tipo de cliente"),
     provincia: Optional[str] = Query(None, description="Filtrar por provincia"),
@@ -53,26 +57,38 @@ async def get_clientes(
             (Clientes.Email.ilike(search))
         )
     
-    # Aplicar ordenamiento
-    if ordenar_por:
-        orden_col = getattr(Clientes, ordenar_por.capitalize(), Clientes.Nombre)
-        if orden == "desc":
-            orden_col = orden_col.desc()
-        query = query.order_by(orden_col)
+    # Paginación por cursor: sin COUNT ni OFFSET
+    por_cursor = es_paginacion_cursor(paginacion, after)
+    if por_cursor:
+        columna = getattr(Clientes, ordenar_por.capitalize(), Clientes.Nombre) if ordenar_por else Clientes.ID_Cliente
+        orden_pagina = orden_cursor(columna, Clientes.ID_Cliente, orden == "desc")
+        clientes, next_cursor = armar_pagina(
+            aplicar_cursor(query, orden_pagina, after, limit).all(), orden_pagina, limit
+        )
+    else:
+        # Aplicar ordenamiento
+        if ordenar_por:
+            orden_col = getattr(Clientes, ordenar_por.capitalize(), Clientes.Nombre)
+            if orden == "desc":
+                orden_col = orden_col.desc()
+            query = query.order_by(orden_col)
+    
+        total = calcular_total(db, query, modo_total)
+        clientes = query.offset(skip).limit(limit).all()
     
-    total = query.count()
-    clientes = query.offset(skip).limit(limit).all()
+    if por_cursor:
+        return {"items": [columnas_en_minusculas(c) for c in clientes], "next_cursor": next_cursor}
     
     return {
         "total": total,
-        "items": clientes,
+        "items": [columnas_en_minusculas(c) for c in clientes],
         "pagina": skip // limit + 1,
-        "paginas": (total + limit - 1) // limit
+        "paginas": total_paginas(total, limit)
     }
 
 # Obtener un cliente por ID
 @router.get("/{cliente_id}", response_model=ClienteCompleta)
-async def get_cliente(
+def get_cliente(
     cliente_id: int = Path(..., gt=0),
     db: Session = Depends(get_db),
     current_user: Usuarios = Depends(get_current_user)
@@ -84,7 +100,7 @@ async def get_cliente(
 
 # Crear nuevo cliente
 @router.post("/", response_model=ClienteCompleta)
-async def create_cliente(
+def create_cliente(
     cliente: ClienteCreate,
     db: Session = Depends(get_db),
     current_user: Usuarios = Depends(get_current_user)
@@ -132,7 +148,7 @@ async def create_cliente(
 
 # Actualizar cliente
 @router.put("/{cliente_id}", response_model=ClienteCompleta)
-async def update_cliente(
+def update_cliente(
     cliente: ClienteUpdate,
     cliente_id: int = Path(..., gt=0),
     db: Session = Depends(get_db),
@@ -174,7 +190,7 @@ async def update_cliente(
 
 # Obtener historial de compras
 @router.get("/{cliente_id}/compras", response_model=List[dict])
-async def get_historial_compras(
+def get_historial_compras(
     cliente_id: int = Path(..., gt=0),
     desde: Optional[datetime] = None,
     hasta: Optional[datetime] = None,
@@ -212,7 +228,7 @@ async def get_historial_compras(
 
 # Obtener estado de cuenta
 @router.get("/{cliente_id}/estado-cuenta", response_model=dict)
-async def get_estado_cuenta(
+def get_estado_cuenta(
     cliente_id: int = Path(..., gt=0),
     db: Session = Depends(get_db),
     current_user: Usuarios = Depends(get_current_user)
@@ -257,7 +273,7 @@ async def get_estado_cuenta(
 
 # Actualizar límite de crédito
 @router.patch("/{cliente_id}/limite-credito")
-async def update_limite_credito(
+def update_limite_credito(
     cliente_id: int = Path(..., gt=0),
     nuevo_limite: float = Query(..., gt=0),
     db: Session = Depends(get_db),
@@ -287,7 +303,7 @@ async def update_limite_credito(
 
 # Obtener estadísticas de clientes
 @router.get("/estadisticas/general", response_model=dict)
-async def get_estadisticas_clientes(
+def get_estadisticas_clientes(
     db: Session = Depends(get_db),
     current_user: Usuarios = Depends(get_current_user)
 ):
@@ -1,12 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, Path, Security
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Optional
 from database import get_db
 from APP.schemas.Descuentos_schema import (
     DescuentoBase,
     DescuentoCreate,
     DescuentoUpdate,
-    DescuentoSimple,
+    DescuentoList,
     DescuentoCompleto,
     ProductoDescuentoBase,
     EstadisticasDescuentos
@@ -20,6 +20,7 @@ from APP.DB.Usuarios_model import Usuarios
 from sqlalchemy import func, and_, case, distinct
 from datetime import datetime, timedelta
 from APP.routers.Usuarios_router import get_current_user
+from APP.services.Paginacion_service import es_paginacion_cursor, aplicar_cursor, armar_pagina, calcular_total, total_paginas
 
 router = APIRouter(
     prefix="/descuentos",
@@ -27,10 +28,13 @@ router = APIRouter(
 )
 
 # Obtener todos los descuentos con paginación y filtros
-@router.get("/", response_model=List[DescuentoSimple])
-async def get_descuentos(
+@router.get("/", response_model=DescuentoList)
+def get_descuentos(
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
+    paginacion: Optional[str] = Query("offset", enum=["offset", "cursor"], description="Tipo de paginación"),
+    after: Optional[str] = Query(None, description="Cursor de la página siguiente (next_cursor)"),
+    modo_total: str = Query("exact", alias="total", enum=["exact", "estimate", "none"], description="Total: exacto, estimado o sin contar"),
     activo: Optional[bool] = Query(None, description="Filtrar por estado activo/inactivo"),
     tipo: Optional[str] = Query(None, description="Filtrar por tipo de descuento"),
     vigente: Optional[bool] = Query(None, description="Filtrar por vigencia actual"),
@@ -57,16 +61,29 @@ async def get_descuentos(
                 Descuentos.Fecha_Fin < hoy
             )
     
-    total = query.count()
-    descuentos = query.order_by(Descuentos.Fecha_Inicio.desc()).offset(skip).limit(limit).all()
+    # Cantidad de productos por descuento: subconsulta agrupada unida a la página
+    # (la página y sus conteos salen en una sola consulta)
+    conteos = db.query(
+        Productos_Descuentos.ID_Descuento,
+        func.count(Productos_Descuentos.ID_Producto).label('productos_count')
+    ).group_by(Productos_Descuentos.ID_Descuento).subquery()
+    pagina = query.outerjoin(
+        conteos, conteos.c.ID_Descuento == Descuentos.ID_Descuento
+    ).add_columns(func.coalesce(conteos.c.productos_count, 0).label('productos_count'))
+    
+    # Paginación por cursor: sin COUNT ni OFFSET
+    por_cursor = es_paginacion_cursor(paginacion, after)
+    if por_cursor:
+        orden_pagina = [(Descuentos.Fecha_Inicio, True), (Descuentos.ID_Descuento, True)]
+        descuentos, next_cursor = armar_pagina(
+            aplicar_cursor(pagina, orden_pagina, after, limit).all(), orden_pagina, limit
+        )
+    else:
+        total = calcular_total(db, query, modo_total)
+        descuentos = pagina.order_by(Descuentos.Fecha_Inicio.desc()).offset(skip).limit(limit).all()
     
-    # Obtener cantidad de productos por descuento
     resultados = []
-    for descuento in descuentos:
-        productos_count = db.query(func.count(Productos_Descuentos.ID_Producto)).filter(
-            Productos_Descuentos.ID_Descuento == descuento.ID_Descuento
-        ).scalar()
-        
+    for descuento, productos_count in descuentos:
         # Calcular estado de vigencia
         hoy = datetime.now().date()
         if not descuento.Activo:
@@ -81,25 +98,32 @@ async def get_descuentos(
         resultados.append({
             "id_descuento": descuento.ID_Descuento,
             "nombre": descuento.Nombre,
+            "descripcion": descuento.Descripcion,
             "tipo_descuento": descuento.Tipo_Descuento,
             "porcentaje": descuento.Porcentaje,
             "monto_fijo": descuento.Monto_Fijo,
+            "cantidad_minima": descuento.Cantidad_Minima,
+            "cantidad_maxima": descuento.Cantidad_Maxima,
             "fecha_inicio": descuento.Fecha_Inicio,
             "fecha_fin": descuento.Fecha_Fin,
+            "activo": descuento.Activo,
             "estado": estado,
-            "productos_count": productos_count
+            "cantidad_productos": productos_count
         })
     
+    if por_cursor:
+        return {"items": resultados, "next_cursor": next_cursor}
+    
     return {
         "total": total,
         "items": resultados,
         "pagina": skip // limit + 1,
-        "paginas": (total + limit - 1) // limit
+        "paginas": total_paginas(total, limit)
     }
 
 # Obtener un descuento específico con sus productos
 @router.get("/{descuento_id}", response_model=DescuentoCompleto)
-async def get_descuento(
+def get_descuento(
     descuento_id: int = Path(..., gt=0),
     db: Session = Depends(get_db),
     current_user: Usuarios = Depends(get_current_user)
@@ -176,7 +200,7 @@ async def get_descuento(
 
 # Crear nuevo descuento
 @router.post("/", response_model=DescuentoCompleto)
-async def create_descuento(
+def create_descuento(
     descuento: DescuentoCreate,
     db: Session = Depends(get_db),
     current_user: Usuarios = Depends(get_current_user)
@@ -250,11 +274,11 @@ async def create_descuento(
     db.commit()
     db.refresh(db_descuento)
     
-    return await get_descuento(db_descuento.ID_Descuento, db, current_user)
+    return get_descuento(db_descuento.ID_Descuento, db, current_user)
 
 # Actualizar descuento
 @router.put("/{descuento_id}", response_model=DescuentoCompleto)
-async def update_descuento(
+def update_descuento(
     descuento: DescuentoUpdate,
     descuento_id: int = Path(..., gt=0),
     db: Session = Depends(get_db),
@@ -321,11 +345,11 @@ async def update_descuento(
     db.commit()
     db.refresh(db_descuento)
     
-    return await get_descuento(descuento_id, db, current_user)
+    return get_descuento(descuento_id, db, current_user)
 
 # Obtener estadísticas de descuentos
 @router.get("/estadisticas", response_model=EstadisticasDescuentos)
-async def get_estadisticas_descuentos(
+def get_estadisticas_descuentos(
     desde: Optional[datetime] = None,
     hasta: Optional[datetime] = None,
     db: Session = Depends(get_db),
@@ -26,7 +26,7 @@ router = APIRouter(
 
 # Obtener detalles de una orden de compra
 @router.get("/orden/{orden_id}", response_model=List[DetalleOCCompleto])
-async def get_detalles_orden(
+def get_detalles_orden(
     orden_id: int = Path(..., gt=0),
     db: Session = Depends(get_db),
     current_user: Usuarios = Depends(get_current_user)
@@ -48,28 +48,44 @@ async def get_detalles_orden(
         Detalle_OC.ID_OC == orden_id
     ).all()
     
+    ids_producto = list({detalle.Detalle_OC.ID_Producto for detalle in detalles})
+    
+    # Último costo registrado antes de esta orden, para todos los productos en una consulta
+    ultimos_costos = db.query(
+        Detalle_OC.ID_Producto,
+        Detalle_OC.Costo_Unitario,
+        func.row_number().over(
+            partition_by=Detalle_OC.ID_Producto,
+            order_by=(Ordenes_Compra.Fecha.desc(), Ordenes_Compra.ID_OC.desc())
+        ).label('posicion')
+    ).join(
+        Ordenes_Compra
+    ).filter(
+        Detalle_OC.ID_Producto.in_(ids_producto),
+        Ordenes_Compra.Fecha < orden.Fecha,
+        Ordenes_Compra.Estado == 'Recibida'
+    ).subquery()
+    costos_anteriores = dict(
+        db.query(ultimos_costos.c.ID_Producto, ultimos_costos.c.Costo_Unitario).filter(
+            ultimos_costos.c.posicion == 1
+        ).all()
+    )
+    
+    # Stock actual (todas las sucursales) por producto
+    stocks = dict(
+        db.query(Inventario.ID_Producto, func.sum(Inventario.Stock_Actual)).filter(
+            Inventario.ID_Producto.in_(ids_producto)
+        ).group_by(Inventario.ID_Producto).all()
+    )
+    
     # Obtener costos anteriores para comparación
     resultados = []
     for detalle in detalles:
-        # Buscar último costo registrado antes de esta orden
-        costo_anterior = db.query(Detalle_OC.Costo_Unitario).join(
-            Ordenes_Compra
-        ).filter(
-            Detalle_OC.ID_Producto == detalle.Detalle_OC.ID_Producto,
-            Ordenes_Compra.Fecha < orden.Fecha,
-            Ordenes_Compra.Estado == 'Recibida'
-        ).order_by(
-            Ordenes_Compra.Fecha.desc()
-        ).first()
-        
         # Calcular variación de costo
-        costo_anterior = costo_anterior[0] if costo_anterior else detalle.Detalle_OC.Costo_Unitario
+        costo_anterior = costos_anteriores.get(detalle.Detalle_OC.ID_Producto, detalle.Detalle_OC.Costo_Unitario)
         variacion = ((detalle.Detalle_OC.Costo_Unitario - costo_anterior) / costo_anterior * 100) if costo_anterior > 0 else 0
         
-        # Obtener stock actual
-        stock = db.query(func.sum(Inventario.Stock_Actual)).filter(
-            Inventario.ID_Producto == detalle.Detalle_OC.ID_Producto
-        ).scalar() or 0
+        stock = stocks.get(detalle.Detalle_OC.ID_Producto) or 0
         
         resultados.append({
             "detalle": {
@@ -98,7 +114,7 @@ async def get_detalles_orden(
 
 # Obtener un detalle específico
 @router.get("/{detalle_id}", response_model=DetalleOCCompleto)
-async def get_detalle(
+def get_detalle(
     detalle_id: int = Path(..., gt=0),
     db: Session = Depends(get_db),
     current_user: Usuarios = Depends(get_current_user)
@@ -146,7 +162,7 @@ async def get_detalle(
 
 # Actualizar detalle (solo si la orden está pendiente)
 @router.put("/{detalle_id}", response_model=DetalleOCCompleto)
-async def update_detalle(
+def update_detalle(
     detalle: DetalleOCUpdate,
     detalle_id: int = Path(..., gt=0),
     db: Session = Depends(get_db),
@@ -193,11 +209,11 @@ async def update_detalle(
     db.commit()
     db.refresh(db_detalle)
     
-    return await get_detalle(detalle_id, db, current_user)
+    return get_detalle(detalle_id, db, current_user)
 
 # Análisis de costos por producto
 @router.get("/producto/{producto_id}/analisis", response_model=AnalisisCostos)
-async def get_analisis_costos(
+def get_analisis_costos(
     producto_id: int = Path(..., gt=0),
     desde: Optional[datetime] = None,
     hasta: Optional[datetime] = None,
@@ -12,12 +12,11 @@ from APP.schemas.Detalles_Factura_Venta_schema import (
 from APP.DB.Detalles_Factura_Venta_model import Detalles_Factura_Venta
 from APP.DB.Facturas_Venta_model import Facturas_Venta
 from APP.DB.Productos_model import Productos
-from APP.DB.Inventario_model import Inventario
 from APP.DB.Usuarios_model import Usuarios
-from APP.DB.Movimientos_inventario_model import Movimientos_inventario
 from sqlalchemy import func, and_, case
 from datetime import datetime, timedelta
 from APP.routers.Usuarios_router import get_current_user
+from APP.services.Inventario_service import aplicar_movimientos
 
 router = APIRouter(
     prefix="/detalles-factura",
@@ -26,7 +25,7 @@ router = APIRouter(
 
 # Obtener detalles de una factura
 @router.get("/factura/{factura_id}", response_model=List[DetalleFacturaVentaCompleta])
-async def get_detalles_factura(
+def get_detalles_factura(
     factura_id: int = Path(..., gt=0),
     db: Session = Depends(get_db),
     current_user: Usuarios = Depends(get_current_user)
@@ -67,7 +66,7 @@ async def get_detalles_factura(
 
 # Obtener un detalle específico
 @router.get("/{detalle_id}", response_model=DetalleFacturaVentaCompleta)
-async def get_detalle(
+def get_detalle(
     detalle_id: int = Path(..., gt=0),
     db: Session = Depends(get_db),
     current_user: Usuarios = Depends(get_current_user)
@@ -82,7 +81,7 @@ async def get_detalle(
 
 # Actualizar detalle (solo si la factura está en estado pendiente)
 @router.put("/{detalle_id}", response_model=DetalleFacturaVentaCompleta)
-async def update_detalle(
+def update_detalle(
     detalle: DetalleFacturaVentaUpdate,
     detalle_id: int = Path(..., gt=0),
     db: Session = Depends(get_db),
@@ -109,35 +108,20 @@ async def update_detalle(
     
     # Si se modifica la cantidad, verificar stock
     if detalle.cantidad and detalle.cantidad != db_detalle.Cantidad:
-        # Verificar stock disponible
-        stock = db.query(Inventario).filter(
-            Inventario.ID_Producto == db_detalle.ID_Producto,
-            Inventario.ID_Sucursal == factura.ID_Sucursal
-        ).first()
-        
         diferencia = detalle.cantidad - db_detalle.Cantidad
-        if stock.Stock_Actual < diferencia:
-            raise HTTPException(
-                status_code=400,
-                detail="Stock insuficiente para la modificación"
-            )
-        
-        # Actualizar stock
-        stock.Stock_Actual -= diferencia
-        stock.Fecha_Ultimo_Movimiento = datetime.now()
         
-        # Registrar movimiento
-        movimiento = Movimientos_inventario(
-            ID_Producto=db_detalle.ID_Producto,
-            ID_Sucursal=factura.ID_Sucursal,
-            Tipo="Ajuste",
-            Cantidad=-diferencia,
-            ID_Usuario=current_user.ID_Usuario,
-            ID_Referencia=factura.ID_Factura_Venta,
-            Tipo_Referencia="Factura",
-            Observaciones="Modificación de detalle de factura"
+        # Actualizar stock de forma atómica y registrar movimiento
+        aplicar_movimientos(
+            db,
+            factura.ID_Sucursal,
+            [{"id_producto": db_detalle.ID_Producto, "cantidad": -diferencia}],
+            "Ajuste",
+            current_user.ID_Usuario,
+            id_referencia=factura.ID_Factura_Venta,
+            tipo_referencia="Factura",
+            observaciones="Modificación de detalle de factura",
+            mensaje_error="Stock insuficiente para la modificación"
         )
-        db.add(movimiento)
     
     # Actualizar campos
     if detalle.cantidad:
@@ -164,7 +148,7 @@ async def update_detalle(
 
 # Obtener estadísticas de productos vendidos
 @router.get("/estadisticas/productos", response_model=List[dict])
-async def get_estadisticas_productos(
+def get_estadisticas_productos(
     desde: Optional[datetime] = None,
     hasta: Optional[datetime] = None,
     sucursal_id: Optional[int] = None,
@@ -224,7 +208,7 @@ async def get_estadisticas_productos(
 
 # Obtener historial de ventas de un producto
 @router.get("/producto/{producto_id}/historial", response_model=List[dict])
-async def get_historial_producto(
+def get_historial_producto(
     producto_id: int = Path(..., gt=0),
     desde: Optional[datetime] = None,
     hasta: Optional[datetime] = None,
@@ -29,7 +29,7 @@ router = APIRouter(
 
 # Obtener detalles de una transferencia
 @router.get("/transferencia/{transferencia_id}", response_model=List[DetalleTransferenciaCompleto])
-async def get_detalles_transferencia(
+def get_detalles_transferencia(
     transferencia_id: int = Path(..., gt=0),
     db: Session = Depends(get_db),
     current_user: Usuarios = Depends(get_current_user)
@@ -59,18 +59,24 @@ async def get_detalles_transferencia(
         Detalles_Transferencia.ID_Transferencia == transferencia_id
     ).all()
     
-    # Obtener stock actual en origen y destino
+    # Obtener stock actual en origen y destino (una sola consulta para todos los productos)
+    stocks = {
+        (fila.ID_Producto, fila.ID_Sucursal): fila.Stock_Actual
+        for fila in db.query(
+            Inventario.ID_Producto,
+            Inventario.ID_Sucursal,
+            Inventario.Stock_Actual
+        ).filter(
+            Inventario.ID_Producto.in_({detalle.Detalles_Transferencia.ID_Producto for detalle in detalles}),
+            Inventario.ID_Sucursal.in_([transferencia.ID_Sucursal_Origen, transferencia.ID_Sucursal_Destino])
+        ).all()
+    }
+    
     resultados = []
     for detalle in detalles:
-        stock_origen = db.query(Inventario.Stock_Actual).filter(
-            Inventario.ID_Producto == detalle.Detalles_Transferencia.ID_Producto,
-            Inventario.ID_Sucursal == transferencia.ID_Sucursal_Origen
-        ).scalar() or 0
-        
-        stock_destino = db.query(Inventario.Stock_Actual).filter(
-            Inventario.ID_Producto == detalle.Detalles_Transferencia.ID_Producto,
-            Inventario.ID_Sucursal == transferencia.ID_Sucursal_Destino
-        ).scalar() or 0
+        id_producto = detalle.Detalles_Transferencia.ID_Producto
+        stock_origen = stocks.get((id_producto, transferencia.ID_Sucursal_Origen)) or 0
+        stock_destino = stocks.get((id_producto, transferencia.ID_Sucursal_Destino)) or 0
         
         resultados.append({
             "detalle": {
@@ -99,7 +105,7 @@ async def get_detalles_transferencia(
 
 # Actualizar cantidad recibida
 @router.patch("/{detalle_id}/recepcion")
-async def update_cantidad_recibida(
+def update_cantidad_recibida(
     detalle_id: int = Path(..., gt=0),
     cantidad_recibida: int = Query(..., gt=0),
     observaciones: Optional[str] = None,
@@ -155,7 +161,7 @@ async def update_cantidad_recibida(
 
 # Obtener seguimiento de un detalle
 @router.get("/{detalle_id}/seguimiento", response_model=SeguimientoDetalleTransferencia)
-async def get_seguimiento_detalle(
+def get_seguimiento_detalle(
     detalle_id: int = Path(..., gt=0),
     db: Session = Depends(get_db),
     current_user: Usuarios = Depends(get_current_user)
@@ -221,7 +227,7 @@ async def get_seguimiento_detalle(
 
 # Obtener análisis de transferencias por producto
 @router.get("/producto/{producto_id}/analisis", response_model=AnalisisTransferenciasProducto)
-async def get_analisis_producto(
+def get_analisis_producto(
     producto_id: int = Path(..., gt=0),
     desde: Optional[datetime] = None,
     hasta: Optional[datetime] = None,
@@ -1,12 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, Path, Security
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Optional
 from database import get_db
 from APP.schemas.Devoluciones_schema import (
     DevolucionBase,
     DevolucionCreate,
     DevolucionUpdate,
-    DevolucionSimple,
+    DevolucionList,
     DevolucionCompleta,
     DetalleDevolucionCreate,
     EstadisticasDevoluciones
@@ -14,14 +14,15 @@ from APP.schemas.Devoluciones_schema import (
 from APP.DB.Devoluciones_model import Devoluciones
 from APP.DB.Detalles_Devoluciones_model import Detalles_Devolucion
 from APP.DB.Facturas_Venta_model import Facturas_Venta
+from APP.DB.Clientes_model import Clientes
 from APP.DB.Detalles_Factura_Venta_model import Detalles_Factura_Venta
 from APP.DB.Productos_model import Productos
-from APP.DB.Inventario_model import Inventario
-from APP.DB.Movimientos_inventario_model import Movimientos_inventario
 from APP.DB.Usuarios_model import Usuarios
 from sqlalchemy import func, and_, case, distinct
 from datetime import datetime, timedelta
 from APP.routers.Usuarios_router import get_current_user
+from APP.services.Paginacion_service import es_paginacion_cursor, aplicar_cursor, armar_pagina, calcular_total, total_paginas
+from APP.services.Inventario_service import aplicar_movimientos
 
 router = APIRouter(
     prefix="/devoluciones",
@@ -29,10 +30,13 @@ router = APIRouter(
 )
 
 # Obtener todas las devoluciones con filtros
-@router.get("/", response_model=List[DevolucionSimple])
-async def get_devoluciones(
+@router.get("/", response_model=DevolucionList)
+def get_devoluciones(
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
+    paginacion: Optional[str] = Query("offset", enum=["offset", "cursor"], description="Tipo de paginación"),
+    after: Optional[str] = Query(None, description="Cursor de la página siguiente (next_cursor)"),
+    modo_total: str = Query("exact", alias="total", enum=["exact", "estimate", "none"], description="Total: exacto, estimado o sin contar"),
     estado: Optional[str] = Query(None, description="Filtrar por estado"),
     factura_id: Optional[int] = Query(None, description="Filtrar por factura"),
     desde: Optional[datetime] = Query(None, description="Fecha inicial"),
@@ -43,15 +47,21 @@ async def get_devoluciones(
     query = db.query(
         Devoluciones,
         Facturas_Venta.Numero_Factura,
+        Clientes.Nombre.label('nombre_cliente'),
+        Clientes.Apellido.label('apellido_cliente'),
         func.count(Detalles_Devolucion.ID_Detalle_Devolucion).label('cantidad_items'),
         func.sum(Detalles_Devolucion.Cantidad).label('total_unidades')
     ).join(
-        Facturas_Venta
+        Facturas_Venta, Facturas_Venta.ID_Factura_Venta == Devoluciones.ID_Factura_Venta
     ).join(
-        Detalles_Devolucion
+        Clientes, Clientes.ID_Cliente == Facturas_Venta.ID_Cliente
+    ).join(
+        Detalles_Devolucion, Detalles_Devolucion.ID_Devolucion == Devoluciones.ID_Devolucion
     ).group_by(
         Devoluciones.ID_Devolucion,
-        Facturas_Venta.Numero_Factura
+        Facturas_Venta.Numero_Factura,
+        Clientes.Nombre,
+        Clientes.Apellido
     )
     
     # Aplicar filtros
@@ -64,33 +74,46 @@ async def get_devoluciones(
     if hasta:
         query = query.filter(Devoluciones.Fecha_Devolucion <= hasta)
     
-    total = query.count()
-    devoluciones = query.order_by(Devoluciones.Fecha_Devolucion.desc()).offset(skip).limit(limit).all()
+    # Paginación por cursor: sin COUNT ni OFFSET
+    por_cursor = es_paginacion_cursor(paginacion, after)
+    if por_cursor:
+        orden_pagina = [(Devoluciones.Fecha_Devolucion, True), (Devoluciones.ID_Devolucion, True)]
+        devoluciones, next_cursor = armar_pagina(
+            aplicar_cursor(query, orden_pagina, after, limit).all(), orden_pagina, limit
+        )
+    else:
+        total = calcular_total(db, query, modo_total)
+        devoluciones = query.order_by(Devoluciones.Fecha_Devolucion.desc()).offset(skip).limit(limit).all()
+    
+    items = [
+        {
+            "id_devolucion": d.Devoluciones.ID_Devolucion,
+            "id_factura_venta": d.Devoluciones.ID_Factura_Venta,
+            "numero_factura": d.Numero_Factura,
+            "cliente_nombre": f"{d.nombre_cliente} {d.apellido_cliente or ''}".strip(),
+            "fecha_devolucion": d.Devoluciones.Fecha_Devolucion,
+            "estado": d.Devoluciones.Estado,
+            "motivo": d.Devoluciones.Motivo,
+            "observaciones": d.Devoluciones.Observaciones,
+            "total_items": d.cantidad_items,
+            "total_unidades": d.total_unidades
+        }
+        for d in devoluciones
+    ]
+    
+    if por_cursor:
+        return {"items": items, "next_cursor": next_cursor}
     
     return {
         "total": total,
-        "items": [
-            {
-                "id_devolucion": d.Devoluciones.ID_Devolucion,
-                "factura": {
-                    "id": d.Devoluciones.ID_Factura_Venta,
-                    "numero": d.Numero_Factura
-                },
-                "fecha": d.Devoluciones.Fecha_Devolucion,
-                "estado": d.Devoluciones.Estado,
-                "motivo": d.Devoluciones.Motivo,
-                "items": d.cantidad_items,
-                "unidades": d.total_unidades
-            }
-            for d in devoluciones
-        ],
+        "items": items,
         "pagina": skip // limit + 1,
-        "paginas": (total + limit - 1) // limit
+        "paginas": total_paginas(total, limit)
     }
 
 # Obtener una devolución específica
 @router.get("/{devolucion_id}", response_model=DevolucionCompleta)
-async def get_devolucion(
+def get_devolucion(
     devolucion_id: int = Path(..., gt=0),
     db: Session = Depends(get_db),
     current_user: Usuarios = Depends(get_current_user)
@@ -162,7 +185,7 @@ async def get_devolucion(
 
 # Crear nueva devolución
 @router.post("/", response_model=DevolucionCompleta)
-async def create_devolucion(
+def create_devolucion(
     devolucion: DevolucionCreate,
     db: Session = Depends(get_db),
     current_user: Usuarios = Depends(get_current_user)
@@ -237,11 +260,11 @@ async def create_devolucion(
     db.commit()
     db.refresh(db_devolucion)
     
-    return await get_devolucion(db_devolucion.ID_Devolucion, db, current_user)
+    return get_devolucion(db_devolucion.ID_Devolucion, db, current_user)
 
 # Actualizar estado de devolución
 @router.patch("/{devolucion_id}/estado")
-async def update_estado_devolucion(
+def update_estado_devolucion(
     devolucion_id: int = Path(..., gt=0),
     estado: str = Query(..., description="Nuevo estado de la devolución"),
     observaciones: Optional[str] = None,
@@ -278,40 +301,17 @@ async def update_estado_devolucion(
             Facturas_Venta.ID_Factura_Venta == devolucion.ID_Factura_Venta
         ).first()
         
-        for detalle in detalles:
-            # Actualizar o crear registro de inventario
-            inventario = db.query(Inventario).filter(
-                Inventario.ID_Producto == detalle.ID_Producto,
-                Inventario.ID_Sucursal == factura.ID_Sucursal
-            ).first()
-            
-            if not inventario:
-                inventario = Inventario(
-                    ID_Producto=detalle.ID_Producto,
-                    ID_Sucursal=factura.ID_Sucursal,
-                    Stock_Actual=0,
-                    Stock_Minimo=0,
-                    Stock_Maximo=999999
-                )
-                db.add(inventario)
-                db.flush()
-            
-            # Actualizar stock
-            inventario.Stock_Actual += detalle.Cantidad
-            inventario.Fecha_Ultimo_Movimiento = datetime.now()
-            
-            # Registrar movimiento
-            movimiento = Movimientos_inventario(
-                ID_Producto=detalle.ID_Producto,
-                ID_Sucursal=factura.ID_Sucursal,
-                Tipo="Devolucion",
-                Cantidad=detalle.Cantidad,
-                ID_Usuario=current_user.ID_Usuario,
-                ID_Referencia=devolucion_id,
-                Tipo_Referencia="Devolucion",
-                Observaciones=f"Devolución de factura {factura.Numero_Factura}"
-            )
-            db.add(movimiento)
+        # Reingresar stock (crea el registro de inventario si no existe)
+        aplicar_movimientos(
+            db,
+            factura.ID_Sucursal,
+            [{"id_producto": d.ID_Producto, "cantidad": d.Cantidad} for d in detalles],
+            "Devolucion",
+            current_user.ID_Usuario,
+            id_referencia=devolucion_id,
+            tipo_referencia="Devolucion",
+            observaciones=f"Devolución de factura {factura.Numero_Factura}"
+        )
     
     # Actualizar estado
     devolucion.Estado = estado
@@ -324,7 +324,7 @@ async def update_estado_devolucion(
 
 # Obtener estadísticas de devoluciones
 @router.get("/estadisticas", response_model=EstadisticasDevoluciones)
-async def get_estadisticas_devoluciones(
+def get_estadisticas_devoluciones(
     desde: Optional[datetime] = None,
     hasta: Optional[datetime] = None,
     db: Session = Depends(get_db),
@@ -1,25 +1,31 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, Path, Security
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from database import get_db
+from sqlalchemy.orm import Session, selectinload, joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from database import get_db, get_async_db
 from APP.schemas.Facturas_Venta_schema import (
     FacturaVentaBase,
     FacturaVentaCreate,
     FacturaVentaUpdate,
-    FacturaVentaSimple,
+    FacturaVentaList,
     FacturaVentaCompleta,
     DetalleFacturaCreate
 )
 from APP.DB.Facturas_Venta_model import Facturas_Venta
 from APP.DB.Detalles_Factura_Venta_model import Detalles_Factura_Venta
 from APP.DB.Clientes_model import Clientes
-from APP.DB.Productos_model import Productos
-from APP.DB.Inventario_model import Inventario
+from APP.DB.Sucursales_model import Sucursales
 from APP.DB.Usuarios_model import Usuarios
-from APP.DB.Movimientos_inventario_model import Movimientos_inventario
-from sqlalchemy import func, and_, case
+from sqlalchemy import func, and_, case, select, insert
 from datetime import datetime, timedelta
+from decimal import Decimal, ROUND_HALF_UP
 from APP.routers.Usuarios_router import get_current_user
+from APP.services.Paginacion_service import es_paginacion_cursor, aplicar_cursor, armar_pagina, calcular_total_async, total_paginas, columnas_en_minusculas
+from APP.services.Inventario_service import (
+    validar_detalles_venta,
+    registrar_salida_venta,
+    aplicar_movimientos
+)
 
 router = APIRouter(
     prefix="/facturas",
@@ -27,48 +33,76 @@ router = APIRouter(
 )
 
 # Obtener todas las facturas con paginación y filtros
-@router.get("/", response_model=List[FacturaVentaSimple])
+@router.get("/", response_model=FacturaVentaList)
 async def get_facturas(
     skip: int = Query(0, ge=0, description="Número de registros a saltar"),
     limit: int = Query(10, ge=1, le=100, description="Número de registros a retornar"),
+    paginacion: Optional[str] = Query("offset", enum=["offset", "cursor"], description="Tipo de paginación"),
+    after: Optional[str] = Query(None, description="Cursor de la página siguiente (next_cursor)"),
+    modo_total: str = Query("exact", alias="total", enum=["exact", "estimate", "none"], description="Total: exacto, estimado o sin contar"),
     cliente_id: Optional[int] = Query(None, description="Filtrar por cliente"),
     sucursal_id: Optional[int] = Query(None, description="Filtrar por sucursal"),
     estado: Optional[str] = Query(None, description="Filtrar por estado"),
     desde: Optional[datetime] = Query(None, description="Fecha inicial"),
     hasta: Optional[datetime] = Query(None, description="Fecha final"),
     tipo_factura: Optional[str] = Query(None, description="Tipo de factura (A, B, C)"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Usuarios = Depends(get_current_user)
 ):
-    query = db.query(Facturas_Venta)
+    query = select(Facturas_Venta)
+    # Cliente y sucursal de la página en la misma consulta (la sesión asíncrona no carga
+    # relaciones de forma diferida)
+    con_nombres = [joinedload(Facturas_Venta.cliente), joinedload(Facturas_Venta.sucursal)]
     
     # Aplicar filtros
     if cliente_id:
-        query = query.filter(Facturas_Venta.ID_Cliente == cliente_id)
+        query = query.where(Facturas_Venta.ID_Cliente == cliente_id)
     if sucursal_id:
-        query = query.filter(Facturas_Venta.ID_Sucursal == sucursal_id)
+        query = query.where(Facturas_Venta.ID_Sucursal == sucursal_id)
     if estado:
-        query = query.filter(Facturas_Venta.Estado == estado)
+        query = query.where(Facturas_Venta.Estado == estado)
     if desde:
-        query = query.filter(Facturas_Venta.Fecha >= desde)
+        query = query.where(Facturas_Venta.Fecha >= desde)
     if hasta:
-        query = query.filter(Facturas_Venta.Fecha <= hasta)
+        query = query.where(Facturas_Venta.Fecha <= hasta)
     if tipo_factura:
-        query = query.filter(Facturas_Venta.Tipo_Factura == tipo_factura)
+        query = query.where(Facturas_Venta.Tipo_Factura == tipo_factura)
     
-    total = query.count()
-    facturas = query.order_by(Facturas_Venta.Fecha.desc()).offset(skip).limit(limit).all()
+    # Paginación por cursor: sin COUNT ni OFFSET
+    por_cursor = es_paginacion_cursor(paginacion, after)
+    if por_cursor:
+        orden_pagina = [(Facturas_Venta.Fecha, True), (Facturas_Venta.ID_Factura_Venta, True)]
+        facturas, next_cursor = armar_pagina(
+            (await db.scalars(aplicar_cursor(query.options(*con_nombres), orden_pagina, after, limit))).all(), orden_pagina, limit
+        )
+    else:
+        total = await calcular_total_async(db, query, modo_total)
+        facturas = (await db.scalars(
+            query.options(*con_nombres).order_by(Facturas_Venta.Fecha.desc()).offset(skip).limit(limit)
+        )).all()
+    
+    items = [
+        {
+            **columnas_en_minusculas(f),
+            "cliente_nombre": f"{f.cliente.Nombre} {f.cliente.Apellido or ''}".strip(),
+            "sucursal_nombre": f.sucursal.Nombre
+        }
+        for f in facturas
+    ]
+    
+    if por_cursor:
+        return {"items": items, "next_cursor": next_cursor}
     
     return {
         "total": total,
-        "items": facturas,
+        "items": items,
         "pagina": skip // limit + 1,
-        "paginas": (total + limit - 1) // limit
+        "paginas": total_paginas(total, limit)
     }
 
 # Obtener estadísticas de ventas
 @router.get("/estadisticas", response_model=dict)
-async def get_estadisticas_ventas(
+def get_estadisticas_ventas(
     desde: Optional[datetime] = None,
     hasta: Optional[datetime] = None,
     sucursal_id: Optional[int] = None,
@@ -142,21 +176,41 @@ async def get_estadisticas_ventas(
 @router.get("/{factura_id}", response_model=FacturaVentaCompleta)
 async def get_factura(
     factura_id: int = Path(..., gt=0),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Usuarios = Depends(get_current_user)
 ):
-    factura = db.query(Facturas_Venta).filter(Facturas_Venta.ID_Factura_Venta == factura_id).first()
+    # En la sesión asíncrona no hay carga diferida: los detalles se traen de antemano
+    factura = await db.get(
+        Facturas_Venta,
+        factura_id,
+        options=[selectinload(Facturas_Venta.detalles)]
+    )
     if not factura:
         raise HTTPException(status_code=404, detail="Factura no encontrada")
     return factura
 
+# Alícuota de IVA aplicada sobre el neto (subtotal menos descuentos)
+ALICUOTA_IVA = Decimal("0.21")
+CENTAVOS = Decimal("0.01")
+
+# Importes de la factura a partir de las líneas: subtotal bruto, descuentos por unidad,
+# IVA sobre el neto y total. Devuelve también el subtotal de cada línea
+def calcular_importes(detalles):
+    subtotales = [d.cantidad * (d.precio_unitario - d.descuento_unitario) for d in detalles]
+    subtotal = sum((d.cantidad * d.precio_unitario for d in detalles), Decimal(0))
+    descuento = sum((d.cantidad * d.descuento_unitario for d in detalles), Decimal(0))
+    iva = ((subtotal - descuento) * ALICUOTA_IVA).quantize(CENTAVOS, rounding=ROUND_HALF_UP)
+    return subtotales, subtotal, iva, descuento, subtotal - descuento + iva
+
 # Crear nueva factura
 @router.post("/", response_model=FacturaVentaCompleta)
-async def create_factura(
+def create_factura(
     factura: FacturaVentaCreate,
     db: Session = Depends(get_db),
     current_user: Usuarios = Depends(get_current_user)
 ):
+    subtotales, subtotal, iva, descuento, total = calcular_importes(factura.detalles)
+    
     # Verificar cliente
     cliente = db.query(Clientes).filter(
         Clientes.ID_Cliente == factura.id_cliente,
@@ -167,43 +221,22 @@ async def create_factura(
     
     # Verificar límite de crédito si la factura no es de contado
     if factura.forma_pago != "Contado":
-        saldo_pendiente = cliente.Saldo_Actual + factura.total
+        saldo_pendiente = cliente.Saldo_Actual + total
         if saldo_pendiente > cliente.Limite_Credito:
             raise HTTPException(
                 status_code=400,
                 detail="El cliente excedería su límite de crédito"
             )
     
-    # Verificar productos y stock
-    for detalle in factura.detalles:
-        # Verificar producto
-        producto = db.query(Productos).filter(
-            Productos.ID_Producto == detalle.id_producto,
-            Productos.Activo == True
-        ).first()
-        if not producto:
-            raise HTTPException(
-                status_code=404,
-                detail=f"Producto {detalle.id_producto} no encontrado o inactivo"
-            )
-        
-        # Verificar stock
-        stock = db.query(Inventario).filter(
-            Inventario.ID_Producto == detalle.id_producto,
-            Inventario.ID_Sucursal == factura.id_sucursal
-        ).first()
-        if not stock or stock.Stock_Actual < detalle.cantidad:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Stock insuficiente para el producto {producto.Nombre}"
-            )
-        
-        # Verificar precio
-        if detalle.precio_unitario < producto.Costo:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Precio inválido para el producto {producto.Nombre}"
-            )
+    sucursal = db.query(Sucursales.Nombre).filter(
+        Sucursales.ID_Sucursal == factura.id_sucursal,
+        Sucursales.Activo == True
+    ).scalar()
+    if sucursal is None:
+        raise HTTPException(status_code=404, detail="Sucursal no encontrada o inactiva")
+    
+    # Verificar productos y stock (una sola consulta para todas las líneas)
+    productos = validar_detalles_venta(db, factura.id_sucursal, factura.detalles)
     
     # Crear factura
     db_factura = Facturas_Venta(
@@ -211,10 +244,10 @@ async def create_factura(
         ID_Sucursal=factura.id_sucursal,
         Tipo_Factura=factura.tipo_factura,
         Condicion_IVA=cliente.Condicion_IVA,
-        Subtotal=factura.subtotal,
-        IVA=factura.iva,
-        Descuento=factura.descuento,
-        Total=factura.total,
+        Subtotal=subtotal,
+        IVA=iva,
+        Descuento=descuento,
+        Total=total,
         ID_Usuario=current_user.ID_Usuario,
         Estado="Emitida",
         Forma_Pago=factura.forma_pago,
@@ -223,49 +256,76 @@ async def create_factura(
     db.add(db_factura)
     db.flush()  # Para obtener el ID de la factura
     
-    # Crear detalles y actualizar stock
-    for detalle in factura.detalles:
-        db_detalle = Detalles_Factura_Venta(
-            ID_Factura_Venta=db_factura.ID_Factura_Venta,
-            ID_Producto=detalle.id_producto,
-            Cantidad=detalle.cantidad,
-            Precio_Unitario=detalle.precio_unitario,
-            Descuento_Unitario=detalle.descuento_unitario,
-            Subtotal=detalle.subtotal
-        )
-        db.add(db_detalle)
-        
-        # Actualizar stock
-        stock = db.query(Inventario).filter(
-            Inventario.ID_Producto == detalle.id_producto,
-            Inventario.ID_Sucursal == factura.id_sucursal
-        ).first()
-        stock.Stock_Actual -= detalle.cantidad
-        stock.Fecha_Ultimo_Movimiento = datetime.now()
-        
-        # Registrar movimiento
-        movimiento = Movimientos_inventario(
-            ID_Producto=detalle.id_producto,
-            ID_Sucursal=factura.id_sucursal,
-            Tipo="Venta",
-            Cantidad=-detalle.cantidad,
-            ID_Usuario=current_user.ID_Usuario,
-            ID_Referencia=db_factura.ID_Factura_Venta,
-            Tipo_Referencia="Factura"
-        )
-        db.add(movimiento)
+    # Crear detalles (un solo INSERT para todas las líneas)
+    db.execute(
+        insert(Detalles_Factura_Venta),
+        [
+            {
+                "ID_Factura_Venta": db_factura.ID_Factura_Venta,
+                "ID_Producto": detalle.id_producto,
+                "Cantidad": detalle.cantidad,
+                "Precio_Unitario": detalle.precio_unitario,
+                "Descuento_Unitario": detalle.descuento_unitario,
+                "Subtotal": subtotal_detalle
+            }
+            for detalle, subtotal_detalle in zip(factura.detalles, subtotales)
+        ]
+    )
+    
+    # Actualizar stock y registrar movimientos en lote
+    registrar_salida_venta(
+        db,
+        factura.id_sucursal,
+        factura.detalles,
+        current_user.ID_Usuario,
+        db_factura.ID_Factura_Venta
+    )
     
     # Actualizar saldo del cliente si no es de contado
     if factura.forma_pago != "Contado":
-        cliente.Saldo_Actual += factura.total
+        cliente.Saldo_Actual += total
+    
+    db_detalles = db.execute(
+        select(Detalles_Factura_Venta).where(
+            Detalles_Factura_Venta.ID_Factura_Venta == db_factura.ID_Factura_Venta
+        ).order_by(Detalles_Factura_Venta.ID_Detalle)
+    ).scalars().all()
     
+    # La respuesta se arma antes del commit, que expira los objetos de la sesión
+    respuesta = {
+        "id_factura_venta": db_factura.ID_Factura_Venta,
+        "numero_factura": db_factura.Numero_Factura,
+        "fecha": db_factura.Fecha,
+        "tipo_factura": db_factura.Tipo_Factura,
+        "estado": db_factura.Estado,
+        "subtotal": subtotal,
+        "iva": iva,
+        "descuento": descuento,
+        "total": total,
+        "cliente_nombre": f"{cliente.Nombre} {cliente.Apellido}",
+        "sucursal_nombre": sucursal,
+        "usuario_nombre": f"{current_user.Nombre} {current_user.Apellido}",
+        "detalles": [
+            {
+                "id_detalle": d.ID_Detalle,
+                "id_producto": d.ID_Producto,
+                "cantidad": d.Cantidad,
+                "precio_unitario": d.Precio_Unitario,
+                "descuento_unitario": d.Descuento_Unitario,
+                "subtotal": d.Subtotal,
+                "producto_nombre": productos[d.ID_Producto].Nombre,
+                "producto_codigo": productos[d.ID_Producto].Codigo_Barras or productos[d.ID_Producto].SKU or ""
+            }
+            for d in db_detalles
+        ],
+        "saldo_pendiente": 0 if factura.forma_pago == "Contado" else total
+    }
     db.commit()
-    db.refresh(db_factura)
-    return db_factura
+    return respuesta
 
 # Anular factura
 @router.post("/{factura_id}/anular")
-async def anular_factura(
+def anular_factura(
     factura_id: int = Path(..., gt=0),
     motivo: str = Query(..., min_length=5, max_length=200),
     db: Session = Depends(get_db),
@@ -286,26 +346,16 @@ async def anular_factura(
         Detalles_Factura_Venta.ID_Factura_Venta == factura_id
     ).all()
     
-    for detalle in detalles:
-        stock = db.query(Inventario).filter(
-            Inventario.ID_Producto == detalle.ID_Producto,
-            Inventario.ID_Sucursal == factura.ID_Sucursal
-        ).first()
-        stock.Stock_Actual += detalle.Cantidad
-        stock.Fecha_Ultimo_Movimiento = datetime.now()
-        
-        # Registrar movimiento
-        movimiento = Movimientos_inventario(
-            ID_Producto=detalle.ID_Producto,
-            ID_Sucursal=factura.ID_Sucursal,
-            Tipo="Anulación",
-            Cantidad=detalle.Cantidad,
-            ID_Usuario=current_user.ID_Usuario,
-            ID_Referencia=factura_id,
-            Tipo_Referencia="Factura",
-            Observaciones=f"Anulación de factura: {motivo}"
-        )
-        db.add(movimiento)
+    aplicar_movimientos(
+        db,
+        factura.ID_Sucursal,
+        [{"id_producto": d.ID_Producto, "cantidad": d.Cantidad} for d in detalles],
+        "Anulación",
+        current_user.ID_Usuario,
+        id_referencia=factura_id,
+        tipo_referencia="Factura",
+        observaciones=f"Anulación de factura: {motivo}"
+    )
     
     # Restaurar saldo del cliente si no era de contado
     if factura.Forma_Pago != "Contado":
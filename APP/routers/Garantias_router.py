@@ -1,12 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, Path, Security
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Optional
 from database import get_db
 from APP.schemas.Garantias_schema import (
     GarantiaBase,
     GarantiaCreate,
     GarantiaUpdate,
-    GarantiaSimple,
+    GarantiaList,
     GarantiaCompleta,
     EjecucionGarantia,
     EstadisticasGarantias
@@ -19,6 +19,7 @@ from APP.DB.Usuarios_model import Usuarios
 from sqlalchemy import func, and_, case
 from datetime import datetime, timedelta
 from APP.routers.Usuarios_router import get_current_user
+from APP.services.Paginacion_service import es_paginacion_cursor, aplicar_cursor, armar_pagina, calcular_total, total_paginas
 
 router = APIRouter(
     prefix="/garantias",
@@ -26,10 +27,13 @@ router = APIRouter(
 )
 
 # Obtener todas las garantías con paginación y filtros
-@router.get("/", response_model=List[GarantiaSimple])
-async def get_garantias(
+@router.get("/", response_model=GarantiaList)
+def get_garantias(
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
+    paginacion: Optional[str] = Query("offset", enum=["offset", "cursor"], description="Tipo de paginación"),
+    after: Optional[str] = Query(None, description="Cursor de la página siguiente (next_cursor)"),
+    modo_total: str = Query("exact", alias="total", enum=["exact", "estimate", "none"], description="Total: exacto, estimado o sin contar"),
     producto_id: Optional[int] = Query(None, description="Filtrar por producto"),
     tipo: Optional[str] = Query(None, description="Filtrar por tipo de garantía"),
     activo: Optional[bool] = Query(None, description="Filtrar por estado activo/inactivo"),
@@ -53,33 +57,44 @@ async def get_garantias(
     if activo is not None:
         query = query.filter(Garantias.Activo == activo)
     
-    total = query.count()
-    garantias = query.order_by(Garantias.ID_Garantia).offset(skip).limit(limit).all()
+    # Paginación por cursor: sin COUNT ni OFFSET
+    por_cursor = es_paginacion_cursor(paginacion, after)
+    if por_cursor:
+        orden_pagina = [(Garantias.ID_Garantia, False)]
+        garantias, next_cursor = armar_pagina(
+            aplicar_cursor(query, orden_pagina, after, limit).all(), orden_pagina, limit
+        )
+    else:
+        total = calcular_total(db, query, modo_total)
+        garantias = query.order_by(Garantias.ID_Garantia).offset(skip).limit(limit).all()
+    
+    items = [
+        {
+            "id_garantia": g.Garantias.ID_Garantia,
+            "id_producto": g.Garantias.ID_Producto,
+            "producto_nombre": g.nombre_producto,
+            "producto_codigo": g.Codigo_Barras or g.SKU,
+            "tipo_garantia": g.Garantias.Tipo_Garantia,
+            "tiempo_garantia": g.Garantias.Tiempo_Garantia,
+            "descripcion": g.Garantias.Descripcion,
+            "activo": g.Garantias.Activo
+        }
+        for g in garantias
+    ]
+    
+    if por_cursor:
+        return {"items": items, "next_cursor": next_cursor}
     
     return {
         "total": total,
-        "items": [
-            {
-                "id_garantia": g.Garantias.ID_Garantia,
-                "producto": {
-                    "id": g.Garantias.ID_Producto,
-                    "nombre": g.nombre_producto,
-                    "codigo_barras": g.Codigo_Barras,
-                    "sku": g.SKU
-                },
-                "tipo_garantia": g.Garantias.Tipo_Garantia,
-                "tiempo_garantia": g.Garantias.Tiempo_Garantia,
-                "activo": g.Garantias.Activo
-            }
-            for g in garantias
-        ],
+        "items": items,
         "pagina": skip // limit + 1,
-        "paginas": (total + limit - 1) // limit
+        "paginas": total_paginas(total, limit)
     }
 
 # Obtener una garantía específica
 @router.get("/{garantia_id}", response_model=GarantiaCompleta)
-async def get_garantia(
+def get_garantia(
     garantia_id: int = Path(..., gt=0),
     db: Session = Depends(get_db),
     current_user: Usuarios = Depends(get_current_user)
@@ -143,7 +158,7 @@ async def get_garantia(
 
 # Crear nueva garantía
 @router.post("/", response_model=GarantiaCompleta)
-async def create_garantia(
+def create_garantia(
     garantia: GarantiaCreate,
     db: Session = Depends(get_db),
     current_user: Usuarios = Depends(get_current_user)
@@ -188,11 +203,11 @@ async def create_garantia(
     db.commit()
     db.refresh(db_garantia)
     
-    return await get_garantia(db_garantia.ID_Garantia, db, current_user)
+    return get_garantia(db_garantia.ID_Garantia, db, current_user)
 
 # Actualizar garantía
 @router.put("/{garantia_id}", response_model=GarantiaCompleta)
-async def update_garantia(
+def update_garantia(
     garantia: GarantiaUpdate,
     garantia_id: int = Path(..., gt=0),
     db: Session = Depends(get_db),
@@ -219,11 +234,11 @@ async def update_garantia(
     db.commit()
     db.refresh(db_garantia)
     
-    return await get_garantia(garantia_id, db, current_user)
+    return get_garantia(garantia_id, db, current_user)
 
 # Verificar garantía de un producto vendido
 @router.get("/verificar/{factura_id}/{producto_id}", response_model=dict)
-async def verificar_garantia(
+def verificar_garantia(
     factura_id: int = Path(..., gt=0),
     producto_id: int = Path(..., gt=0),
     db: Session = Depends(get_db),
@@ -287,7 +302,7 @@ async def verificar_garantia(
 
 # Obtener estadísticas de garantías
 @router.get("/estadisticas", response_model=EstadisticasGarantias)
-async def get_estadisticas_garantias(
+def get_estadisticas_garantias(
     db: Session = Depends(get_db),
     current_user: Usuarios = Depends(get_current_user)
 ):
@@ -1,22 +1,27 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, Path, Security
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-from database import get_db
-from APP.schemas.Inventario_schema import (
-    InventarioBase,
+from database import get_db, get_async_db
+from APP.schemas.inventario_schema import (
     InventarioCreate,
     InventarioUpdate,
-    InventarioSimple,
-    InventarioCompleta
+    InventarioCompleta,
+    InventarioList
 )
 from APP.DB.Inventario_model import Inventario
 from APP.DB.Productos_model import Productos
 from APP.DB.Sucursales_model import Sucursales
 from APP.DB.Movimientos_inventario_model import Movimientos_inventario
+from APP.DB.Facturas_Venta_model import Facturas_Venta
+from APP.DB.Detalles_Factura_Venta_model import Detalles_Factura_Venta
 from APP.DB.Usuarios_model import Usuarios
-from sqlalchemy import func, and_, case
+from sqlalchemy import func, and_, case, select
 from datetime import datetime, timedelta
 from APP.routers.Usuarios_router import get_current_user
+from APP.services.Paginacion_service import es_paginacion_cursor, orden_cursor, aplicar_cursor, armar_pagina, calcular_total_async, total_paginas, columnas_en_minusculas
+from APP.services.Inventario_service import aplicar_movimientos
+from APP.services.Busqueda_service import buscador_productos, condicion_sql, BUSQUEDA_MAX_IDS_SQL, CAMPOS_TITULO
 
 router = APIRouter(
     prefix="/inventario",
@@ -24,20 +29,23 @@ router = APIRouter(
 )
 
 # Obtener todo el inventario con paginación y filtros
-@router.get("/", response_model=List[InventarioSimple])
+@router.get("/", response_model=InventarioList)
 async def get_inventario(
     skip: int = Query(0, ge=0, description="Número de registros a saltar"),
     limit: int = Query(10, ge=1, le=100, description="Número de registros a retornar"),
+    paginacion: Optional[str] = Query("offset", enum=["offset", "cursor"], description="Tipo de paginación"),
+    after: Optional[str] = Query(None, description="Cursor de la página siguiente (next_cursor)"),
+    modo_total: str = Query("exact", alias="total", enum=["exact", "estimate", "none"], description="Total: exacto, estimado o sin contar"),
     sucursal_id: Optional[int] = Query(None, description="Filtrar por sucursal"),
     stock_bajo: Optional[bool] = Query(None, description="Filtrar productos con stock bajo"),
     activo: Optional[bool] = Query(None, description="Filtrar por estado activo/inactivo"),
     buscar: Optional[str] = Query(None, description="Buscar por nombre o código de producto"),
     ordenar_por: Optional[str] = Query(None, description="Campo por el cual ordenar"),
     orden: Optional[str] = Query("asc", enum=["asc", "desc"]),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Usuarios = Depends(get_current_user)
 ):
-    query = db.query(
+    query = select(
         Inventario,
         Productos.Nombre.label('nombre_producto'),
         Productos.Codigo_Barras,
@@ -46,63 +54,67 @@ async def get_inventario(
     
     # Aplicar filtros
     if sucursal_id:
-        query = query.filter(Inventario.ID_Sucursal == sucursal_id)
+        query = query.where(Inventario.ID_Sucursal == sucursal_id)
     if stock_bajo is not None:
         if stock_bajo:
-            query = query.filter(Inventario.Stock_Actual <= Inventario.Stock_Minimo)
+            query = query.where(Inventario.Stock_Actual <= Inventario.Stock_Minimo)
         else:
-            query = query.filter(Inventario.Stock_Actual > Inventario.Stock_Minimo)
+            query = query.where(Inventario.Stock_Actual > Inventario.Stock_Minimo)
     if activo is not None:
-        query = query.filter(Inventario.Activo == activo)
+        query = query.where(Inventario.Activo == activo)
     if buscar:
-        search = f"%{buscar}%"
-        query = query.filter(
-            (Productos.Nombre.ilike(search)) |
-            (Productos.Codigo_Barras.ilike(search)) |
-            (Productos.SKU.ilike(search))
+        # Los productos salen del índice de búsqueda si está listo y no son demasiados
+        encontrados = buscador_productos.buscar(buscar, campos=CAMPOS_TITULO, cantidad=BUSQUEDA_MAX_IDS_SQL)
+        if encontrados is not None and encontrados[0] <= BUSQUEDA_MAX_IDS_SQL:
+            query = query.where(Inventario.ID_Producto.in_(encontrados[1]))
+        else:
+            query = query.where(condicion_sql(buscar, CAMPOS_TITULO))
+    
+    # Paginación por cursor: sin COUNT ni OFFSET
+    por_cursor = es_paginacion_cursor(paginacion, after)
+    if por_cursor:
+        columna = getattr(Inventario, ordenar_por.capitalize(), Inventario.ID_Inventario) if ordenar_por else Inventario.ID_Inventario
+        orden_pagina = orden_cursor(columna, Inventario.ID_Inventario, orden == "desc")
+        inventario, next_cursor = armar_pagina(
+            (await db.execute(aplicar_cursor(query, orden_pagina, after, limit))).all(), orden_pagina, limit
         )
+    else:
+        # Aplicar ordenamiento
+        if ordenar_por:
+            orden_col = getattr(Inventario, ordenar_por.capitalize(), Inventario.ID_Inventario)
+            if orden == "desc":
+                orden_col = orden_col.desc()
+            query = query.order_by(orden_col)
     
-    # Aplicar ordenamiento
-    if ordenar_por:
-        orden_col = getattr(Inventario, ordenar_por.capitalize(), Inventario.ID_Inventario)
-        if orden == "desc":
-            orden_col = orden_col.desc()
-        query = query.order_by(orden_col)
+        total = await calcular_total_async(db, query, modo_total)
+        inventario = (await db.execute(query.offset(skip).limit(limit))).all()
+    
+    items = [
+        {
+            **columnas_en_minusculas(item.Inventario),
+            "producto_nombre": item.nombre_producto,
+            "producto_codigo": item.Codigo_Barras,
+            "sucursal_nombre": item.nombre_sucursal,
+            "estado_stock": "Bajo" if item.Inventario.Stock_Actual <= item.Inventario.Stock_Minimo
+                           else "Alto" if item.Inventario.Stock_Actual >= item.Inventario.Stock_Maximo
+                           else "Normal"
+        }
+        for item in inventario
+    ]
     
-    total = query.count()
-    inventario = query.offset(skip).limit(limit).all()
+    if por_cursor:
+        return {"items": items, "next_cursor": next_cursor}
     
     return {
         "total": total,
-        "items": [
-            {
-                "id_inventario": item.Inventario.ID_Inventario,
-                "producto": {
-                    "id": item.Inventario.ID_Producto,
-                    "nombre": item.nombre_producto,
-                    "codigo_barras": item.Codigo_Barras
-                },
-                "sucursal": {
-                    "id": item.Inventario.ID_Sucursal,
-                    "nombre": item.nombre_sucursal
-                },
-                "stock_actual": item.Inventario.Stock_Actual,
-                "stock_minimo": item.Inventario.Stock_Minimo,
-                "stock_maximo": item.Inventario.Stock_Maximo,
-                "ubicacion": item.Inventario.Ubicacion,
-                "estado": "Bajo" if item.Inventario.Stock_Actual <= item.Inventario.Stock_Minimo
-                         else "Alto" if item.Inventario.Stock_Actual >= item.Inventario.Stock_Maximo
-                         else "Normal"
-            }
-            for item in inventario
-        ],
+        "items": items,
         "pagina": skip // limit + 1,
-        "paginas": (total + limit - 1) // limit
+        "paginas": total_paginas(total, limit)
     }
 
 # Obtener resumen de inventario por sucursal
 @router.get("/sucursal/{sucursal_id}/resumen", response_model=dict)
-async def get_resumen_sucursal(
+def get_resumen_sucursal(
     sucursal_id: int = Path(..., gt=0),
     db: Session = Depends(get_db),
     current_user: Usuarios = Depends(get_current_user)
@@ -188,17 +200,17 @@ async def get_resumen_sucursal(
 @router.get("/{inventario_id}", response_model=InventarioCompleta)
 async def get_inventario_by_id(
     inventario_id: int = Path(..., gt=0),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Usuarios = Depends(get_current_user)
 ):
-    inventario = db.query(Inventario).filter(Inventario.ID_Inventario == inventario_id).first()
+    inventario = await db.get(Inventario, inventario_id)
     if not inventario:
         raise HTTPException(status_code=404, detail="Inventario no encontrado")
     return inventario
 
 # Crear nuevo registro de inventario
 @router.post("/", response_model=InventarioCompleta)
-async def create_inventario(
+def create_inventario(
     inventario: InventarioCreate,
     db: Session = Depends(get_db),
     current_user: Usuarios = Depends(get_current_user)
@@ -264,7 +276,7 @@ async def create_inventario(
 
 # Actualizar registro de inventario
 @router.put("/{inventario_id}", response_model=InventarioCompleta)
-async def update_inventario(
+def update_inventario(
     inventario: InventarioUpdate,
     inventario_id: int = Path(..., gt=0),
     db: Session = Depends(get_db),
@@ -300,7 +312,7 @@ async def update_inventario(
 
 # Ajustar stock
 @router.post("/{inventario_id}/ajuste")
-async def ajustar_stock(
+def ajustar_stock(
     inventario_id: int = Path(..., gt=0),
     cantidad: int = Query(..., description="Cantidad a ajustar (positiva o negativa)"),
     motivo: str = Query(..., min_length=5, max_length=200, description="Motivo del ajuste"),
@@ -314,36 +326,29 @@ async def ajustar_stock(
     if not db_inventario:
         raise HTTPException(status_code=404, detail="Inventario no encontrado")
     
-    nuevo_stock = db_inventario.Stock_Actual + cantidad
-    if nuevo_stock < 0:
-        raise HTTPException(status_code=400, detail="El stock no puede ser negativo")
-    
-    # Registrar movimiento
-    movimiento = Movimientos_inventario(
-        ID_Producto=db_inventario.ID_Producto,
-        ID_Sucursal=db_inventario.ID_Sucursal,
-        Tipo="Ajuste",
-        Cantidad=cantidad,
-        ID_Usuario=current_user.ID_Usuario,
-        Observaciones=motivo
+    # Aplicar el ajuste de forma atómica (el stock no puede quedar negativo)
+    stock_resultante = aplicar_movimientos(
+        db,
+        db_inventario.ID_Sucursal,
+        [{"id_producto": db_inventario.ID_Producto, "cantidad": cantidad}],
+        "Ajuste",
+        current_user.ID_Usuario,
+        observaciones=motivo,
+        mensaje_error="El stock no puede ser negativo"
     )
-    db.add(movimiento)
-    
-    # Actualizar stock
-    db_inventario.Stock_Actual = nuevo_stock
-    db_inventario.Fecha_Ultimo_Movimiento = datetime.now()
+    nuevo_stock = stock_resultante[db_inventario.ID_Producto]
     db.commit()
     
     return {
         "message": "Stock ajustado correctamente",
-        "stock_anterior": db_inventario.Stock_Actual - cantidad,
+        "stock_anterior": nuevo_stock - cantidad,
         "ajuste": cantidad,
-        "stock_actual": db_inventario.Stock_Actual
+        "stock_actual": nuevo_stock
     }
 
 # Obtener movimientos de un producto en una sucursal
 @router.get("/{inventario_id}/movimientos", response_model=List[dict])
-async def get_movimientos_inventario(
+def get_movimientos_inventario(
     inventario_id: int = Path(..., gt=0),
     desde: Optional[datetime] = None,
     hasta: Optional[datetime] = None,
@@ -1,13 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, Path, Security
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Optional
 from database import get_db
 from APP.schemas.Movimientos_Inventario_schema import (
     MovimientoInventarioBase,
     MovimientoInventarioCreate,
     MovimientoInventarioUpdate,
-    MovimientoInventarioSimple,
     MovimientoInventarioCompleto,
+    MovimientoInventarioList,
     AnalisisMovimientos
 )
 from APP.DB.Movimientos_inventario_model import Movimientos_inventario
@@ -18,6 +18,8 @@ from APP.DB.Usuarios_model import Usuarios
 from sqlalchemy import func, and_, case
 from datetime import datetime, timedelta
 from APP.routers.Usuarios_router import get_current_user
+from APP.services.Paginacion_service import es_paginacion_cursor, aplicar_cursor, armar_pagina, calcular_total, total_paginas, columnas_en_minusculas
+from APP.services.Inventario_service import aplicar_deltas_stock
 
 router = APIRouter(
     prefix="/movimientos-inventario",
@@ -25,10 +27,13 @@ router = APIRouter(
 )
 
 # Obtener movimientos con paginación y filtros
-@router.get("/", response_model=List[MovimientoInventarioSimple])
-async def get_movimientos(
+@router.get("/", response_model=MovimientoInventarioList)
+def get_movimientos(
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
+    paginacion: Optional[str] = Query("offset", enum=["offset", "cursor"], description="Tipo de paginación"),
+    after: Optional[str] = Query(None, description="Cursor de la página siguiente (next_cursor)"),
+    modo_total: str = Query("exact", alias="total", enum=["exact", "estimate", "none"], description="Total: exacto, estimado o sin contar"),
     producto_id: Optional[int] = Query(None, description="Filtrar por producto"),
     sucursal_id: Optional[int] = Query(None, description="Filtrar por sucursal"),
     tipo: Optional[str] = Query(None, description="Filtrar por tipo de movimiento"),
@@ -45,11 +50,11 @@ async def get_movimientos(
         Usuarios.Nombre.label('nombre_usuario'),
         Usuarios.Apellido.label('apellido_usuario')
     ).join(
-        Productos
+        Productos, Productos.ID_Producto == Movimientos_inventario.ID_Producto
     ).join(
-        Sucursales
+        Sucursales, Sucursales.ID_Sucursal == Movimientos_inventario.ID_Sucursal
     ).join(
-        Usuarios
+        Usuarios, Usuarios.ID_Usuario == Movimientos_inventario.ID_Usuario
     )
     
     # Aplicar filtros
@@ -64,41 +69,41 @@ async def get_movimientos(
     if hasta:
         query = query.filter(Movimientos_inventario.Fecha <= hasta)
     
-    total = query.count()
-    movimientos = query.order_by(Movimientos_inventario.Fecha.desc()).offset(skip).limit(limit).all()
+    # Paginación por cursor: sin COUNT ni OFFSET
+    por_cursor = es_paginacion_cursor(paginacion, after)
+    if por_cursor:
+        orden_pagina = [(Movimientos_inventario.Fecha, True), (Movimientos_inventario.ID_Movimiento, True)]
+        movimientos, next_cursor = armar_pagina(
+            aplicar_cursor(query, orden_pagina, after, limit).all(), orden_pagina, limit
+        )
+    else:
+        total = calcular_total(db, query, modo_total)
+        movimientos = query.order_by(Movimientos_inventario.Fecha.desc()).offset(skip).limit(limit).all()
+    
+    items = [
+        {
+            **columnas_en_minusculas(m.Movimientos_inventario),
+            "producto_nombre": m.nombre_producto,
+            "producto_codigo": m.Codigo_Barras,
+            "sucursal_nombre": m.nombre_sucursal,
+            "usuario_nombre": f"{m.nombre_usuario} {m.apellido_usuario}"
+        }
+        for m in movimientos
+    ]
+    
+    if por_cursor:
+        return {"items": items, "next_cursor": next_cursor}
     
     return {
         "total": total,
-        "items": [
-            {
-                "id_movimiento": m.Movimientos_inventario.ID_Movimiento,
-                "fecha": m.Movimientos_inventario.Fecha,
-                "tipo": m.Movimientos_inventario.Tipo,
-                "producto": {
-                    "id": m.Movimientos_inventario.ID_Producto,
-                    "nombre": m.nombre_producto,
-                    "codigo_barras": m.Codigo_Barras
-                },
-                "sucursal": {
-                    "id": m.Movimientos_inventario.ID_Sucursal,
-                    "nombre": m.nombre_sucursal
-                },
-                "cantidad": m.Movimientos_inventario.Cantidad,
-                "usuario": f"{m.nombre_usuario} {m.apellido_usuario}",
-                "referencia": {
-                    "tipo": m.Movimientos_inventario.Tipo_Referencia,
-                    "id": m.Movimientos_inventario.ID_Referencia
-                } if m.Movimientos_inventario.ID_Referencia else None
-            }
-            for m in movimientos
-        ],
+        "items": items,
         "pagina": skip // limit + 1,
-        "paginas": (total + limit - 1) // limit
+        "paginas": total_paginas(total, limit)
     }
 
 # Obtener un movimiento específico
 @router.get("/{movimiento_id}", response_model=MovimientoInventarioCompleto)
-async def get_movimiento(
+def get_movimiento(
     movimiento_id: int = Path(..., gt=0),
     db: Session = Depends(get_db),
     current_user: Usuarios = Depends(get_current_user)
@@ -112,11 +117,11 @@ async def get_movimiento(
         Usuarios.Nombre.label('nombre_usuario'),
         Usuarios.Apellido.label('apellido_usuario')
     ).join(
-        Productos
+        Productos, Productos.ID_Producto == Movimientos_inventario.ID_Producto
     ).join(
-        Sucursales
+        Sucursales, Sucursales.ID_Sucursal == Movimientos_inventario.ID_Sucursal
     ).join(
-        Usuarios
+        Usuarios, Usuarios.ID_Usuario == Movimientos_inventario.ID_Usuario
     ).filter(
         Movimientos_inventario.ID_Movimiento == movimiento_id
     ).first()
@@ -170,7 +175,7 @@ async def get_movimiento(
 
 # Registrar nuevo movimiento manual
 @router.post("/", response_model=MovimientoInventarioCompleto)
-async def create_movimiento(
+def create_movimiento(
     movimiento: MovimientoInventarioCreate,
     db: Session = Depends(get_db),
     current_user: Usuarios = Depends(get_current_user)
@@ -194,30 +199,15 @@ async def create_movimiento(
     if not sucursal:
         raise HTTPException(status_code=404, detail="Sucursal no encontrada o inactiva")
     
-    # Verificar inventario
-    inventario = db.query(Inventario).filter(
-        Inventario.ID_Producto == movimiento.id_producto,
-        Inventario.ID_Sucursal == movimiento.id_sucursal
-    ).first()
-    
-    if not inventario:
-        inventario = Inventario(
-            ID_Producto=movimiento.id_producto,
-            ID_Sucursal=movimiento.id_sucursal,
-            Stock_Actual=0,
-            Stock_Minimo=0,
-            Stock_Maximo=999999
-        )
-        db.add(inventario)
-        db.flush()
-    
-    # Validar stock si es salida
-    if movimiento.tipo in ["Venta", "Transferencia", "Ajuste"] and movimiento.cantidad < 0:
-        if abs(movimiento.cantidad) > inventario.Stock_Actual:
-            raise HTTPException(
-                status_code=400,
-                detail="Stock insuficiente para realizar el movimiento"
-            )
+    # Actualizar stock de forma atómica (crea el registro de inventario en las entradas).
+    # Solo las salidas por venta, transferencia o ajuste validan stock suficiente
+    aplicar_deltas_stock(
+        db,
+        movimiento.id_sucursal,
+        {movimiento.id_producto: movimiento.cantidad},
+        mensaje_error="Stock insuficiente para realizar el movimiento",
+        permitir_negativo=movimiento.tipo not in ["Venta", "Transferencia", "Ajuste"]
+    )
     
     # Crear movimiento
     db_movimiento = Movimientos_inventario(
@@ -233,18 +223,14 @@ async def create_movimiento(
     )
     db.add(db_movimiento)
     
-    # Actualizar stock
-    inventario.Stock_Actual += movimiento.cantidad
-    inventario.Fecha_Ultimo_Movimiento = datetime.now()
-    
     db.commit()
     db.refresh(db_movimiento)
     
-    return await get_movimiento(db_movimiento.ID_Movimiento, db, current_user)
+    return get_movimiento(db_movimiento.ID_Movimiento, db, current_user)
 
 # Obtener análisis de movimientos por producto
 @router.get("/producto/{producto_id}/analisis", response_model=AnalisisMovimientos)
-async def get_analisis_movimientos(
+def get_analisis_movimientos(
     producto_id: int = Path(..., gt=0),
     desde: Optional[datetime] = None,
     hasta: Optional[datetime] = None,
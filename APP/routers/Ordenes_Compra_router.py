@@ -1,13 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, Path, Security
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Optional
 from database import get_db
 from APP.schemas.Ordenes_Compra_schema import (
     OrdenCompraBase,
     OrdenCompraCreate,
     OrdenCompraUpdate,
-    OrdenCompraSimple,
     OrdenCompraCompleta,
+    OrdenCompraList,
     DetalleOCCreate
 )
 from APP.DB.Ordenes_Compra_model import Ordenes_Compra
@@ -16,11 +16,11 @@ from APP.DB.Proveedores_model import Proveedores
 from APP.DB.Productos_model import Productos
 from APP.DB.Sucursales_model import Sucursales
 from APP.DB.Usuarios_model import Usuarios
-from APP.DB.Inventario_model import Inventario
-from APP.DB.Movimientos_inventario_model import Movimientos_inventario
 from sqlalchemy import func, and_, case
 from datetime import datetime, timedelta
 from APP.routers.Usuarios_router import get_current_user
+from APP.services.Paginacion_service import es_paginacion_cursor, aplicar_cursor, armar_pagina, calcular_total, total_paginas
+from APP.services.Inventario_service import aplicar_movimientos
 
 router = APIRouter(
     prefix="/ordenes-compra",
@@ -28,10 +28,13 @@ router = APIRouter(
 )
 
 # Obtener todas las órdenes con paginación y filtros
-@router.get("/", response_model=List[OrdenCompraSimple])
-async def get_ordenes_compra(
+@router.get("/", response_model=OrdenCompraList)
+def get_ordenes_compra(
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
+    paginacion: Optional[str] = Query("offset", enum=["offset", "cursor"], description="Tipo de paginación"),
+    after: Optional[str] = Query(None, description="Cursor de la página siguiente (next_cursor)"),
+    modo_total: str = Query("exact", alias="total", enum=["exact", "estimate", "none"], description="Total: exacto, estimado o sin contar"),
     proveedor_id: Optional[int] = Query(None, description="Filtrar por proveedor"),
     sucursal_id: Optional[int] = Query(None, description="Filtrar por sucursal"),
     estado: Optional[str] = Query(None, description="Filtrar por estado"),
@@ -62,37 +65,46 @@ async def get_ordenes_compra(
     if hasta:
         query = query.filter(Ordenes_Compra.Fecha <= hasta)
     
-    total = query.count()
-    ordenes = query.order_by(Ordenes_Compra.Fecha.desc()).offset(skip).limit(limit).all()
+    # Paginación por cursor: sin COUNT ni OFFSET
+    por_cursor = es_paginacion_cursor(paginacion, after)
+    if por_cursor:
+        orden_pagina = [(Ordenes_Compra.Fecha, True), (Ordenes_Compra.ID_OC, True)]
+        ordenes, next_cursor = armar_pagina(
+            aplicar_cursor(query, orden_pagina, after, limit).all(), orden_pagina, limit
+        )
+    else:
+        total = calcular_total(db, query, modo_total)
+        ordenes = query.order_by(Ordenes_Compra.Fecha.desc()).offset(skip).limit(limit).all()
+    
+    items = [
+        {
+            "id_oc": o.Ordenes_Compra.ID_OC,
+            "numero_oc": o.Ordenes_Compra.Numero_OC,
+            "id_proveedor": o.Ordenes_Compra.ID_Proveedor,
+            "proveedor_nombre": o.nombre_proveedor,
+            "id_sucursal": o.Ordenes_Compra.ID_Sucursal,
+            "sucursal_nombre": o.nombre_sucursal,
+            "fecha": o.Ordenes_Compra.Fecha,
+            "fecha_entrega_esperada": o.Ordenes_Compra.Fecha_Entrega_Esperada,
+            "total": o.Ordenes_Compra.Total,
+            "estado": o.Ordenes_Compra.Estado
+        }
+        for o in ordenes
+    ]
+    
+    if por_cursor:
+        return {"items": items, "next_cursor": next_cursor}
     
     return {
         "total": total,
-        "items": [
-            {
-                "id_oc": o.Ordenes_Compra.ID_OC,
-                "numero_oc": o.Ordenes_Compra.Numero_OC,
-                "proveedor": {
-                    "id": o.Ordenes_Compra.ID_Proveedor,
-                    "nombre": o.nombre_proveedor
-                },
-                "sucursal": {
-                    "id": o.Ordenes_Compra.ID_Sucursal,
-                    "nombre": o.nombre_sucursal
-                },
-                "fecha": o.Ordenes_Compra.Fecha,
-                "fecha_entrega_esperada": o.Ordenes_Compra.Fecha_Entrega_Esperada,
-                "total": o.Ordenes_Compra.Total,
-                "estado": o.Ordenes_Compra.Estado
-            }
-            for o in ordenes
-        ],
+        "items": items,
         "pagina": skip // limit + 1,
-        "paginas": (total + limit - 1) // limit
+        "paginas": total_paginas(total, limit)
     }
 
 # Obtener una orden específica con sus detalles
 @router.get("/{orden_id}", response_model=OrdenCompraCompleta)
-async def get_orden_compra(
+def get_orden_compra(
     orden_id: int = Path(..., gt=0),
     db: Session = Depends(get_db),
     current_user: Usuarios = Depends(get_current_user)
@@ -172,7 +184,7 @@ async def get_orden_compra(
 
 # Crear nueva orden de compra
 @router.post("/", response_model=OrdenCompraCompleta)
-async def create_orden_compra(
+def create_orden_compra(
     orden: OrdenCompraCreate,
     db: Session = Depends(get_db),
     current_user: Usuarios = Depends(get_current_user)
@@ -197,12 +209,16 @@ async def create_orden_compra(
     subtotal = 0
     detalles_db = []
     
-    for detalle in orden.detalles:
-        producto = db.query(Productos).filter(
-            Productos.ID_Producto == detalle.id_producto,
+    # Traer todos los productos activos de la orden en una sola consulta
+    productos_activos = {
+        id_producto for (id_producto,) in db.query(Productos.ID_Producto).filter(
+            Productos.ID_Producto.in_([detalle.id_producto for detalle in orden.detalles]),
             Productos.Activo == True
-        ).first()
-        if not producto:
+        ).all()
+    }
+    
+    for detalle in orden.detalles:
+        if detalle.id_producto not in productos_activos:
             raise HTTPException(
                 status_code=404,
                 detail=f"Producto {detalle.id_producto} no encontrado o inactivo"
@@ -251,11 +267,11 @@ async def create_orden_compra(
     db.refresh(db_orden)
     
     # Retornar la orden completa
-    return await get_orden_compra(db_orden.ID_OC, db, current_user)
+    return get_orden_compra(db_orden.ID_OC, db, current_user)
 
 # Actualizar estado de orden de compra
 @router.patch("/{orden_id}/estado")
-async def update_estado_orden(
+def update_estado_orden(
     orden_id: int = Path(..., gt=0),
     estado: str = Query(..., description="Nuevo estado de la orden"),
     observaciones: Optional[str] = None,
@@ -286,40 +302,23 @@ async def update_estado_orden(
     if estado == "Recibida":
         detalles = db.query(Detalle_OC).filter(Detalle_OC.ID_OC == orden_id).all()
         
-        for detalle in detalles:
-            # Actualizar o crear registro de inventario
-            inventario = db.query(Inventario).filter(
-                Inventario.ID_Producto == detalle.ID_Producto,
-                Inventario.ID_Sucursal == orden.ID_Sucursal
-            ).first()
-            
-            if not inventario:
-                inventario = Inventario(
-                    ID_Producto=detalle.ID_Producto,
-                    ID_Sucursal=orden.ID_Sucursal,
-                    Stock_Actual=0,
-                    Stock_Minimo=0,
-                    Stock_Maximo=999999
-                )
-                db.add(inventario)
-                db.flush()
-            
-            # Actualizar stock
-            inventario.Stock_Actual += detalle.Cantidad
-            inventario.Fecha_Ultimo_Movimiento = datetime.now()
-            
-            # Registrar movimiento
-            movimiento = Movimientos_inventario(
-                ID_Producto=detalle.ID_Producto,
-                ID_Sucursal=orden.ID_Sucursal,
-                Tipo="Compra",
-                Cantidad=detalle.Cantidad,
-                Costo_Unitario=detalle.Costo_Unitario,
-                ID_Usuario=current_user.ID_Usuario,
-                ID_Referencia=orden_id,
-                Tipo_Referencia="OC"
-            )
-            db.add(movimiento)
+        # Ingresar stock (crea el registro de inventario si no existe)
+        aplicar_movimientos(
+            db,
+            orden.ID_Sucursal,
+            [
+                {
+                    "id_producto": d.ID_Producto,
+                    "cantidad": d.Cantidad,
+                    "costo_unitario": d.Costo_Unitario
+                }
+                for d in detalles
+            ],
+            "Compra",
+            current_user.ID_Usuario,
+            id_referencia=orden_id,
+            tipo_referencia="OC"
+        )
     
     # Actualizar estado
     orden.Estado = estado
@@ -332,7 +331,7 @@ async def update_estado_orden(
 
 # Obtener estadísticas de órdenes de compra
 @router.get("/estadisticas", response_model=dict)
-async def get_estadisticas_oc(
+def get_estadisticas_oc(
     desde: Optional[datetime] = None,
     hasta: Optional[datetime] = None,
     db: Session = Depends(get_db),
@@ -6,8 +6,8 @@ from APP.schemas.Pagos_schema import (
     PagoBase,
     PagoCreate,
     PagoUpdate,
-    PagoSimple,
-    PagoCompleto
+    PagoCompleto,
+    PagoList
 )
 from APP.DB.Pagos_model import Pagos
 from APP.DB.Facturas_Venta_model import Facturas_Venta
@@ -16,6 +16,7 @@ from APP.DB.Usuarios_model import Usuarios
 from sqlalchemy import func, and_, case
 from datetime import datetime, timedelta
 from APP.routers.Usuarios_router import get_current_user
+from APP.services.Paginacion_service import es_paginacion_cursor, aplicar_cursor, armar_pagina, calcular_total, total_paginas, columnas_en_minusculas
 
 router = APIRouter(
     prefix="/pagos",
@@ -23,10 +24,13 @@ router = APIRouter(
 )
 
 # Obtener todos los pagos con paginación y filtros
-@router.get("/", response_model=List[PagoSimple])
-async def get_pagos(
+@router.get("/", response_model=PagoList)
+def get_pagos(
     skip: int = Query(0, ge=0, description="Número de registros a saltar"),
     limit: int = Query(10, ge=1, le=100, description="Número de registros a retornar"),
+    paginacion: Optional[str] = Query("offset", enum=["offset", "cursor"], description="Tipo de paginación"),
+    after: Optional[str] = Query(None, description="Cursor de la página siguiente (next_cursor)"),
+    modo_total: str = Query("exact", alias="total", enum=["exact", "estimate", "none"], description="Total: exacto, estimado o sin contar"),
     factura_id: Optional[int] = Query(None, description="Filtrar por factura"),
     metodo: Optional[str] = Query(None, description="Filtrar por método de pago"),
     desde: Optional[datetime] = Query(None, description="Fecha inicial"),
@@ -38,12 +42,18 @@ async def get_pagos(
         Pagos,
         Facturas_Venta.Numero_Factura,
         Clientes.Nombre.label('nombre_cliente'),
-        Clientes.Apellido.label('apellido_cliente')
+        Clientes.Apellido.label('apellido_cliente'),
+        Usuarios.Nombre.label('nombre_usuario'),
+        Usuarios.Apellido.label('apellido_usuario')
     ).join(
-        Facturas_Venta
+        Facturas_Venta,
+        Pagos.ID_Factura_Venta == Facturas_Venta.ID_Factura_Venta
     ).join(
         Clientes,
         Facturas_Venta.ID_Cliente == Clientes.ID_Cliente
+    ).join(
+        Usuarios,
+        Pagos.ID_Usuario == Usuarios.ID_Usuario
     )
     
     # Aplicar filtros
@@ -56,32 +66,40 @@ async def get_pagos(
     if hasta:
         query = query.filter(Pagos.Fecha <= hasta)
     
-    total = query.count()
-    pagos = query.order_by(Pagos.Fecha.desc()).offset(skip).limit(limit).all()
+    # Paginación por cursor: sin COUNT ni OFFSET
+    por_cursor = es_paginacion_cursor(paginacion, after)
+    if por_cursor:
+        orden_pagina = [(Pagos.Fecha, True), (Pagos.ID_Pago, True)]
+        pagos, next_cursor = armar_pagina(
+            aplicar_cursor(query, orden_pagina, after, limit).all(), orden_pagina, limit
+        )
+    else:
+        total = calcular_total(db, query, modo_total)
+        pagos = query.order_by(Pagos.Fecha.desc()).offset(skip).limit(limit).all()
+    
+    items = [
+        {
+            **columnas_en_minusculas(p.Pagos),
+            "numero_factura": p.Numero_Factura,
+            "cliente_nombre": f"{p.nombre_cliente} {p.apellido_cliente or ''}".strip(),
+            "usuario_nombre": f"{p.nombre_usuario} {p.apellido_usuario}"
+        }
+        for p in pagos
+    ]
+    
+    if por_cursor:
+        return {"items": items, "next_cursor": next_cursor}
     
     return {
         "total": total,
-        "items": [
-            {
-                "id_pago": p.Pagos.ID_Pago,
-                "factura": {
-                    "id": p.Pagos.ID_Factura_Venta,
-                    "numero": p.Numero_Factura
-                },
-                "cliente": f"{p.nombre_cliente} {p.apellido_cliente}",
-                "metodo": p.Pagos.Metodo,
-                "monto": p.Pagos.Monto,
-                "fecha": p.Pagos.Fecha
-            }
-            for p in pagos
-        ],
+        "items": items,
         "pagina": skip // limit + 1,
-        "paginas": (total + limit - 1) // limit
+        "paginas": total_paginas(total, limit)
     }
 
 # Obtener pagos por factura
 @router.get("/factura/{factura_id}", response_model=List[PagoCompleto])
-async def get_pagos_factura(
+def get_pagos_factura(
     factura_id: int = Path(..., gt=0),
     db: Session = Depends(get_db),
     current_user: Usuarios = Depends(get_current_user)
@@ -102,7 +120,7 @@ async def get_pagos_factura(
 
 # Obtener estadísticas de pagos
 @router.get("/estadisticas", response_model=dict)
-async def get_estadisticas_pagos(
+def get_estadisticas_pagos(
     desde: Optional[datetime] = None,
     hasta: Optional[datetime] = None,
     db: Session = Depends(get_db),
@@ -160,7 +178,7 @@ async def get_estadisticas_pagos(
 
 # Obtener resumen de pagos por cliente
 @router.get("/cliente/{cliente_id}/resumen", response_model=dict)
-async def get_resumen_cliente(
+def get_resumen_cliente(
     cliente_id: int = Path(..., gt=0),
     db: Session = Depends(get_db),
     current_user: Usuarios = Depends(get_current_user)
@@ -207,7 +225,7 @@ async def get_resumen_cliente(
 
 # Obtener un pago específico
 @router.get("/{pago_id}", response_model=PagoCompleto)
-async def get_pago(
+def get_pago(
     pago_id: int = Path(..., gt=0),
     db: Session = Depends(get_db),
     current_user: Usuarios = Depends(get_current_user)
@@ -219,7 +237,7 @@ async def get_pago(
 
 # Registrar nuevo pago
 @router.post("/", response_model=PagoCompleto)
-async def create_pago(
+def create_pago(
     pago: PagoCreate,
     db: Session = Depends(get_db),
     current_user: Usuarios = Depends(get_current_user)
@@ -282,7 +300,7 @@ async def create_pago(
 
 # Anular pago
 @router.post("/{pago_id}/anular")
-async def anular_pago(
+def anular_pago(
     pago_id: int = Path(..., gt=0),
     motivo: str = Query(..., min_length=5, max_length=200),
     db: Session = Depends(get_db),
@@ -2,13 +2,8 @@ from fastapi import APIRouter, Depends, HTTPException, Query, Path, Security
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from database import get_db
-from APP.schemas.Productos_Descuentos_schema import (
-    ProductoDescuentoBase,
-    ProductoDescuentoCreate,
-    ProductoDescuentoUpdate,
-    ProductoDescuentoSimple,
+from APP.schemas.Productos_descuentos_schema import (
     ProductoDescuentoCompleto,
-    ResumenDescuentosProducto,
     AnalisisEfectividadDescuentos
 )
 from APP.DB.Productos_Descuentos_model import Productos_Descuentos
@@ -28,7 +23,7 @@ router = APIRouter(
 
 # Obtener descuentos por producto
 @router.get("/producto/{producto_id}", response_model=List[ProductoDescuentoCompleto])
-async def get_descuentos_producto(
+def get_descuentos_producto(
     producto_id: int = Path(..., gt=0),
     activos: Optional[bool] = Query(None, description="Filtrar por descuentos activos"),
     db: Session = Depends(get_db),
@@ -98,7 +93,7 @@ async def get_descuentos_producto(
 
 # Obtener productos por descuento
 @router.get("/descuento/{descuento_id}", response_model=List[ProductoDescuentoCompleto])
-async def get_productos_descuento(
+def get_productos_descuento(
     descuento_id: int = Path(..., gt=0),
     db: Session = Depends(get_db),
     current_user: Usuarios = Depends(get_current_user)
@@ -118,16 +113,11 @@ async def get_productos_descuento(
         Productos.Activo == True
     ).all()
     
-    resultados = []
-    for p in productos:
-        precio_con_descuento = p.Productos.Precio
-        if descuento.Tipo_Descuento == "Porcentaje":
-            precio_con_descuento *= (1 - descuento.Porcentaje/100)
-        else:
-            precio_con_descuento -= descuento.Monto_Fijo
-        
-        # Obtener ventas con este descuento
-        ventas = db.query(
+    # Ventas de todos los productos durante la vigencia del descuento, agrupadas por producto
+    ventas_por_producto = {
+        fila.ID_Producto: fila
+        for fila in db.query(
+            Detalles_Factura_Venta.ID_Producto,
             func.count(Detalles_Factura_Venta.ID_Detalle).label('cantidad_ventas'),
             func.sum(Detalles_Factura_Venta.Cantidad).label('unidades_vendidas'),
             func.sum(Detalles_Factura_Venta.Descuento_Unitario * Detalles_Factura_Venta.Cantidad).label('total_descuento')
@@ -139,8 +129,19 @@ async def get_productos_descuento(
                 Facturas_Venta.Fecha.between(descuento.Fecha_Inicio, descuento.Fecha_Fin)
             )
         ).filter(
-            Detalles_Factura_Venta.ID_Producto == p.Productos.ID_Producto
-        ).first()
+            Detalles_Factura_Venta.ID_Producto.in_([p.Productos.ID_Producto for p in productos])
+        ).group_by(Detalles_Factura_Venta.ID_Producto).all()
+    }
+    
+    resultados = []
+    for p in productos:
+        precio_con_descuento = p.Productos.Precio
+        if descuento.Tipo_Descuento == "Porcentaje":
+            precio_con_descuento *= (1 - descuento.Porcentaje/100)
+        else:
+            precio_con_descuento -= descuento.Monto_Fijo
+        
+        ventas = ventas_por_producto.get(p.Productos.ID_Producto)
         
         resultados.append({
             "producto": {
@@ -158,9 +159,9 @@ async def get_productos_descuento(
             "precio_con_descuento": precio_con_descuento,
             "ahorro": p.Productos.Precio - precio_con_descuento,
             "estadisticas": {
-                "ventas": ventas.cantidad_ventas or 0,
-                "unidades": ventas.unidades_vendidas or 0,
-                "total_descuento": ventas.total_descuento or 0
+                "ventas": ventas.cantidad_ventas if ventas else 0,
+                "unidades": (ventas.unidades_vendidas or 0) if ventas else 0,
+                "total_descuento": (ventas.total_descuento or 0) if ventas else 0
             }
         })
     
@@ -168,7 +169,7 @@ async def get_productos_descuento(
 
 # Análisis de efectividad de descuentos
 @router.get("/analisis", response_model=AnalisisEfectividadDescuentos)
-async def get_analisis_efectividad(
+def get_analisis_efectividad(
     desde: Optional[datetime] = None,
     hasta: Optional[datetime] = None,
     db: Session = Depends(get_db),
@@ -1,13 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Path, Security
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Path, Security, UploadFile, File
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-from database import get_db
+from itertools import chain
+from database import get_db, get_async_db
 from APP.schemas.Productos_schema import (
     ProductoBase,
     ProductoCreate,
     ProductoUpdate,
     ProductoSimple,
-    ProductoCompleta
+    ProductoCompleta,
+    ProductoList,
+    ProductosLote
 )
 from APP.DB.Productos_model import Productos
 from APP.DB.Categorias_model import Categorias
@@ -15,9 +19,15 @@ from APP.DB.Unidades_de_medida_model import Unidades_de_medida
 from APP.DB.Inventario_model import Inventario
 from APP.DB.Garantias_model import Garantias
 from APP.DB.Usuarios_model import Usuarios
-from sqlalchemy import func, and_, case
+from sqlalchemy import func, and_, case, select
 from datetime import datetime, timedelta
 from APP.routers.Usuarios_router import get_current_user
+from APP.services.Paginacion_service import es_paginacion_cursor, orden_cursor, aplicar_cursor, armar_pagina, calcular_total_async, total_paginas, columnas_en_minusculas, TOTAL_NINGUNO
+from APP.services.Busqueda_service import buscador_productos, condicion_sql, BUSQUEDA_MAX_IDS_SQL
+from APP.services.Productos_service import error_de_precios
+from APP.services.Codigos_service import cache_codigos, ProductoCodigo, armar_tabla, COLUMNAS as COLUMNAS_CODIGOS
+from APP.services.Busqueda_service import normalizar_codigo
+from APP.services.Importacion_service import importar_productos as importar_productos_desde_archivo
 
 router = APIRouter(
     prefix="/productos",
@@ -25,10 +35,13 @@ router = APIRouter(
 )
 
 # Obtener todos los productos con paginación y filtros
-@router.get("/", response_model=List[ProductoSimple])
+@router.get("/", response_model=ProductoList)
 async def get_productos(
     skip: int = Query(0, ge=0, description="Número de registros a saltar"),
     limit: int = Query(10, ge=1, le=100, description="Número de registros a retornar"),
+    paginacion: Optional[str] = Query("offset", enum=["offset", "cursor"], description="Tipo de paginación"),
+    after: Optional[str] = Query(None, description="Cursor de la página siguiente (next_cursor)"),
+    modo_total: str = Query("exact", alias="total", enum=["exact", "estimate", "none"], description="Total: exacto, estimado o sin contar"),
     activo: Optional[bool] = Query(None, description="Filtrar por estado activo/inactivo"),
     categoria_id: Optional[int] = Query(None, description="Filtrar por categoría"),
     marca: Optional[str] = Query(None, description="Filtrar por marca"),
@@ -38,71 +51,224 @@ async def get_productos(
     buscar: Optional[str] = Query(None, description="Buscar por nombre, código o descripción"),
     ordenar_por: Optional[str] = Query(None, description="Campo por el cual ordenar"),
     orden: Optional[str] = Query("asc", enum=["asc", "desc"]),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    query = db.query(Productos)
+    query = select(Productos)
     
     # Aplicar filtros
     if activo is not None:
-        query = query.filter(Productos.Activo == activo)
+        query = query.where(Productos.Activo == activo)
     if categoria_id:
-        query = query.filter(Productos.ID_Categoria == categoria_id)
+        query = query.where(Productos.ID_Categoria == categoria_id)
     if marca:
-        query = query.filter(Productos.Marca.ilike(f"%{marca}%"))
+        query = query.where(Productos.Marca.ilike(f"%{marca}%"))
     if precio_min:
-        query = query.filter(Productos.Precio >= precio_min)
+        query = query.where(Productos.Precio >= precio_min)
     if precio_max:
-        query = query.filter(Productos.Precio <= precio_max)
+        query = query.where(Productos.Precio <= precio_max)
     if con_stock is not None:
         query = query.join(Inventario).group_by(Productos.ID_Producto)
         if con_stock:
             query = query.having(func.sum(Inventario.Stock_Actual) > 0)
         else:
             query = query.having(func.sum(Inventario.Stock_Actual) == 0)
+    
+    # Paginación por cursor: sin COUNT ni OFFSET
+    por_cursor = es_paginacion_cursor(paginacion, after)
+    
     if buscar:
-        search = f"%{buscar}%"
-        query = query.filter(
-            (Productos.Nombre.ilike(search)) |
-            (Productos.Codigo_Barras.ilike(search)) |
-            (Productos.SKU.ilike(search)) |
-            (Productos.Descripcion.ilike(search))
+        # Con el índice de búsqueda listo el texto se resuelve en memoria, ordenado por
+        # relevancia. Si hay filtros u orden que el índice no conoce, sus resultados pasan
+        # a SQL como lista de ids (si no son demasiados)
+        solo_indice = not (marca or precio_min or precio_max or con_stock is not None or ordenar_por or por_cursor)
+        encontrados = buscador_productos.buscar(
+            buscar,
+            activo=activo,
+            categoria_id=categoria_id,
+            desde=skip if solo_indice else 0,
+            cantidad=limit if solo_indice else BUSQUEDA_MAX_IDS_SQL
         )
+        if encontrados is not None and solo_indice:
+            total, ids = encontrados
+            return {
+                "total": total if modo_total != TOTAL_NINGUNO else None,
+                "items": [columnas_en_minusculas(p) for p in await productos_en_orden(db, ids)],
+                "pagina": skip // limit + 1,
+                "paginas": total_paginas(total, limit) if modo_total != TOTAL_NINGUNO else None
+            }
+        if encontrados is not None and encontrados[0] <= BUSQUEDA_MAX_IDS_SQL:
+            query = query.where(Productos.ID_Producto.in_(encontrados[1]))
+        else:
+            query = query.where(condicion_sql(buscar))
     
-    # Aplicar ordenamiento
-    if ordenar_por:
-        orden_col = getattr(Productos, ordenar_por.capitalize(), Productos.Nombre)
-        if orden == "desc":
-            orden_col = orden_col.desc()
-        query = query.order_by(orden_col)
+    if por_cursor:
+        columna = getattr(Productos, ordenar_por.capitalize(), Productos.Nombre) if ordenar_por else Productos.ID_Producto
+        orden_pagina = orden_cursor(columna, Productos.ID_Producto, orden == "desc")
+        productos, next_cursor = armar_pagina(
+            (await db.scalars(aplicar_cursor(query, orden_pagina, after, limit))).all(), orden_pagina, limit
+        )
+    else:
+        # Aplicar ordenamiento
+        if ordenar_por:
+            orden_col = getattr(Productos, ordenar_por.capitalize(), Productos.Nombre)
+            if orden == "desc":
+                orden_col = orden_col.desc()
+            query = query.order_by(orden_col)
+    
+        total = await calcular_total_async(db, query, modo_total)
+        productos = (await db.scalars(query.offset(skip).limit(limit))).all()
     
-    total = query.count()
-    productos = query.offset(skip).limit(limit).all()
+    if por_cursor:
+        return {"items": [columnas_en_minusculas(p) for p in productos], "next_cursor": next_cursor}
     
     return {
         "total": total,
-        "items": productos,
+        "items": [columnas_en_minusculas(p) for p in productos],
         "pagina": skip // limit + 1,
-        "paginas": (total + limit - 1) // limit
+        "paginas": total_paginas(total, limit)
     }
 
-# Buscar productos por código de barras
+# Productos de una lista de ids, en el mismo orden
+async def productos_en_orden(db: AsyncSession, ids: List[int]) -> List[Productos]:
+    if not ids:
+        return []
+    por_id = {p.ID_Producto: p for p in (await db.scalars(select(Productos).where(Productos.ID_Producto.in_(ids)))).all()}
+    return [por_id[i] for i in ids if i in por_id]
+
+# Sugerencias mientras se escribe ("torn", "mart st"): productos y marcas que empiezan con el
+# texto, los más vendidos primero. Sale del índice en memoria; mientras se arma, de SQL por
+# prefijo del nombre (sin popularidad)
+@router.get("/autocompletar", response_model=dict)
+async def autocompletar_productos(
+    texto: str = Query(..., min_length=1, max_length=100, description="Texto escrito hasta ahora"),
+    limite: int = Query(10, ge=1, le=50, description="Cantidad de sugerencias"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    sugerencias = buscador_productos.autocompletar(texto, limite)
+    if sugerencias is not None:
+        productos, marcas = sugerencias
+        return {"productos": productos, "marcas": marcas}
+
+    texto = texto.strip()
+    filas = (await db.execute(
+        select(Productos.ID_Producto, Productos.Nombre, Productos.Marca, Productos.Modelo)
+        .where(Productos.Activo == True, Productos.Nombre.startswith(texto, autoescape=True))
+        .order_by(Productos.Nombre)
+        .limit(limite)
+    )).all()
+    marcas = (await db.scalars(
+        select(Productos.Marca)
+        .where(Productos.Activo == True, Productos.Marca.startswith(texto, autoescape=True))
+        .distinct()
+        .order_by(Productos.Marca)
+        .limit(limite)
+    )).all()
+    return {
+        "productos": [
+            {"id": f.ID_Producto, "nombre": f.Nombre, "marca": f.Marca, "modelo": f.Modelo, "ventas": None}
+            for f in filas
+        ],
+        "marcas": [{"marca": m, "productos": None, "ventas": None} for m in marcas]
+    }
+
+# Buscar productos por código de barras o SKU. Sale de la tabla de códigos en memoria; a la
+# base solo van los códigos que no están ahí (y no se saben desconocidos)
 @router.get("/buscar/{codigo}", response_model=ProductoSimple)
 async def buscar_por_codigo(
     codigo: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    producto = db.query(Productos).filter(
-        (Productos.Codigo_Barras == codigo) |
-        (Productos.SKU == codigo)
-    ).first()
+    resuelto, registro = cache_codigos.buscar(codigo)
+    if not resuelto:
+        producto = await db.scalar(
+            select(Productos).where(
+                (Productos.Codigo_Barras == codigo) |
+                (Productos.SKU == codigo)
+            ).limit(1)
+        )
+        registro = ProductoCodigo.desde_producto(producto) if producto else None
+        cache_codigos.anotar(codigo, registro)
     
-    if not producto:
+    if not registro:
         raise HTTPException(status_code=404, detail="Producto no encontrado")
-    return producto
+    return registro.a_dict()
+
+# Detalle de muchos productos en un solo pedido (un carrito entero), por id y por código de
+# barras/SKU. Sale de la tabla de códigos en memoria; lo que no está se trae con un IN y el
+# stock por sucursal de todos sale de una sola consulta. Los productos vuelven en el orden
+# pedido (primero los ids y después los códigos, sin repetidos)
+@router.post("/lote", response_model=dict)
+async def get_productos_lote(
+    lote: ProductosLote,
+    db: AsyncSession = Depends(get_async_db)
+):
+    ids = list(dict.fromkeys(lote.ids))
+    codigos = list(dict.fromkeys(lote.codigos))
+
+    por_id = cache_codigos.por_ids(ids)
+    faltantes = [i for i in ids if i not in por_id]
+    if faltantes:
+        filas = (await db.execute(select(*COLUMNAS_CODIGOS).where(Productos.ID_Producto.in_(faltantes)))).all()
+        por_id.update((fila.ID_Producto, ProductoCodigo(tuple(fila))) for fila in filas)
+
+    por_codigo, pendientes = cache_codigos.buscar_varios(codigos)
+    if pendientes:
+        filas = (await db.execute(select(*COLUMNAS_CODIGOS).where(
+            (Productos.Codigo_Barras.in_(pendientes)) |
+            (Productos.SKU.in_(pendientes))
+        ))).all()
+        encontrados, _ = armar_tabla(tuple(fila) for fila in filas)
+        for codigo in pendientes:
+            por_codigo[codigo] = encontrados.get(normalizar_codigo(codigo))
+            cache_codigos.anotar(codigo, por_codigo[codigo])
+
+    pedidos = list(chain(
+        ((i, por_id.get(i)) for i in ids),
+        ((c, por_codigo.get(c)) for c in codigos)
+    ))
+
+    stock = {}
+    if lote.incluir_stock:
+        ids_encontrados = {registro.id_producto for _, registro in pedidos if registro}
+        if ids_encontrados:
+            filas = (await db.execute(
+                select(
+                    Inventario.ID_Producto,
+                    Inventario.ID_Sucursal,
+                    Inventario.Stock_Actual,
+                    Inventario.Stock_Minimo,
+                    Inventario.Stock_Maximo,
+                    Inventario.Ubicacion
+                ).where(
+                    Inventario.ID_Producto.in_(ids_encontrados)
+                ).order_by(Inventario.ID_Producto, Inventario.ID_Sucursal)
+            )).all()
+            for fila in filas:
+                stock.setdefault(fila.ID_Producto, []).append(stock_de_sucursal(fila))
+
+    productos = []
+    for solicitado, registro in pedidos:
+        if not registro:
+            continue
+        producto = registro.a_dict()
+        producto["solicitado"] = solicitado
+        if lote.incluir_stock:
+            sucursales = stock.get(registro.id_producto, [])
+            producto["stock_total"] = sum(s["stock_actual"] for s in sucursales)
+            producto["stock_por_sucursal"] = sucursales
+        productos.append(producto)
+
+    return {
+        "productos": productos,
+        "no_encontrados": {
+            "ids": [i for i in ids if i not in por_id],
+            "codigos": [c for c in codigos if not por_codigo.get(c)]
+        }
+    }
 
 # Obtener productos con stock bajo
 @router.get("/reportes/stock-bajo", response_model=List[dict])
-async def get_productos_stock_bajo(
+def get_productos_stock_bajo(
     limite: int = Query(10, ge=1, le=100),
     sucursal_id: Optional[int] = None,
     db: Session = Depends(get_db)
@@ -140,16 +306,21 @@ async def get_productos_stock_bajo(
 @router.get("/{producto_id}", response_model=ProductoCompleta)
 async def get_producto(
     producto_id: int = Path(..., gt=0),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    producto = db.query(Productos).filter(Productos.ID_Producto == producto_id).first()
+    # En la sesión asíncrona no hay carga diferida: las relaciones se traen de antemano
+    producto = await db.get(
+        Productos,
+        producto_id,
+        options=[selectinload(Productos.categoria), selectinload(Productos.unidad_medida)]
+    )
     if not producto:
         raise HTTPException(status_code=404, detail="Producto no encontrado")
     return producto
 
 # Crear nuevo producto
 @router.post("/", response_model=ProductoCompleta)
-async def create_producto(
+def create_producto(
     producto: ProductoCreate,
     current_user: Usuarios = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -189,17 +360,9 @@ async def create_producto(
         raise HTTPException(status_code=404, detail="Unidad de medida no encontrada o inactiva")
     
     # Validar precios
-    if producto.precio_mayorista and producto.precio_mayorista >= producto.precio:
-        raise HTTPException(
-            status_code=400,
-            detail="El precio mayorista debe ser menor al precio regular"
-        )
-    
-    if producto.precio <= producto.costo:
-        raise HTTPException(
-            status_code=400,
-            detail="El precio debe ser mayor al costo"
-        )
+    error = error_de_precios(producto.precio, producto.costo, producto.precio_mayorista)
+    if error:
+        raise HTTPException(status_code=400, detail=error[1])
     
     # Crear producto
     db_producto = Productos(**producto.dict())
@@ -208,9 +371,29 @@ async def create_producto(
     db.refresh(db_producto)
     return db_producto
 
+# Importar una lista de productos (CSV o XLSX): los códigos que ya existen se actualizan
+# con las columnas del archivo y los nuevos se dan de alta. Devuelve el detalle de las
+# filas que no se pudieron guardar
+@router.post("/importar", response_model=dict)
+def importar_productos(
+    archivo: UploadFile = File(..., description="CSV (separado por , ; o tabulación) o XLSX, con encabezados"),
+    simular: bool = Query(False, description="Solo validar el archivo, sin guardar cambios"),
+    codificacion: str = Query("utf-8-sig", description="Codificación del CSV (por ejemplo latin-1)"),
+    current_user: Usuarios = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    if current_user.Rol not in ["Admin", "Supervisor"]:
+        raise HTTPException(status_code=403, detail="No tiene permisos para esta acción")
+    try:
+        "".encode(codificacion)
+    except LookupError:
+        raise HTTPException(status_code=400, detail=f"Codificación desconocida: {codificacion}")
+
+    return importar_productos_desde_archivo(db, archivo.file, archivo.filename, simular, codificacion)
+
 # Actualizar producto
 @router.put("/{producto_id}", response_model=ProductoCompleta)
-async def update_producto(
+def update_producto(
     producto: ProductoUpdate,
     producto_id: int = Path(..., gt=0),
     current_user: Usuarios = Depends(get_current_user),
@@ -263,17 +446,9 @@ async def update_producto(
     costo = producto.costo if producto.costo is not None else db_producto.Costo
     precio_mayorista = producto.precio_mayorista if producto.precio_mayorista is not None else db_producto.Precio_Mayorista
     
-    if precio_mayorista and precio_mayorista >= precio:
-        raise HTTPException(
-            status_code=400,
-            detail="El precio mayorista debe ser menor al precio regular"
-        )
-    
-    if precio <= costo:
-        raise HTTPException(
-            status_code=400,
-            detail="El precio debe ser mayor al costo"
-        )
+    error = error_de_precios(precio, costo, precio_mayorista)
+    if error:
+        raise HTTPException(status_code=400, detail=error[1])
     
     # Actualizar campos
     for key, value in producto.dict(exclude_unset=True).items():
@@ -286,7 +461,7 @@ async def update_producto(
 
 # Obtener stock por sucursal
 @router.get("/{producto_id}/stock", response_model=List[dict])
-async def get_stock_por_sucursal(
+def get_stock_por_sucursal(
     producto_id: int = Path(..., gt=0),
     db: Session = Depends(get_db)
 ):
@@ -302,21 +477,22 @@ async def get_stock_por_sucursal(
         Inventario.Ubicacion
     ).filter(Inventario.ID_Producto == producto_id).all()
     
-    return [
-        {
-            "sucursal_id": s.ID_Sucursal,
-            "stock_actual": s.Stock_Actual,
-            "stock_minimo": s.Stock_Minimo,
-            "stock_maximo": s.Stock_Maximo,
-            "ubicacion": s.Ubicacion,
-            "estado": "Bajo" if s.Stock_Actual <= s.Stock_Minimo else "Alto" if s.Stock_Actual >= s.Stock_Maximo else "Normal"
-        }
-        for s in stocks
-    ]
+    return [stock_de_sucursal(s) for s in stocks]
+
+# Stock de un producto en una sucursal (fila de Inventario)
+def stock_de_sucursal(s) -> dict:
+    return {
+        "sucursal_id": s.ID_Sucursal,
+        "stock_actual": s.Stock_Actual,
+        "stock_minimo": s.Stock_Minimo,
+        "stock_maximo": s.Stock_Maximo,
+        "ubicacion": s.Ubicacion,
+        "estado": "Bajo" if s.Stock_Actual <= s.Stock_Minimo else "Alto" if s.Stock_Actual >= s.Stock_Maximo else "Normal"
+    }
 
 # Obtener historial de precios
 @router.get("/{producto_id}/historial-precios", response_model=List[dict])
-async def get_historial_precios(
+def get_historial_precios(
     producto_id: int = Path(..., gt=0),
     desde: Optional[datetime] = None,
     hasta: Optional[datetime] = None,
@@ -335,7 +511,7 @@ async def get_historial_precios(
 
 # Obtener estadísticas del producto
 @router.get("/{producto_id}/estadisticas", response_model=dict)
-async def get_estadisticas_producto(
+def get_estadisticas_producto(
     producto_id: int = Path(..., gt=0),
     db: Session = Depends(get_db)
 ):
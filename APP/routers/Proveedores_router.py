@@ -6,7 +6,7 @@ from APP.schemas.Proveedores_schema import (
     ProveedorBase,
     ProveedorCreate,
     ProveedorUpdate,
-    ProveedorSimple,
+    ProveedorList,
     ProveedorCompleta
 )
 from APP.DB.Proveedores_model import Proveedores
@@ -15,6 +15,7 @@ from APP.DB.Usuarios_model import Usuarios
 from sqlalchemy import func, and_, case
 from datetime import datetime, timedelta
 from APP.routers.Usuarios_router import get_current_user
+from APP.services.Paginacion_service import es_paginacion_cursor, orden_cursor, aplicar_cursor, armar_pagina, calcular_total, total_paginas, columnas_en_minusculas
 
 router = APIRouter(
     prefix="/proveedores",
@@ -22,10 +23,13 @@ router = APIRouter(
 )
 
 # Obtener todos los proveedores con paginación y filtros
-@router.get("/", response_model=List[ProveedorSimple])
-async def get_proveedores(
+@router.get("/", response_model=ProveedorList)
+def get_proveedores(
     skip: int = Query(0, ge=0, description="Número de registros a saltar"),
     limit: int = Query(10, ge=1, le=100, description="Número de registros a retornar"),
+    paginacion: Optional[str] = Query("offset", enum=["offset", "cursor"], description="Tipo de paginación"),
+    after: Optional[str] = Query(None, description="Cursor de la página siguiente (next_cursor)"),
+    modo_total: str = Query("exact", alias="total", enum=["exact", "estimate", "none"], description="Total: exacto, estimado o sin contar"),
     activo: Optional[bool] = Query(None, description="Filtrar por estado activo/inactivo"),
     provincia: Optional[str] = Query(None, description="Filtrar por provincia"),
     buscar: Optional[str] = Query(None, description="Buscar por nombre, CUIT o email"),
@@ -49,26 +53,38 @@ async def get_proveedores(
             (Proveedores.Email.ilike(search))
         )
     
-    # Aplicar ordenamiento
-    if ordenar_por:
-        orden_col = getattr(Proveedores, ordenar_por.capitalize(), Proveedores.Nombre)
-        if orden == "desc":
-            orden_col = orden_col.desc()
-        query = query.order_by(orden_col)
+    # Paginación por cursor: sin COUNT ni OFFSET
+    por_cursor = es_paginacion_cursor(paginacion, after)
+    if por_cursor:
+        columna = getattr(Proveedores, ordenar_por.capitalize(), Proveedores.Nombre) if ordenar_por else Proveedores.ID_Proveedor
+        orden_pagina = orden_cursor(columna, Proveedores.ID_Proveedor, orden == "desc")
+        proveedores, next_cursor = armar_pagina(
+            aplicar_cursor(query, orden_pagina, after, limit).all(), orden_pagina, limit
+        )
+    else:
+        # Aplicar ordenamiento
+        if ordenar_por:
+            orden_col = getattr(Proveedores, ordenar_por.capitalize(), Proveedores.Nombre)
+            if orden == "desc":
+                orden_col = orden_col.desc()
+            query = query.order_by(orden_col)
+    
+        total = calcular_total(db, query, modo_total)
+        proveedores = query.offset(skip).limit(limit).all()
     
-    total = query.count()
-    proveedores = query.offset(skip).limit(limit).all()
+    if por_cursor:
+        return {"items": [columnas_en_minusculas(c) for c in proveedores], "next_cursor": next_cursor}
     
     return {
         "total": total,
-        "items": proveedores,
+        "items": [columnas_en_minusculas(c) for c in proveedores],
         "pagina": skip // limit + 1,
-        "paginas": (total + limit - 1) // limit
+        "paginas": total_paginas(total, limit)
     }
 
 # Obtener un proveedor por ID
 @router.get("/{proveedor_id}", response_model=ProveedorCompleta)
-async def get_proveedor(
+def get_proveedor(
     proveedor_id: int = Path(..., gt=0),
     db: Session = Depends(get_db),
     current_user: Usuarios = Depends(get_current_user)
@@ -80,7 +96,7 @@ async def get_proveedor(
 
 # Crear nuevo proveedor
 @router.post("/", response_model=ProveedorCompleta)
-async def create_proveedor(
+def create_proveedor(
     proveedor: ProveedorCreate,
     db: Session = Depends(get_db),
     current_user: Usuarios = Depends(get_current_user)
@@ -113,7 +129,7 @@ async def create_proveedor(
 
 # Actualizar proveedor
 @router.put("/{proveedor_id}", response_model=ProveedorCompleta)
-async def update_proveedor(
+def update_proveedor(
     proveedor: ProveedorUpdate,
     proveedor_id: int = Path(..., gt=0),
     db: Session = Depends(get_db),
@@ -158,7 +174,7 @@ async def update_proveedor(
 
 # Obtener historial de órdenes de compra
 @router.get("/{proveedor_id}/ordenes", response_model=List[dict])
-async def get_historial_ordenes(
+def get_historial_ordenes(
     proveedor_id: int = Path(..., gt=0),
     desde: Optional[datetime] = None,
     hasta: Optional[datetime] = None,
@@ -201,7 +217,7 @@ async def get_historial_ordenes(
 
 # Obtener estadísticas del proveedor
 @router.get("/{proveedor_id}/estadisticas", response_model=dict)
-async def get_estadisticas_proveedor(
+def get_estadisticas_proveedor(
     proveedor_id: int = Path(..., gt=0),
     db: Session = Depends(get_db),
     current_user: Usuarios = Depends(get_current_user)
@@ -261,7 +277,7 @@ async def get_estadisticas_proveedor(
 
 # Obtener estadísticas generales de proveedores
 @router.get("/estadisticas/general", response_model=dict)
-async def get_estadisticas_proveedores(
+def get_estadisticas_proveedores(
     db: Session = Depends(get_db),
     current_user: Usuarios = Depends(get_current_user)
 ):
@@ -0,0 +1,135 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import PlainTextResponse
+import database
+from database import (
+    estadisticas_pool,
+    metricas_pool,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING,
+    DB_ECHO,
+    DB_ISOLATION_LEVEL,
+    DB_STATEMENT_TIMEOUT
+)
+from APP.DB.Usuarios_model import Usuarios
+from APP.services.Consultas_lentas_service import registro_consultas_lentas
+from APP.services.Perfilado_service import registro_perfiles, PERFILADO_ACTIVO
+from APP.services.Busqueda_service import buscador_productos
+from APP.services.Codigos_service import cache_codigos
+from APP.routers.Usuarios_router import check_admin_role
+
+router = APIRouter(
+    prefix="/sistema",
+    tags=["Sistema"]
+)
+
+# Estado del pool de conexiones a la base de datos
+@router.get("/pool", response_model=dict)
+def get_estado_pool(
+    current_user: Usuarios = Depends(check_admin_role)
+):
+    respuesta = {
+        "configuracion": {
+            "pool_size": DB_POOL_SIZE,
+            "max_overflow": DB_MAX_OVERFLOW,
+            "pool_timeout": DB_POOL_TIMEOUT,
+            "pool_recycle": DB_POOL_RECYCLE,
+            "pool_pre_ping": DB_POOL_PRE_PING,
+            "echo": DB_ECHO,
+            "isolation_level": DB_ISOLATION_LEVEL,
+            "statement_timeout": DB_STATEMENT_TIMEOUT
+        },
+        "sync": estadisticas_pool(),
+        "espera": metricas_pool.resumen()
+    }
+
+    # El engine asíncrono solo existe si algún endpoint ya lo usó
+    if database.async_engine is not None:
+        respuesta["async"] = estadisticas_pool(database.async_engine.sync_engine)
+
+    return respuesta
+
+# Reiniciar los contadores de espera del pool
+@router.post("/pool/reiniciar")
+def reiniciar_metricas_pool(
+    current_user: Usuarios = Depends(check_admin_role)
+):
+    metricas_pool.reiniciar()
+    return {"message": "Métricas del pool reiniciadas"}
+
+# Consultas lentas acumuladas por SQL normalizado, las que más tiempo consumen primero
+@router.get("/consultas-lentas", response_model=dict)
+def get_consultas_lentas(
+    limite: int = Query(20, ge=1, le=200, description="Cantidad de consultas a devolver"),
+    orden: str = Query("total", enum=["total", "maximo", "cantidad"], description="Ordenar por tiempo total, máximo o cantidad"),
+    current_user: Usuarios = Depends(check_admin_role)
+):
+    return {
+        **registro_consultas_lentas.resumen(),
+        "consultas": registro_consultas_lentas.top(limite, orden)
+    }
+
+# Plan de ejecución capturado (showplan XML, se abre con SSMS como .sqlplan)
+@router.get("/consultas-lentas/{consulta_id}/plan")
+def get_plan_consulta_lenta(
+    consulta_id: str,
+    current_user: Usuarios = Depends(check_admin_role)
+):
+    plan = registro_consultas_lentas.plan(consulta_id)
+    if not plan:
+        raise HTTPException(status_code=404, detail="No hay plan capturado para esa consulta")
+
+    return Response(
+        content=plan["xml"],
+        media_type="application/xml",
+        headers={"Content-Disposition": f'attachment; filename="{consulta_id}.sqlplan"'}
+    )
+
+# Reiniciar el registro de consultas lentas y los planes guardados
+@router.post("/consultas-lentas/reiniciar")
+def reiniciar_consultas_lentas(
+    current_user: Usuarios = Depends(check_admin_role)
+):
+    registro_consultas_lentas.reiniciar()
+    return {"message": "Registro de consultas lentas reiniciado"}
+
+# Perfiles de requests guardados, el más reciente primero
+@router.get("/perfiles", response_model=dict)
+def get_perfiles(
+    current_user: Usuarios = Depends(check_admin_role)
+):
+    return {
+        "activo": PERFILADO_ACTIVO,
+        "perfiles": registro_perfiles.listar()
+    }
+
+# Pilas colapsadas de un perfil (para flamegraph.pl, speedscope o inferno)
+@router.get("/perfiles/{perfil_id}", response_class=PlainTextResponse)
+def get_perfil(
+    perfil_id: str,
+    current_user: Usuarios = Depends(check_admin_role)
+):
+    perfil = registro_perfiles.obtener(perfil_id)
+    if not perfil:
+        raise HTTPException(status_code=404, detail="Perfil no encontrado")
+
+    return PlainTextResponse(
+        content=perfil.colapsado(),
+        headers={"Content-Disposition": f'attachment; filename="perfil-{perfil_id}.folded"'}
+    )
+
+# Estado del índice de búsqueda de productos
+@router.get("/busqueda", response_model=dict)
+def get_estado_busqueda(
+    current_user: Usuarios = Depends(check_admin_role)
+):
+    return buscador_productos.estadisticas()
+
+# Estado de la tabla de códigos de barras/SKU en memoria
+@router.get("/codigos", response_model=dict)
+def get_estado_codigos(
+    current_user: Usuarios = Depends(check_admin_role)
+):
+    return cache_codigos.estadisticas()
@@ -17,6 +17,7 @@ from APP.DB.Inventario_model import Inventario
 from APP.DB.Facturas_Venta_model import Facturas_Venta
 from sqlalchemy import func, and_, or_, distinct, case, exists
 from datetime import datetime, time
+from APP.services.Paginacion_service import es_paginacion_cursor, orden_cursor, aplicar_cursor, armar_pagina, calcular_total, total_paginas
 
 router = APIRouter(
     prefix="/sucursales",
@@ -25,9 +26,12 @@ router = APIRouter(
 
 # Obtener todas las sucursales con paginación y filtros
 @router.get("/", response_model=SucursalList)
-async def get_sucursales(
+def get_sucursales(
     skip: int = Query(0, ge=0, description="Número de registros a saltar"),
     limit: int = Query(10, ge=1, le=100, description="Número de registros a retornar"),
+    paginacion: Optional[str] = Query("offset", enum=["offset", "cursor"], description="Tipo de paginación"),
+    after: Optional[str] = Query(None, description="Cursor de la página siguiente (next_cursor)"),
+    modo_total: str = Query("exact", alias="total", enum=["exact", "estimate", "none"], description="Total: exacto, estimado o sin contar"),
     activo: Optional[bool] = Query(None, description="Filtrar por estado activo/inactivo"),
     provincia: Optional[str] = Query(None, description="Filtrar por provincia"),
     buscar: Optional[str] = Query(None, description="Buscar por nombre, dirección o localidad"),
@@ -86,31 +90,45 @@ async def get_sucursales(
             )
         )
     
-    # Contar total de registros
-    total = db.query(func.count(Sucursales.ID_Sucursal)).scalar()
+    # Paginación por cursor: sin COUNT ni OFFSET
+    por_cursor = es_paginacion_cursor(paginacion, after)
+    if por_cursor:
+        columnas_orden = {
+            "nombre": Sucursales.Nombre,
+            "localidad": Sucursales.Localidad,
+            "provincia": Sucursales.Provincia
+        }
+        columna = columnas_orden.get(ordenar_por, Sucursales.ID_Sucursal)
+        orden_pagina = orden_cursor(columna, Sucursales.ID_Sucursal, orden == "desc")
+        resultados, next_cursor = armar_pagina(
+            aplicar_cursor(query, orden_pagina, after, limit).all(), orden_pagina, limit
+        )
+    else:
+        # Contar total de registros
+        total = calcular_total(db, query, modo_total, contar=lambda: db.query(func.count(Sucursales.ID_Sucursal)).scalar())
     
-    # Aplicar ordenamiento (requerido por SQL Server para OFFSET/LIMIT)
-    if ordenar_por == "nombre":
-        if orden == "desc":
-            query = query.order_by(Sucursales.Nombre.desc(), Sucursales.ID_Sucursal.asc())
-        else:
-            query = query.order_by(Sucursales.Nombre.asc(), Sucursales.ID_Sucursal.asc())
-    elif ordenar_por == "localidad":
-        if orden == "desc":
-            query = query.order_by(Sucursales.Localidad.desc(), Sucursales.ID_Sucursal.asc())
+        # Aplicar ordenamiento (requerido por SQL Server para OFFSET/LIMIT)
+        if ordenar_por == "nombre":
+            if orden == "desc":
+                query = query.order_by(Sucursales.Nombre.desc(), Sucursales.ID_Sucursal.asc())
+            else:
+                query = query.order_by(Sucursales.Nombre.asc(), Sucursales.ID_Sucursal.asc())
+        elif ordenar_por == "localidad":
+            if orden == "desc":
+                query = query.order_by(Sucursales.Localidad.desc(), Sucursales.ID_Sucursal.asc())
+            else:
+                query = query.order_by(Sucursales.Localidad.asc(), Sucursales.ID_Sucursal.asc())
+        elif ordenar_por == "provincia":
+            if orden == "desc":
+                query = query.order_by(Sucursales.Provincia.desc(), Sucursales.ID_Sucursal.asc())
+            else:
+                query = query.order_by(Sucursales.Provincia.asc(), Sucursales.ID_Sucursal.asc())
         else:
-            query = query.order_by(Sucursales.Localidad.asc(), Sucursales.ID_Sucursal.asc())
-    elif ordenar_por == "provincia":
-        if orden == "desc":
-            query = query.order_by(Sucursales.Provincia.desc(), Sucursales.ID_Sucursal.asc())
-        else:
-            query = query.order_by(Sucursales.Provincia.asc(), Sucursales.ID_Sucursal.asc())
-    else:
-        # Ordenamiento por defecto
-        query = query.order_by(Sucursales.ID_Sucursal.asc())
+            # Ordenamiento por defecto
+            query = query.order_by(Sucursales.ID_Sucursal.asc())
     
-    # Aplicar paginación
-    resultados = query.offset(skip).limit(limit).all()
+        # Aplicar paginación
+        resultados = query.offset(skip).limit(limit).all()
     
     # Procesar resultados
     sucursales_procesadas = []
@@ -133,16 +151,19 @@ async def get_sucursales(
         }
         sucursales_procesadas.append(sucursal_dict)
     
+    if por_cursor:
+        return {"sucursales": sucursales_procesadas, "next_cursor": next_cursor}
+    
     return {
         "total_registros": total,
         "pagina_actual": skip // limit + 1,
-        "total_paginas": (total + limit - 1) // limit,
+        "total_paginas": total_paginas(total, limit),
         "sucursales": sucursales_procesadas
     }
 
 # Obtener estadísticas de sucursales
 @router.get("/estadisticas", response_model=SucursalEstadisticas)
-async def get_estadisticas_sucursales(
+def get_estadisticas_sucursales(
     db: Session = Depends(get_db)
 ):
     # Total de sucursales
@@ -215,7 +236,7 @@ async def get_estadisticas_sucursales(
 
 # Obtener una sucursal por ID
 @router.get("/{sucursal_id}", response_model=SucursalCompleta)
-async def get_sucursal(
+def get_sucursal(
     sucursal_id: int = Path(..., gt=0, description="ID de la sucursal"),
     db: Session = Depends(get_db)
 ):
@@ -282,7 +303,7 @@ async def get_sucursal(
 
 # Crear nueva sucursal
 @router.post("/", response_model=SucursalCompleta)
-async def create_sucursal(
+def create_sucursal(
     sucursal: SucursalCreate,
     db: Session = Depends(get_db)
 ):
@@ -335,7 +356,7 @@ async def create_sucursal(
 
 # Actualizar sucursal
 @router.put("/{sucursal_id}", response_model=SucursalCompleta)
-async def update_sucursal(
+def update_sucursal(
     sucursal: SucursalUpdate,
     sucursal_id: int = Path(..., gt=0),
     db: Session = Depends(get_db)
@@ -419,7 +440,7 @@ async def update_sucursal(
 
 # Eliminar sucursal (soft delete)
 @router.delete("/{sucursal_id}")
-async def delete_sucursal(
+def delete_sucursal(
     sucursal_id: int = Path(..., gt=0),
     db: Session = Depends(get_db)
 ):
@@ -1,13 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, Path, Security
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Optional
 from database import get_db
 from APP.schemas.Transferencias_Sucursales_schema import (
     TransferenciaSucursalBase,
     TransferenciaSucursalCreate,
     TransferenciaSucursalUpdate,
-    TransferenciaSucursalSimple,
     TransferenciaSucursalCompleta,
+    TransferenciaSucursalList,
     DetalleTransferenciaCreate,
     EstadisticasTransferencias
 )
@@ -16,11 +16,12 @@ from APP.DB.Detalles_Transferencia_model import Detalles_Transferencia
 from APP.DB.Sucursales_model import Sucursales
 from APP.DB.Productos_model import Productos
 from APP.DB.Inventario_model import Inventario
-from APP.DB.Movimientos_inventario_model import Movimientos_inventario
 from APP.DB.Usuarios_model import Usuarios
 from sqlalchemy import func, and_, case, distinct, or_
 from datetime import datetime, timedelta
 from APP.routers.Usuarios_router import get_current_user
+from APP.services.Paginacion_service import es_paginacion_cursor, aplicar_cursor, armar_pagina, calcular_total, total_paginas, columnas_en_minusculas
+from APP.services.Inventario_service import aplicar_movimientos, obtener_stock_sucursal
 
 router = APIRouter(
     prefix="/transferencias",
@@ -28,10 +29,13 @@ router = APIRouter(
 )
 
 # Obtener todas las transferencias con filtros
-@router.get("/", response_model=List[TransferenciaSucursalSimple])
-async def get_transferencias(
+@router.get("/", response_model=TransferenciaSucursalList)
+def get_transferencias(
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
+    paginacion: Optional[str] = Query("offset", enum=["offset", "cursor"], description="Tipo de paginación"),
+    after: Optional[str] = Query(None, description="Cursor de la página siguiente (next_cursor)"),
+    modo_total: str = Query("exact", alias="total", enum=["exact", "estimate", "none"], description="Total: exacto, estimado o sin contar"),
     estado: Optional[str] = Query(None, description="Filtrar por estado"),
     sucursal_origen: Optional[int] = Query(None, description="Filtrar por sucursal origen"),
     sucursal_destino: Optional[int] = Query(None, description="Filtrar por sucursal destino"),
@@ -76,8 +80,16 @@ async def get_transferencias(
             )
         )
     
-    total = query.count()
-    transferencias = query.order_by(Transferencias_Sucursales.Fecha_Solicitud.desc()).offset(skip).limit(limit).all()
+    # Paginación por cursor: sin COUNT ni OFFSET
+    por_cursor = es_paginacion_cursor(paginacion, after)
+    if por_cursor:
+        orden_pagina = [(Transferencias_Sucursales.Fecha_Solicitud, True), (Transferencias_Sucursales.ID_Transferencia, True)]
+        transferencias, next_cursor = armar_pagina(
+            aplicar_cursor(query, orden_pagina, after, limit).all(), orden_pagina, limit
+        )
+    else:
+        total = calcular_total(db, query, modo_total)
+        transferencias = query.order_by(Transferencias_Sucursales.Fecha_Solicitud.desc()).offset(skip).limit(limit).all()
     
     # Obtener nombres de sucursales destino
     sucursales_destino = {
@@ -86,35 +98,30 @@ async def get_transferencias(
         ).all()
     }
     
+    items = [
+        {
+            **columnas_en_minusculas(t.Transferencias_Sucursales),
+            "sucursal_origen_nombre": t.nombre_origen,
+            "sucursal_destino_nombre": sucursales_destino[t.Transferencias_Sucursales.ID_Sucursal_Destino],
+            "total_items": t.cantidad_items,
+            "total_unidades": t.total_unidades
+        }
+        for t in transferencias
+    ]
+    
+    if por_cursor:
+        return {"items": items, "next_cursor": next_cursor}
+    
     return {
         "total": total,
-        "items": [
-            {
-                "id_transferencia": t.Transferencias_Sucursales.ID_Transferencia,
-                "numero": t.Transferencias_Sucursales.Numero_Transferencia,
-                "sucursal_origen": {
-                    "id": t.Transferencias_Sucursales.ID_Sucursal_Origen,
-                    "nombre": t.nombre_origen
-                },
-                "sucursal_destino": {
-                    "id": t.Transferencias_Sucursales.ID_Sucursal_Destino,
-                    "nombre": sucursales_destino[t.Transferencias_Sucursales.ID_Sucursal_Destino]
-                },
-                "fecha_solicitud": t.Transferencias_Sucursales.Fecha_Solicitud,
-                "fecha_transferencia": t.Transferencias_Sucursales.Fecha_Transferencia,
-                "estado": t.Transferencias_Sucursales.Estado,
-                "items": t.cantidad_items,
-                "unidades": t.total_unidades
-            }
-            for t in transferencias
-        ],
+        "items": items,
         "pagina": skip // limit + 1,
-        "paginas": (total + limit - 1) // limit
+        "paginas": total_paginas(total, limit)
     }
 
 # Obtener una transferencia específica
 @router.get("/{transferencia_id}", response_model=TransferenciaSucursalCompleta)
-async def get_transferencia(
+def get_transferencia(
     transferencia_id: int = Path(..., gt=0),
     db: Session = Depends(get_db),
     current_user: Usuarios = Depends(get_current_user)
@@ -206,7 +213,7 @@ async def get_transferencia(
 
 # Crear nueva transferencia
 @router.post("/", response_model=TransferenciaSucursalCompleta)
-async def create_transferencia(
+def create_transferencia(
     transferencia: TransferenciaSucursalCreate,
     db: Session = Depends(get_db),
     current_user: Usuarios = Depends(get_current_user)
@@ -225,14 +232,14 @@ async def create_transferencia(
             detail="Solo puede crear transferencias desde su sucursal"
         )
     
-    # Verificar stock disponible
+    # Verificar stock disponible (una consulta para todos los productos)
+    stocks = obtener_stock_sucursal(
+        db, [detalle.id_producto for detalle in transferencia.detalles], transferencia.id_sucursal_origen
+    )
     for detalle in transferencia.detalles:
-        stock = db.query(Inventario).filter(
-            Inventario.ID_Producto == detalle.id_producto,
-            Inventario.ID_Sucursal == transferencia.id_sucursal_origen
-        ).first()
+        stock = stocks.get(detalle.id_producto)
         
-        if not stock or stock.Stock_Actual < detalle.cantidad:
+        if stock is None or stock < detalle.cantidad:
             producto = db.query(Productos).filter(Productos.ID_Producto == detalle.id_producto).first()
             raise HTTPException(
                 status_code=400,
@@ -262,11 +269,11 @@ async def create_transferencia(
     db.commit()
     db.refresh(db_transferencia)
     
-    return await get_transferencia(db_transferencia.ID_Transferencia, db, current_user)
+    return get_transferencia(db_transferencia.ID_Transferencia, db, current_user)
 
 # Actualizar estado de transferencia
 @router.patch("/{transferencia_id}/estado")
-async def update_estado_transferencia(
+def update_estado_transferencia(
     transferencia_id: int = Path(..., gt=0),
     estado: str = Query(..., description="Nuevo estado de la transferencia"),
     observaciones: Optional[str] = None,
@@ -311,13 +318,13 @@ async def update_estado_transferencia(
             Detalles_Transferencia.ID_Transferencia == transferencia_id
         ).all()
         
+        stocks = obtener_stock_sucursal(
+            db, [detalle.ID_Producto for detalle in detalles], transferencia.ID_Sucursal_Origen
+        )
         for detalle in detalles:
-            stock = db.query(Inventario).filter(
-                Inventario.ID_Producto == detalle.ID_Producto,
-                Inventario.ID_Sucursal == transferencia.ID_Sucursal_Origen
-            ).first()
+            stock = stocks.get(detalle.ID_Producto)
             
-            if not stock or stock.Stock_Actual < detalle.Cantidad:
+            if stock is None or stock < detalle.Cantidad:
                 producto = db.query(Productos).filter(Productos.ID_Producto == detalle.ID_Producto).first()
                 raise HTTPException(
                     status_code=400,
@@ -329,61 +336,36 @@ async def update_estado_transferencia(
             Detalles_Transferencia.ID_Transferencia == transferencia_id
         ).all()
         
-        for detalle in detalles:
-            # Reducir stock en origen
-            stock_origen = db.query(Inventario).filter(
-                Inventario.ID_Producto == detalle.ID_Producto,
-                Inventario.ID_Sucursal == transferencia.ID_Sucursal_Origen
-            ).first()
-            
-            stock_origen.Stock_Actual -= detalle.Cantidad
-            stock_origen.Fecha_Ultimo_Movimiento = datetime.now()
-            
-            # Registrar movimiento en origen
-            movimiento_origen = Movimientos_inventario(
-                ID_Producto=detalle.ID_Producto,
-                ID_Sucursal=transferencia.ID_Sucursal_Origen,
-                Tipo="Transferencia",
-                Cantidad=-detalle.Cantidad,
-                ID_Usuario=current_user.ID_Usuario,
-                ID_Referencia=transferencia_id,
-                Tipo_Referencia="Transferencia",
-                Observaciones=f"Transferencia #{transferencia.Numero_Transferencia} - Salida"
-            )
-            db.add(movimiento_origen)
-            
-            # Actualizar o crear stock en destino
-            stock_destino = db.query(Inventario).filter(
-                Inventario.ID_Producto == detalle.ID_Producto,
-                Inventario.ID_Sucursal == transferencia.ID_Sucursal_Destino
-            ).first()
-            
-            if not stock_destino:
-                stock_destino = Inventario(
-                    ID_Producto=detalle.ID_Producto,
-                    ID_Sucursal=transferencia.ID_Sucursal_Destino,
-                    Stock_Actual=0,
-                    Stock_Minimo=0,
-                    Stock_Maximo=999999
-                )
-                db.add(stock_destino)
-                db.flush()
-            
-            stock_destino.Stock_Actual += detalle.Cantidad
-            stock_destino.Fecha_Ultimo_Movimiento = datetime.now()
-            
-            # Registrar movimiento en destino
-            movimiento_destino = Movimientos_inventario(
-                ID_Producto=detalle.ID_Producto,
-                ID_Sucursal=transferencia.ID_Sucursal_Destino,
-                Tipo="Transferencia",
-                Cantidad=detalle.Cantidad,
-                ID_Usuario=current_user.ID_Usuario,
-                ID_Referencia=transferencia_id,
-                Tipo_Referencia="Transferencia",
-                Observaciones=f"Transferencia #{transferencia.Numero_Transferencia} - Entrada"
-            )
-            db.add(movimiento_destino)
+        movimientos_salida = [
+            {"id_producto": d.ID_Producto, "cantidad": -d.Cantidad} for d in detalles
+        ]
+        movimientos_entrada = [
+            {"id_producto": d.ID_Producto, "cantidad": d.Cantidad} for d in detalles
+        ]
+        
+        # Reducir stock en origen (falla si otra operación consumió el stock)
+        aplicar_movimientos(
+            db,
+            transferencia.ID_Sucursal_Origen,
+            movimientos_salida,
+            "Transferencia",
+            current_user.ID_Usuario,
+            id_referencia=transferencia_id,
+            tipo_referencia="Transferencia",
+            observaciones=f"Transferencia #{transferencia.Numero_Transferencia} - Salida"
+        )
+        
+        # Aumentar (o crear) stock en destino
+        aplicar_movimientos(
+            db,
+            transferencia.ID_Sucursal_Destino,
+            movimientos_entrada,
+            "Transferencia",
+            current_user.ID_Usuario,
+            id_referencia=transferencia_id,
+            tipo_referencia="Transferencia",
+            observaciones=f"Transferencia #{transferencia.Numero_Transferencia} - Entrada"
+        )
     
     # Actualizar estado
     transferencia.Estado = estado
@@ -396,7 +378,7 @@ async def update_estado_transferencia(
 
 # Obtener estadísticas de transferencias
 @router.get("/estadisticas", response_model=EstadisticasTransferencias)
-async def get_estadisticas_transferencias(
+def get_estadisticas_transferencias(
     desde: Optional[datetime] = None,
     hasta: Optional[datetime] = None,
     db: Session = Depends(get_db),
@@ -13,6 +13,7 @@ from APP.schemas.Unidades_de_medida_schema import (
 from APP.DB.Unidades_de_medida_model import Unidades_de_medida
 from sqlalchemy import func, and_
 from APP.DB.Productos_model import Productos
+from APP.services.Paginacion_service import es_paginacion_cursor, orden_cursor, aplicar_cursor, armar_pagina, calcular_total, total_paginas
 
 router = APIRouter(
     prefix="/unidades-medida",
@@ -21,9 +22,12 @@ router = APIRouter(
 
 # Obtener todas las unidades de medida con paginación y filtros
 @router.get("/", response_model=UnidadMedidaList)
-async def get_unidades_medida(
+def get_unidades_medida(
     skip: int = Query(0, ge=0, description="Número de registros a saltar"),
     limit: int = Query(10, ge=1, le=100, description="Número de registros a retornar"),
+    paginacion: Optional[str] = Query("offset", enum=["offset", "cursor"], description="Tipo de paginación"),
+    after: Optional[str] = Query(None, description="Cursor de la página siguiente (next_cursor)"),
+    modo_total: str = Query("exact", alias="total", enum=["exact", "estimate", "none"], description="Total: exacto, estimado o sin contar"),
     activo: Optional[bool] = Query(None, description="Filtrar por estado activo/inactivo"),
     buscar: Optional[str] = Query(None, description="Buscar por nombre o abreviatura"),
     ordenar_por: Optional[str] = Query("nombre", description="Campo por el cual ordenar"),
@@ -56,26 +60,39 @@ async def get_unidades_medida(
             (Unidades_de_medida.Abreviatura.ilike(search))
         )
     
-    # Contar total de registros
-    total = db.query(func.count(Unidades_de_medida.ID_Unidad_de_medida)).scalar()
+    # Paginación por cursor: sin COUNT ni OFFSET
+    por_cursor = es_paginacion_cursor(paginacion, after)
+    if por_cursor:
+        columnas_orden = {
+            "nombre": Unidades_de_medida.Nombre,
+            "abreviatura": Unidades_de_medida.Abreviatura
+        }
+        columna = columnas_orden.get(ordenar_por, Unidades_de_medida.ID_Unidad_de_medida)
+        orden_pagina = orden_cursor(columna, Unidades_de_medida.ID_Unidad_de_medida, orden == "desc")
+        resultados, next_cursor = armar_pagina(
+            aplicar_cursor(query, orden_pagina, after, limit).all(), orden_pagina, limit
+        )
+    else:
+        # Contar total de registros
+        total = calcular_total(db, query, modo_total, contar=lambda: db.query(func.count(Unidades_de_medida.ID_Unidad_de_medida)).scalar())
     
-    # Aplicar ordenamiento (requerido por SQL Server para OFFSET/LIMIT)
-    if ordenar_por == "nombre":
-        if orden == "desc":
-            query = query.order_by(Unidades_de_medida.Nombre.desc(), Unidades_de_medida.ID_Unidad_de_medida.asc())
+        # Aplicar ordenamiento (requerido por SQL Server para OFFSET/LIMIT)
+        if ordenar_por == "nombre":
+            if orden == "desc":
+                query = query.order_by(Unidades_de_medida.Nombre.desc(), Unidades_de_medida.ID_Unidad_de_medida.asc())
+            else:
+                query = query.order_by(Unidades_de_medida.Nombre.asc(), Unidades_de_medida.ID_Unidad_de_medida.asc())
+        elif ordenar_por == "abreviatura":
+            if orden == "desc":
+                query = query.order_by(Unidades_de_medida.Abreviatura.desc(), Unidades_de_medida.ID_Unidad_de_medida.asc())
+            else:
+                query = query.order_by(Unidades_de_medida.Abreviatura.asc(), Unidades_de_medida.ID_Unidad_de_medida.asc())
         else:
-            query = query.order_by(Unidades_de_medida.Nombre.asc(), Unidades_de_medida.ID_Unidad_de_medida.asc())
-    elif ordenar_por == "abreviatura":
-        if orden == "desc":
-            query = query.order_by(Unidades_de_medida.Abreviatura.desc(), Unidades_de_medida.ID_Unidad_de_medida.asc())
-        else:
-            query = query.order_by(Unidades_de_medida.Abreviatura.asc(), Unidades_de_medida.ID_Unidad_de_medida.asc())
-    else:
-        # Ordenamiento por defecto
-        query = query.order_by(Unidades_de_medida.ID_Unidad_de_medida.asc())
+            # Ordenamiento por defecto
+            query = query.order_by(Unidades_de_medida.ID_Unidad_de_medida.asc())
     
-    # Aplicar paginación
-    resultados = query.offset(skip).limit(limit).all()
+        # Aplicar paginación
+        resultados = query.offset(skip).limit(limit).all()
     
     # Procesar resultados
     unidades_procesadas = []
@@ -89,16 +106,19 @@ async def get_unidades_medida(
         }
         unidades_procesadas.append(unidad_dict)
     
+    if por_cursor:
+        return {"unidades": unidades_procesadas, "next_cursor": next_cursor}
+    
     return {
         "total_registros": total,
         "pagina_actual": skip // limit + 1,
-        "total_paginas": (total + limit - 1) // limit,
+        "total_paginas": total_paginas(total, limit),
         "unidades": unidades_procesadas
     }
 
 # Obtener estadísticas de unidades de medida
 @router.get("/estadisticas", response_model=dict)
-async def get_estadisticas_unidades_medida(
+def get_estadisticas_unidades_medida(
     db: Session = Depends(get_db)
 ):
     # Total de unidades
@@ -144,7 +164,7 @@ async def get_estadisticas_unidades_medida(
 
 # Obtener una unidad de medida por ID
 @router.get("/{unidad_id}", response_model=UnidadMedidaCompleta)
-async def get_unidad_medida(
+def get_unidad_medida(
     unidad_id: int = Path(..., gt=0, description="ID de la unidad de medida"),
     db: Session = Depends(get_db)
 ):
@@ -181,7 +201,7 @@ async def get_unidad_medida(
 
 # Crear nueva unidad de medida
 @router.post("/", response_model=UnidadMedidaCompleta)
-async def create_unidad_medida(
+def create_unidad_medida(
     unidad: UnidadMedidaCreate,
     db: Session = Depends(get_db)
 ):
@@ -216,7 +236,7 @@ async def create_unidad_medida(
 
 # Actualizar unidad de medida
 @router.put("/{unidad_id}", response_model=UnidadMedidaCompleta)
-async def update_unidad_medida(
+def update_unidad_medida(
     unidad: UnidadMedidaUpdate,
     unidad_id: int = Path(..., gt=0),
     db: Session = Depends(get_db)
@@ -264,7 +284,7 @@ async def update_unidad_medida(
 
 # Eliminar unidad de medida (soft delete)
 @router.delete("/{unidad_id}")
-async def delete_unidad_medida(
+def delete_unidad_medida(
     unidad_id: int = Path(..., gt=0),
     db: Session = Depends(get_db)
 ):
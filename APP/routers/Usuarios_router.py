@@ -18,7 +18,9 @@ from APP.schemas.Usuarios_schema import (
 )
 from APP.DB.Usuarios_model import Usuarios
 from APP.DB.Sucursales_model import Sucursales
+from APP.services.Usuarios_service import cache_usuarios
 from sqlalchemy import func, and_, or_, case
+from APP.services.Paginacion_service import es_paginacion_cursor, orden_cursor, aplicar_cursor, armar_pagina, calcular_total, total_paginas
 
 # Configuración de seguridad
 SECRET_KEY = "tu_clave_secreta_aqui"  # En producción, usar variable de entorno
@@ -50,7 +52,7 @@ def create_access_token(data: dict):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(
+def get_current_user(
     token: str = Security(oauth2_scheme),
     db: Session = Depends(get_db)
 ):
@@ -68,9 +70,13 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
     
-    user = db.query(Usuarios).filter(Usuarios.Email == token_data.email).first()
+    # Buscar primero en la caché de usuarios autenticados para evitar la consulta a la base
+    user = cache_usuarios.obtener(token_data.email)
     if user is None:
-        raise credentials_exception
+        db_user = db.query(Usuarios).filter(Usuarios.Email == token_data.email).first()
+        if db_user is None:
+            raise credentials_exception
+        user = cache_usuarios.guardar(token_data.email, db_user)
     if not user.Estado:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -78,7 +84,7 @@ async def get_current_user(
         )
     return user
 
-async def check_admin_role(current_user: Usuarios = Depends(get_current_user)):
+def check_admin_role(current_user: Usuarios = Depends(get_current_user)):
     if current_user.Rol.lower() != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -86,7 +92,7 @@ async def check_admin_role(current_user: Usuarios = Depends(get_current_user)):
         )
     return current_user
 
-async def check_role_permission(required_role: str, current_user: Usuarios = Depends(get_current_user)):
+def check_role_permission(required_role: str, current_user: Usuarios = Depends(get_current_user)):
     user_role = current_user.Rol.lower()
     if user_role not in ROLES_PERMITIDOS.get(required_role, []):
         raise HTTPException(
@@ -101,7 +107,7 @@ router = APIRouter(
 )
 
 @router.post("/login", response_model=Token)
-async def login(
+def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db)
 ):
@@ -169,9 +175,12 @@ async def login(
 
 # Obtener todos los usuarios con paginación y filtros
 @router.get("/", response_model=UsuarioList)
-async def get_usuarios(
+def get_usuarios(
     skip: int = Query(0, ge=0, description="Número de registros a saltar"),
     limit: int = Query(10, ge=1, le=100, description="Número de registros a retornar"),
+    paginacion: Optional[str] = Query("offset", enum=["offset", "cursor"], description="Tipo de paginación"),
+    after: Optional[str] = Query(None, description="Cursor de la página siguiente (next_cursor)"),
+    modo_total: str = Query("exact", alias="total", enum=["exact", "estimate", "none"], description="Total: exacto, estimado o sin contar"),
     estado: Optional[bool] = Query(None, description="Filtrar por estado activo/inactivo"),
     rol: Optional[str] = Query(None, description="Filtrar por rol"),
     sucursal_id: Optional[int] = Query(None, description="Filtrar por sucursal"),
@@ -201,40 +210,49 @@ async def get_usuarios(
             )
         )
     
-    # Contar total de registros
-    total = query.count()
-    
-    # Aplicar ordenamiento
-    if ordenar_por == "nombre":
-        if orden == "desc":
-            query = query.order_by(Usuarios.Nombre.desc(), Usuarios.ID_Usuario.asc())
-        else:
-            query = query.order_by(Usuarios.Nombre.asc(), Usuarios.ID_Usuario.asc())
-    elif ordenar_por == "email":
-        if orden == "desc":
-            query = query.order_by(Usuarios.Email.desc(), Usuarios.ID_Usuario.asc())
-        else:
-            query = query.order_by(Usuarios.Email.asc(), Usuarios.ID_Usuario.asc())
-    elif ordenar_por == "rol":
-        if orden == "desc":
-            query = query.order_by(Usuarios.Rol.desc(), Usuarios.ID_Usuario.asc())
-        else:
-            query = query.order_by(Usuarios.Rol.asc(), Usuarios.ID_Usuario.asc())
+    # El nombre de la sucursal viene en la misma consulta de la página
+    pagina = query.outerjoin(
+        Sucursales, Sucursales.ID_Sucursal == Usuarios.ID_Sucursal
+    ).add_columns(Sucursales.Nombre.label('sucursal_nombre'))
+    
+    # Paginación por cursor: sin COUNT ni OFFSET
+    por_cursor = es_paginacion_cursor(paginacion, after)
+    if por_cursor:
+        columnas_orden = {"nombre": Usuarios.Nombre, "email": Usuarios.Email, "rol": Usuarios.Rol}
+        columna = columnas_orden.get(ordenar_por, Usuarios.ID_Usuario)
+        orden_pagina = orden_cursor(columna, Usuarios.ID_Usuario, orden == "desc")
+        usuarios, next_cursor = armar_pagina(
+            aplicar_cursor(pagina, orden_pagina, after, limit).all(), orden_pagina, limit
+        )
     else:
-        query = query.order_by(Usuarios.ID_Usuario.asc())
+        # Contar total de registros
+        total = calcular_total(db, query, modo_total)
+    
+        # Aplicar ordenamiento
+        if ordenar_por == "nombre":
+            if orden == "desc":
+                pagina = pagina.order_by(Usuarios.Nombre.desc(), Usuarios.ID_Usuario.asc())
+            else:
+                pagina = pagina.order_by(Usuarios.Nombre.asc(), Usuarios.ID_Usuario.asc())
+        elif ordenar_por == "email":
+            if orden == "desc":
+                pagina = pagina.order_by(Usuarios.Email.desc(), Usuarios.ID_Usuario.asc())
+            else:
+                pagina = pagina.order_by(Usuarios.Email.asc(), Usuarios.ID_Usuario.asc())
+        elif ordenar_por == "rol":
+            if orden == "desc":
+                pagina = pagina.order_by(Usuarios.Rol.desc(), Usuarios.ID_Usuario.asc())
+            else:
+                pagina = pagina.order_by(Usuarios.Rol.asc(), Usuarios.ID_Usuario.asc())
+        else:
+            pagina = pagina.order_by(Usuarios.ID_Usuario.asc())
     
-    # Aplicar paginación
-    usuarios = query.offset(skip).limit(limit).all()
+        # Aplicar paginación
+        usuarios = pagina.offset(skip).limit(limit).all()
     
     # Procesar resultados
     usuarios_procesados = []
-    for usuario in usuarios:
-        sucursal_nombre = None
-        if usuario.ID_Sucursal:
-            sucursal = db.query(Sucursales).filter(Sucursales.ID_Sucursal == usuario.ID_Sucursal).first()
-            if sucursal:
-                sucursal_nombre = sucursal.Nombre
-        
+    for usuario, sucursal_nombre in usuarios:
         usuarios_procesados.append({
             "id_usuario": usuario.ID_Usuario,
             "nombre": usuario.Nombre,
@@ -245,16 +263,19 @@ async def get_usuarios(
             "sucursal": sucursal_nombre
         })
     
+    if por_cursor:
+        return {"usuarios": usuarios_procesados, "next_cursor": next_cursor}
+    
     return {
         "total_registros": total,
         "pagina_actual": skip // limit + 1,
-        "total_paginas": (total + limit - 1) // limit,
+        "total_paginas": total_paginas(total, limit),
         "usuarios": usuarios_procesados
     }
 
 # Obtener estadísticas de usuarios
 @router.get("/estadisticas", response_model=dict)
-async def get_estadisticas_usuarios(
+def get_estadisticas_usuarios(
     current_user: Usuarios = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -308,9 +329,16 @@ async def get_estadisticas_usuarios(
         }
     }
 
+# Obtener estadísticas de la caché de usuarios autenticados
+@router.get("/cache/estadisticas", response_model=dict)
+def get_estadisticas_cache_usuarios(
+    current_user: Usuarios = Depends(check_admin_role)
+):
+    return cache_usuarios.estadisticas()
+
 # Obtener un usuario por ID
 @router.get("/{usuario_id}", response_model=UsuarioCompleta)
-async def get_usuario(
+def get_usuario(
     usuario_id: int = Path(..., gt=0),
     current_user: Usuarios = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -347,7 +375,7 @@ async def get_usuario(
 
 # Crear nuevo usuario
 @router.post("/", response_model=UsuarioCompleta)
-async def create_usuario(
+def create_usuario(
     usuario: UsuarioCreate,
     current_user: Usuarios = Depends(check_admin_role),
     db: Session = Depends(get_db)
@@ -423,7 +451,7 @@ async def create_usuario(
 
 # Actualizar usuario
 @router.put("/{usuario_id}", response_model=UsuarioCompleta)
-async def update_usuario(
+def update_usuario(
     usuario: UsuarioUpdate,
     usuario_id: int = Path(..., gt=0),
     current_user: Usuarios = Depends(check_admin_role),
@@ -483,7 +511,7 @@ async def update_usuario(
 
 # Cambiar estado del usuario (activar/desactivar)
 @router.patch("/{usuario_id}/estado")
-async def change_usuario_estado(
+def change_usuario_estado(
     usuario_id: int = Path(..., gt=0),
     estado: bool = Query(..., description="Nuevo estado del usuario"),
     current_user: Usuarios = Depends(get_current_user),
@@ -508,17 +536,22 @@ async def change_usuario_estado(
 
 # Cambiar contraseña propia
 @router.post("/cambiar-password")
-async def change_password(
+def change_password(
     current_password: str,
     new_password: str,
     current_user: Usuarios = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    if not verify_password(current_password, current_user.Contraseña):
+    # current_user puede venir de la caché: se trabaja sobre el registro de la sesión
+    db_usuario = db.query(Usuarios).filter(Usuarios.ID_Usuario == current_user.ID_Usuario).first()
+    if not db_usuario:
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    
+    if not verify_password(current_password, db_usuario.Contraseña):
         raise HTTPException(status_code=400, detail="Contraseña actual incorrecta")
     
-    current_user.Contraseña = get_password_hash(new_password)
-    current_user.Actualizado_el = datetime.now()
+    db_usuario.Contraseña = get_password_hash(new_password)
+    db_usuario.Actualizado_el = datetime.now()
     db.commit()
     
     return {"message": "Contraseña actualizada correctamente"}
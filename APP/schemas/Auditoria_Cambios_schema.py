@@ -142,10 +142,11 @@ class AuditoriaCambiosCompleta(AuditoriaCambiosSimple):
         }
 
 class AuditoriaCambiosList(BaseModel):
-    total_registros: int
-    pagina_actual: int
-    total_paginas: int
-    registros: List[AuditoriaCambiosSimple]
+    total: Optional[int] = Field(None, description="Total de registros")
+    pagina: Optional[int] = Field(None, description="Página actual")
+    paginas: Optional[int] = Field(None, description="Total de páginas")
+    items: List[AuditoriaCambiosSimple]
+    next_cursor: Optional[str] = Field(None, description="Cursor de la página siguiente (paginación por cursor)")
 
     class Config:
         from_attributes = True
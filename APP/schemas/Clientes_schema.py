@@ -19,7 +19,7 @@ class ClienteBase(BaseModel):
         description="CUIT/CUIL del cliente",
         example="20-12345678-9"
     )
-    tipo_cliente: constr(max_length=20) = Field(
+    tipo_cliente: constr(max_length=30) = Field(
         "Consumidor Final",
         description="Tipo de cliente",
         example="Consumidor Final"
@@ -194,10 +194,11 @@ class ClienteCompleta(ClienteSimple):
 
 # Schema para lista paginada de clientes
 class ClienteList(BaseModel):
-    total: int = Field(..., description="Total de registros")
-    pagina: int = Field(..., description="Página actual")
-    paginas: int = Field(..., description="Total de páginas")
+    total: Optional[int] = Field(None, description="Total de registros")
+    pagina: Optional[int] = Field(None, description="Página actual")
+    paginas: Optional[int] = Field(None, description="Total de páginas")
     items: List[ClienteSimple]
+    next_cursor: Optional[str] = Field(None, description="Cursor de la página siguiente (paginación por cursor)")
 
     class Config:
         from_attributes = True
@@ -116,6 +116,11 @@ class DescuentoSimple(DescuentoBase):
         description="Cantidad de productos incluidos en el descuento",
         example=10
     )
+    estado: Optional[str] = Field(
+        None,
+        description="Vigencia a hoy: Vigente, Pendiente, Vencido o Inactivo",
+        example="Vigente"
+    )
 
     class Config:
         from_attributes = True
@@ -182,10 +187,11 @@ class DescuentoCompleto(DescuentoSimple):
         }
 
 class DescuentoList(BaseModel):
-    total_registros: int
-    pagina_actual: int
-    total_paginas: int
-    descuentos: List[DescuentoSimple]
+    total: Optional[int] = Field(None, description="Total de registros")
+    pagina: Optional[int] = Field(None, description="Página actual")
+    paginas: Optional[int] = Field(None, description="Total de páginas")
+    items: List[DescuentoSimple]
+    next_cursor: Optional[str] = Field(None, description="Cursor de la página siguiente (paginación por cursor)")
 
     class Config:
         from_attributes = True
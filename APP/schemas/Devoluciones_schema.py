@@ -76,8 +76,9 @@ class DevolucionSimple(DevolucionBase):
     fecha_devolucion: datetime
     estado: str = Field(..., example="Pendiente")
     cliente_nombre: str = Field(..., example="Juan Pérez")
-    numero_factura: str = Field(..., example="A-0001-00000001")
+    numero_factura: Optional[str] = Field(None, example="A-0001-00000001")
     total_items: int = Field(..., example=1)
+    total_unidades: Optional[int] = Field(None, example=2)
 
     class Config:
         from_attributes = True
@@ -142,10 +143,11 @@ class DevolucionCompleta(DevolucionSimple):
         }
 
 class DevolucionList(BaseModel):
-    total_registros: int
-    pagina_actual: int
-    total_paginas: int
-    devoluciones: List[DevolucionSimple]
+    total: Optional[int] = Field(None, description="Total de registros")
+    pagina: Optional[int] = Field(None, description="Página actual")
+    paginas: Optional[int] = Field(None, description="Total de páginas")
+    items: List[DevolucionSimple]
+    next_cursor: Optional[str] = Field(None, description="Cursor de la página siguiente (paginación por cursor)")
 
     class Config:
         from_attributes = True
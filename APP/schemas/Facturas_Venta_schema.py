@@ -179,10 +179,11 @@ class FacturaVentaCompleta(FacturaVentaSimple):
 
 # Schema para respuesta de lista de facturas
 class FacturaVentaList(BaseModel):
-    total_registros: int
-    pagina_actual: int
-    total_paginas: int
-    facturas: List[FacturaVentaSimple]
+    total: Optional[int] = Field(None, description="Total de registros")
+    pagina: Optional[int] = Field(None, description="Página actual")
+    paginas: Optional[int] = Field(None, description="Total de páginas")
+    items: List[FacturaVentaSimple]
+    next_cursor: Optional[str] = Field(None, description="Cursor de la página siguiente (paginación por cursor)")
 
     class Config:
         from_attributes = True
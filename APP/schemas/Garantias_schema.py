@@ -69,6 +69,8 @@ class GarantiaUpdate(BaseModel):
 class GarantiaSimple(GarantiaBase):
     id_garantia: int = Field(..., description="ID único de la garantía")
     activo: bool = Field(..., description="Estado de la garantía")
+    producto_nombre: Optional[str] = Field(None, description="Nombre del producto")
+    producto_codigo: Optional[str] = Field(None, description="Código o SKU del producto")
 
     class Config:
         from_attributes = True
@@ -131,10 +133,11 @@ class GarantiaCompleta(GarantiaSimple):
         }
 
 class GarantiaList(BaseModel):
-    total_registros: int
-    pagina_actual: int
-    total_paginas: int
-    garantias: List[GarantiaSimple]
+    total: Optional[int] = Field(None, description="Total de registros")
+    pagina: Optional[int] = Field(None, description="Página actual")
+    paginas: Optional[int] = Field(None, description="Total de páginas")
+    items: List[GarantiaSimple]
+    next_cursor: Optional[str] = Field(None, description="Cursor de la página siguiente (paginación por cursor)")
 
     class Config:
         from_attributes = True
@@ -85,6 +85,26 @@ class MovimientoInventarioSimple(MovimientoInventarioBase):
         ...,
         description="Nombre del usuario que registró el movimiento"
     )
+    producto_nombre: Optional[str] = Field(
+        None,
+        description="Nombre del producto",
+        example="Martillo Profesional"
+    )
+    producto_codigo: Optional[str] = Field(
+        None,
+        description="Código de barras del producto",
+        example="7790001234567"
+    )
+    sucursal_nombre: Optional[str] = Field(
+        None,
+        description="Nombre de la sucursal",
+        example="Sucursal Centro"
+    )
+
+    # La cantidad es la registrada: la entrada de una transferencia es positiva
+    @validator('cantidad')
+    def validar_cantidad(cls, v, values):
+        return v
 
     class Config:
         from_attributes = True
@@ -154,10 +174,11 @@ class MovimientoInventarioCompleto(MovimientoInventarioSimple):
         }
 
 class MovimientoInventarioList(BaseModel):
-    total_registros: int
-    pagina_actual: int
-    total_paginas: int
-    movimientos: List[MovimientoInventarioSimple]
+    total: Optional[int] = Field(None, description="Total de registros")
+    pagina: Optional[int] = Field(None, description="Página actual")
+    paginas: Optional[int] = Field(None, description="Total de páginas")
+    items: List[MovimientoInventarioSimple]
+    next_cursor: Optional[str] = Field(None, description="Cursor de la página siguiente (paginación por cursor)")
 
     class Config:
         from_attributes = True
@@ -97,6 +97,8 @@ class OrdenCompraSimple(BaseModel):
     total: condecimal(gt=0, decimal_places=2)
     proveedor_nombre: str = Field(..., description="Nombre del proveedor")
     sucursal_nombre: str = Field(..., description="Nombre de la sucursal")
+    id_proveedor: Optional[int] = Field(None, description="ID del proveedor")
+    id_sucursal: Optional[int] = Field(None, description="ID de la sucursal")
 
     class Config:
         from_attributes = True
@@ -183,10 +185,11 @@ class OrdenCompraCompleta(OrdenCompraSimple):
 
 # Schema para respuesta de lista de órdenes
 class OrdenCompraList(BaseModel):
-    total_registros: int
-    pagina_actual: int
-    total_paginas: int
-    ordenes: List[OrdenCompraSimple]
+    total: Optional[int] = Field(None, description="Total de registros")
+    pagina: Optional[int] = Field(None, description="Página actual")
+    paginas: Optional[int] = Field(None, description="Total de páginas")
+    items: List[OrdenCompraSimple]
+    next_cursor: Optional[str] = Field(None, description="Cursor de la página siguiente (paginación por cursor)")
 
     class Config:
         from_attributes = True
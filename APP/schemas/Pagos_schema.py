@@ -73,6 +73,16 @@ class PagoSimple(PagoBase):
         description="Nombre del usuario que registró el pago",
         example="María Elena Rodríguez"
     )
+    numero_factura: Optional[str] = Field(
+        None,
+        description="Número de la factura",
+        example="A-0001-00000001"
+    )
+    cliente_nombre: Optional[str] = Field(
+        None,
+        description="Nombre del cliente",
+        example="Juan Carlos González"
+    )
 
     class Config:
         from_attributes = True
@@ -125,10 +135,11 @@ class PagoCompleto(PagoSimple):
         }
 
 class PagoList(BaseModel):
-    total_registros: int
-    pagina_actual: int
-    total_paginas: int
-    pagos: List[PagoSimple]
+    total: Optional[int] = Field(None, description="Total de registros")
+    pagina: Optional[int] = Field(None, description="Página actual")
+    paginas: Optional[int] = Field(None, description="Total de páginas")
+    items: List[PagoSimple]
+    next_cursor: Optional[str] = Field(None, description="Cursor de la página siguiente (paginación por cursor)")
 
     class Config:
         from_attributes = True
@@ -176,12 +176,42 @@ class ProductoCompleta(ProductoSimple):
             }
         }
 
-# Schema para lista paginada de productos
+# Schema para lista paginada de productos (por offset o por cursor)
 class ProductoList(BaseModel):
-    total: int = Field(..., description="Total de registros")
-    pagina: int = Field(..., description="Página actual")
-    paginas: int = Field(..., description="Total de páginas")
+    total: Optional[int] = Field(None, description="Total de registros")
+    pagina: Optional[int] = Field(None, description="Página actual")
+    paginas: Optional[int] = Field(None, description="Total de páginas")
     items: List[ProductoSimple]
+    next_cursor: Optional[str] = Field(None, description="Cursor de la página siguiente (paginación por cursor)")
 
     class Config:
         from_attributes = True
+
+# Máximo de ids + códigos en un pedido de POST /productos/lote
+MAX_PRODUCTOS_LOTE = 500
+
+# Schema para buscar varios productos en un solo pedido
+class ProductosLote(BaseModel):
+    ids: List[int] = Field(
+        [],
+        description="IDs de producto",
+        example=[1, 2, 3]
+    )
+    codigos: List[str] = Field(
+        [],
+        description="Códigos de barras o SKU",
+        example=["7790001234567", "MART-001"]
+    )
+    incluir_stock: bool = Field(
+        True,
+        description="Agregar el stock por sucursal de cada producto"
+    )
+
+    @validator('codigos', always=True)
+    def validar_cantidad(cls, v, values):
+        cantidad = len(v) + len(values.get('ids', []))
+        if cantidad == 0:
+            raise ValueError('Hay que indicar al menos un id o código')
+        if cantidad > MAX_PRODUCTOS_LOTE:
+            raise ValueError(f'Se pueden pedir hasta {MAX_PRODUCTOS_LOTE} productos por lote')
+        return v
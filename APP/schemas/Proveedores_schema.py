@@ -166,10 +166,11 @@ class ProveedorCompleta(ProveedorSimple):
 
 # Schema para lista paginada de proveedores
 class ProveedorList(BaseModel):
-    total: int = Field(..., description="Total de registros")
-    pagina: int = Field(..., description="Página actual")
-    paginas: int = Field(..., description="Total de páginas")
+    total: Optional[int] = Field(None, description="Total de registros")
+    pagina: Optional[int] = Field(None, description="Página actual")
+    paginas: Optional[int] = Field(None, description="Total de páginas")
     items: List[ProveedorSimple]
+    next_cursor: Optional[str] = Field(None, description="Cursor de la página siguiente (paginación por cursor)")
 
     class Config:
         from_attributes = True
@@ -86,6 +86,8 @@ class TransferenciaSucursalSimple(TransferenciaSucursalBase):
     total_items: int = Field(..., example=2)
     sucursal_origen_nombre: str = Field(..., example="Sucursal Centro")
     sucursal_destino_nombre: str = Field(..., example="Sucursal Norte")
+    fecha_transferencia: Optional[datetime] = None
+    total_unidades: Optional[int] = Field(None, example=15)
 
     class Config:
         from_attributes = True
@@ -147,10 +149,11 @@ class TransferenciaSucursalCompleta(TransferenciaSucursalSimple):
         }
 
 class TransferenciaSucursalList(BaseModel):
-    total_registros: int
-    pagina_actual: int
-    total_paginas: int
-    transferencias: List[TransferenciaSucursalSimple]
+    total: Optional[int] = Field(None, description="Total de registros")
+    pagina: Optional[int] = Field(None, description="Página actual")
+    paginas: Optional[int] = Field(None, description="Total de páginas")
+    items: List[TransferenciaSucursalSimple]
+    next_cursor: Optional[str] = Field(None, description="Cursor de la página siguiente (paginación por cursor)")
 
     class Config:
         from_attributes = True
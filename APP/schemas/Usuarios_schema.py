@@ -96,10 +96,11 @@ class UsuarioCompleta(UsuarioSimple):
         }
 
 class UsuarioList(BaseModel):
-    total_registros: int = Field(..., description="Total de registros encontrados")
-    pagina_actual: int = Field(..., description="Número de página actual")
-    total_paginas: int = Field(..., description="Total de páginas disponibles")
+    total_registros: Optional[int] = Field(None, description="Total de registros encontrados")
+    pagina_actual: Optional[int] = Field(None, description="Número de página actual")
+    total_paginas: Optional[int] = Field(None, description="Total de páginas disponibles")
     usuarios: List[UsuarioSimple] = Field(..., description="Lista de usuarios")
+    next_cursor: Optional[str] = Field(None, description="Cursor de la página siguiente (paginación por cursor)")
 
     class Config:
         from_attributes = True
@@ -70,6 +70,21 @@ class InventarioSimple(InventarioBase):
         description="Estado del stock",
         example="Normal"
     )
+    producto_nombre: Optional[str] = Field(
+        None,
+        description="Nombre del producto",
+        example="Martillo Profesional"
+    )
+    producto_codigo: Optional[str] = Field(
+        None,
+        description="Código de barras del producto",
+        example="7790001234567"
+    )
+    sucursal_nombre: Optional[str] = Field(
+        None,
+        description="Nombre de la sucursal",
+        example="Sucursal Centro"
+    )
 
     class Config:
         from_attributes = True
@@ -135,3 +150,14 @@ class InventarioCompleta(InventarioSimple):
                 "dias_sin_movimiento": 5
             }
         }
+
+# Schema para lista paginada de inventario (por offset o por cursor)
+class InventarioList(BaseModel):
+    total: Optional[int] = Field(None, description="Total de registros")
+    pagina: Optional[int] = Field(None, description="Página actual")
+    paginas: Optional[int] = Field(None, description="Total de páginas")
+    items: List[InventarioSimple]
+    next_cursor: Optional[str] = Field(None, description="Cursor de la página siguiente (paginación por cursor)")
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,184 @@
+from starlette.routing import BaseRoute, Match, NoMatchFound
+from fastapi import FastAPI
+from typing import Callable, Optional
+import importlib
+import threading
+import hashlib
+import logging
+import pkgutil
+import json
+import time
+import os
+
+import APP
+import APP.DB
+from APP.services.Entorno_service import env_bool
+
+# Arranque rápido: los routers (y con ellos los schemas de pydantic, jose, passlib, etc.)
+# se importan recién cuando llega el primer request a su prefijo. Al arrancar solo se
+# registra un marcador por prefijo; el primer request lo reemplaza por las rutas reales.
+# El documento OpenAPI se guarda en OPENAPI_CACHE junto con una huella del código, así
+# /docs no obliga a cargar todos los routers mientras el código no cambie.
+
+CARGA_DIFERIDA_ROUTERS = env_bool("CARGA_DIFERIDA_ROUTERS", True)
+# Archivo del OpenAPI precalculado (vacío lo desactiva)
+OPENAPI_CACHE = os.getenv("OPENAPI_CACHE", "openapi_cache.json")
+
+# (prefijo, módulo) de cada router, en el orden en que se registran
+ROUTERS = [
+    ("/categorias", "APP.routers.Categorias_router"),
+    ("/unidades-medida", "APP.routers.Unidades_de_medida_router"),
+    ("/sucursales", "APP.routers.Sucursales_router"),
+    ("/usuarios", "APP.routers.Usuarios_router"),
+    ("/productos", "APP.routers.Productos_router"),
+    ("/clientes", "APP.routers.Clientes_router"),
+    ("/proveedores", "APP.routers.Proveedores_router"),
+    ("/inventario", "APP.routers.Inventario_router"),
+    ("/facturas", "APP.routers.Facturas_Venta_router"),
+    ("/detalles-factura", "APP.routers.Detalles_Factura_Venta_router"),
+    ("/pagos", "APP.routers.Pagos_router"),
+    ("/ordenes-compra", "APP.routers.Ordenes_Compra_router"),
+    ("/detalle-oc", "APP.routers.Detalle_OC_router"),
+    ("/movimientos-inventario", "APP.routers.Movimientos_Inventario_router"),
+    ("/garantias", "APP.routers.Garantias_router"),
+    ("/descuentos", "APP.routers.Descuentos_router"),
+    ("/productos-descuentos", "APP.routers.Productos_Descuentos_router"),
+    ("/devoluciones", "APP.routers.Devoluciones_router"),
+    ("/transferencias", "APP.routers.Transferencias_Sucursales_router"),
+    ("/detalles-transferencia", "APP.routers.Detalles_Transferencias_router"),
+    ("/auditoria", "APP.routers.Auditoria_Cambios_router"),
+    ("/sistema", "APP.routers.Sistema_router"),
+]
+
+logger = logging.getLogger("main.arranque")
+
+# Los modelos se importan siempre al arrancar: las relationship se resuelven por nombre y
+# el mapper necesita todas las clases aunque el router que las usa todavía no se cargó
+def importar_modelos():
+    for modulo in pkgutil.iter_modules(APP.DB.__path__):
+        importlib.import_module(f"APP.DB.{modulo.name}")
+
+class CargadorRouters:
+    def __init__(self, app, al_cargar: Optional[Callable[[list], None]] = None):
+        self.app = app
+        self.al_cargar = al_cargar
+        self.cargados = set()
+        self._lock = threading.Lock()
+
+    def cargar(self, prefijo: str, modulo: str):
+        with self._lock:
+            if prefijo in self.cargados:
+                return
+            inicio = time.perf_counter()
+            router = importlib.import_module(modulo).router
+            rutas = self.app.router.routes
+            antes = len(rutas)
+            self.app.include_router(router)
+            nuevas = rutas[antes:]
+            # El marcador ya no hace falta: desde ahora el prefijo lo atienden sus rutas
+            rutas[:] = [r for r in rutas if not (isinstance(r, RouterDiferido) and r.prefijo == prefijo)]
+            if self.al_cargar is not None:
+                self.al_cargar(nuevas)
+            self.cargados.add(prefijo)
+        logger.info(f"Router {modulo} cargado en {(time.perf_counter() - inicio) * 1000:.1f}ms")
+
+    def cargar_todos(self):
+        for prefijo, modulo in ROUTERS:
+            self.cargar(prefijo, modulo)
+
+# Marcador de un router sin cargar: acepta cualquier path bajo su prefijo, carga el router
+# y vuelve a despachar el request por el router de la app, que ya tiene las rutas reales
+class RouterDiferido(BaseRoute):
+    def __init__(self, cargador: CargadorRouters, prefijo: str, modulo: str):
+        self.cargador = cargador
+        self.prefijo = prefijo
+        self.modulo = modulo
+
+    def matches(self, scope):
+        if scope["type"] not in ("http", "websocket"):
+            return Match.NONE, {}
+        path = scope["path"]
+        root_path = scope.get("root_path", "")
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+        if path == self.prefijo or path.startswith(self.prefijo + "/"):
+            return Match.FULL, {}
+        return Match.NONE, {}
+
+    def url_path_for(self, name: str, /, **path_params):
+        raise NoMatchFound(name, path_params)
+
+    async def handle(self, scope, receive, send):
+        self.cargador.cargar(self.prefijo, self.modulo)
+        await self.cargador.app.router.app(scope, receive, send)
+
+# Se llama una vez en main, en el lugar donde antes se incluían los routers. "al_cargar"
+# recibe las rutas nuevas de cada router que se carga
+def registrar_routers(app, al_cargar: Optional[Callable[[list], None]] = None) -> CargadorRouters:
+    cargador = CargadorRouters(app, al_cargar)
+    if CARGA_DIFERIDA_ROUTERS:
+        for prefijo, modulo in ROUTERS:
+            app.router.routes.append(RouterDiferido(cargador, prefijo, modulo))
+    else:
+        cargador.cargar_todos()
+    return cargador
+
+# --- OpenAPI precalculado ---
+
+# Huella del código que define el documento: fuentes de la app y versiones de FastAPI/pydantic
+def huella_codigo(version_app: str) -> str:
+    import fastapi
+    import pydantic
+
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(APP.__file__)))
+    archivos = [os.path.join(raiz, "main.py"), os.path.join(raiz, "database.py")]
+    for carpeta, _, nombres in os.walk(os.path.dirname(os.path.abspath(APP.__file__))):
+        archivos.extend(os.path.join(carpeta, n) for n in nombres if n.endswith(".py"))
+
+    huella = hashlib.sha256(f"{version_app}|{fastapi.__version__}|{pydantic.VERSION}".encode())
+    for archivo in sorted(archivos):
+        huella.update(os.path.relpath(archivo, raiz).encode())
+        with open(archivo, "rb") as f:
+            huella.update(f.read())
+    return huella.hexdigest()
+
+def _leer_cache(huella: str) -> Optional[dict]:
+    try:
+        with open(OPENAPI_CACHE, encoding="utf-8") as f:
+            guardado = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return guardado.get("documento") if guardado.get("huella") == huella else None
+
+def _guardar_cache(huella: str, documento: dict):
+    temporal = f"{OPENAPI_CACHE}.{os.getpid()}.tmp"
+    try:
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump({"huella": huella, "documento": documento}, f, ensure_ascii=False)
+        # Reemplazo atómico: otro worker puede estar leyendo el archivo
+        os.replace(temporal, OPENAPI_CACHE)
+    except OSError as e:
+        logger.warning(f"No se pudo guardar el OpenAPI en {OPENAPI_CACHE}: {e}")
+
+# Reemplaza app.openapi: el documento sale del archivo si la huella coincide; si no, se
+# cargan todos los routers, se genera y se guarda para los próximos arranques y workers
+def instalar_openapi_cacheado(app, cargador: CargadorRouters):
+    def openapi() -> dict:
+        if app.openapi_schema:
+            return app.openapi_schema
+        inicio = time.perf_counter()
+        huella = huella_codigo(app.version) if OPENAPI_CACHE else None
+        documento = _leer_cache(huella) if huella else None
+        if documento is None:
+            cargador.cargar_todos()
+            documento = FastAPI.openapi(app)
+            if huella:
+                _guardar_cache(huella, documento)
+            origen = "generado"
+        else:
+            origen = "leído de la cache"
+        app.openapi_schema = documento
+        logger.info(f"OpenAPI {origen} en {(time.perf_counter() - inicio) * 1000:.1f}ms")
+        return documento
+
+    app.openapi = openapi
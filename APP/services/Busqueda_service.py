@@ -0,0 +1,574 @@
+from sqlalchemy import func, or_, select
+from typing import Dict, List, Optional, Set, Tuple, Union
+from bisect import bisect_left, insort
+import heapq
+import unicodedata
+import logging
+import time
+import re
+import os
+
+from APP.services.Entorno_service import env_bool
+from APP.DB.Productos_model import Productos
+from APP.DB.Detalles_Factura_Venta_model import Detalles_Factura_Venta
+from APP.services.Cache_productos_service import CacheProductos, leer_filas, suscribir
+
+# Búsqueda de productos en memoria. Reemplaza los ilike('%texto%') sobre Nombre, Marca, Modelo,
+# Descripcion y códigos, que ningún índice B-tree puede resolver y recorren la tabla entera.
+# Una sola palabra encuentra lo mismo que condicion_sql(texto): como parte de cualquier palabra
+# de los campos o de un código. Con varias (o con signos en el medio) pide cada término por
+# separado (AND), así que incluye todo lo que encuentra el ilike del texto entero y también
+# otros órdenes ("6 tornillo").
+#
+# - Índice invertido por campo: palabra normalizada -> documentos (sin tildes ni mayúsculas,
+#   "Destornillador Phillips" y "destornillador phillips" son lo mismo, la ñ queda como n).
+# - Índice de trigramas sobre el vocabulario para encontrar las palabras que contienen un
+#   término ("tornil" -> tornillo, destornillador); los de 1-2 letras recorren el vocabulario.
+# - Códigos de barras y SKU en un diccionario (exacto) y trigramas -> documentos (parte del código).
+# - Varios términos se combinan con AND y el resultado se ordena por niveles: código exacto,
+#   todos los términos como palabra o prefijo en nombre/marca/modelo, como parte de una palabra
+#   del nombre, y el resto (descripción). Dentro de cada nivel, los más vendidos primero
+#   (unidades en Detalles_Factura_Venta) y después los nombres más cortos.
+# - Autocompletado: productos con todos los términos como prefijo en nombre/marca/modelo, y
+#   marcas que empiezan con el texto (lista ordenada de marcas, se busca con bisect).
+#
+# Los conjuntos de documentos se operan como mapas de bits (un int de Python, bit n = documento
+# n): AND/OR/conteo sobre 500.000 productos toman microsegundos. Las palabras frecuentes guardan
+# el mapa de bits armado; las poco frecuentes una lista, que ocupa menos.
+#
+# Se arma en segundo plano (ver Cache_productos_service); mientras tanto, y desde un cambio
+# masivo hasta que termina la recarga, los endpoints usan condicion_sql. Los cambios hechos en
+# este proceso se aplican al confirmar la transacción y los de otros procesos se leen cada
+# BUSQUEDA_SINCRONIZAR_SEGUNDOS.
+
+BUSQUEDA_INDICE = env_bool("BUSQUEDA_INDICE", True)
+BUSQUEDA_SINCRONIZAR_SEGUNDOS = float(os.getenv("BUSQUEDA_SINCRONIZAR_SEGUNDOS", "60"))
+# Cada cuánto se reconstruye el índice entero (actualiza la popularidad por ventas)
+BUSQUEDA_RECONSTRUIR_SEGUNDOS = float(os.getenv("BUSQUEDA_RECONSTRUIR_SEGUNDOS", "86400"))
+# Máximo de ids que se pasan a SQL (IN) cuando la búsqueda se combina con filtros que el
+# índice no conoce; con más resultados se usa la consulta SQL completa
+BUSQUEDA_MAX_IDS_SQL = int(os.getenv("BUSQUEDA_MAX_IDS_SQL", "1000"))
+
+# Documentos agregados desde la última construcción (productos nuevos o versiones nuevas de
+# productos modificados) a partir de los cuales conviene reconstruir
+MAX_CAMBIOS = 0.25
+# Textos más cortos van a SQL: como parte de un código coincidirían con casi todo el catálogo
+LARGO_MINIMO = 3
+# Una palabra guarda mapa de bits si aparece en al menos 1 de cada N documentos (con 64 el mapa
+# ocupa lo mismo que la lista; con más se gana velocidad a cambio de memoria)
+FRECUENCIA_MAPA_BITS = 256
+
+NOMBRE, MARCA, MODELO, DESCRIPCION = range(4)
+CAMPOS_TODOS = (NOMBRE, MARCA, MODELO, DESCRIPCION)
+CAMPOS_TITULO = (NOMBRE, MARCA, MODELO)
+
+# Palabras que no filtran nada ("martillo de uña"); se ignoran si la búsqueda tiene otras
+PALABRAS_VACIAS = frozenset(["de", "del", "la", "las", "el", "los", "para", "con", "sin", "y", "en", "a", "p"])
+
+COLUMNAS = (
+    Productos.ID_Producto,
+    Productos.Nombre,
+    Productos.Marca,
+    Productos.Modelo,
+    Productos.Descripcion,
+    Productos.Codigo_Barras,
+    Productos.SKU,
+    Productos.Activo,
+    Productos.ID_Categoria
+)
+
+logger = logging.getLogger("main.busqueda")
+
+_SEPARADORES = re.compile(r"[^0-9a-z]+")
+_BYTE_NO_CERO = re.compile(rb"[^\x00]")
+# Posiciones de los bits encendidos de cada valor de byte
+_BITS_DE_BYTE = tuple(tuple(b for b in range(8) if valor >> b & 1) for valor in range(256))
+_BLOQUE_BYTES = 4096
+
+# Minúsculas y sin tildes/diéresis (NFKD separa la marca de la letra y se descarta)
+def normalizar(texto: Optional[str]) -> str:
+    if not texto:
+        return ""
+    return unicodedata.normalize("NFKD", texto.casefold()).encode("ascii", "ignore").decode("ascii")
+
+def palabras(texto: Optional[str]) -> List[str]:
+    return [p for p in _SEPARADORES.split(normalizar(texto)) if p]
+
+def normalizar_codigo(codigo: Optional[str]) -> str:
+    return codigo.strip().casefold() if codigo else ""
+
+# Términos de una búsqueda, sin repetidos ni palabras vacías (salvo que sean las únicas)
+def _terminos(texto: str) -> List[str]:
+    terminos = list(dict.fromkeys(palabras(texto)))
+    if any(t not in PALABRAS_VACIAS for t in terminos):
+        terminos = [t for t in terminos if t not in PALABRAS_VACIAS]
+    return terminos
+
+def _trigramas(palabra: str):
+    return {palabra[i:i + 3] for i in range(len(palabra) - 2)}
+
+# Mapa de bits de una colección de documentos
+def _a_bits(docs) -> int:
+    if not docs:
+        return 0
+    datos = bytearray(max(docs) // 8 + 1)
+    for doc in docs:
+        datos[doc >> 3] |= 1 << (doc & 7)
+    return int.from_bytes(datos, "little")
+
+# Documentos (en orden) de un mapa de bits, salteando los primeros "desde" (cantidad None: todos)
+def _docs_de_bits(bits: int, desde: int, cantidad: Optional[int]) -> List[int]:
+    datos = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+    docs = []
+    for bloque in range(0, len(datos), _BLOQUE_BYTES):
+        fin = bloque + _BLOQUE_BYTES
+        if desde:
+            en_bloque = int.from_bytes(datos[bloque:fin], "little").bit_count()
+            if en_bloque <= desde:
+                desde -= en_bloque
+                continue
+        for encontrado in _BYTE_NO_CERO.finditer(datos, bloque, fin):
+            posicion = encontrado.start()
+            for bit in _BITS_DE_BYTE[datos[posicion]]:
+                if desde:
+                    desde -= 1
+                    continue
+                docs.append(posicion * 8 + bit)
+                if len(docs) == cantidad:
+                    return docs
+    return docs
+
+class IndiceProductos:
+    def __init__(self):
+        # Al construir, los documentos se numeran por relevancia (más vendidos primero, después
+        # nombres más cortos y el ID), así el orden de los bits ya es el orden del resultado. Un
+        # producto nuevo o modificado se agrega al final y la versión anterior queda obsoleta
+        # hasta la próxima reconstrucción
+        self.ids: List[int] = []
+        self.huellas: List[int] = []
+        # (nombre, marca, modelo) y unidades vendidas de cada documento, para el autocompletado
+        self.titulos: List[Tuple[Optional[str], Optional[str], Optional[str]]] = []
+        self.ventas: List[int] = []
+        self.codigos_doc: List[Tuple[str, ...]] = []
+        self.doc_por_id: Dict[int, int] = {}
+        self.construidos = 0
+        self.obsoletos = 0
+        self.cantidad_obsoletos = 0
+        self.inactivos = 0
+        self.por_categoria: Dict[int, int] = {}
+        self.postings: Tuple[Dict[str, Union[List[int], int]], ...] = tuple({} for _ in CAMPOS_TODOS)
+        self.vocabulario: List[str] = []
+        self.trigramas: Dict[str, Set[str]] = {}
+        self.codigos: Dict[str, int] = {}
+        # trigrama de código -> documentos (como postings)
+        self.postings_codigos: Dict[str, Union[List[int], int]] = {}
+        # marca normalizada -> [marca, productos, unidades vendidas]
+        self.marcas: Dict[str, list] = {}
+        self.marcas_ordenadas: List[str] = []
+        self._conocidas: Set[str] = set()
+        self._cargando = False
+
+    # ventas: unidades vendidas por ID de producto
+    @classmethod
+    def construir(cls, filas, ventas: Optional[Dict[int, int]] = None) -> "IndiceProductos":
+        ventas = ventas or {}
+        indice = cls()
+        indice._cargando = True
+        inactivos = []
+        por_categoria = {}
+        for fila in sorted(filas, key=lambda f: (-ventas.get(f[0], 0), len(f[1] or ""), f[0])):
+            doc = indice.agregar(fila, ventas.get(fila[0], 0))
+            if doc is None:
+                continue
+            if not fila[7]:
+                inactivos.append(doc)
+            por_categoria.setdefault(fila[8], []).append(doc)
+        indice._cargando = False
+        indice.construidos = len(indice.ids)
+        indice.inactivos = _a_bits(inactivos)
+        indice.por_categoria = {categoria: _a_bits(docs) for categoria, docs in por_categoria.items()}
+        minimo = indice.construidos // FRECUENCIA_MAPA_BITS
+        for postings in (*indice.postings, indice.postings_codigos):
+            for palabra, lista in postings.items():
+                if len(lista) > minimo:
+                    postings[palabra] = _a_bits(lista)
+        indice.vocabulario.sort()
+        indice.marcas_ordenadas.sort()
+        return indice
+
+    def documentos(self) -> int:
+        return len(self.doc_por_id)
+
+    # Proporción de documentos agregados desde la construcción
+    def proporcion_cambios(self) -> float:
+        return (len(self.ids) - self.construidos) / max(self.construidos, 1)
+
+    # fila: valores de COLUMNAS en ese orden. Devuelve el documento nuevo (None si no cambió).
+    # Un producto modificado conserva las ventas de su versión anterior
+    def agregar(self, fila: tuple, ventas: int = 0) -> Optional[int]:
+        id_producto, nombre, marca, modelo, descripcion, codigo_barras, sku, activo, id_categoria = fila
+        anterior = self.doc_por_id.get(id_producto)
+        if anterior is not None:
+            if self.huellas[anterior] == hash(fila):
+                return None
+            ventas = self.ventas[anterior]
+            self._quitar(anterior)
+
+        doc = len(self.ids)
+        self.ids.append(id_producto)
+        self.huellas.append(hash(fila))
+        self.ventas.append(ventas)
+        self.doc_por_id[id_producto] = doc
+        clave_marca = " ".join(palabras(marca))
+        if clave_marca:
+            datos_marca = self.marcas.get(clave_marca)
+            if datos_marca is None:
+                self.marcas[clave_marca] = datos_marca = [marca, 0, 0]
+                self._insertar_ordenado(self.marcas_ordenadas, clave_marca)
+            # Todos los productos de la marca comparten el mismo texto
+            marca = datos_marca[0]
+            if activo:
+                datos_marca[1] += 1
+                datos_marca[2] += ventas
+        self.titulos.append((nombre, marca, modelo))
+        # Durante la construcción los mapas de bits se arman al final
+        if not self._cargando:
+            bit = 1 << doc
+            if not activo:
+                self.inactivos |= bit
+            self.por_categoria[id_categoria] = self.por_categoria.get(id_categoria, 0) | bit
+
+        for campo, texto in ((NOMBRE, nombre), (MARCA, marca), (MODELO, modelo), (DESCRIPCION, descripcion)):
+            for palabra in set(palabras(texto)):
+                if self._anotar(self.postings[campo], palabra, doc) and palabra not in self._conocidas:
+                    self._nueva_palabra(palabra)
+
+        codigos = tuple(filter(None, (normalizar_codigo(codigo_barras), normalizar_codigo(sku))))
+        self.codigos_doc.append(codigos)
+        for codigo in codigos:
+            self.codigos[codigo] = doc
+        for trigrama in set().union(*map(_trigramas, codigos)):
+            self._anotar(self.postings_codigos, trigrama, doc)
+        return doc
+
+    # Agrega el documento a la lista (o mapa de bits) de la clave; True si la clave es nueva
+    def _anotar(self, postings: dict, clave: str, doc: int) -> bool:
+        lista = postings.get(clave)
+        if lista is None:
+            postings[clave] = [doc]
+            return True
+        if isinstance(lista, int):
+            postings[clave] = lista | 1 << doc
+        else:
+            lista.append(doc)
+        return False
+
+    def quitar(self, id_producto: int):
+        doc = self.doc_por_id.pop(id_producto, None)
+        if doc is not None:
+            self._quitar(doc)
+
+    def _quitar(self, doc: int):
+        self.obsoletos |= 1 << doc
+        self.cantidad_obsoletos += 1
+        datos_marca = self.marcas.get(" ".join(palabras(self.titulos[doc][1])))
+        if datos_marca is not None and not self.inactivos >> doc & 1:
+            datos_marca[1] -= 1
+            datos_marca[2] -= self.ventas[doc]
+        for codigo in self.codigos_doc[doc]:
+            if self.codigos.get(codigo) == doc:
+                del self.codigos[codigo]
+
+    def _nueva_palabra(self, palabra: str):
+        self._conocidas.add(palabra)
+        self._insertar_ordenado(self.vocabulario, palabra)
+        for trigrama in _trigramas(palabra):
+            self.trigramas.setdefault(trigrama, set()).add(palabra)
+
+    def _insertar_ordenado(self, lista: list, valor: str):
+        # Durante la carga inicial se ordena una sola vez al final
+        if self._cargando:
+            lista.append(valor)
+        else:
+            insort(lista, valor)
+
+    def _rango_prefijo(self, lista: List[str], prefijo: str) -> List[str]:
+        return lista[bisect_left(lista, prefijo):bisect_left(lista, prefijo + "\x7f")]
+
+    # Documentos de un término como mapas de bits: (palabra o prefijo en nombre/marca/modelo,
+    # parte de una palabra de nombre/marca/modelo, cualquier campo)
+    def _coincidencias(self, termino: str, campos) -> Tuple[int, int, int]:
+        if len(termino) >= 3:
+            grupos = [self.trigramas.get(t) for t in _trigramas(termino)]
+            if not all(grupos):
+                return 0, 0, 0
+            grupos.sort(key=len)
+            candidatas = [p for p in grupos[0].intersection(*grupos[1:]) if termino in p]
+        else:
+            candidatas = [p for p in self.vocabulario if termino in p]
+
+        # [mapa de bits, documentos de las palabras poco frecuentes] por nivel
+        niveles = ([0, []], [0, []], [0, []])
+        for palabra in candidatas:
+            prefijo = palabra.startswith(termino)
+            for campo in campos:
+                docs = self.postings[campo].get(palabra)
+                if not docs:
+                    continue
+                nivel = niveles[2 if campo == DESCRIPCION else 0 if prefijo else 1]
+                if isinstance(docs, int):
+                    nivel[0] |= docs
+                else:
+                    nivel[1].extend(docs)
+        fuertes, titulo, todos = (bits | _a_bits(docs) for bits, docs in niveles)
+        titulo |= fuertes
+        todos |= titulo
+        return fuertes, titulo, todos
+
+    # Documentos con un código de barras o SKU que contiene el texto (de 3 caracteres o más)
+    def _por_codigo(self, codigo: str) -> int:
+        grupos = [self.postings_codigos.get(t) for t in _trigramas(codigo)]
+        if not grupos or not all(grupos):
+            return 0
+        bits = -1
+        for docs in grupos:
+            bits &= docs if isinstance(docs, int) else _a_bits(docs)
+        if len(codigo) == 3:
+            return bits
+        # Los trigramas pueden estar en otro orden o en el otro código del producto
+        return _a_bits([
+            doc for doc in _docs_de_bits(bits, 0, None)
+            if any(codigo in propio for propio in self.codigos_doc[doc])
+        ])
+
+    # Total de coincidencias e IDs de producto de la ventana pedida, en orden de relevancia
+    def buscar(
+        self,
+        texto: str,
+        activo: Optional[bool] = None,
+        categoria_id: Optional[int] = None,
+        campos=CAMPOS_TODOS,
+        desde: int = 0,
+        cantidad: Optional[int] = None
+    ) -> Tuple[int, List[int]]:
+        terminos = _terminos(texto)
+        codigo = normalizar_codigo(texto)
+        exactos = 0
+        por_codigo = 0
+        if codigo:
+            doc = self.codigos.get(codigo)
+            if doc is not None:
+                exactos = 1 << doc
+            if len(codigo) >= LARGO_MINIMO:
+                por_codigo = self._por_codigo(codigo)
+
+        if terminos:
+            fuertes, titulo, resultado = -1, -1, -1
+            for termino in terminos:
+                coincidencias = self._coincidencias(termino, campos)
+                fuertes &= coincidencias[0]
+                titulo &= coincidencias[1]
+                resultado &= coincidencias[2]
+                if not resultado:
+                    break
+            niveles = [exactos, fuertes | por_codigo, titulo, resultado]
+            resultado |= exactos | por_codigo
+        else:
+            niveles = [exactos, por_codigo]
+            resultado = exactos | por_codigo
+
+        resultado &= ~self.obsoletos
+        if activo is True:
+            resultado &= ~self.inactivos
+        elif activo is False:
+            resultado &= self.inactivos
+        if categoria_id is not None:
+            resultado &= self.por_categoria.get(categoria_id, 0)
+
+        total = resultado.bit_count()
+        hasta = total if cantidad is None else min(total, desde + cantidad)
+        docs = []
+        vistos = 0
+        pendientes = resultado
+        for nivel in niveles:
+            if vistos >= hasta or not pendientes:
+                break
+            del_nivel = pendientes & nivel
+            pendientes &= ~nivel
+            en_nivel = del_nivel.bit_count()
+            # Los niveles que quedan enteros antes de la ventana no hace falta recorrerlos
+            if vistos + en_nivel > desde:
+                inicio = max(0, desde - vistos)
+                docs.extend(_docs_de_bits(del_nivel, inicio, min(en_nivel, hasta - vistos) - inicio))
+            vistos += en_nivel
+        return total, [self.ids[doc] for doc in docs]
+
+    # Productos activos con todos los términos como prefijo de una palabra de nombre/marca/modelo
+    # (los más vendidos primero) y marcas que empiezan con el texto (las que más venden primero)
+    def autocompletar(self, texto: str, cantidad: int) -> Tuple[List[dict], List[dict]]:
+        terminos = _terminos(texto)
+        if not terminos:
+            return [], []
+        encontrados = -1
+        for termino in terminos:
+            encontrados &= self._coincidencias(termino, CAMPOS_TITULO)[0]
+            if not encontrados:
+                break
+        encontrados &= ~(self.obsoletos | self.inactivos)
+        productos = []
+        for doc in _docs_de_bits(encontrados, 0, cantidad):
+            nombre, marca, modelo = self.titulos[doc]
+            productos.append({
+                "id": self.ids[doc],
+                "nombre": nombre,
+                "marca": marca,
+                "modelo": modelo,
+                "ventas": self.ventas[doc]
+            })
+
+        claves = self._rango_prefijo(self.marcas_ordenadas, " ".join(palabras(texto)))
+        marcas = heapq.nlargest(
+            cantidad,
+            (self.marcas[clave] for clave in claves if self.marcas[clave][1] > 0),
+            key=lambda datos: datos[2]
+        )
+        return productos, [{"marca": marca, "productos": total, "ventas": ventas} for marca, total, ventas in marcas]
+
+# Índice compartido por el proceso: mientras se reconstruye se sigue usando el anterior
+class BuscadorProductos(CacheProductos):
+    COLUMNAS = COLUMNAS
+    NOMBRE = "el índice de búsqueda"
+    logger = logger
+
+    def __init__(self):
+        super().__init__(BUSQUEDA_SINCRONIZAR_SEGUNDOS)
+        self.indice: Optional[IndiceProductos] = None
+        self.consultas = 0
+        self.tiempo_consultas = 0.0
+        self.autocompletados = 0
+        self.tiempo_autocompletados = 0.0
+        self._proxima_reconstruccion = 0.0
+        # Hubo un cambio masivo y la recarga todavía no terminó
+        self._desactualizado = False
+
+    def listo(self) -> bool:
+        return self.indice is not None and not self._desactualizado
+
+    # None si el índice todavía no está o está desactualizado, y para textos que no se
+    # resuelven en memoria (muy cortos o sin palabras): el endpoint usa condicion_sql
+    def buscar(self, texto: str, **opciones) -> Optional[Tuple[int, List[int]]]:
+        if not BUSQUEDA_INDICE:
+            return None
+        self._programar()
+        if not self.listo() or len(normalizar_codigo(texto)) < LARGO_MINIMO or not palabras(texto):
+            return None
+        inicio = time.perf_counter()
+        with self._lock:
+            resultado = self.indice.buscar(texto, **opciones)
+        self.consultas += 1
+        self.tiempo_consultas += time.perf_counter() - inicio
+        return resultado
+
+    # (productos, marcas) sugeridos para un texto a medio escribir; None si el índice no está
+    def autocompletar(self, texto: str, cantidad: int) -> Optional[Tuple[List[dict], List[dict]]]:
+        if not BUSQUEDA_INDICE:
+            return None
+        self._programar()
+        if not self.listo():
+            return None
+        inicio = time.perf_counter()
+        with self._lock:
+            resultado = self.indice.autocompletar(texto, cantidad)
+        self.autocompletados += 1
+        self.tiempo_autocompletados += time.perf_counter() - inicio
+        return resultado
+
+    def _cargada(self) -> bool:
+        return self.indice is not None
+
+    def _necesita_carga(self) -> bool:
+        return super()._necesita_carga() or time.monotonic() >= self._proxima_reconstruccion
+
+    # Filas de COLUMNAS y unidades vendidas por producto (popularidad)
+    async def _leer(self, db):
+        filas = await leer_filas(db, COLUMNAS)
+        ventas = dict((await db.execute(
+            select(Detalles_Factura_Venta.ID_Producto, func.sum(Detalles_Factura_Venta.Cantidad))
+            .group_by(Detalles_Factura_Venta.ID_Producto)
+        )).all())
+        return filas, ventas
+
+    def _armar(self, datos):
+        filas, ventas = datos
+        return IndiceProductos.construir(filas, ventas)
+
+    def _instalar(self, indice):
+        self.indice = indice
+        self._desactualizado = False
+        self._proxima_reconstruccion = time.monotonic() + BUSQUEDA_RECONSTRUIR_SEGUNDOS
+
+    # Hasta que termine la recarga, el endpoint va a la base
+    def _al_recargar(self):
+        self._desactualizado = True
+
+    def _resumen_carga(self) -> str:
+        return (
+            f"Índice de búsqueda armado: {self.indice.documentos()} productos, "
+            f"{len(self.indice.vocabulario)} palabras"
+        )
+
+    def _poner_fila(self, fila: tuple):
+        self.indice.agregar(fila)
+
+    def _quitar(self, id_producto: int):
+        self.indice.quitar(id_producto)
+
+    def _revisar(self):
+        if self.indice.proporcion_cambios() > MAX_CAMBIOS:
+            self._recargar = True
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            indice = self.indice
+            return {
+                "activo": BUSQUEDA_INDICE,
+                "listo": indice is not None,
+                "desactualizado": self._desactualizado,
+                "productos": indice.documentos() if indice else 0,
+                "palabras": len(indice.vocabulario) if indice else 0,
+                "obsoletos": indice.cantidad_obsoletos if indice else 0,
+                "construcciones": self.cargas,
+                "duracion_construccion_s": round(self.duracion_carga, 3),
+                "consultas": self.consultas,
+                "consulta_promedio_ms": round(self.tiempo_consultas / self.consultas * 1000, 4) if self.consultas else 0.0,
+                "autocompletados": self.autocompletados,
+                "autocompletado_promedio_ms": round(self.tiempo_autocompletados / self.autocompletados * 1000, 4) if self.autocompletados else 0.0,
+                "marcas": len(indice.marcas) if indice else 0,
+                "pendientes_de_releer": len(self._releer),
+                "error": self.error
+            }
+
+# Columna de cada campo del índice
+_COLUMNAS_CAMPO = {
+    NOMBRE: Productos.Nombre,
+    MARCA: Productos.Marca,
+    MODELO: Productos.Modelo,
+    DESCRIPCION: Productos.Descripcion
+}
+
+# La búsqueda en SQL, sobre los mismos campos que el índice y los códigos
+def condicion_sql(texto: str, campos=CAMPOS_TODOS):
+    patron = f"%{texto}%"
+    return or_(
+        *(_COLUMNAS_CAMPO[campo].ilike(patron) for campo in campos),
+        Productos.Codigo_Barras.ilike(patron),
+        Productos.SKU.ilike(patron)
+    )
+
+buscador_productos = BuscadorProductos()
+suscribir(buscador_productos)
+
+# Se llama al arrancar la app (desde el event loop) para no esperar a la primera búsqueda
+def precargar_busqueda():
+    if BUSQUEDA_INDICE:
+        buscador_productos._programar()
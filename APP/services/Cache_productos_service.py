@@ -0,0 +1,313 @@
+from sqlalchemy import event, inspect, or_, select
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from contextlib import contextmanager
+from typing import Callable, List, Optional, Set, Tuple
+from itertools import chain
+from abc import ABC, abstractmethod
+import contextvars
+import threading
+import asyncio
+import logging
+import time
+
+from APP.DB.Productos_model import Productos
+
+# Base de las copias en memoria de Productos (tabla de códigos, índice de búsqueda) y de los
+# eventos de sesión que les avisan qué cambió.
+#
+# - CacheProductos: carga completa en segundo plano con la sesión asíncrona (filas por lotes,
+#   armado en un hilo), sincronización por Fecha_Actualizacion cada sincronizar_segundos y
+#   cambios confirmados en este proceso, que se guardan si llegan durante una carga.
+# - registrar_colector: junta en session.info lo que cambia en cada flush y en cada
+#   INSERT/UPDATE/DELETE masivo, y lo entrega al confirmar la transacción (si se deshace, se
+#   descarta). Los productos tienen un solo colector; las caches se suscriben con suscribir().
+# - recargar_al_terminar: para procesos que confirman muchos cambios masivos seguidos (la
+#   importación de productos), una sola recarga al final en vez de una por transacción.
+
+# Margen al sincronizar por Fecha_Actualizacion (transacciones largas, relojes distintos)
+MARGEN_SINCRONIZACION = timedelta(seconds=5)
+FILAS_POR_LOTE = 5000
+
+# Filas de las columnas pedidas, leídas por lotes con una sesión asíncrona
+async def leer_filas(db, columnas) -> List[tuple]:
+    filas = []
+    resultado = await db.stream(select(*columnas).execution_options(yield_per=FILAS_POR_LOTE))
+    async for lote in resultado.partitions(FILAS_POR_LOTE):
+        filas.extend(tuple(fila) for fila in lote)
+    return filas
+
+# Cada cache define COLUMNAS (las filas que lee, empezando por ID_Producto), NOMBRE (para los
+# mensajes) y los métodos de la sección de abajo; los que tocan los datos se llaman con el lock
+class CacheProductos(ABC):
+    COLUMNAS: tuple = ()
+    NOMBRE = "la cache de productos"
+    logger = logging.getLogger("main")
+
+    def __init__(self, sincronizar_segundos: float):
+        self.sincronizar_segundos = sincronizar_segundos
+        self._atributos = tuple(columna.key for columna in self.COLUMNAS)
+        self._lock = threading.Lock()
+        self._tarea: Optional[asyncio.Task] = None
+        # Cambios confirmados mientras se carga (se aplican al terminar)
+        self._durante_carga: Optional[list] = None
+        self._releer: Set[int] = set()
+        self._recargar = False
+        self._sincronizado_hasta: Optional[datetime] = None
+        self._proxima_sincronizacion = 0.0
+        self.cargas = 0
+        self.duracion_carga = 0.0
+        self.error: Optional[str] = None
+
+    # --- Propio de cada cache ---
+
+    @abstractmethod
+    def _cargada(self) -> bool:
+        ...
+
+    # Lo que necesita _armar; por defecto las filas de COLUMNAS
+    async def _leer(self, db):
+        return await leer_filas(db, self.COLUMNAS)
+
+    # Corre en un hilo, fuera del event loop
+    @abstractmethod
+    def _armar(self, datos):
+        ...
+
+    @abstractmethod
+    def _instalar(self, armado):
+        ...
+
+    # Texto del log al terminar una carga (sin la duración)
+    @abstractmethod
+    def _resumen_carga(self) -> str:
+        ...
+
+    # fila: valores de COLUMNAS en ese orden
+    @abstractmethod
+    def _poner_fila(self, fila: tuple):
+        ...
+
+    @abstractmethod
+    def _quitar(self, id_producto: int):
+        ...
+
+    # Llegó un cambio masivo: no se sabe qué filas cambiaron
+    def _al_recargar(self):
+        pass
+
+    # Después de sincronizar o de aplicar cambios (puede pedir una recarga)
+    def _revisar(self):
+        pass
+
+    def _necesita_carga(self) -> bool:
+        return not self._cargada() or self._recargar
+
+    # --- Carga y sincronización ---
+
+    # Arranca la carga o la sincronización si corresponde (solo desde el event loop). Si la
+    # carga falla se reintenta después de sincronizar_segundos. La tarea corre en un contexto
+    # vacío: si copiara el del request que la dispara, sus consultas se sumarían a las métricas,
+    # al Server-Timing y al log de consultas lentas de ese request
+    def _programar(self):
+        if self._tarea is not None and not self._tarea.done():
+            return
+        if time.monotonic() < self._proxima_sincronizacion and not self._releer and not self._recargar:
+            return
+        trabajo = self.cargar() if self._necesita_carga() else self.sincronizar()
+        self._tarea = asyncio.get_running_loop().create_task(trabajo, context=contextvars.Context())
+
+    async def cargar(self):
+        from database import get_async_sessionmaker
+
+        inicio = time.perf_counter()
+        marca = datetime.now()
+        with self._lock:
+            self._durante_carga = []
+            self._recargar = False
+        try:
+            async with get_async_sessionmaker()() as db:
+                datos = await self._leer(db)
+            armado = await asyncio.to_thread(self._armar, datos)
+        except Exception as e:
+            with self._lock:
+                self._durante_carga = None
+            self.error = str(e)
+            self._proxima_sincronizacion = time.monotonic() + self.sincronizar_segundos
+            self.logger.error(f"No se pudo cargar {self.NOMBRE}: {e}", exc_info=True)
+            return
+
+        with self._lock:
+            self._instalar(armado)
+            for accion, valor in self._durante_carga:
+                self._aplicar(accion, valor)
+            self._durante_carga = None
+            self._sincronizado_hasta = marca
+            self._proxima_sincronizacion = time.monotonic() + self.sincronizar_segundos
+        self.error = None
+        self.cargas += 1
+        self.duracion_carga = time.perf_counter() - inicio
+        self.logger.info(f"{self._resumen_carga()} en {self.duracion_carga:.2f}s")
+
+    # Productos modificados por otros procesos (Fecha_Actualizacion) y los que este proceso
+    # no pudo tomar del objeto al confirmar
+    async def sincronizar(self):
+        from database import get_async_sessionmaker
+
+        marca = datetime.now()
+        with self._lock:
+            releer, self._releer = self._releer, set()
+        condiciones = [Productos.Fecha_Actualizacion >= self._sincronizado_hasta - MARGEN_SINCRONIZACION]
+        if releer:
+            condiciones.append(Productos.ID_Producto.in_(releer))
+        try:
+            async with get_async_sessionmaker()() as db:
+                filas = (await db.execute(select(*self.COLUMNAS).where(or_(*condiciones)))).all()
+        except Exception as e:
+            with self._lock:
+                self._releer |= releer
+            self.logger.warning(f"No se pudo sincronizar {self.NOMBRE}: {e}")
+            filas = None
+        with self._lock:
+            if filas is not None and self._cargada():
+                for fila in filas:
+                    self._poner_fila(tuple(fila))
+                self._sincronizado_hasta = marca
+                self._revisar()
+            self._proxima_sincronizacion = time.monotonic() + self.sincronizar_segundos
+
+    # --- Cambios hechos en este proceso ---
+
+    # En un producto nuevo los atributos que no se asignaron se insertaron como NULL; en uno
+    # modificado, si falta alguno (atributos expirados) hay que releerlo de la base
+    def _fila_desde_valores(self, valores: dict, nuevo: bool) -> Optional[tuple]:
+        if not nuevo and not all(atributo in valores for atributo in self._atributos):
+            return None
+        return tuple(valores.get(atributo) for atributo in self._atributos)
+
+    def _aplicar(self, accion: str, valor):
+        if accion == "recargar":
+            self._recargar = True
+            self._al_recargar()
+        elif not self._cargada():
+            return
+        elif accion == "guardar":
+            valores, nuevo = valor
+            fila = self._fila_desde_valores(valores, nuevo)
+            if fila is None:
+                self._releer.add(valores["ID_Producto"])
+            else:
+                self._poner_fila(fila)
+        elif accion == "quitar":
+            self._quitar(valor)
+
+    # Cambios confirmados en este proceso (los entrega el colector de productos)
+    def aplicar_cambios(self, cambios: list):
+        with self._lock:
+            if self._durante_carga is not None:
+                self._durante_carga.extend(cambios)
+            if not self._cargada():
+                # Sin datos cargados solo importa si la carga en curso quedó vieja
+                if any(accion == "recargar" for accion, _ in cambios):
+                    self._recargar = True
+                return
+            for accion, valor in cambios:
+                self._aplicar(accion, valor)
+            self._revisar()
+
+# --- Colectores de cambios por transacción ---
+
+# (clave en session.info, anotar_flush(session), anotar_masivo(session, clase), aplicar(cambios))
+_colectores: List[Tuple[str, Callable, Callable, Callable]] = []
+
+# anotar_flush y anotar_masivo devuelven la lista de cambios a anotar (vacía si no hay);
+# aplicar recibe todos los de la transacción cuando se confirma
+def registrar_colector(clave: str, anotar_flush: Callable, anotar_masivo: Callable, aplicar: Callable):
+    _colectores.append((clave, anotar_flush, anotar_masivo, aplicar))
+
+@event.listens_for(Session, "after_flush")
+def _anotar_flush(session, flush_context):
+    for clave, anotar_flush, _, _ in _colectores:
+        cambios = anotar_flush(session)
+        if cambios:
+            session.info.setdefault(clave, []).extend(cambios)
+
+# INSERT/UPDATE/DELETE masivos (db.execute(update(Productos)...)) no pasan por el flush
+@event.listens_for(Session, "do_orm_execute")
+def _anotar_masivo(orm_execute_state):
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None:
+        return
+    session = orm_execute_state.session
+    for clave, _, anotar_masivo, _ in _colectores:
+        cambios = anotar_masivo(session, mapper.class_)
+        if cambios:
+            session.info.setdefault(clave, []).extend(cambios)
+
+@event.listens_for(Session, "after_commit")
+def _aplicar_al_confirmar(session):
+    for clave, _, _, aplicar in _colectores:
+        cambios = session.info.pop(clave, None)
+        if cambios:
+            aplicar(cambios)
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_cambios(session):
+    for clave, *_ in _colectores:
+        session.info.pop(clave, None)
+
+# --- Colector de productos ---
+# Al hacer flush se copian los valores de los productos nuevos o modificados y el id de los
+# borrados: ("guardar", (valores, nuevo)) y ("quitar", id). Un cambio masivo es
+# ("recargar", None). Al confirmar, cada cache suscripta recibe la lista entera
+
+_CAMBIOS_PRODUCTOS = "productos_cambios"
+# Presente en session.info dentro de recargar_al_terminar; True si hubo algún cambio masivo
+_MASIVOS_DIFERIDOS = "productos_masivos_diferidos"
+_CLAVES_PRODUCTO = tuple(columna.key for columna in Productos.__table__.columns)
+
+_suscriptores: List[CacheProductos] = []
+
+def suscribir(cache: CacheProductos):
+    _suscriptores.append(cache)
+
+def _anotar_productos(session) -> list:
+    cambios = []
+    for producto in chain(session.new, session.dirty):
+        if isinstance(producto, Productos):
+            estado = inspect(producto).dict
+            valores = {clave: estado[clave] for clave in _CLAVES_PRODUCTO if clave in estado}
+            cambios.append(("guardar", (valores, producto in session.new)))
+    for producto in session.deleted:
+        if isinstance(producto, Productos):
+            cambios.append(("quitar", producto.ID_Producto))
+    return cambios
+
+def _anotar_productos_masivo(session, clase) -> list:
+    if clase is not Productos:
+        return []
+    if _MASIVOS_DIFERIDOS in session.info:
+        session.info[_MASIVOS_DIFERIDOS] = True
+        return []
+    return [("recargar", None)]
+
+def _aplicar_productos(cambios: list):
+    for cache in _suscriptores:
+        cache.aplicar_cambios(cambios)
+
+registrar_colector(_CAMBIOS_PRODUCTOS, _anotar_productos, _anotar_productos_masivo, _aplicar_productos)
+
+# Dentro del bloque, los INSERT/UPDATE/DELETE masivos sobre Productos de esta sesión no piden
+# una recarga en cada commit: se pide una sola al salir (también si sale con un error, los
+# lotes ya confirmados quedan guardados). Mientras tanto las caches siguen con los datos de
+# antes del bloque más lo que lean al sincronizar
+@contextmanager
+def recargar_al_terminar(session: Session):
+    session.info[_MASIVOS_DIFERIDOS] = False
+    try:
+        yield
+    finally:
+        if session.info.pop(_MASIVOS_DIFERIDOS, False):
+            _aplicar_productos([("recargar", None)])
@@ -0,0 +1,163 @@
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import get_history
+from typing import Dict, List, Optional
+from itertools import chain
+from APP.DB.Categorias_model import Categorias
+from APP.DB.Productos_model import Productos
+from APP.services.Cache_productos_service import registrar_colector
+import threading
+import json
+import time
+import os
+
+# Árbol de categorías: se arma con una sola consulta plana (categorías activas + cantidad de
+# productos activos) y se ensambla en memoria en O(n). El JSON resultante queda cacheado
+# hasta que cambie una categoría o la categoría/estado de un producto (o venza el TTL).
+
+# Segundos de vida del árbol cacheado (0 lo desactiva). El TTL cubre los cambios hechos
+# por otros procesos, que no pasan por la invalidación local
+ARBOL_CATEGORIAS_TTL = float(os.getenv("ARBOL_CATEGORIAS_TTL", "300"))
+
+_CAMBIO_ARBOL = "arbol_categorias_modificado"
+
+# Cantidad de productos activos por categoría, en una subconsulta agrupada
+def _productos_por_categoria():
+    return select(
+        Productos.ID_Categoria.label("ID_Categoria"),
+        func.count(Productos.ID_Producto).label("productos_count")
+    ).where(
+        Productos.Activo == True
+    ).group_by(Productos.ID_Categoria).subquery()
+
+# Una sola ida a la base: todas las categorías activas con su conteo de productos
+def obtener_categorias_arbol(db: Session):
+    conteos = _productos_por_categoria()
+    return db.query(
+        Categorias.ID_Categoria,
+        Categorias.Nombre,
+        Categorias.Descripcion,
+        Categorias.Categoria_Padre,
+        func.coalesce(conteos.c.productos_count, 0).label("productos_count")
+    ).outerjoin(
+        conteos, conteos.c.ID_Categoria == Categorias.ID_Categoria
+    ).filter(
+        Categorias.Activo == True
+    ).order_by(Categorias.ID_Categoria).all()
+
+# Ensamblar el árbol desde las raíces. Igual que el recorrido recursivo original, una
+# categoría activa cuyo padre está inactivo no aparece (su rama queda cortada)
+def armar_arbol(filas) -> List[dict]:
+    hijos: Dict[Optional[int], List[dict]] = {}
+    for fila in filas:
+        hijos.setdefault(fila.Categoria_Padre, []).append({
+            "id": fila.ID_Categoria,
+            "nombre": fila.Nombre,
+            "descripcion": fila.Descripcion,
+            "productos_count": fila.productos_count,
+            "subcategorias": []
+        })
+
+    raices = hijos.get(None, [])
+    pendientes = list(raices)
+    visitados = set()
+    while pendientes:
+        nodo = pendientes.pop()
+        # Protección contra ciclos en Categoria_Padre
+        if nodo["id"] in visitados:
+            continue
+        visitados.add(nodo["id"])
+        nodo["subcategorias"] = hijos.get(nodo["id"], [])
+        pendientes.extend(nodo["subcategorias"])
+    return raices
+
+# Caché del árbol ya serializado. La generación evita guardar un árbol leído antes de una
+# invalidación que ocurrió mientras se armaba
+class CacheArbolCategorias:
+    def __init__(self, ttl: float = ARBOL_CATEGORIAS_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._contenido: Optional[bytes] = None
+        self._vence = 0.0
+        self._generacion = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidaciones = 0
+
+    def obtener(self):
+        with self._lock:
+            if self._contenido is not None and self._vence >= time.monotonic():
+                self.hits += 1
+                return self._contenido, self._generacion
+            self.misses += 1
+            return None, self._generacion
+
+    def guardar(self, contenido: bytes, generacion: int):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            if generacion == self._generacion:
+                self._contenido = contenido
+                self._vence = time.monotonic() + self.ttl
+
+    def invalidar(self):
+        with self._lock:
+            self._generacion += 1
+            self._contenido = None
+            self.invalidaciones += 1
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidaciones": self.invalidaciones,
+                "cacheado": self._contenido is not None and self._vence >= time.monotonic(),
+                "ttl_segundos": self.ttl
+            }
+
+cache_arbol_categorias = CacheArbolCategorias()
+
+# Árbol serializado en JSON: desde la caché o con una sola consulta
+def obtener_arbol_serializado(db: Session) -> bytes:
+    contenido, generacion = cache_arbol_categorias.obtener()
+    if contenido is not None:
+        return contenido
+
+    arbol = armar_arbol(obtener_categorias_arbol(db))
+    contenido = json.dumps(arbol, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    cache_arbol_categorias.guardar(contenido, generacion)
+    return contenido
+
+def invalidar_arbol_categorias():
+    cache_arbol_categorias.invalidar()
+
+# --- Invalidación automática ---
+# Cualquier sesión que modifique categorías, o la categoría/estado de un producto, marca
+# el cambio al hacer flush; la caché se invalida recién cuando la transacción se confirma
+
+def _afecta_arbol(objeto, borrado: bool = False) -> bool:
+    if isinstance(objeto, Categorias) or (borrado and isinstance(objeto, Productos)):
+        return True
+    if isinstance(objeto, Productos):
+        return (
+            get_history(objeto, "ID_Categoria").has_changes()
+            or get_history(objeto, "Activo").has_changes()
+        )
+    return False
+
+def _anotar_cambios_arbol(session) -> list:
+    if any(_afecta_arbol(objeto) for objeto in chain(session.new, session.dirty)) or any(
+        _afecta_arbol(objeto, borrado=True) for objeto in session.deleted
+    ):
+        return [True]
+    return []
+
+# INSERT/UPDATE/DELETE masivos (db.execute(update(Productos)...)) no pasan por el flush
+def _anotar_cambios_masivos_arbol(session, clase) -> list:
+    return [True] if clase in (Categorias, Productos) else []
+
+registrar_colector(
+    _CAMBIO_ARBOL, _anotar_cambios_arbol, _anotar_cambios_masivos_arbol,
+    lambda cambios: invalidar_arbol_categorias()
+)
@@ -0,0 +1,243 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import logging
+import time
+import os
+
+from APP.services.Entorno_service import env_bool
+from APP.DB.Productos_model import Productos
+from APP.services.Busqueda_service import normalizar_codigo
+from APP.services.Cache_productos_service import CacheProductos, suscribir
+
+# Tabla en memoria de códigos de barras y SKU para /productos/buscar/{codigo}, el endpoint
+# que más se llama (uno por artículo escaneado en cada caja). Cada código apunta a un registro
+# chico con __slots__ y los datos que devuelve el endpoint, así el escaneo no va a la base.
+#
+# - Se carga entera al arrancar (en segundo plano, ver Cache_productos_service); hasta que
+#   está lista el endpoint consulta la base como siempre.
+# - Los productos creados, modificados o desactivados en este proceso se actualizan al
+#   confirmar la transacción; los de otros procesos se leen por Fecha_Actualizacion cada
+#   CODIGOS_SINCRONIZAR_SEGUNDOS. Un cambio masivo sobre Productos descarta la tabla hasta
+#   volver a cargarla.
+# - Un código que no está se busca una vez en la base (puede ser un producto recién creado
+#   por otro proceso) y, si tampoco está ahí, se recuerda como desconocido por
+#   CODIGOS_NEGATIVOS_TTL segundos: un código ilegible escaneado varias veces no va a la base.
+
+CODIGOS_CACHE = env_bool("CODIGOS_CACHE", True)
+CODIGOS_SINCRONIZAR_SEGUNDOS = float(os.getenv("CODIGOS_SINCRONIZAR_SEGUNDOS", "30"))
+CODIGOS_NEGATIVOS_TTL = float(os.getenv("CODIGOS_NEGATIVOS_TTL", "60"))
+CODIGOS_NEGATIVOS_MAX = int(os.getenv("CODIGOS_NEGATIVOS_MAX", "10000"))
+
+COLUMNAS = (
+    Productos.ID_Producto,
+    Productos.Nombre,
+    Productos.Descripcion,
+    Productos.Codigo_Barras,
+    Productos.SKU,
+    Productos.Marca,
+    Productos.Modelo,
+    Productos.Precio,
+    Productos.Costo,
+    Productos.Precio_Mayorista,
+    Productos.ID_Categoria,
+    Productos.ID_Unidad_de_medida,
+    Productos.Peso,
+    Productos.Dimensiones,
+    Productos.Activo
+)
+_ATRIBUTOS = tuple(columna.key for columna in COLUMNAS)
+
+logger = logging.getLogger("main.codigos")
+
+# Datos de un producto que devuelve la búsqueda por código (los campos de ProductoSimple)
+class ProductoCodigo:
+    __slots__ = (
+        "id_producto", "nombre", "descripcion", "codigo_barras", "sku", "marca", "modelo",
+        "precio", "costo", "precio_mayorista", "id_categoria", "id_unidad_de_medida",
+        "peso", "dimensiones", "activo"
+    )
+
+    # fila: valores de COLUMNAS en ese orden
+    def __init__(self, fila: tuple):
+        for atributo, valor in zip(self.__slots__, fila):
+            setattr(self, atributo, valor)
+
+    @classmethod
+    def desde_producto(cls, producto: Productos) -> "ProductoCodigo":
+        return cls(tuple(getattr(producto, atributo) for atributo in _ATRIBUTOS))
+
+    def a_dict(self) -> dict:
+        return {atributo: getattr(self, atributo) for atributo in self.__slots__}
+
+# Un código de barras tiene prioridad sobre el SKU igual de otro producto
+def _indexar(registro: ProductoCodigo, por_codigo: Dict[str, ProductoCodigo], por_id: Dict[int, ProductoCodigo]):
+    por_id[registro.id_producto] = registro
+    sku = normalizar_codigo(registro.sku)
+    if sku:
+        actual = por_codigo.get(sku)
+        if actual is None or normalizar_codigo(actual.codigo_barras) != sku:
+            por_codigo[sku] = registro
+    codigo_barras = normalizar_codigo(registro.codigo_barras)
+    if codigo_barras:
+        por_codigo[codigo_barras] = registro
+
+# Tabla completa a partir de las filas (corre en un hilo, fuera del event loop)
+def armar_tabla(filas) -> Tuple[Dict[str, ProductoCodigo], Dict[int, ProductoCodigo]]:
+    por_codigo, por_id = {}, {}
+    for fila in filas:
+        _indexar(ProductoCodigo(fila), por_codigo, por_id)
+    return por_codigo, por_id
+
+class CacheCodigos(CacheProductos):
+    COLUMNAS = COLUMNAS
+    NOMBRE = "la tabla de códigos"
+    logger = logger
+
+    def __init__(self):
+        super().__init__(CODIGOS_SINCRONIZAR_SEGUNDOS)
+        self._por_codigo: Optional[Dict[str, ProductoCodigo]] = None
+        self._por_id: Dict[int, ProductoCodigo] = {}
+        # código -> vencimiento (monotonic), los más viejos primero
+        self._desconocidos: "OrderedDict[str, float]" = OrderedDict()
+        self.hits = 0
+        self.hits_negativos = 0
+        self.misses = 0
+
+    def lista(self) -> bool:
+        return self._por_codigo is not None
+
+    # (resuelto, registro): resuelto=False si hay que ir a la base (tabla sin cargar o código
+    # que no está y no se sabe desconocido); registro=None con resuelto=True es un 404
+    def buscar(self, codigo: str) -> Tuple[bool, Optional[ProductoCodigo]]:
+        if not CODIGOS_CACHE:
+            return False, None
+        self._programar()
+        clave = normalizar_codigo(codigo)
+        with self._lock:
+            if self._por_codigo is None:
+                return False, None
+            registro = self._por_codigo.get(clave)
+            if registro is not None:
+                self.hits += 1
+                return True, registro
+            vence = self._desconocidos.get(clave)
+            if vence is not None and vence > time.monotonic():
+                self.hits_negativos += 1
+                return True, None
+            self.misses += 1
+            return False, None
+
+    # Varios códigos con una sola toma del lock: (resueltos, pendientes de ir a la base).
+    # En resueltos, None es un código que se sabe desconocido
+    def buscar_varios(self, codigos: List[str]) -> Tuple[Dict[str, Optional[ProductoCodigo]], List[str]]:
+        if not CODIGOS_CACHE:
+            return {}, list(codigos)
+        self._programar()
+        resueltos, pendientes = {}, []
+        ahora = time.monotonic()
+        with self._lock:
+            if self._por_codigo is None:
+                return {}, list(codigos)
+            for codigo in codigos:
+                clave = normalizar_codigo(codigo)
+                registro = self._por_codigo.get(clave)
+                if registro is not None:
+                    self.hits += 1
+                    resueltos[codigo] = registro
+                elif self._desconocidos.get(clave, 0) > ahora:
+                    self.hits_negativos += 1
+                    resueltos[codigo] = None
+                else:
+                    self.misses += 1
+                    pendientes.append(codigo)
+        return resueltos, pendientes
+
+    # Registros de los ids que están en la tabla (los que faltan pueden ser productos nuevos
+    # de otro proceso: no se recuerdan como desconocidos)
+    def por_ids(self, ids: List[int]) -> Dict[int, ProductoCodigo]:
+        if not CODIGOS_CACHE:
+            return {}
+        self._programar()
+        with self._lock:
+            if self._por_codigo is None:
+                return {}
+            return {i: self._por_id[i] for i in ids if i in self._por_id}
+
+    # Resultado de la base para un código que no estaba: se agrega o se recuerda desconocido
+    def anotar(self, codigo: str, registro: Optional[ProductoCodigo]):
+        if not CODIGOS_CACHE:
+            return
+        with self._lock:
+            if self._por_codigo is None:
+                return
+            if registro is not None:
+                self._poner(registro)
+                return
+            if CODIGOS_NEGATIVOS_TTL <= 0:
+                return
+            clave = normalizar_codigo(codigo)
+            self._desconocidos.pop(clave, None)
+            self._desconocidos[clave] = time.monotonic() + CODIGOS_NEGATIVOS_TTL
+            while len(self._desconocidos) > CODIGOS_NEGATIVOS_MAX:
+                self._desconocidos.popitem(last=False)
+
+    def _poner(self, registro: ProductoCodigo):
+        self._quitar(registro.id_producto)
+        _indexar(registro, self._por_codigo, self._por_id)
+        self._desconocidos.pop(normalizar_codigo(registro.sku), None)
+        self._desconocidos.pop(normalizar_codigo(registro.codigo_barras), None)
+
+    def _quitar(self, id_producto: int):
+        anterior = self._por_id.pop(id_producto, None)
+        if anterior is None:
+            return
+        for codigo in (normalizar_codigo(anterior.codigo_barras), normalizar_codigo(anterior.sku)):
+            if codigo and self._por_codigo.get(codigo) is anterior:
+                del self._por_codigo[codigo]
+
+    def _cargada(self) -> bool:
+        return self._por_codigo is not None
+
+    def _armar(self, filas):
+        return armar_tabla(filas)
+
+    def _instalar(self, armado):
+        self._por_codigo, self._por_id = armado
+        self._desconocidos.clear()
+
+    def _resumen_carga(self) -> str:
+        return f"Tabla de códigos cargada: {len(self._por_id)} productos"
+
+    def _poner_fila(self, fila: tuple):
+        self._poner(ProductoCodigo(fila))
+
+    # Hasta recargar, el endpoint va a la base
+    def _al_recargar(self):
+        self._por_codigo = None
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            consultas = self.hits + self.hits_negativos + self.misses
+            return {
+                "activo": CODIGOS_CACHE,
+                "lista": self._por_codigo is not None,
+                "productos": len(self._por_id) if self._por_codigo is not None else 0,
+                "codigos": len(self._por_codigo) if self._por_codigo is not None else 0,
+                "desconocidos": len(self._desconocidos),
+                "hits": self.hits,
+                "hits_negativos": self.hits_negativos,
+                "misses": self.misses,
+                "hit_ratio": round((self.hits + self.hits_negativos) / consultas, 4) if consultas else 0.0,
+                "cargas": self.cargas,
+                "duracion_carga_s": round(self.duracion_carga, 3),
+                "pendientes_de_releer": len(self._releer),
+                "error": self.error
+            }
+
+cache_codigos = CacheCodigos()
+suscribir(cache_codigos)
+
+# Se llama al arrancar la app (desde el event loop) para no esperar al primer escaneo
+def precargar_codigos():
+    if CODIGOS_CACHE:
+        cache_codigos._programar()
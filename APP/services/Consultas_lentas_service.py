@@ -0,0 +1,273 @@
+from collections import OrderedDict
+from datetime import datetime, date
+from decimal import Decimal
+from typing import Dict, List, Optional
+import threading
+import logging
+import hashlib
+import queue
+import re
+import os
+
+from APP.services.Entorno_service import env_bool
+
+# Registro de consultas lentas: las sentencias que superan SLOW_QUERY_MS se loguean con el
+# SQL normalizado, los parámetros redactados, la duración y la ruta que las originó, y se
+# acumulan por SQL normalizado para listar las que más tiempo consumen en total.
+# Opcionalmente se captura el plan estimado de SQL Server (showplan XML) de cada una.
+
+# Umbral en milisegundos (0 lo desactiva)
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "500"))
+# Capturar el plan de ejecución de las consultas lentas (solo SQL Server)
+SLOW_QUERY_PLANES = env_bool("SLOW_QUERY_PLANES", False)
+# Consultas distintas que se acumulan y planes que se guardan (los más viejos se descartan)
+SLOW_QUERY_MAX_CONSULTAS = int(os.getenv("SLOW_QUERY_MAX_CONSULTAS", "200"))
+SLOW_QUERY_MAX_PLANES = int(os.getenv("SLOW_QUERY_MAX_PLANES", "50"))
+
+UMBRAL_SEGUNDOS = SLOW_QUERY_MS / 1000
+
+MAX_PARAMETROS = 20
+MAX_RUTAS = 10
+
+logger = logging.getLogger("main.consultas_lentas")
+
+# --- Normalización del SQL ---
+# Los literales pasan a "?" y las listas IN / filas de VALUES se colapsan, así la misma
+# consulta con distinta cantidad de ids cuenta como una sola
+_ESPACIOS = re.compile(r"\s+")
+_TEXTO = re.compile(r"N?'(?:[^']|'')*'")
+_NUMERO = re.compile(r"(?<![\w@.])-?\d+(?:\.\d+)?\b")
+_LISTA = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_FILAS = re.compile(r"(\(\?(?:, \?)*\))(?:\s*,\s*\1)+")
+
+def normalizar_sql(sql: str) -> str:
+    sql = _ESPACIOS.sub(" ", sql).strip()
+    sql = _TEXTO.sub("?", sql)
+    sql = _NUMERO.sub("?", sql)
+    sql = _FILAS.sub(r"\1, ...", sql)
+    return _LISTA.sub("(?, ...)", sql)
+
+def id_consulta(sql_normalizado: str) -> str:
+    return hashlib.sha1(sql_normalizado.encode("utf-8")).hexdigest()[:12]
+
+# --- Parámetros redactados ---
+# Los números, fechas y booleanos se muestran (ids, cantidades, rangos); los textos y
+# binarios no, porque pueden traer emails, nombres o contraseñas. Solo se indica el largo
+def _redactar(valor):
+    if valor is None or isinstance(valor, (bool, int, float, Decimal)):
+        return valor
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    if isinstance(valor, str):
+        return f"<texto:{len(valor)}>"
+    if isinstance(valor, (bytes, bytearray, memoryview)):
+        return f"<binario:{len(valor)}>"
+    return f"<{type(valor).__name__}>"
+
+def redactar_parametros(parametros, executemany: bool = False):
+    # En executemany llega una lista de filas: se muestra la primera y la cantidad
+    if executemany and parametros:
+        return {"filas": len(parametros), "primera": redactar_parametros(parametros[0])}
+    if isinstance(parametros, dict):
+        items = list(parametros.items())[:MAX_PARAMETROS]
+        return {clave: _redactar(valor) for clave, valor in items}
+    if isinstance(parametros, (list, tuple)):
+        return [_redactar(valor) for valor in parametros[:MAX_PARAMETROS]]
+    return None
+
+# --- Acumulado por consulta ---
+
+class ConsultaLenta:
+    __slots__ = (
+        "id", "sql", "cantidad", "tiempo_total", "tiempo_maximo", "ultima_duracion",
+        "ultima_vez", "ultimos_parametros", "rutas"
+    )
+
+    def __init__(self, id: str, sql: str):
+        self.id = id
+        self.sql = sql
+        self.cantidad = 0
+        self.tiempo_total = 0.0
+        self.tiempo_maximo = 0.0
+        self.ultima_duracion = 0.0
+        self.ultima_vez = None
+        self.ultimos_parametros = None
+        self.rutas: Dict[str, int] = {}
+
+    def registrar(self, duracion: float, parametros, ruta: str):
+        self.cantidad += 1
+        self.tiempo_total += duracion
+        self.tiempo_maximo = max(self.tiempo_maximo, duracion)
+        self.ultima_duracion = duracion
+        self.ultima_vez = datetime.now()
+        self.ultimos_parametros = parametros
+        if ruta in self.rutas or len(self.rutas) < MAX_RUTAS:
+            self.rutas[ruta] = self.rutas.get(ruta, 0) + 1
+
+    def a_dict(self, tiene_plan: bool) -> dict:
+        return {
+            "id": self.id,
+            "sql": self.sql,
+            "cantidad": self.cantidad,
+            "tiempo_total_ms": round(self.tiempo_total * 1000, 2),
+            "tiempo_promedio_ms": round(self.tiempo_total * 1000 / self.cantidad, 2),
+            "tiempo_maximo_ms": round(self.tiempo_maximo * 1000, 2),
+            "ultima_duracion_ms": round(self.ultima_duracion * 1000, 2),
+            "ultima_vez": self.ultima_vez.isoformat() if self.ultima_vez else None,
+            "ultimos_parametros": self.ultimos_parametros,
+            "rutas": dict(sorted(self.rutas.items(), key=lambda r: r[1], reverse=True)),
+            "tiene_plan": tiene_plan
+        }
+
+ORDENES_CONSULTAS = {
+    "total": lambda c: c.tiempo_total,
+    "maximo": lambda c: c.tiempo_maximo,
+    "cantidad": lambda c: c.cantidad
+}
+
+class RegistroConsultasLentas:
+    def __init__(self, max_consultas: int = SLOW_QUERY_MAX_CONSULTAS, max_planes: int = SLOW_QUERY_MAX_PLANES):
+        self.max_consultas = max_consultas
+        self.max_planes = max_planes
+        self._consultas: Dict[str, ConsultaLenta] = {}
+        self._planes = OrderedDict()
+        self._lock = threading.Lock()
+        self.total_registradas = 0
+
+    # Devuelve la consulta acumulada y si todavía no tiene plan capturado
+    def registrar(self, sql: str, duracion: float, parametros, ruta: str):
+        clave = id_consulta(sql)
+        with self._lock:
+            consulta = self._consultas.get(clave)
+            if consulta is None:
+                # Lleno: se descarta la que menos tiempo acumuló (es O(n), pero solo pasa
+                # con consultas lentas nuevas y n está acotado)
+                if len(self._consultas) >= self.max_consultas:
+                    menor = min(self._consultas.values(), key=lambda c: c.tiempo_total)
+                    del self._consultas[menor.id]
+                consulta = self._consultas[clave] = ConsultaLenta(clave, sql)
+            consulta.registrar(duracion, parametros, ruta)
+            self.total_registradas += 1
+            return consulta, clave not in self._planes
+
+    def guardar_plan(self, clave: str, xml: str):
+        with self._lock:
+            self._planes[clave] = {"xml": xml, "capturado": datetime.now()}
+            self._planes.move_to_end(clave)
+            while len(self._planes) > self.max_planes:
+                self._planes.popitem(last=False)
+
+    def plan(self, clave: str) -> Optional[dict]:
+        with self._lock:
+            return self._planes.get(clave)
+
+    def top(self, limite: int = 20, orden: str = "total") -> List[dict]:
+        with self._lock:
+            consultas = sorted(self._consultas.values(), key=ORDENES_CONSULTAS[orden], reverse=True)
+            return [c.a_dict(c.id in self._planes) for c in consultas[:limite]]
+
+    def resumen(self) -> dict:
+        with self._lock:
+            return {
+                "umbral_ms": SLOW_QUERY_MS,
+                "captura_planes": SLOW_QUERY_PLANES,
+                "consultas_distintas": len(self._consultas),
+                "total_registradas": self.total_registradas,
+                "planes_guardados": len(self._planes)
+            }
+
+    def reiniciar(self):
+        with self._lock:
+            self._consultas.clear()
+            self._planes.clear()
+            self.total_registradas = 0
+
+registro_consultas_lentas = RegistroConsultasLentas()
+
+# --- Captura del plan (SQL Server) ---
+# Un hilo de fondo repite la sentencia con SET SHOWPLAN_XML ON: SQL Server devuelve el plan
+# estimado sin ejecutarla (tampoco los UPDATE/DELETE). Se usa una conexión del engine
+# sincrónico, una a la vez, y solo la primera vez que aparece cada consulta.
+# La cola es acotada: si el hilo está atrasado, el pedido se descarta
+
+_SENTENCIAS_CON_PLAN = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+_cola_planes = queue.Queue(maxsize=max(SLOW_QUERY_MAX_PLANES, 1))
+_hilo_planes: Optional[threading.Thread] = None
+_lock_hilo = threading.Lock()
+# Consultas con el plan ya pedido, para no encolar la misma dos veces mientras se captura
+_planes_pedidos = set()
+
+def _capturar_plan(engine, statement: str, parametros) -> Optional[str]:
+    conexion = engine.raw_connection()
+    cursor = conexion.cursor()
+    try:
+        cursor.execute("SET SHOWPLAN_XML ON")
+        try:
+            cursor.execute(statement, parametros or ())
+            fila = cursor.fetchone()
+        finally:
+            cursor.execute("SET SHOWPLAN_XML OFF")
+        conexion.rollback()
+        conexion.close()
+        return fila[0] if fila else None
+    except Exception:
+        # Si no se pudo apagar SHOWPLAN la conexión no puede volver al pool
+        conexion.invalidate()
+        raise
+
+def _procesar_planes():
+    while True:
+        clave, engine, statement, parametros = _cola_planes.get()
+        try:
+            xml = _capturar_plan(engine, statement, parametros)
+            if xml:
+                registro_consultas_lentas.guardar_plan(clave, xml)
+        except Exception as e:
+            logger.warning(f"No se pudo capturar el plan de la consulta {clave}: {str(e)}")
+        finally:
+            with _lock_hilo:
+                _planes_pedidos.discard(clave)
+
+def _pedir_plan(clave: str, conn, statement: str, parametros):
+    global _hilo_planes
+    engine = conn.engine
+    # El engine asíncrono (aioodbc) no se puede usar desde un hilo: el plan se pide con el
+    # sincrónico, que apunta a la misma base y genera el mismo SQL
+    if conn.dialect.is_async:
+        import database
+        engine = database.engine
+    if engine.dialect.name != "mssql":
+        return
+
+    with _lock_hilo:
+        if clave in _planes_pedidos:
+            return
+        if _hilo_planes is None:
+            _hilo_planes = threading.Thread(target=_procesar_planes, name="planes-consultas-lentas", daemon=True)
+            _hilo_planes.start()
+        try:
+            _cola_planes.put_nowait((clave, engine, statement, parametros))
+            _planes_pedidos.add(clave)
+        except queue.Full:
+            pass
+
+# Se llama desde el evento after_cursor_execute de Metricas_service cuando la sentencia
+# supera el umbral
+def registrar_consulta_lenta(conn, statement: str, parametros, executemany: bool, duracion: float, ruta: str):
+    sql = normalizar_sql(statement)
+    redactados = redactar_parametros(parametros, executemany)
+    consulta, sin_plan = registro_consultas_lentas.registrar(sql, duracion, redactados, ruta)
+
+    logger.warning(
+        f"Consulta lenta: {duracion * 1000:.1f}ms - Ruta: {ruta} - ID: {consulta.id} - "
+        f"SQL: {sql} - Parámetros: {redactados}"
+    )
+
+    if (
+        SLOW_QUERY_PLANES
+        and sin_plan
+        and not executemany
+        and sql.lstrip("( ").upper().startswith(_SENTENCIAS_CON_PLAN)
+    ):
+        _pedir_plan(consulta.id, conn, statement, parametros)
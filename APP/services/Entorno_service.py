@@ -0,0 +1,11 @@
+import os
+
+# Lectura de variables de entorno. No importa nada de la app: lo usan database.py y los
+# servicios que database.py importa (Consultas_lentas_service, vía Metricas_service)
+
+# Variable de entorno booleana ("1", "true", "si", "sí" o "yes")
+def env_bool(nombre: str, defecto: bool) -> bool:
+    valor = os.getenv(nombre)
+    if valor is None:
+        return defecto
+    return valor.strip().lower() in ("1", "true", "si", "sí", "yes")
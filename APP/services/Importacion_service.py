@@ -0,0 +1,382 @@
+from fastapi import HTTPException
+from sqlalchemy import insert, update, or_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from pydantic import ValidationError
+from datetime import datetime
+from typing import Dict, Iterator, List, Tuple
+import logging
+import time
+import csv
+import io
+import os
+
+from APP.DB.Productos_model import Productos
+from APP.DB.Categorias_model import Categorias
+from APP.DB.Unidades_de_medida_model import Unidades_de_medida
+from APP.schemas.Productos_schema import ProductoCreate, ProductoUpdate
+from APP.services.Busqueda_service import normalizar
+from APP.services.Cache_productos_service import recargar_al_terminar
+from APP.services.Productos_service import error_de_precios
+
+# Importación masiva de productos desde una lista de precios (CSV o XLSX con encabezados).
+# El archivo se recorre fila por fila y se procesa en lotes: por lote, una consulta trae los
+# productos existentes con esos códigos de barras/SKU, las filas se validan con los mismos
+# schemas que POST/PUT /productos contra las categorías y unidades leídas al empezar, y se
+# guarda todo junto con un INSERT y un UPDATE por clave ejecutados en bloque (executemany,
+# que con pyodbc y fast_executemany viaja en un solo paquete). Cada lote es una transacción;
+# la tabla de códigos y el índice de búsqueda se recargan una sola vez, al terminar.
+#
+# Una fila con un código de barras o SKU que ya existe actualiza ese producto, solo con las
+# columnas que trae el archivo (una lista con codigo_barras, precio y costo actualiza precios);
+# si no existe, se da de alta y tiene que traer todos los datos obligatorios.
+
+# Filas por transacción (con 1000 la consulta de existentes usa hasta 2000 parámetros, cerca
+# del límite de 2100 de SQL Server)
+IMPORTACION_FILAS_POR_LOTE = min(int(os.getenv("IMPORTACION_FILAS_POR_LOTE", "1000")), 1000)
+# Errores que se devuelven en el reporte (el total se cuenta igual)
+IMPORTACION_MAX_ERRORES = int(os.getenv("IMPORTACION_MAX_ERRORES", "1000"))
+
+# Columna del archivo -> atributo del modelo
+COLUMNAS = {
+    "nombre": "Nombre",
+    "descripcion": "Descripcion",
+    "codigo_barras": "Codigo_Barras",
+    "sku": "SKU",
+    "marca": "Marca",
+    "modelo": "Modelo",
+    "precio": "Precio",
+    "costo": "Costo",
+    "precio_mayorista": "Precio_Mayorista",
+    "id_categoria": "ID_Categoria",
+    "id_unidad_de_medida": "ID_Unidad_de_medida",
+    "peso": "Peso",
+    "dimensiones": "Dimensiones",
+    "activo": "Activo"
+}
+# Columnas que se aceptan además de las anteriores; categoría y unidad también por nombre
+ALIAS = {
+    "codigo_de_barras": "codigo_barras",
+    "codigo": "codigo_barras",
+    "precio_de_venta": "precio",
+    "categoria": "categoria",
+    "unidad": "unidad_medida",
+    "unidad_medida": "unidad_medida",
+    "unidad_de_medida": "unidad_medida"
+}
+NUMERICAS = ("precio", "costo", "precio_mayorista", "peso")
+VERDADEROS = ("1", "true", "si", "sí", "yes")
+FALSOS = ("0", "false", "no")
+
+logger = logging.getLogger("main.importacion")
+
+# --- Lectura del archivo ---
+
+def _nombre_columna(encabezado) -> str:
+    nombre = "_".join(normalizar(str(encabezado or "")).split())
+    return ALIAS.get(nombre, nombre)
+
+# Valor de una celda de XLSX como texto (los códigos numéricos llegan como float)
+def _celda(valor) -> str:
+    if valor is None:
+        return ""
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return str(valor).strip()
+
+def _filas_csv(archivo, codificacion: str) -> Iterator[list]:
+    texto = io.TextIOWrapper(archivo, encoding=codificacion, newline="")
+    primera = texto.readline()
+    separador = max((";", ",", "\t"), key=primera.count)
+    yield next(csv.reader([primera], delimiter=separador), [])
+    for valores in csv.reader(texto, delimiter=separador):
+        yield [v.strip() for v in valores]
+
+def _filas_xlsx(archivo) -> Iterator[list]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise HTTPException(status_code=400, detail="Para importar XLSX hay que instalar openpyxl")
+    libro = load_workbook(archivo, read_only=True, data_only=True)
+    try:
+        for valores in libro.active.iter_rows(values_only=True):
+            yield [_celda(v) for v in valores]
+    finally:
+        libro.close()
+
+# (número de fila, {columna: texto}) de cada fila con datos; la fila 1 es el encabezado
+def leer_filas(archivo, nombre_archivo: str, codificacion: str = "utf-8-sig") -> Tuple[List[str], Iterator[Tuple[int, dict]]]:
+    extension = os.path.splitext(nombre_archivo or "")[1].lower()
+    if extension == ".xlsx":
+        filas = _filas_xlsx(archivo)
+    elif extension in (".csv", ".txt", ""):
+        filas = _filas_csv(archivo, codificacion)
+    else:
+        raise HTTPException(status_code=400, detail="Formato no soportado: el archivo tiene que ser CSV o XLSX")
+
+    try:
+        encabezado = [_nombre_columna(c) for c in next(filas)]
+    except (StopIteration, UnicodeDecodeError, csv.Error):
+        raise HTTPException(status_code=400, detail="No se pudo leer el encabezado del archivo")
+    if not ({"codigo_barras", "sku"} & set(encabezado)):
+        raise HTTPException(status_code=400, detail="El archivo necesita una columna codigo_barras o sku")
+
+    def datos():
+        for numero, valores in enumerate(filas, start=2):
+            fila = {columna: valor for columna, valor in zip(encabezado, valores) if valor not in ("", None)}
+            if fila:
+                yield numero, fila
+
+    return encabezado, datos()
+
+# --- Validación ---
+
+def _numero(texto: str) -> str:
+    # "1.234,50" y "1234,50" (coma decimal) además de "1234.50"
+    texto = texto.replace("$", "").replace(" ", "")
+    if "," in texto:
+        texto = texto.replace(".", "").replace(",", ".")
+    return texto
+
+def _errores_validacion(e: ValidationError) -> List[str]:
+    return [f"{'.'.join(str(p) for p in error['loc']) or 'fila'}: {error['msg']}" for error in e.errors()]
+
+# Referencias que se leen una sola vez por importación
+class Referencias:
+    def __init__(self, db: Session):
+        categorias = db.query(Categorias.ID_Categoria, Categorias.Nombre).filter(Categorias.Activo == True).all()
+        unidades = db.query(
+            Unidades_de_medida.ID_Unidad_de_medida,
+            Unidades_de_medida.Nombre,
+            Unidades_de_medida.Abreviatura
+        ).filter(Unidades_de_medida.Activo == True).all()
+        self.categorias = {c.ID_Categoria for c in categorias}
+        self.categorias_por_nombre = {normalizar(c.Nombre): c.ID_Categoria for c in categorias}
+        self.unidades = {u.ID_Unidad_de_medida for u in unidades}
+        self.unidades_por_nombre = {normalizar(u.Abreviatura): u.ID_Unidad_de_medida for u in unidades}
+        self.unidades_por_nombre.update((normalizar(u.Nombre), u.ID_Unidad_de_medida) for u in unidades)
+
+class ImportacionProductos:
+    def __init__(self, db: Session, simular: bool = False):
+        self.db = db
+        self.simular = simular
+        self.referencias = Referencias(db)
+        # código (en minúsculas) -> fila donde apareció, para detectar repetidos en el archivo
+        self.vistos: Dict[str, int] = {}
+        self.filas = 0
+        self.insertados = 0
+        self.actualizados = 0
+        self.con_errores = 0
+        self.errores: List[dict] = []
+
+    def error(self, numero: int, fila: dict, mensajes: List[str]):
+        self.con_errores += 1
+        if len(self.errores) < IMPORTACION_MAX_ERRORES:
+            self.errores.append({
+                "fila": numero,
+                "codigo": fila.get("codigo_barras") or fila.get("sku"),
+                "errores": mensajes
+            })
+
+    def procesar(self, filas: Iterator[Tuple[int, dict]]):
+        lote = []
+        for numero, fila in filas:
+            self.filas += 1
+            lote.append((numero, fila))
+            if len(lote) >= IMPORTACION_FILAS_POR_LOTE:
+                self.procesar_lote(lote)
+                lote = []
+        if lote:
+            self.procesar_lote(lote)
+
+    # Productos existentes con alguno de los códigos del lote, en una sola consulta
+    def existentes(self, lote) -> Tuple[Dict[str, tuple], Dict[str, tuple]]:
+        codigos = {f["codigo_barras"] for _, f in lote if "codigo_barras" in f}
+        skus = {f["sku"] for _, f in lote if "sku" in f}
+        condiciones = []
+        if codigos:
+            condiciones.append(Productos.Codigo_Barras.in_(codigos))
+        if skus:
+            condiciones.append(Productos.SKU.in_(skus))
+        if not condiciones:
+            return {}, {}
+        productos = self.db.query(
+            Productos.ID_Producto,
+            Productos.Codigo_Barras,
+            Productos.SKU,
+            Productos.Precio,
+            Productos.Costo,
+            Productos.Precio_Mayorista
+        ).filter(or_(*condiciones)).all()
+        por_codigo = {p.Codigo_Barras.casefold(): p for p in productos if p.Codigo_Barras}
+        por_sku = {p.SKU.casefold(): p for p in productos if p.SKU}
+        return por_codigo, por_sku
+
+    # Fila -> ("insertar" | "actualizar", valores del modelo) o lista de errores
+    def preparar(self, fila: dict, por_codigo: dict, por_sku: dict):
+        errores = []
+        valores = {}
+        for columna, texto in fila.items():
+            if columna in NUMERICAS:
+                valores[columna] = _numero(texto)
+            elif columna == "activo":
+                if texto.lower() in VERDADEROS:
+                    valores["activo"] = True
+                elif texto.lower() in FALSOS:
+                    valores["activo"] = False
+                else:
+                    errores.append(f"activo: valor inválido '{texto}'")
+            elif columna == "categoria":
+                valores["id_categoria"] = self.referencias.categorias_por_nombre.get(normalizar(texto))
+                if valores["id_categoria"] is None:
+                    errores.append(f"categoria: '{texto}' no existe o está inactiva")
+            elif columna == "unidad_medida":
+                valores["id_unidad_de_medida"] = self.referencias.unidades_por_nombre.get(normalizar(texto))
+                if valores["id_unidad_de_medida"] is None:
+                    errores.append(f"unidad_medida: '{texto}' no existe o está inactiva")
+            elif columna in COLUMNAS:
+                valores[columna] = texto
+        # Los ids que no son números los rechaza el schema
+        if fila.get("id_categoria", "").isdigit() and int(fila["id_categoria"]) not in self.referencias.categorias:
+            errores.append("id_categoria: no existe o está inactiva")
+        if fila.get("id_unidad_de_medida", "").isdigit() and int(fila["id_unidad_de_medida"]) not in self.referencias.unidades:
+            errores.append("id_unidad_de_medida: no existe o está inactiva")
+        if errores:
+            return errores
+
+        codigo = fila.get("codigo_barras", "").casefold()
+        sku = fila.get("sku", "").casefold()
+        if not codigo and not sku:
+            return ["Falta codigo_barras o sku"]
+        existente_codigo = por_codigo.get(codigo) if codigo else None
+        existente_sku = por_sku.get(sku) if sku else None
+        if existente_codigo and existente_sku and existente_codigo.ID_Producto != existente_sku.ID_Producto:
+            return ["codigo_barras y sku pertenecen a productos distintos"]
+        # Un código de barras nuevo que ya es SKU de otro producto (o al revés)
+        for clave, otro in ((codigo, por_sku.get(codigo)), (sku, por_codigo.get(sku))):
+            propio = existente_codigo or existente_sku
+            if clave and otro and (propio is None or otro.ID_Producto != propio.ID_Producto):
+                return [f"El código '{clave}' ya está usado por el producto {otro.ID_Producto}"]
+
+        existente = existente_codigo or existente_sku
+        try:
+            if existente is None:
+                datos = ProductoCreate(**valores).dict()
+                activo = valores.get("activo", True)
+            else:
+                datos = ProductoUpdate(**valores).dict(exclude_unset=True)
+                activo = datos.pop("activo", None)
+        except ValidationError as e:
+            return _errores_validacion(e)
+
+        # Los precios se controlan aparte, con las mismas reglas que POST/PUT /productos (el
+        # validador del schema valida precio antes de conocer el costo)
+        precio = datos.get("precio", existente.Precio if existente else None)
+        costo = datos.get("costo", existente.Costo if existente else None)
+        precio_mayorista = datos.get("precio_mayorista", existente.Precio_Mayorista if existente else None)
+        error = error_de_precios(precio, costo, precio_mayorista)
+        if error:
+            return [f"{error[0]}: {error[1]}"]
+
+        ahora = datetime.now()
+        registro = {COLUMNAS[c]: v for c, v in datos.items() if c in COLUMNAS}
+        if existente is None:
+            registro.update(Activo=activo, Fecha_Creacion=ahora, Fecha_Actualizacion=ahora)
+            return "insertar", registro
+        if activo is not None:
+            registro["Activo"] = activo
+        registro.update(ID_Producto=existente.ID_Producto, Fecha_Actualizacion=ahora)
+        return "actualizar", registro
+
+    def procesar_lote(self, lote: List[Tuple[int, dict]]):
+        por_codigo, por_sku = self.existentes(lote)
+        altas, cambios = [], []
+        for numero, fila in lote:
+            # Un código repetido en el archivo: vale la primera fila
+            repetida = next((self.vistos[c] for c in self._codigos(fila) if c in self.vistos), None)
+            if repetida is not None:
+                self.error(numero, fila, [f"Código repetido en el archivo (fila {repetida})"])
+                continue
+            resultado = self.preparar(fila, por_codigo, por_sku)
+            if isinstance(resultado, list):
+                self.error(numero, fila, resultado)
+                continue
+            for c in self._codigos(fila):
+                self.vistos[c] = numero
+            accion, registro = resultado
+            (altas if accion == "insertar" else cambios).append((numero, fila, registro))
+
+        if self.simular:
+            self.insertados += len(altas)
+            self.actualizados += len(cambios)
+            return
+        try:
+            self.guardar([r for _, _, r in altas], [r for _, _, r in cambios])
+            self.db.commit()
+            self.insertados += len(altas)
+            self.actualizados += len(cambios)
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            logger.warning(f"Falló el lote de importación, se guarda fila por fila: {e}")
+            self.guardar_por_fila(altas, cambios)
+
+    def guardar(self, altas: List[dict], cambios: List[dict]):
+        if altas:
+            # Todas las filas con las mismas claves, así el INSERT va en un solo executemany
+            claves = set().union(*altas)
+            self.db.execute(insert(Productos), [{c: r.get(c) for c in claves} for r in altas])
+        if cambios:
+            self.db.execute(update(Productos), cambios)
+
+    # Si el lote falla (por ejemplo un código que otro proceso dio de alta mientras tanto),
+    # cada fila se guarda sola para saber cuáles fallan
+    def guardar_por_fila(self, altas, cambios):
+        for numero, fila, registro in altas + cambios:
+            es_alta = "ID_Producto" not in registro
+            try:
+                self.guardar([registro] if es_alta else [], [] if es_alta else [registro])
+                self.db.commit()
+            except SQLAlchemyError as e:
+                self.db.rollback()
+                self.error(numero, fila, [f"No se pudo guardar: {str(e.orig if hasattr(e, 'orig') else e)[:200]}"])
+                continue
+            if es_alta:
+                self.insertados += 1
+            else:
+                self.actualizados += 1
+
+    def _codigos(self, fila: dict) -> List[str]:
+        return [fila[c].casefold() for c in ("codigo_barras", "sku") if c in fila]
+
+    def resumen(self) -> dict:
+        return {
+            "filas": self.filas,
+            "insertados": self.insertados,
+            "actualizados": self.actualizados,
+            "con_errores": self.con_errores,
+            "simulacion": self.simular,
+            "errores": self.errores
+        }
+
+def importar_productos(db: Session, archivo, nombre_archivo: str, simular: bool = False, codificacion: str = "utf-8-sig") -> dict:
+    inicio = time.perf_counter()
+    encabezado, filas = leer_filas(archivo, nombre_archivo, codificacion)
+    importacion = ImportacionProductos(db, simular)
+    resultado = {}
+    try:
+        with recargar_al_terminar(db):
+            importacion.procesar(filas)
+    except (UnicodeDecodeError, csv.Error) as e:
+        # Los lotes anteriores ya quedaron guardados
+        resultado["error_archivo"] = f"No se pudo leer el archivo después de la fila {importacion.filas + 1}: {e}"
+    resultado.update(importacion.resumen())
+    resultado["columnas_ignoradas"] = [
+        c for c in encabezado
+        if c and c not in COLUMNAS and c not in ("categoria", "unidad_medida")
+    ]
+    resultado["duracion_s"] = round(time.perf_counter() - inicio, 3)
+    logger.info(
+        f"Importación de {nombre_archivo}: {importacion.filas} filas, {importacion.insertados} altas, "
+        f"{importacion.actualizados} actualizaciones, {importacion.con_errores} con errores en {resultado['duracion_s']}s"
+    )
+    return resultado
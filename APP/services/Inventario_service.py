@@ -0,0 +1,232 @@
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, case, insert, update
+from typing import Dict, List, Optional
+from datetime import datetime
+from APP.DB.Productos_model import Productos
+from APP.DB.Inventario_model import Inventario
+from APP.DB.Movimientos_inventario_model import Movimientos_inventario
+
+# Ledger de inventario: todo cambio de Stock_Actual pasa por aplicar_deltas_stock,
+# que lo resuelve con un UPDATE condicional atómico (sin leer y reescribir en Python)
+
+# Sumar cantidades por producto (una operación puede repetir un producto en varias líneas)
+def agrupar_cantidades(detalles) -> Dict[int, int]:
+    cantidades: Dict[int, int] = {}
+    for detalle in detalles:
+        cantidades[detalle.id_producto] = cantidades.get(detalle.id_producto, 0) + detalle.cantidad
+    return cantidades
+
+# Aplicar variaciones de stock (positivas o negativas) a varios productos de una sucursal.
+# Las salidas solo se aplican si el stock alcanza (WHERE Stock_Actual + delta >= 0), de modo
+# que dos ventas concurrentes nunca pueden dejar el stock en negativo.
+# Las entradas crean el registro de inventario si todavía no existe.
+# Devuelve el stock resultante por producto.
+def aplicar_deltas_stock(
+    db: Session,
+    id_sucursal: int,
+    deltas: Dict[int, int],
+    mensaje_error: str = "Stock insuficiente para el producto {nombre}",
+    permitir_negativo: bool = False
+) -> Dict[int, int]:
+    if not deltas:
+        return {}
+
+    ahora = datetime.now()
+    variacion = case(deltas, value=Inventario.ID_Producto, else_=0)
+
+    condiciones = [
+        Inventario.ID_Sucursal == id_sucursal,
+        Inventario.ID_Producto.in_(list(deltas))
+    ]
+    if not permitir_negativo:
+        condiciones.append(Inventario.Stock_Actual + variacion >= 0)
+
+    filas = db.execute(
+        update(Inventario)
+        .where(*condiciones)
+        .values(
+            Stock_Actual=Inventario.Stock_Actual + variacion,
+            Fecha_Ultimo_Movimiento=ahora
+        )
+        .returning(Inventario.ID_Producto, Inventario.Stock_Actual),
+        execution_options={"synchronize_session": False}
+    ).all()
+    stock_resultante = {fila.ID_Producto: fila.Stock_Actual for fila in filas}
+
+    faltantes = [id_producto for id_producto in deltas if id_producto not in stock_resultante]
+
+    # Entradas sobre productos sin registro de inventario en la sucursal
+    nuevos = [
+        id_producto for id_producto in faltantes
+        if deltas[id_producto] >= 0 or permitir_negativo
+    ]
+    if nuevos:
+        db.execute(
+            insert(Inventario),
+            [
+                {
+                    "ID_Producto": id_producto,
+                    "ID_Sucursal": id_sucursal,
+                    "Stock_Actual": deltas[id_producto],
+                    "Stock_Minimo": 0,
+                    "Stock_Maximo": 999999,
+                    "Fecha_Ultimo_Movimiento": ahora
+                }
+                for id_producto in nuevos
+            ]
+        )
+        for id_producto in nuevos:
+            stock_resultante[id_producto] = deltas[id_producto]
+
+    # Salidas que no pudieron aplicarse: sin registro o sin stock suficiente.
+    # Las filas ya actualizadas se descartan con el rollback de la sesión
+    rechazados = [id_producto for id_producto in faltantes if id_producto not in nuevos]
+    if rechazados:
+        nombre = db.query(Productos.Nombre).filter(
+            Productos.ID_Producto == rechazados[0]
+        ).scalar()
+        raise HTTPException(
+            status_code=400,
+            detail=mensaje_error.format(nombre=nombre or rechazados[0])
+        )
+
+    return stock_resultante
+
+# Insertar los movimientos de inventario en un solo lote
+def registrar_movimientos(
+    db: Session,
+    id_sucursal: int,
+    movimientos: List[dict],
+    tipo: str,
+    id_usuario: int,
+    id_referencia: Optional[int] = None,
+    tipo_referencia: Optional[str] = None,
+    observaciones: Optional[str] = None
+):
+    if not movimientos:
+        return
+
+    ahora = datetime.now()
+    db.execute(
+        insert(Movimientos_inventario),
+        [
+            {
+                "ID_Producto": movimiento["id_producto"],
+                "ID_Sucursal": id_sucursal,
+                "Fecha": ahora,
+                "Tipo": tipo,
+                "Cantidad": movimiento["cantidad"],
+                "Costo_Unitario": movimiento.get("costo_unitario"),
+                "ID_Usuario": id_usuario,
+                "ID_Referencia": id_referencia,
+                "Tipo_Referencia": tipo_referencia,
+                "Observaciones": observaciones
+            }
+            for movimiento in movimientos
+        ]
+    )
+
+# Aplicar los movimientos al stock y registrarlos en Movimientos_inventario.
+# Cada movimiento es un dict con id_producto, cantidad (con signo) y opcionalmente costo_unitario
+def aplicar_movimientos(
+    db: Session,
+    id_sucursal: int,
+    movimientos: List[dict],
+    tipo: str,
+    id_usuario: int,
+    id_referencia: Optional[int] = None,
+    tipo_referencia: Optional[str] = None,
+    observaciones: Optional[str] = None,
+    mensaje_error: str = "Stock insuficiente para el producto {nombre}",
+    permitir_negativo: bool = False
+) -> Dict[int, int]:
+    deltas: Dict[int, int] = {}
+    for movimiento in movimientos:
+        deltas[movimiento["id_producto"]] = deltas.get(movimiento["id_producto"], 0) + movimiento["cantidad"]
+
+    stock_resultante = aplicar_deltas_stock(
+        db, id_sucursal, deltas,
+        mensaje_error=mensaje_error,
+        permitir_negativo=permitir_negativo
+    )
+    registrar_movimientos(
+        db, id_sucursal, movimientos, tipo, id_usuario,
+        id_referencia=id_referencia,
+        tipo_referencia=tipo_referencia,
+        observaciones=observaciones
+    )
+    return stock_resultante
+
+# Traer productos activos y su stock en la sucursal en una sola consulta
+def obtener_productos_con_stock(db: Session, ids_producto: List[int], id_sucursal: int):
+    filas = db.query(
+        Productos.ID_Producto,
+        Productos.Nombre,
+        Productos.Codigo_Barras,
+        Productos.SKU,
+        Productos.Costo,
+        Inventario.ID_Inventario,
+        Inventario.Stock_Actual
+    ).outerjoin(
+        Inventario, and_(
+            Inventario.ID_Producto == Productos.ID_Producto,
+            Inventario.ID_Sucursal == id_sucursal
+        )
+    ).filter(
+        Productos.ID_Producto.in_(ids_producto),
+        Productos.Activo == True
+    ).all()
+
+    return {fila.ID_Producto: fila for fila in filas}
+
+# Stock actual de varios productos en una sucursal, en una sola consulta.
+# Los productos sin registro de inventario no aparecen en el resultado
+def obtener_stock_sucursal(db: Session, ids_producto: List[int], id_sucursal: int) -> Dict[int, int]:
+    return dict(
+        db.query(Inventario.ID_Producto, Inventario.Stock_Actual).filter(
+            Inventario.ID_Producto.in_(ids_producto),
+            Inventario.ID_Sucursal == id_sucursal
+        ).all()
+    )
+
+# Validar productos, stock y precios de todas las líneas de una venta.
+# Los errores se reportan en el mismo orden y con los mismos mensajes que la validación línea por línea;
+# la garantía contra ventas concurrentes la da el UPDATE condicional de aplicar_deltas_stock
+def validar_detalles_venta(db: Session, id_sucursal: int, detalles):
+    cantidades = agrupar_cantidades(detalles)
+    productos = obtener_productos_con_stock(db, list(cantidades), id_sucursal)
+
+    for detalle in detalles:
+        producto = productos.get(detalle.id_producto)
+        if not producto:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Producto {detalle.id_producto} no encontrado o inactivo"
+            )
+
+        if producto.Stock_Actual is None or producto.Stock_Actual < cantidades[detalle.id_producto]:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Stock insuficiente para el producto {producto.Nombre}"
+            )
+
+        if detalle.precio_unitario < producto.Costo:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Precio inválido para el producto {producto.Nombre}"
+            )
+
+    return productos
+
+# Descontar el stock de toda la venta y registrar los movimientos en lote
+def registrar_salida_venta(db: Session, id_sucursal: int, detalles, id_usuario: int, id_factura: int):
+    return aplicar_movimientos(
+        db,
+        id_sucursal,
+        [{"id_producto": d.id_producto, "cantidad": -d.cantidad} for d in detalles],
+        "Venta",
+        id_usuario,
+        id_referencia=id_factura,
+        tipo_referencia="Factura"
+    )
@@ -0,0 +1,37 @@
+from logging.handlers import QueueHandler, QueueListener
+import logging
+import queue
+import threading
+
+# Logging sin bloquear el event loop: los loggers solo encolan el registro y un hilo de fondo
+# (QueueListener) hace el formateo, los tracebacks y la escritura a disco.
+# La cola es acotada; si se llena, el registro se descarta y se cuenta en lugar de esperar.
+
+class ColaLoggingAcotada(QueueHandler):
+    def __init__(self, max_registros: int):
+        super().__init__(queue.Queue(maxsize=max_registros))
+        self._lock_contador = threading.Lock()
+        self.descartados = 0
+
+    # El QueueHandler estándar formatea el mensaje (y el traceback) en el hilo que loguea.
+    # Acá el registro pasa tal cual: el listener lo formatea en su hilo
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock_contador:
+                self.descartados += 1
+
+    def pendientes(self) -> int:
+        return self.queue.qsize()
+
+# Conectar el logger a la cola y arrancar el hilo que escribe en los handlers reales
+def iniciar_logging_en_segundo_plano(logger: logging.Logger, handlers, max_registros: int):
+    cola = ColaLoggingAcotada(max_registros)
+    listener = QueueListener(cola.queue, *handlers, respect_handler_level=True)
+    logger.addHandler(cola)
+    listener.start()
+    return cola, listener
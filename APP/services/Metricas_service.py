@@ -0,0 +1,265 @@
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from contextvars import ContextVar
+from typing import Dict, Optional
+from bisect import bisect_left
+from APP.services.Consultas_lentas_service import registrar_consulta_lenta, UMBRAL_SEGUNDOS
+import ipaddress
+import threading
+import hmac
+import time
+import os
+import re
+
+# Métricas de SQL por request: cantidad de sentencias, tiempo total en la base y la sentencia
+# más lenta. El middleware de main crea un MetricasRequest por request y lo deja en una
+# ContextVar; los eventos del engine lo encuentran ahí aunque el endpoint corra en el pool
+# de hilos (anyio copia el contexto) o en la sesión asíncrona.
+
+LARGO_MAXIMO_SQL = 300
+
+# Acceso a /metrics: con METRICAS_TOKEN hay que mandar "Authorization: Bearer <token>"; sin
+# token solo se responde a clientes de METRICAS_REDES (por defecto loopback y redes privadas)
+METRICAS_TOKEN = os.getenv("METRICAS_TOKEN", "")
+METRICAS_REDES = tuple(
+    ipaddress.ip_network(red.strip())
+    for red in os.getenv(
+        "METRICAS_REDES", "127.0.0.0/8,::1/128,10.0.0.0/8,172.16.0.0/12,192.168.0.0/16,fc00::/7"
+    ).split(",")
+    if red.strip()
+)
+
+class MetricasRequest:
+    __slots__ = ("scope", "sentencias", "tiempo_db", "tiempo_mas_lenta", "sql_mas_lenta")
+
+    def __init__(self, scope=None):
+        self.scope = scope
+        self.sentencias = 0
+        self.tiempo_db = 0.0
+        self.tiempo_mas_lenta = 0.0
+        self.sql_mas_lenta = None
+
+    def registrar(self, duracion: float, sql: str):
+        self.sentencias += 1
+        self.tiempo_db += duracion
+        if duracion >= self.tiempo_mas_lenta:
+            self.tiempo_mas_lenta = duracion
+            self.sql_mas_lenta = sql
+
+    # SQL de la sentencia más lenta en una sola línea y recortado, para el log
+    def sql_mas_lenta_resumida(self) -> Optional[str]:
+        if not self.sql_mas_lenta:
+            return None
+        sql = re.sub(r"\s+", " ", self.sql_mas_lenta).strip()
+        return sql if len(sql) <= LARGO_MAXIMO_SQL else sql[:LARGO_MAXIMO_SQL] + "..."
+
+    # Valor del header Server-Timing (duraciones en milisegundos)
+    def server_timing(self, duracion_total: float) -> str:
+        return ", ".join([
+            f'db;dur={self.tiempo_db * 1000:.2f};desc="{self.sentencias} sentencias"',
+            f'db-lenta;dur={self.tiempo_mas_lenta * 1000:.2f}',
+            f'total;dur={duracion_total * 1000:.2f}'
+        ])
+
+_metricas_request: ContextVar[Optional[MetricasRequest]] = ContextVar("metricas_request", default=None)
+
+def iniciar_metricas_request(scope=None):
+    metricas = MetricasRequest(scope)
+    return metricas, _metricas_request.set(metricas)
+
+def finalizar_metricas_request(token):
+    _metricas_request.reset(token)
+
+def metricas_request_actual() -> Optional[MetricasRequest]:
+    return _metricas_request.get()
+
+# Los eventos se registran sobre la clase Engine: cubren el engine sincrónico y el
+# asíncrono (que se crea recién cuando se usa por primera vez)
+@event.listens_for(Engine, "before_cursor_execute")
+def _antes_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._inicio_metricas = time.perf_counter()
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _despues_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    inicio = getattr(context, "_inicio_metricas", None)
+    if inicio is None:
+        return
+    duracion = time.perf_counter() - inicio
+    metricas = _metricas_request.get()
+    if metricas is not None:
+        metricas.registrar(duracion, statement)
+    if UMBRAL_SEGUNDOS > 0 and duracion >= UMBRAL_SEGUNDOS:
+        registrar_consulta_lenta(conn, statement, parameters, executemany, duracion, ruta_request(metricas))
+
+# Ruta que originó la sentencia ("GET /productos/"), para el registro de consultas lentas.
+# Las sentencias fuera de un request (arranque, tareas de fondo) quedan como sin_ruta
+def ruta_request(metricas: Optional[MetricasRequest]) -> str:
+    if metricas is None or metricas.scope is None:
+        return RUTA_DESCONOCIDA
+    return f'{metricas.scope["method"]} {plantilla_ruta(metricas.scope)}'
+
+# --- Métricas para Prometheus (/metrics) ---
+# Contadores e histogramas propios, sin dependencias. Las etiquetas de cada serie se arman
+# una sola vez, cuando aparece la ruta; por request solo se suman números.
+
+PREFIJO_METRICAS = "ferreteria"
+
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_TAMANO = (100, 1000, 10000, 100000, 1000000, 10000000)
+BUCKETS_ESPERA_POOL = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0)
+
+# Tipos de error, uno por cada manejador de excepciones de main
+TIPOS_ERROR = ("validacion", "integridad", "base_de_datos", "interno")
+
+RUTA_DESCONOCIDA = "sin_ruta"
+
+class Histograma:
+    __slots__ = ("limites", "conteos", "suma", "total")
+
+    def __init__(self, limites):
+        self.limites = tuple(limites)
+        self.conteos = [0] * (len(self.limites) + 1)  # el último es +Inf
+        self.suma = 0.0
+        self.total = 0
+
+    def observar(self, valor: float):
+        self.conteos[bisect_left(self.limites, valor)] += 1
+        self.suma += valor
+        self.total += 1
+
+    # Líneas en formato de texto de Prometheus (los buckets son acumulativos)
+    def exponer(self, nombre: str, etiquetas: str, lineas: list):
+        separador = "," if etiquetas else ""
+        acumulado = 0
+        for limite, conteo in zip(self.limites, self.conteos):
+            acumulado += conteo
+            lineas.append(f'{nombre}_bucket{{{etiquetas}{separador}le="{limite}"}} {acumulado}')
+        # El total sale de los mismos conteos, así queda consistente aunque se lea sin lock
+        acumulado += self.conteos[-1]
+        lineas.append(f'{nombre}_bucket{{{etiquetas}{separador}le="+Inf"}} {acumulado}')
+        sufijo = f"{{{etiquetas}}}" if etiquetas else ""
+        lineas.append(f"{nombre}_sum{sufijo} {self.suma}")
+        lineas.append(f"{nombre}_count{sufijo} {acumulado}")
+
+class MetricasRuta:
+    __slots__ = ("etiquetas", "latencia", "tamano", "respuestas", "errores")
+
+    def __init__(self, metodo: str, ruta: str):
+        self.etiquetas = f'metodo="{metodo}",ruta="{ruta}"'
+        self.latencia = Histograma(BUCKETS_LATENCIA)
+        self.tamano = Histograma(BUCKETS_TAMANO)
+        self.respuestas = [0] * 5  # 1xx a 5xx
+        self.errores = dict.fromkeys(TIPOS_ERROR, 0)
+
+# Plantilla de la ruta que atendió el request (/productos/{producto_id}, no el path real),
+# así la cantidad de series queda acotada a las rutas declaradas
+def plantilla_ruta(scope) -> str:
+    ruta = scope.get("route")
+    return getattr(ruta, "path", None) or RUTA_DESCONOCIDA
+
+class MetricasHTTP:
+    def __init__(self):
+        self._rutas: Dict[tuple, MetricasRuta] = {}
+        self._lock = threading.Lock()
+        self.en_curso = 0
+
+    def ruta(self, metodo: str, ruta: str) -> MetricasRuta:
+        clave = (metodo, ruta)
+        metricas = self._rutas.get(clave)
+        if metricas is None:
+            with self._lock:
+                metricas = self._rutas.setdefault(clave, MetricasRuta(metodo, ruta))
+        return metricas
+
+    # Se llama desde el middleware ASGI con el scope del request
+    def registrar_respuesta(self, scope, codigo: int, duracion: float, tamano: Optional[int]):
+        metricas = self.ruta(scope["method"], plantilla_ruta(scope))
+        metricas.latencia.observar(duracion)
+        if tamano is not None:
+            metricas.tamano.observar(tamano)
+        metricas.respuestas[min(max(codigo // 100, 1), 5) - 1] += 1
+
+    def registrar_error(self, request, tipo: str):
+        self.ruta(request.method, plantilla_ruta(request.scope)).errores[tipo] += 1
+
+    def exponer(self, lineas: list):
+        rutas = list(self._rutas.values())
+        n = PREFIJO_METRICAS
+
+        lineas.append(f"# HELP {n}_http_requests_en_curso Requests que se están atendiendo")
+        lineas.append(f"# TYPE {n}_http_requests_en_curso gauge")
+        lineas.append(f"{n}_http_requests_en_curso {self.en_curso}")
+
+        lineas.append(f"# HELP {n}_http_duracion_segundos Latencia de los requests por ruta")
+        lineas.append(f"# TYPE {n}_http_duracion_segundos histogram")
+        for metricas in rutas:
+            metricas.latencia.exponer(f"{n}_http_duracion_segundos", metricas.etiquetas, lineas)
+
+        lineas.append(f"# HELP {n}_http_respuesta_bytes Tamaño de las respuestas por ruta")
+        lineas.append(f"# TYPE {n}_http_respuesta_bytes histogram")
+        for metricas in rutas:
+            metricas.tamano.exponer(f"{n}_http_respuesta_bytes", metricas.etiquetas, lineas)
+
+        lineas.append(f"# HELP {n}_http_respuestas_total Respuestas por ruta y clase de código")
+        lineas.append(f"# TYPE {n}_http_respuestas_total counter")
+        for metricas in rutas:
+            for indice, cantidad in enumerate(metricas.respuestas):
+                if cantidad:
+                    lineas.append(f'{n}_http_respuestas_total{{{metricas.etiquetas},codigo="{indice + 1}xx"}} {cantidad}')
+
+        lineas.append(f"# HELP {n}_http_errores_total Errores por ruta y manejador de excepciones")
+        lineas.append(f"# TYPE {n}_http_errores_total counter")
+        for metricas in rutas:
+            for tipo, cantidad in metricas.errores.items():
+                if cantidad:
+                    lineas.append(f'{n}_http_errores_total{{{metricas.etiquetas},tipo="{tipo}"}} {cantidad}')
+
+metricas_http = MetricasHTTP()
+
+def acceso_metricas_permitido(autorizacion: Optional[str], ip_cliente: Optional[str]) -> bool:
+    if METRICAS_TOKEN:
+        esquema, _, token = (autorizacion or "").partition(" ")
+        return esquema.lower() == "bearer" and hmac.compare_digest(token.strip().encode(), METRICAS_TOKEN.encode())
+    try:
+        ip = ipaddress.ip_address(ip_cliente or "")
+    except ValueError:
+        return False
+    return any(ip in red for red in METRICAS_REDES)
+
+# Texto completo para /metrics: HTTP, espera del pool de conexiones y cola de logging
+def exponer_metricas(
+    metricas_pool,
+    estado_pool: dict,
+    log_descartados: Optional[int] = None,
+    log_pendientes: Optional[int] = None
+) -> str:
+    lineas = []
+    metricas_http.exponer(lineas)
+    n = PREFIJO_METRICAS
+
+    lineas.append(f"# HELP {n}_db_pool_espera_segundos Espera para obtener una conexión del pool")
+    lineas.append(f"# TYPE {n}_db_pool_espera_segundos histogram")
+    metricas_pool.histograma_espera.exponer(f"{n}_db_pool_espera_segundos", "", lineas)
+
+    lineas.append(f"# HELP {n}_db_pool_timeouts_total Checkouts que vencieron esperando conexión")
+    lineas.append(f"# TYPE {n}_db_pool_timeouts_total counter")
+    lineas.append(f"{n}_db_pool_timeouts_total {metricas_pool.timeouts_totales}")
+
+    for clave, descripcion in (("en_uso", "Conexiones prestadas"), ("disponibles", "Conexiones libres en el pool")):
+        if clave in estado_pool:
+            lineas.append(f"# HELP {n}_db_pool_{clave} {descripcion}")
+            lineas.append(f"# TYPE {n}_db_pool_{clave} gauge")
+            lineas.append(f"{n}_db_pool_{clave} {estado_pool[clave]}")
+
+    # Logging en segundo plano: registros descartados por cola llena y pendientes de escribir
+    if log_descartados is not None:
+        lineas.append(f"# HELP {n}_log_descartados_total Registros de log descartados por cola llena")
+        lineas.append(f"# TYPE {n}_log_descartados_total counter")
+        lineas.append(f"{n}_log_descartados_total {log_descartados}")
+    if log_pendientes is not None:
+        lineas.append(f"# HELP {n}_log_pendientes Registros de log esperando a escribirse")
+        lineas.append(f"# TYPE {n}_log_pendientes gauge")
+        lineas.append(f"{n}_log_pendientes {log_pendientes}")
+
+    return "\n".join(lineas) + "\n"
@@ -0,0 +1,223 @@
+from fastapi import HTTPException
+from sqlalchemy import Table, and_, func, or_, select, text, inspect
+from sqlalchemy.engine import Row
+from typing import List, Optional, Tuple
+from collections import OrderedDict
+from datetime import datetime, date
+from decimal import Decimal
+import threading
+import base64
+import json
+import time
+import os
+
+# Paginación por cursor (keyset): en lugar de OFFSET, cada página continúa desde los valores
+# de la clave de orden de la última fila de la página anterior. Así el costo de una página es
+# O(limit) sin importar qué tan lejos se esté del principio.
+
+# Un orden es una lista de (columna, descendente). La última columna debe ser única (la PK)
+# para que el orden sea estable aunque se repitan fechas o nombres.
+Orden = List[Tuple[object, bool]]
+
+PAGINACION_OFFSET = "offset"
+PAGINACION_CURSOR = "cursor"
+
+def es_paginacion_cursor(paginacion: Optional[str], after: Optional[str]) -> bool:
+    return paginacion == PAGINACION_CURSOR or bool(after)
+
+# Orden por una columna elegida con la PK como desempate. Las columnas que admiten NULL
+# no sirven como clave de cursor (las comparaciones con NULL descartan filas)
+def orden_cursor(columna, clave_primaria, descendente: bool = False) -> Orden:
+    if columna is clave_primaria:
+        return [(clave_primaria, descendente)]
+    columnas = getattr(getattr(columna, "property", None), "columns", None)
+    if not columnas or columnas[0].nullable:
+        raise HTTPException(
+            status_code=400,
+            detail=f"No se puede paginar por cursor ordenando por {getattr(columna, 'key', columna)}"
+        )
+    return [(columna, descendente), (clave_primaria, descendente)]
+
+def _a_json(valor):
+    if isinstance(valor, datetime):
+        return {"dt": valor.isoformat()}
+    if isinstance(valor, date):
+        return {"d": valor.isoformat()}
+    if isinstance(valor, Decimal):
+        return {"dec": str(valor)}
+    return valor
+
+def _desde_json(valor):
+    if isinstance(valor, dict):
+        if "dt" in valor:
+            return datetime.fromisoformat(valor["dt"])
+        if "d" in valor:
+            return date.fromisoformat(valor["d"])
+        if "dec" in valor:
+            return Decimal(valor["dec"])
+    return valor
+
+def codificar_cursor(orden: Orden, valores) -> str:
+    contenido = {
+        "k": [columna.key for columna, _ in orden],
+        "v": [_a_json(valor) for valor in valores]
+    }
+    texto = json.dumps(contenido, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(texto).decode("ascii").rstrip("=")
+
+def decodificar_cursor(orden: Orden, cursor: str) -> list:
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        contenido = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        valores = [_desde_json(valor) for valor in contenido["v"]]
+        claves = contenido["k"]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+    # El cursor tiene que haber salido de un listado con el mismo orden
+    if claves != [columna.key for columna, _ in orden] or len(valores) != len(orden):
+        raise HTTPException(status_code=400, detail="El cursor no corresponde a este listado")
+    return valores
+
+# Condición "viene después de" para un orden de varias columnas con direcciones mixtas:
+# (a > x) OR (a = x AND b > y) ...  (SQL Server no soporta comparar tuplas)
+def _condicion_siguiente(orden: Orden, valores: list):
+    condiciones = []
+    for i, (columna, descendente) in enumerate(orden):
+        anteriores = [orden[j][0] == valores[j] for j in range(i)]
+        comparacion = columna < valores[i] if descendente else columna > valores[i]
+        condiciones.append(and_(*anteriores, comparacion))
+    return or_(*condiciones)
+
+# Aplicar filtro, orden y límite de la página. Sirve para Query (sync) y select() (async).
+# Se pide una fila de más para saber si hay página siguiente sin contar el total
+def aplicar_cursor(query, orden: Orden, after: Optional[str], limit: int):
+    if after:
+        query = query.where(_condicion_siguiente(orden, decodificar_cursor(orden, after)))
+    return query.order_by(
+        *[columna.desc() if descendente else columna.asc() for columna, descendente in orden]
+    ).limit(limit + 1)
+
+def _valor_columna(fila, columna):
+    # Las consultas con varias entidades/columnas devuelven Row: se busca la entidad dueña
+    objeto = fila._mapping[columna.class_] if isinstance(fila, Row) else fila
+    return getattr(objeto, columna.key)
+
+# Recortar las filas a la página y calcular el cursor de la siguiente (None si no hay más)
+def armar_pagina(filas, orden: Orden, limit: int):
+    filas = list(filas)
+    if len(filas) <= limit:
+        return filas, None
+    filas = filas[:limit]
+    ultima = filas[-1]
+    return filas, codificar_cursor(orden, [_valor_columna(ultima, columna) for columna, _ in orden])
+
+# --- Total de registros en la paginación por offset ---
+# exact:    COUNT sobre la consulta filtrada (comportamiento original)
+# estimate: sin filtros en SQL Server usa la metadata de particiones (no recorre la tabla);
+#           con filtros reutiliza un COUNT cacheado por TOTAL_ESTIMADO_TTL segundos
+# none:     no cuenta; la respuesta trae total y páginas en null
+TOTAL_EXACTO = "exact"
+TOTAL_ESTIMADO = "estimate"
+TOTAL_NINGUNO = "none"
+
+TOTAL_ESTIMADO_TTL = float(os.getenv("TOTAL_ESTIMADO_TTL", "60"))
+TOTAL_ESTIMADO_MAX = 512
+
+_totales_cacheados = OrderedDict()
+_lock_totales = threading.Lock()
+
+def _sentencia(query):
+    # Query (sync) expone la sentencia en .statement; select() ya es la sentencia
+    return query.statement if hasattr(query, "statement") else query
+
+# Tabla sola, sin WHERE ni GROUP BY: el total es la cantidad de filas de la tabla
+def _tabla_sin_filtros(sentencia) -> Optional[Table]:
+    froms = sentencia.get_final_froms()
+    if (
+        sentencia.whereclause is None
+        and not sentencia._group_by_clauses
+        and len(froms) == 1
+        and isinstance(froms[0], Table)
+    ):
+        return froms[0]
+    return None
+
+def _clave_total(sentencia) -> str:
+    compilada = sentencia.compile()
+    return f"{compilada}|{sorted(compilada.params.items(), key=lambda p: p[0])!r}"
+
+def _total_cacheado(clave: str) -> Optional[int]:
+    with _lock_totales:
+        item = _totales_cacheados.get(clave)
+        if item is None or item[0] < time.monotonic():
+            return None
+        _totales_cacheados.move_to_end(clave)
+        return item[1]
+
+def _guardar_total(clave: str, total: int):
+    with _lock_totales:
+        _totales_cacheados[clave] = (time.monotonic() + TOTAL_ESTIMADO_TTL, total)
+        _totales_cacheados.move_to_end(clave)
+        while len(_totales_cacheados) > TOTAL_ESTIMADO_MAX:
+            _totales_cacheados.popitem(last=False)
+
+def _sql_filas_tabla(tabla: Table):
+    nombre = f"{tabla.schema}.{tabla.name}" if tabla.schema else tabla.name
+    return text(
+        "SELECT SUM(p.rows) FROM sys.partitions p "
+        "WHERE p.object_id = OBJECT_ID(:tabla) AND p.index_id IN (0, 1)"
+    ).bindparams(tabla=nombre)
+
+# Calcular el total según el modo pedido. "contar" permite al endpoint indicar su propio COUNT
+def calcular_total(db, query, modo: str = TOTAL_EXACTO, contar=None) -> Optional[int]:
+    if modo == TOTAL_NINGUNO:
+        return None
+    contar_exacto = contar or query.count
+    if modo != TOTAL_ESTIMADO:
+        return contar_exacto()
+
+    sentencia = _sentencia(query)
+    tabla = _tabla_sin_filtros(sentencia)
+    if tabla is not None and db.get_bind().dialect.name == "mssql":
+        return int(db.execute(_sql_filas_tabla(tabla)).scalar() or 0)
+
+    clave = _clave_total(sentencia)
+    total = _total_cacheado(clave)
+    if total is None:
+        total = contar_exacto()
+        _guardar_total(clave, total)
+    return total
+
+# Igual que calcular_total, para las consultas select() de los endpoints con AsyncSession
+async def calcular_total_async(db, query, modo: str = TOTAL_EXACTO) -> Optional[int]:
+    if modo == TOTAL_NINGUNO:
+        return None
+
+    async def contar_exacto():
+        return await db.scalar(select(func.count()).select_from(query.subquery()))
+
+    if modo != TOTAL_ESTIMADO:
+        return await contar_exacto()
+
+    tabla = _tabla_sin_filtros(query)
+    if tabla is not None and db.get_bind().dialect.name == "mssql":
+        return int((await db.execute(_sql_filas_tabla(tabla))).scalar() or 0)
+
+    clave = _clave_total(query)
+    total = _total_cacheado(clave)
+    if total is None:
+        total = await contar_exacto()
+        _guardar_total(clave, total)
+    return total
+
+# Cantidad de páginas para un total que puede no haberse calculado
+def total_paginas(total: Optional[int], limit: int) -> Optional[int]:
+    if total is None:
+        return None
+    return (total + limit - 1) // limit
+
+# Fila de un modelo con las columnas en minúsculas, como las declaran los schemas de
+# respuesta (ID_Producto -> id_producto)
+def columnas_en_minusculas(objeto) -> dict:
+    return {c.key.lower(): getattr(objeto, c.key) for c in inspect(objeto).mapper.column_attrs}
@@ -0,0 +1,287 @@
+from fastapi.routing import APIRoute
+from starlette.routing import compile_path
+from collections import Counter, OrderedDict
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, List, Optional
+import functools
+import asyncio
+import threading
+import logging
+import random
+import hmac
+import time
+import uuid
+import sys
+import os
+
+# Perfilado por muestreo de un request puntual, sin redeploy. Un hilo toma la pila del
+# request cada PERFILADO_INTERVALO_MS y la acumula en formato "collapsed stacks" (una línea
+# por pila: marco;marco;marco cantidad), que leen flamegraph.pl, speedscope o inferno.
+# Cada pila empieza con su categoría (python, sql_compilacion o db) para ver el reparto.
+#
+# Se activa con el header X-Perfilar: <PERFILADO_TOKEN> o por ruta con una tasa de muestreo
+# (PERFILADO_RUTAS="GET /facturas/estadisticas=0.05,POST /facturas/=0.01").
+# Sin ninguna de las dos configuradas no se instala nada y no tiene costo.
+
+PERFILADO_TOKEN = os.getenv("PERFILADO_TOKEN", "")
+PERFILADO_RUTAS = os.getenv("PERFILADO_RUTAS", "")
+PERFILADO_INTERVALO_MS = float(os.getenv("PERFILADO_INTERVALO_MS", "5"))
+# Corte de seguridad: el muestreo se detiene aunque el request siga
+PERFILADO_MAX_SEGUNDOS = float(os.getenv("PERFILADO_MAX_SEGUNDOS", "30"))
+# Perfiles guardados en memoria (los más viejos se descartan)
+PERFILADO_MAX = int(os.getenv("PERFILADO_MAX", "20"))
+
+# Perfiles simultáneos: el resto de los requests pedidos se atiende sin perfilar
+PERFILES_SIMULTANEOS = 2
+
+HEADER_PERFILAR = b"x-perfilar"
+
+CATEGORIA_PYTHON = "python"
+CATEGORIA_COMPILACION = "sql_compilacion"
+CATEGORIA_DB = "db"
+
+logger = logging.getLogger("main.perfilado")
+
+# Reglas "METODO /ruta/{param}=tasa" con la ruta compilada igual que en Starlette
+def _leer_reglas(texto: str) -> list:
+    reglas = []
+    for regla in filter(None, (parte.strip() for parte in texto.split(","))):
+        try:
+            destino, tasa = regla.rsplit("=", 1)
+            metodo, ruta = destino.split(None, 1)
+            regex, _, _ = compile_path(ruta.strip())
+            reglas.append((metodo.upper(), regex, float(tasa)))
+        except ValueError:
+            logger.warning(f"Regla de perfilado inválida: {regla}")
+    return reglas
+
+REGLAS_PERFILADO = _leer_reglas(PERFILADO_RUTAS)
+
+PERFILADO_ACTIVO = bool(PERFILADO_TOKEN or REGLAS_PERFILADO)
+
+# --- Clasificación de las muestras ---
+
+def _modulo(marco) -> str:
+    return marco.f_globals.get("__name__", "?")
+
+def _categoria(marcos) -> str:
+    compilando = False
+    for marco in marcos:
+        modulo = _modulo(marco)
+        # Esperando a la base: ejecución del cursor o checkout/conexión del pool
+        if (
+            (modulo == "sqlalchemy.engine.default" and marco.f_code.co_name.startswith("do_execute"))
+            or modulo.startswith("sqlalchemy.pool")
+        ):
+            return CATEGORIA_DB
+        if modulo.startswith(("sqlalchemy.sql.compiler", "sqlalchemy.sql.crud")):
+            compilando = True
+    return CATEGORIA_COMPILACION if compilando else CATEGORIA_PYTHON
+
+def _etiqueta(marco) -> str:
+    return f"{_modulo(marco)}:{marco.f_code.co_name}"
+
+class Perfil:
+    def __init__(self, scope, motivo: str, marco_middleware):
+        self.id = uuid.uuid4().hex[:12]
+        self.metodo = scope["method"]
+        self.path = scope["path"]
+        self.ruta = None
+        self.motivo = motivo
+        self.inicio = datetime.now()
+        self.duracion = 0.0
+        self.db_ms = 0.0
+        self.sentencias = 0
+        self.pilas: Counter = Counter()
+        self.categorias: Counter = Counter()
+        # Los endpoints async corren en el hilo del event loop junto con otros requests:
+        # de ese hilo solo se toman las pilas que pasan por el middleware de este request
+        self._marco_middleware = marco_middleware
+        self._hilo_loop = threading.get_ident()
+        # Hilos del pool donde corre el endpoint sincrónico (hilo -> profundidad)
+        self._hilos: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._detener = threading.Event()
+        self._muestreador = threading.Thread(target=self._muestrear, name=f"perfil-{self.id}", daemon=True)
+
+    def entrar_hilo(self):
+        hilo = threading.get_ident()
+        with self._lock:
+            self._hilos[hilo] = self._hilos.get(hilo, 0) + 1
+
+    def salir_hilo(self):
+        hilo = threading.get_ident()
+        with self._lock:
+            if self._hilos.get(hilo, 0) <= 1:
+                self._hilos.pop(hilo, None)
+            else:
+                self._hilos[hilo] -= 1
+
+    # Marcos desde la raíz del request hasta la hoja, o None si la pila no es de este request
+    def _pila(self, hilo: int, hoja) -> Optional[list]:
+        marcos = []
+        marco = hoja
+        while marco is not None:
+            marcos.append(marco)
+            if marco is self._marco_middleware or (hilo != self._hilo_loop and marco.f_code is _CODIGO_ENVOLTORIO):
+                marcos.reverse()
+                return marcos
+            marco = marco.f_back
+        return None
+
+    def _muestrear(self):
+        intervalo = PERFILADO_INTERVALO_MS / 1000
+        limite = time.monotonic() + PERFILADO_MAX_SEGUNDOS
+        propio = threading.get_ident()
+        while not self._detener.wait(intervalo) and time.monotonic() < limite:
+            with self._lock:
+                hilos = [self._hilo_loop, *self._hilos]
+            marcos_por_hilo = sys._current_frames()
+            # Si ya se pidió detener, la pila puede ser la del propio cierre del perfil
+            if self._detener.is_set():
+                break
+            for hilo in hilos:
+                hoja = marcos_por_hilo.get(hilo)
+                if hoja is None or hilo == propio:
+                    continue
+                marcos = self._pila(hilo, hoja)
+                if marcos is None:
+                    continue
+                categoria = _categoria(reversed(marcos))
+                self.categorias[categoria] += 1
+                self.pilas[(categoria, *map(_etiqueta, marcos))] += 1
+            del marcos_por_hilo
+
+    def iniciar(self):
+        self._muestreador.start()
+
+    def detener(self, scope, duracion: float, metricas=None):
+        self._detener.set()
+        self._muestreador.join()
+        ruta = scope.get("route")
+        self.ruta = getattr(ruta, "path", None)
+        self.duracion = duracion
+        if metricas is not None:
+            self.db_ms = metricas.tiempo_db * 1000
+            self.sentencias = metricas.sentencias
+        # El marco del middleware ya no hace falta y retiene las variables del request
+        self._marco_middleware = None
+
+    def colapsado(self) -> str:
+        return "".join(f"{';'.join(pila)} {cantidad}\n" for pila, cantidad in self.pilas.items())
+
+    def resumen(self) -> dict:
+        muestras = sum(self.categorias.values())
+        return {
+            "id": self.id,
+            "metodo": self.metodo,
+            "ruta": self.ruta,
+            "path": self.path,
+            "motivo": self.motivo,
+            "inicio": self.inicio.isoformat(),
+            "duracion_ms": round(self.duracion * 1000, 2),
+            "intervalo_ms": PERFILADO_INTERVALO_MS,
+            "muestras": muestras,
+            # Reparto según las muestras (tiempo de pared del request)
+            "reparto": {
+                categoria: round(self.categorias[categoria] / muestras, 3) if muestras else 0
+                for categoria in (CATEGORIA_PYTHON, CATEGORIA_COMPILACION, CATEGORIA_DB)
+            },
+            # Medido por los eventos del engine (incluye las consultas asíncronas)
+            "db_ms": round(self.db_ms, 2),
+            "sentencias": self.sentencias
+        }
+
+class RegistroPerfiles:
+    def __init__(self, maximo: int = PERFILADO_MAX):
+        self.maximo = maximo
+        self._perfiles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def guardar(self, perfil: Perfil):
+        with self._lock:
+            self._perfiles[perfil.id] = perfil
+            while len(self._perfiles) > self.maximo:
+                self._perfiles.popitem(last=False)
+
+    def obtener(self, perfil_id: str) -> Optional[Perfil]:
+        with self._lock:
+            return self._perfiles.get(perfil_id)
+
+    def listar(self) -> List[dict]:
+        with self._lock:
+            perfiles = list(self._perfiles.values())
+        return [perfil.resumen() for perfil in reversed(perfiles)]
+
+registro_perfiles = RegistroPerfiles()
+
+_perfil_actual: ContextVar[Optional[Perfil]] = ContextVar("perfil_actual", default=None)
+_perfiles_en_curso = threading.BoundedSemaphore(PERFILES_SIMULTANEOS)
+
+def _motivo_perfilado(scope) -> Optional[str]:
+    if PERFILADO_TOKEN:
+        for nombre, valor in scope.get("headers", ()):
+            if nombre == HEADER_PERFILAR:
+                if hmac.compare_digest(valor, PERFILADO_TOKEN.encode("latin-1")):
+                    return "header"
+                break
+    for metodo, regex, tasa in REGLAS_PERFILADO:
+        if metodo == scope["method"] and regex.match(scope["path"]):
+            return "muestreo" if random.random() < tasa else None
+    return None
+
+# Se llama desde el middleware ASGI al empezar el request. Devuelve (perfil, token) o
+# (None, None) si este request no se perfila
+def iniciar_perfil(scope):
+    motivo = _motivo_perfilado(scope)
+    if motivo is None or not _perfiles_en_curso.acquire(blocking=False):
+        return None, None
+    perfil = Perfil(scope, motivo, sys._getframe(1))
+    token = _perfil_actual.set(perfil)
+    perfil.iniciar()
+    return perfil, token
+
+def finalizar_perfil(perfil: Perfil, token, scope, duracion: float, metricas=None):
+    try:
+        _perfil_actual.reset(token)
+        perfil.detener(scope, duracion, metricas)
+        registro_perfiles.guardar(perfil)
+    finally:
+        _perfiles_en_curso.release()
+    logger.info(
+        f"Perfil {perfil.id} - {perfil.metodo} {perfil.path} ({perfil.motivo}): "
+        f"{sum(perfil.categorias.values())} muestras en {duracion * 1000:.1f}ms"
+    )
+
+# --- Endpoints sincrónicos ---
+# FastAPI los corre en el pool de hilos, fuera del stack del middleware. El envoltorio anota
+# el hilo en el perfil del request mientras corre el endpoint para que el muestreador lo siga
+
+def _ejecutar_perfilado(funcion, args, kwargs):
+    perfil = _perfil_actual.get()
+    if perfil is None:
+        return funcion(*args, **kwargs)
+    perfil.entrar_hilo()
+    try:
+        return funcion(*args, **kwargs)
+    finally:
+        perfil.salir_hilo()
+
+_CODIGO_ENVOLTORIO = _ejecutar_perfilado.__code__
+
+def _envolver(funcion):
+    @functools.wraps(funcion)
+    def envuelta(*args, **kwargs):
+        return _ejecutar_perfilado(funcion, args, kwargs)
+    return envuelta
+
+# Se llama con las rutas de cada router a medida que se cargan. Solo se envuelve el endpoint:
+# las dependencias sincrónicas (autenticación) no se siguen, así los dependency_overrides
+# siguen funcionando con la función original
+def instrumentar_rutas(rutas):
+    if not PERFILADO_ACTIVO:
+        return
+    for ruta in rutas:
+        if isinstance(ruta, APIRoute) and not asyncio.iscoroutinefunction(ruta.dependant.call):
+            ruta.dependant.call = _envolver(ruta.dependant.call)
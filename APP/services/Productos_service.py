@@ -0,0 +1,19 @@
+from decimal import Decimal
+from typing import Optional, Tuple
+
+# Reglas de precios de un producto, las mismas para el alta y la modificación por la API y para
+# la importación: costo < precio mayorista < precio. Al modificar se controlan los valores que
+# quedan después del cambio. Devuelve (campo, mensaje) del primer problema o None
+def error_de_precios(
+    precio: Decimal,
+    costo: Decimal,
+    precio_mayorista: Optional[Decimal]
+) -> Optional[Tuple[str, str]]:
+    if precio <= costo:
+        return "precio", "El precio debe ser mayor al costo"
+    if precio_mayorista is not None:
+        if precio_mayorista >= precio:
+            return "precio_mayorista", "El precio mayorista debe ser menor al precio de venta"
+        if precio_mayorista <= costo:
+            return "precio_mayorista", "El precio mayorista debe ser mayor al costo"
+    return None
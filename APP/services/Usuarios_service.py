@@ -0,0 +1,127 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from itertools import chain
+from typing import Optional
+from sqlalchemy.orm.attributes import get_history, PASSIVE_NO_INITIALIZE
+from APP.DB.Usuarios_model import Usuarios
+from APP.services.Cache_productos_service import registrar_colector
+
+# Configuración de la caché de usuarios autenticados (TTL en segundos, 0 la desactiva).
+# La invalidación solo alcanza al proceso que hizo el cambio: con varios workers, los demás
+# siguen usando su copia hasta que vence, por eso el TTL es corto
+USUARIOS_CACHE_TTL = float(os.getenv("USUARIOS_CACHE_TTL", "30"))
+USUARIOS_CACHE_MAX = int(os.getenv("USUARIOS_CACHE_MAX", "1024"))
+
+# Copia liviana del usuario autenticado. No queda atada a ninguna sesión de SQLAlchemy,
+# así que puede compartirse entre requests. No guarda el hash de la contraseña.
+class UsuarioAutenticado:
+    __slots__ = (
+        "ID_Usuario",
+        "Nombre",
+        "Apellido",
+        "CUIL",
+        "Rol",
+        "Email",
+        "ID_Sucursal",
+        "Estado",
+        "Ultimo_Acceso",
+        "Creado_el",
+        "Actualizado_el"
+    )
+
+    def __init__(self, usuario):
+        for campo in self.__slots__:
+            setattr(self, campo, getattr(usuario, campo))
+
+    def __repr__(self):
+        return f"<UsuarioAutenticado(ID_Usuario={self.ID_Usuario}, Email='{self.Email}', Rol='{self.Rol}')>"
+
+# Caché LRU con vencimiento por tiempo, indexada por el email (claim "sub" del token)
+class CacheUsuarios:
+    def __init__(self, ttl: float = USUARIOS_CACHE_TTL, max_items: int = USUARIOS_CACHE_MAX):
+        self.ttl = ttl
+        self.max_items = max_items
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidaciones = 0
+
+    def obtener(self, email: str) -> Optional[UsuarioAutenticado]:
+        with self._lock:
+            item = self._items.get(email)
+            if item is None:
+                self.misses += 1
+                return None
+            vence, usuario = item
+            if vence < time.monotonic():
+                del self._items[email]
+                self.misses += 1
+                return None
+            self._items.move_to_end(email)
+            self.hits += 1
+            return usuario
+
+    def guardar(self, email: str, usuario) -> UsuarioAutenticado:
+        principal = UsuarioAutenticado(usuario)
+        if self.ttl <= 0:
+            return principal
+        with self._lock:
+            self._items[email] = (time.monotonic() + self.ttl, principal)
+            self._items.move_to_end(email)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+        return principal
+
+    def invalidar(self, *emails: str):
+        with self._lock:
+            for email in emails:
+                if email and self._items.pop(email, None) is not None:
+                    self.invalidaciones += 1
+
+    def limpiar(self):
+        with self._lock:
+            self._items.clear()
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            consultas = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / consultas, 4) if consultas else 0.0,
+                "invalidaciones": self.invalidaciones,
+                "items": len(self._items),
+                "max_items": self.max_items,
+                "ttl_segundos": self.ttl
+            }
+
+cache_usuarios = CacheUsuarios()
+
+# --- Invalidación al confirmar ---
+# Cualquier alta, modificación o baja de Usuarios confirmada en este proceso saca de la caché
+# los emails afectados (el anterior y el nuevo si cambió). Un cambio masivo la vacía entera
+_CAMBIOS_USUARIOS = "usuarios_cambios"
+_TODOS = None
+
+def _anotar_usuarios(session) -> list:
+    emails = []
+    for usuario in chain(session.new, session.dirty, session.deleted):
+        if isinstance(usuario, Usuarios):
+            # Sin cargar nada: en un borrado la fila ya no está
+            historial = get_history(usuario, "Email", passive=PASSIVE_NO_INITIALIZE)
+            emails.extend(chain(historial.added, historial.unchanged, historial.deleted))
+    return emails
+
+def _anotar_usuarios_masivo(session, clase) -> list:
+    return [_TODOS] if clase is Usuarios else []
+
+def _aplicar_usuarios(emails: list):
+    if _TODOS in emails:
+        cache_usuarios.limpiar()
+    else:
+        cache_usuarios.invalidar(*emails)
+
+registrar_colector(_CAMBIOS_USUARIOS, _anotar_usuarios, _anotar_usuarios_masivo, _aplicar_usuarios)
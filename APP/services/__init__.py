@@ -0,0 +1,3 @@
+"""
+Módulo de servicios de negocio compartidos por los routers
+""" 
\ No newline at end of file
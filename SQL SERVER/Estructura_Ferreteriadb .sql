@@ -82,7 +82,7 @@ CREATE TABLE Clientes (
         Nombre VARCHAR(150) NOT NULL,
         Apellido VARCHAR(150) NULL,
         CUIT_CUIL VARCHAR(13) NULL UNIQUE,
-        Tipo_Cliente VARCHAR(20) NOT NULL DEFAULT 'Consumidor Final', -- 'Consumidor Final', 'Responsable Inscripto', 'Monotributista'
+        Tipo_Cliente VARCHAR(30) NOT NULL DEFAULT 'Consumidor Final', -- 'Consumidor Final', 'Responsable Inscripto', 'Monotributista'
         Condicion_IVA VARCHAR(50) NULL, -- 'IVA Responsable Inscripto', 'IVA Responsable no Inscripto', 'IVA no Responsable', 'IVA Sujeto Exento'
         Direccion VARCHAR(200) NOT NULL,
         Localidad VARCHAR(100) NOT NULL,
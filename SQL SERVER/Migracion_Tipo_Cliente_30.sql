@@ -0,0 +1,8 @@
+USE Ferreteriadb
+
+-- Tipo_Cliente acepta 'Responsable Inscripto' (21 caracteres) pero la columna se creó como VARCHAR(20).
+-- Para bases creadas con una versión anterior de Estructura_Ferreteriadb.sql; se puede correr más de una vez.
+-- Agrandar un VARCHAR no choca con el DEFAULT ni con el índice IX_Clientes_Tipo, así que no hace falta recrearlos
+IF COL_LENGTH('Clientes', 'Tipo_Cliente') < 30
+    ALTER TABLE Clientes ALTER COLUMN Tipo_Cliente VARCHAR(30) NOT NULL;
+GO
@@ -0,0 +1,3 @@
+"""
+Módulo de benchmarks de rendimiento de la API
+""" 
\ No newline at end of file
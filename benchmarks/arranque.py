@@ -0,0 +1,147 @@
+import sys
+import os
+import json
+import argparse
+import tempfile
+import subprocess
+from collections import defaultdict
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.comun import percentil
+
+# Tiempo de arranque de la app, medido en procesos nuevos (como un worker recién levantado):
+# import de main, generación del OpenAPI (en frío y desde la cache) y carga de los routers
+# restantes (lo que pagan los primeros requests con la carga diferida). Con -X importtime
+# muestra los módulos que más tardan en importarse al arrancar.
+#
+# Con --json guarda la medición; con --linea-base sale con código 1 si la mediana del import
+# de main supera la de una medición guardada (más --tolerancia), así puede correr en CI y
+# frenar las regresiones del arranque. --presupuesto-ms fija un máximo absoluto en su lugar:
+#
+#     python benchmarks/arranque.py --repeticiones 7 --json arranque_base.json
+#     python benchmarks/arranque.py --linea-base arranque_base.json --tolerancia 0.2
+#     CARGA_DIFERIDA_ROUTERS=false python benchmarks/arranque.py   # comparar con la carga completa
+#
+# tests/test_arranque.py hace el mismo control dentro de pytest (ARRANQUE_LINEA_BASE o
+# ARRANQUE_PRESUPUESTO_MS); sin ninguna de las dos se saltea
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Código que corre en cada proceso nuevo; imprime los tiempos como JSON en la última línea
+MEDICION = """
+import json, time
+inicio = time.perf_counter()
+import main
+importado = time.perf_counter()
+main.app.openapi()
+openapi = time.perf_counter()
+main.cargador_routers.cargar_todos()
+routers = time.perf_counter()
+print(json.dumps({
+    "import_ms": (importado - inicio) * 1000,
+    "openapi_ms": (openapi - importado) * 1000,
+    "routers_ms": (routers - openapi) * 1000
+}))
+"""
+
+def correr(argumentos: list, cache_openapi: str) -> subprocess.CompletedProcess:
+    entorno = dict(os.environ, OPENAPI_CACHE=cache_openapi)
+    resultado = subprocess.run(
+        [sys.executable, *argumentos], cwd=RAIZ, env=entorno, capture_output=True, text=True
+    )
+    if resultado.returncode != 0:
+        sys.exit(f"El proceso de medición falló:\n{resultado.stderr[-3000:]}")
+    return resultado
+
+def medir(cache_openapi: str) -> dict:
+    resultado = correr(["-c", MEDICION], cache_openapi)
+    return json.loads(resultado.stdout.strip().splitlines()[-1])
+
+# Máximo para el import de main a partir de una medición guardada con --json: su mediana más
+# la tolerancia (0.25 = hasta un 25% más lento)
+def limite_linea_base(ruta: str, tolerancia: float) -> float:
+    with open(ruta, encoding="utf-8") as f:
+        return json.load(f)["mediana"]["import_ms"] * (1 + tolerancia)
+
+# Perfil de imports de un arranque (solo el import de main, sin los routers diferidos)
+def perfil_imports(cache_openapi: str) -> list:
+    return leer_importtime(correr(["-X", "importtime", "-c", "import main"], cache_openapi).stderr)
+
+# Líneas de -X importtime: "import time: propio | acumulado | modulo" (en microsegundos)
+def leer_importtime(texto: str) -> list:
+    modulos = []
+    for linea in texto.splitlines():
+        if not linea.startswith("import time:") or "self [us]" in linea:
+            continue
+        propio, acumulado, nombre = linea[len("import time:"):].split("|")
+        modulos.append((nombre.strip(), int(propio), int(acumulado)))
+    return modulos
+
+def imprimir_importtime(modulos: list, top: int):
+    print("\nMódulos más lentos (tiempo propio, sin contar sus imports)")
+    print(f"{'Módulo':<55} | {'Propio ms':>9} | {'Acum. ms':>9}")
+    print("-" * 79)
+    for nombre, propio, acumulado in sorted(modulos, key=lambda m: m[1], reverse=True)[:top]:
+        print(f"{nombre:<55} | {propio / 1000:>9.1f} | {acumulado / 1000:>9.1f}")
+
+    # Por paquete de primer nivel (APP se separa en DB, routers, schemas y services)
+    paquetes = defaultdict(int)
+    for nombre, propio, _ in modulos:
+        partes = nombre.split(".")
+        paquete = ".".join(partes[:2]) if partes[0] == "APP" and len(partes) > 1 else partes[0]
+        paquetes[paquete] += propio
+    print(f"\n{'Paquete':<30} | {'ms':>7}")
+    print("-" * 40)
+    for paquete, propio in sorted(paquetes.items(), key=lambda p: p[1], reverse=True)[:top]:
+        print(f"{paquete:<30} | {propio / 1000:>7.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo de arranque de la app en procesos nuevos")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--presupuesto-ms", type=float, default=0, help="Máximo absoluto para la mediana del import de main (0 = sin control)")
+    parser.add_argument("--linea-base", help="Medición guardada con --json contra la que se controla la mediana del import de main")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="Margen sobre la línea base (0.25 = 25%% más lento)")
+    parser.add_argument("--top", type=int, default=20, help="Módulos a listar del perfil de imports")
+    parser.add_argument("--sin-perfil", action="store_true", help="No correr -X importtime")
+    parser.add_argument("--json", help="Archivo donde guardar los resultados")
+    args = parser.parse_args()
+
+    cache = os.path.join(tempfile.mkdtemp(), "openapi.json")
+    # La primera corrida genera el OpenAPI y lo deja en la cache; el resto lo lee de ahí
+    frio = medir(cache)
+    corridas = [medir(cache) for _ in range(args.repeticiones)]
+
+    mediana = {clave: percentil([c[clave] for c in corridas], 50) for clave in ("import_ms", "openapi_ms", "routers_ms")}
+    print(f"{'Medición':<34} | {'ms':>8}")
+    print("-" * 46)
+    print(f"{'import de main (mediana)':<34} | {mediana['import_ms']:>8.1f}")
+    print(f"{'import de main (máximo)':<34} | {max(c['import_ms'] for c in corridas):>8.1f}")
+    print(f"{'OpenAPI generado (en frío)':<34} | {frio['openapi_ms']:>8.1f}")
+    print(f"{'OpenAPI desde la cache':<34} | {mediana['openapi_ms']:>8.1f}")
+    print(f"{'carga de los routers restantes':<34} | {mediana['routers_ms']:>8.1f}")
+
+    modulos = []
+    if not args.sin_perfil:
+        modulos = perfil_imports(cache)
+        imprimir_importtime(modulos, args.top)
+
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({
+                "carga_diferida": os.getenv("CARGA_DIFERIDA_ROUTERS", "true"),
+                "mediana": mediana,
+                "openapi_frio_ms": frio["openapi_ms"],
+                "corridas": corridas,
+                "modulos": [{"modulo": n, "propio_us": p, "acumulado_us": a} for n, p, a in modulos]
+            }, f, indent=2, ensure_ascii=False)
+
+    limite = limite_linea_base(args.linea_base, args.tolerancia) if args.linea_base else args.presupuesto_ms
+    if limite and mediana["import_ms"] > limite:
+        print(f"\nEl import de main tarda {mediana['import_ms']:.1f}ms y el máximo es {limite:.0f}ms")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import sys
+import os
+import time
+import json
+import asyncio
+import argparse
+import tempfile
+from functools import partial
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import anyio.to_thread
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from benchmarks.comun import (
+    crear_engine_sqlite,
+    crear_esquema,
+    crear_sesion,
+    sembrar_referencias,
+    sembrar_productos,
+    percentil
+)
+from APP.DB.Productos_model import Productos
+
+# Compara el throughput de la misma consulta (búsqueda de producto por código) hecha:
+#   - sync:  Session normal ejecutada en el pool de hilos, como los endpoints "def"
+#   - async: AsyncSession esperada directamente en el event loop
+# Por defecto usa un archivo SQLite (sqlite + aiosqlite); con --url-sync y --url-async
+# se puede apuntar a SQL Server (mssql+pyodbc / mssql+aioodbc).
+
+def buscar_sync(SessionLocal, codigo):
+    db = SessionLocal()
+    try:
+        return db.scalar(select(Productos).where(Productos.Codigo_Barras == codigo).limit(1))
+    finally:
+        db.close()
+
+async def buscar_async(AsyncSessionLocal, codigo):
+    async with AsyncSessionLocal() as db:
+        return await db.scalar(select(Productos).where(Productos.Codigo_Barras == codigo).limit(1))
+
+async def ronda(consulta, codigos, concurrencia, total):
+    latencias = []
+    pendientes = iter(range(total))
+
+    async def trabajador():
+        for i in pendientes:
+            inicio = time.perf_counter()
+            await consulta(codigos[i % len(codigos)])
+            latencias.append(time.perf_counter() - inicio)
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*[trabajador() for _ in range(concurrencia)])
+    duracion = time.perf_counter() - inicio
+    return {
+        "consultas_por_segundo": round(total / duracion, 1),
+        "p50_ms": round(percentil(latencias, 50) * 1000, 2),
+        "p99_ms": round(percentil(latencias, 99) * 1000, 2)
+    }
+
+async def ejecutar(args, SessionLocal, async_engine, codigos):
+    AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+    anyio.to_thread.current_default_thread_limiter().total_tokens = args.hilos
+
+    async def sync(codigo):
+        return await anyio.to_thread.run_sync(partial(buscar_sync, SessionLocal, codigo))
+
+    async def asincronica(codigo):
+        return await buscar_async(AsyncSessionLocal, codigo)
+
+    resultados = []
+    for concurrencia in [int(c) for c in args.concurrencia.split(",")]:
+        for modo, consulta in (("sync", sync), ("async", asincronica)):
+            r = await ronda(consulta, codigos, concurrencia, args.consultas)
+            r.update({"modo": modo, "concurrencia": concurrencia})
+            resultados.append(r)
+            print(
+                f"{concurrencia:>12} | {modo:>5} | {r['consultas_por_segundo']:>12} | "
+                f"{r['p50_ms']:>8} | {r['p99_ms']:>8}"
+            )
+
+    # Cerrar las conexiones asíncronas dentro del event loop
+    await async_engine.dispose()
+    return resultados
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput de Session (hilos) vs AsyncSession")
+    parser.add_argument("--url-sync", help="URL SQLAlchemy sincrónica (por defecto SQLite temporal)")
+    parser.add_argument("--url-async", help="URL SQLAlchemy asíncrona de la misma base")
+    parser.add_argument("--productos", type=int, default=1000)
+    parser.add_argument("--consultas", type=int, default=2000, help="Consultas por ronda")
+    parser.add_argument("--concurrencia", default="1,8,32,64")
+    parser.add_argument("--hilos", type=int, default=40, help="Tamaño del pool de hilos (THREADPOOL_SIZE)")
+    parser.add_argument("--pool", type=int, default=20, help="Conexiones por engine")
+    parser.add_argument("--json", help="Archivo donde guardar los resultados")
+    args = parser.parse_args()
+
+    if args.url_sync:
+        engine = create_engine(args.url_sync, pool_size=args.pool, max_overflow=0)
+        url_async = args.url_async
+    else:
+        ruta = os.path.join(tempfile.mkdtemp(), "async.db")
+        semilla = crear_engine_sqlite(ruta)
+        crear_esquema(semilla)
+        db = crear_sesion(semilla)()
+        refs = sembrar_referencias(db)
+        sembrar_productos(db, refs, args.productos)
+        db.close()
+        semilla.dispose()
+
+        engine = create_engine(
+            f"sqlite:///{ruta}",
+            connect_args={"check_same_thread": False},
+            pool_size=args.pool,
+            max_overflow=0
+        )
+        url_async = f"sqlite+aiosqlite:///{ruta}"
+
+    if not url_async:
+        parser.error("--url-async es obligatorio cuando se usa --url-sync")
+
+    async_engine = create_async_engine(
+        url_async,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=args.pool,
+        max_overflow=0
+    )
+    SessionLocal = crear_sesion(engine)
+    codigos = [f"779{i:010d}" for i in range(1, args.productos + 1)]
+
+    print(f"{'Concurrencia':>12} | {'Modo':>5} | {'Consultas/s':>12} | {'p50 ms':>8} | {'p99 ms':>8}")
+    print("-" * 58)
+    resultados = asyncio.run(ejecutar(args, SessionLocal, async_engine, codigos))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2)
+
+if __name__ == "__main__":
+    main()
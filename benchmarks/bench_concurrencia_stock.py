@@ -0,0 +1,141 @@
+import sys
+import os
+import time
+import json
+import argparse
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine, func
+from sqlalchemy.exc import OperationalError
+
+from benchmarks.comun import (
+    crear_engine_sqlite,
+    crear_esquema,
+    crear_sesion,
+    sembrar_referencias,
+    sembrar_productos
+)
+from APP.DB.Inventario_model import Inventario
+from APP.DB.Movimientos_inventario_model import Movimientos_inventario
+from APP.services.Inventario_service import aplicar_movimientos
+
+# Prueba de estrés del ledger de inventario: cientos de ventas en paralelo sobre los mismos
+# productos y sucursal, midiendo ventas por segundo según la cantidad de hilos.
+# Con --productos 1 todas las ventas compiten por la misma fila; con más productos se mide
+# cómo escala el throughput cuando las filas bloqueadas son distintas (en SQL Server).
+# Los invariantes (stock nunca negativo, sin sobreventa, un movimiento por venta aceptada)
+# se verifican en tests/test_concurrencia_stock.py con la misma ronda.
+
+def vender(SessionLocal, refs, id_producto, cantidad, reintentos=20):
+    for intento in range(reintentos):
+        db = SessionLocal()
+        try:
+            aplicar_movimientos(
+                db,
+                refs["sucursal"],
+                [{"id_producto": id_producto, "cantidad": -cantidad}],
+                "Venta",
+                refs["usuario"],
+                tipo_referencia="Factura"
+            )
+            db.commit()
+            return True
+        except HTTPException:
+            db.rollback()
+            return False
+        except OperationalError:
+            # SQLite: base bloqueada por otra escritura, se reintenta
+            db.rollback()
+            time.sleep(0.001 * (intento + 1))
+        finally:
+            db.close()
+    raise RuntimeError("No se pudo registrar la venta")
+
+def ejecutar_ronda(SessionLocal, refs, ids_producto, stock_inicial, ventas, hilos, cantidad):
+    db = SessionLocal()
+    db.query(Inventario).filter(
+        Inventario.ID_Producto.in_(ids_producto),
+        Inventario.ID_Sucursal == refs["sucursal"]
+    ).update({"Stock_Actual": stock_inicial})
+    db.query(Movimientos_inventario).delete()
+    db.commit()
+    db.close()
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=hilos) as pool:
+        resultados = list(pool.map(
+            lambda i: vender(SessionLocal, refs, ids_producto[i % len(ids_producto)], cantidad),
+            range(ventas)
+        ))
+    duracion = time.perf_counter() - inicio
+
+    db = SessionLocal()
+    stocks_finales = [
+        fila.Stock_Actual for fila in db.query(Inventario.Stock_Actual).filter(
+            Inventario.ID_Producto.in_(ids_producto),
+            Inventario.ID_Sucursal == refs["sucursal"]
+        ).all()
+    ]
+    movimientos = db.query(func.count(Movimientos_inventario.ID_Movimiento)).scalar()
+    unidades_movidas = -(db.query(func.sum(Movimientos_inventario.Cantidad)).scalar() or 0)
+    db.close()
+
+    aceptadas = sum(resultados)
+    return {
+        "hilos": hilos,
+        "ventas": ventas,
+        "aceptadas": aceptadas,
+        "rechazadas": ventas - aceptadas,
+        "stock_final": sum(stocks_finales),
+        "stock_minimo": min(stocks_finales),
+        "movimientos": movimientos,
+        "unidades_movidas": unidades_movidas,
+        "ventas_por_segundo": round(ventas / duracion, 1)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Estrés concurrente del ledger de inventario")
+    parser.add_argument("--url", help="URL SQLAlchemy de la base a usar (por defecto SQLite temporal)")
+    parser.add_argument("--ventas", type=int, default=400, help="Ventas por ronda")
+    parser.add_argument("--stock", type=int, default=250, help="Stock inicial de cada producto")
+    parser.add_argument("--productos", type=int, default=1, help="Productos entre los que se reparten las ventas")
+    parser.add_argument("--cantidad", type=int, default=1, help="Unidades por venta")
+    parser.add_argument("--hilos", default="1,2,4,8,16,32")
+    parser.add_argument("--json", help="Archivo donde guardar los resultados")
+    args = parser.parse_args()
+
+    if args.url:
+        engine = create_engine(args.url, pool_size=64, max_overflow=0)
+    else:
+        ruta = os.path.join(tempfile.mkdtemp(), "estres.db")
+        engine = crear_engine_sqlite(ruta)
+    crear_esquema(engine)
+    SessionLocal = crear_sesion(engine)
+
+    db = SessionLocal()
+    refs = sembrar_referencias(db)
+    ids_producto = sembrar_productos(db, refs, args.productos, stock=args.stock)
+    db.close()
+
+    resultados = []
+    print(f"{'Hilos':>6} | {'Aceptadas':>9} | {'Rechazadas':>10} | {'Stock final':>11} | {'Ventas/s':>9}")
+    print("-" * 59)
+    for hilos in [int(h) for h in args.hilos.split(",")]:
+        r = ejecutar_ronda(SessionLocal, refs, ids_producto, args.stock, args.ventas, hilos, args.cantidad)
+        resultados.append(r)
+        print(
+            f"{r['hilos']:>6} | {r['aceptadas']:>9} | {r['rechazadas']:>10} | "
+            f"{r['stock_final']:>11} | {r['ventas_por_segundo']:>9}"
+        )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+import sys
+import os
+import time
+import json
+import argparse
+from types import SimpleNamespace
+from datetime import datetime
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.comun import (
+    crear_engine_sqlite,
+    crear_esquema,
+    crear_sesion,
+    sembrar_referencias,
+    sembrar_productos,
+    ContadorSQL
+)
+from APP.DB.Productos_model import Productos
+from APP.DB.Inventario_model import Inventario
+from APP.DB.Movimientos_inventario_model import Movimientos_inventario
+from APP.services.Inventario_service import validar_detalles_venta, registrar_salida_venta
+
+# Ruta anterior de create_factura: dos SELECT por línea para validar,
+# otro SELECT por línea para descontar y un INSERT de movimiento por línea
+def ruta_linea_por_linea(db, id_sucursal, detalles, id_usuario, id_factura):
+    for detalle in detalles:
+        producto = db.query(Productos).filter(
+            Productos.ID_Producto == detalle.id_producto,
+            Productos.Activo == True
+        ).first()
+        stock = db.query(Inventario).filter(
+            Inventario.ID_Producto == detalle.id_producto,
+            Inventario.ID_Sucursal == id_sucursal
+        ).first()
+        if not producto or not stock or stock.Stock_Actual < detalle.cantidad:
+            raise RuntimeError("Datos de benchmark inválidos")
+
+    for detalle in detalles:
+        stock = db.query(Inventario).filter(
+            Inventario.ID_Producto == detalle.id_producto,
+            Inventario.ID_Sucursal == id_sucursal
+        ).first()
+        stock.Stock_Actual -= detalle.cantidad
+        stock.Fecha_Ultimo_Movimiento = datetime.now()
+
+        db.add(Movimientos_inventario(
+            ID_Producto=detalle.id_producto,
+            ID_Sucursal=id_sucursal,
+            Tipo="Venta",
+            Cantidad=-detalle.cantidad,
+            ID_Usuario=id_usuario,
+            ID_Referencia=id_factura,
+            Tipo_Referencia="Factura"
+        ))
+    db.commit()
+
+# Ruta nueva: una consulta para validar, un UPDATE y un INSERT en lote
+def ruta_en_lote(db, id_sucursal, detalles, id_usuario, id_factura):
+    validar_detalles_venta(db, id_sucursal, detalles)
+    registrar_salida_venta(db, id_sucursal, detalles, id_usuario, id_factura)
+    db.commit()
+
+def medir(SessionLocal, contador, ruta, refs, detalles, repeticiones):
+    sentencias = []
+    tiempos = []
+    for _ in range(repeticiones):
+        db = SessionLocal()
+        try:
+            contador.reiniciar()
+            inicio = time.perf_counter()
+            ruta(db, refs["sucursal"], detalles, refs["usuario"], 1)
+            tiempos.append(time.perf_counter() - inicio)
+            sentencias.append(contador.sentencias)
+        finally:
+            db.close()
+    tiempos.sort()
+    return {
+        "sentencias": max(sentencias),
+        "mediana_ms": round(tiempos[len(tiempos) // 2] * 1000, 3)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Idas y vueltas y latencia de create_factura según cantidad de líneas")
+    parser.add_argument("--lineas", default="1,5,10,20,40,60,100", help="Cantidades de líneas a medir")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--rtt-ms", type=float, default=0.5, help="Latencia de red simulada por sentencia")
+    parser.add_argument("--json", help="Archivo donde guardar los resultados")
+    args = parser.parse_args()
+
+    lineas = [int(n) for n in args.lineas.split(",")]
+
+    engine = crear_engine_sqlite()
+    crear_esquema(engine)
+    SessionLocal = crear_sesion(engine)
+
+    db = SessionLocal()
+    refs = sembrar_referencias(db)
+    ids_producto = sembrar_productos(db, refs, max(lineas))
+    db.close()
+
+    contador = ContadorSQL(engine, args.rtt_ms)
+    resultados = []
+
+    print(f"RTT simulado: {args.rtt_ms} ms por sentencia")
+    print(f"{'Líneas':>7} | {'Sent. antes':>11} | {'ms antes':>9} | {'Sent. lote':>10} | {'ms lote':>8}")
+    print("-" * 58)
+
+    for n in lineas:
+        detalles = [
+            SimpleNamespace(id_producto=ids_producto[i], cantidad=1, precio_unitario=150)
+            for i in range(n)
+        ]
+        antes = medir(SessionLocal, contador, ruta_linea_por_linea, refs, detalles, args.repeticiones)
+        lote = medir(SessionLocal, contador, ruta_en_lote, refs, detalles, args.repeticiones)
+        resultados.append({"lineas": n, "linea_por_linea": antes, "en_lote": lote})
+        print(
+            f"{n:>7} | {antes['sentencias']:>11} | {antes['mediana_ms']:>9} | "
+            f"{lote['sentencias']:>10} | {lote['mediana_ms']:>8}"
+        )
+
+    contador.cerrar()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"rtt_ms": args.rtt_ms, "resultados": resultados}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
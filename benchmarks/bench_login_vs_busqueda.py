@@ -0,0 +1,107 @@
+import sys
+import os
+import time
+import json
+import asyncio
+import argparse
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from benchmarks.comun import (
+    preparar_app_en_proceso,
+    cerrar_app_en_proceso,
+    percentil,
+    EMAIL_PRUEBA,
+    PASSWORD_PRUEBA
+)
+
+# Mide la latencia de /productos/buscar/{codigo} sola y mientras /usuarios/login
+# recibe carga constante. Si bcrypt o la base bloquean el event loop, el p99 de la
+# búsqueda se dispara durante la segunda fase.
+
+async def martillar_login(cliente, fin, email, password, latencias):
+    while time.perf_counter() < fin:
+        inicio = time.perf_counter()
+        await cliente.post("/usuarios/login", data={"username": email, "password": password})
+        latencias.append(time.perf_counter() - inicio)
+
+async def buscar_codigo(cliente, fin, codigo, latencias, errores):
+    while time.perf_counter() < fin:
+        inicio = time.perf_counter()
+        respuesta = await cliente.get(f"/productos/buscar/{codigo}")
+        latencias.append(time.perf_counter() - inicio)
+        if respuesta.status_code != 200:
+            errores.append(respuesta.status_code)
+
+def resumir(latencias):
+    return {
+        "requests": len(latencias),
+        "p50_ms": round(percentil(latencias, 50) * 1000, 2),
+        "p95_ms": round(percentil(latencias, 95) * 1000, 2),
+        "p99_ms": round(percentil(latencias, 99) * 1000, 2)
+    }
+
+async def fase(cliente, args, con_login):
+    fin = time.perf_counter() + args.duracion
+    busquedas, logins, errores = [], [], []
+    tareas = [
+        buscar_codigo(cliente, fin, args.codigo, busquedas, errores)
+        for _ in range(args.concurrencia_busqueda)
+    ]
+    if con_login:
+        tareas += [
+            martillar_login(cliente, fin, args.email, args.password, logins)
+            for _ in range(args.concurrencia_login)
+        ]
+    await asyncio.gather(*tareas)
+    return {"busqueda": resumir(busquedas), "login": resumir(logins), "errores_busqueda": len(errores)}
+
+async def ejecutar(args):
+    if args.en_proceso:
+        transporte = httpx.ASGITransport(app=preparar_app_en_proceso(), raise_app_exceptions=False)
+        cliente = httpx.AsyncClient(transport=transporte, base_url="http://en-proceso", timeout=60)
+    else:
+        cliente = httpx.AsyncClient(base_url=args.url, timeout=60)
+
+    async with cliente:
+        base = await fase(cliente, args, con_login=False)
+        carga = await fase(cliente, args, con_login=True)
+
+    if args.en_proceso:
+        await cerrar_app_en_proceso()
+
+    return {"solo_busqueda": base, "busqueda_con_login": carga}
+
+def main():
+    parser = argparse.ArgumentParser(description="p99 de /productos/buscar/{codigo} bajo carga de /usuarios/login")
+    parser.add_argument("--url", default="http://localhost:8000", help="URL de la API en ejecución")
+    parser.add_argument("--en-proceso", action="store_true", help="Levantar la app en proceso sobre SQLite")
+    parser.add_argument("--duracion", type=float, default=10, help="Segundos por fase")
+    parser.add_argument("--concurrencia-busqueda", type=int, default=4)
+    parser.add_argument("--concurrencia-login", type=int, default=8)
+    parser.add_argument("--codigo", default="7790000000001")
+    parser.add_argument("--email", default=EMAIL_PRUEBA)
+    parser.add_argument("--password", default=PASSWORD_PRUEBA)
+    parser.add_argument("--json", help="Archivo donde guardar los resultados")
+    args = parser.parse_args()
+
+    resultados = asyncio.run(ejecutar(args))
+
+    for nombre, datos in resultados.items():
+        b = datos["busqueda"]
+        l = datos["login"]
+        print(
+            f"{nombre:<20} búsqueda: {b['requests']:>6} req  p50 {b['p50_ms']:>8} ms  "
+            f"p95 {b['p95_ms']:>8} ms  p99 {b['p99_ms']:>8} ms  |  logins: {l['requests']}  "
+            f"errores: {datos['errores_busqueda']}"
+        )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import sys
+import os
+import time
+import json
+import asyncio
+import argparse
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from fastapi import Request
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from benchmarks.comun import preparar_app_en_proceso, cerrar_app_en_proceso, percentil
+
+# Micro-benchmark del middleware de logging: requests/segundo en "/" y en
+# /productos/buscar/{codigo} con el middleware ASGI puro (actual) y con la versión anterior
+# basada en @app.middleware("http") (BaseHTTPMiddleware), que hace el mismo trabajo.
+# La app corre en proceso (ASGITransport), así que no se mide red ni uvicorn.
+
+# Versión anterior del middleware, sobre BaseHTTPMiddleware
+async def log_requests_base_http(request: Request, call_next):
+    import main
+
+    start_time = time.time()
+    inicio = time.perf_counter()
+    metricas, token = main.iniciar_metricas_request()
+    main.metricas_http.en_curso += 1
+
+    path = request.url.path
+    should_log = path not in main.RUTAS_SIN_LOG and not path.startswith("/static")
+
+    try:
+        response = await call_next(request)
+        duration = time.time() - start_time
+
+        tamano = response.headers.get("content-length")
+        main.metricas_http.registrar_respuesta(
+            request.scope, response.status_code, time.perf_counter() - inicio,
+            int(tamano) if tamano else None
+        )
+        if main.SERVER_TIMING:
+            response.headers["Server-Timing"] = metricas.server_timing(duration)
+        if should_log:
+            main.logger.info(
+                f"Method: {request.method} - Path: {path} - "
+                f"Status: {response.status_code} - Duration: {duration:.2f}s - "
+                f"SQL: {metricas.sentencias} sentencias, {metricas.tiempo_db * 1000:.1f}ms"
+            )
+        return response
+    finally:
+        main.metricas_http.en_curso -= 1
+        main.finalizar_metricas_request(token)
+
+# Reemplazar el middleware de logging de la app y forzar que Starlette rearme la pila
+def usar_middleware(app, variante: str):
+    import main
+
+    if variante == "asgi":
+        nuevo = Middleware(main.LogRequestsMiddleware)
+    else:
+        nuevo = Middleware(BaseHTTPMiddleware, dispatch=log_requests_base_http)
+    app.user_middleware = [
+        nuevo if m.cls in (main.LogRequestsMiddleware, BaseHTTPMiddleware) else m
+        for m in app.user_middleware
+    ]
+    app.middleware_stack = None
+
+async def medir(cliente, url, total, concurrencia):
+    latencias = []
+    errores = 0
+    pendientes = iter(range(total))
+
+    async def trabajador():
+        nonlocal errores
+        for _ in pendientes:
+            inicio = time.perf_counter()
+            respuesta = await cliente.get(url)
+            latencias.append(time.perf_counter() - inicio)
+            if respuesta.status_code != 200:
+                errores += 1
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*[trabajador() for _ in range(concurrencia)])
+    duracion = time.perf_counter() - inicio
+    return {
+        "requests_por_segundo": round(total / duracion, 1),
+        "p50_ms": round(percentil(latencias, 50) * 1000, 3),
+        "p99_ms": round(percentil(latencias, 99) * 1000, 3),
+        "errores": errores
+    }
+
+async def ejecutar(args, app):
+    urls = ["/", f"/productos/buscar/{args.codigo}"]
+    transporte = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    resultados = []
+    async with httpx.AsyncClient(transport=transporte, base_url="http://en-proceso") as cliente:
+        for url in urls:
+            for variante in ("base_http", "asgi"):
+                usar_middleware(app, variante)
+                await medir(cliente, url, args.calentamiento, args.concurrencia)
+                # Varias rondas alternadas: se informa la mejor de cada variante
+                rondas = [await medir(cliente, url, args.requests, args.concurrencia) for _ in range(args.rondas)]
+                mejor = max(rondas, key=lambda r: r["requests_por_segundo"])
+                resultados.append({"url": url, "middleware": variante, **mejor})
+                print(
+                    f"{url:<32} | {variante:>9} | {mejor['requests_por_segundo']:>10} | "
+                    f"{mejor['p50_ms']:>8} | {mejor['p99_ms']:>8} | {mejor['errores']:>7}"
+                )
+    await cerrar_app_en_proceso()
+    return resultados
+
+def main():
+    parser = argparse.ArgumentParser(description="Requests/s con BaseHTTPMiddleware vs middleware ASGI puro")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests por ronda")
+    parser.add_argument("--rondas", type=int, default=3)
+    parser.add_argument("--calentamiento", type=int, default=200)
+    parser.add_argument("--concurrencia", type=int, default=8)
+    parser.add_argument("--codigo", default="7790000000001")
+    parser.add_argument("--json", help="Archivo donde guardar los resultados")
+    args = parser.parse_args()
+
+    app = preparar_app_en_proceso()
+
+    print(f"{'URL':<32} | {'Middleware':>9} | {'Req/s':>10} | {'p50 ms':>8} | {'p99 ms':>8} | Errores")
+    print("-" * 90)
+    resultados = asyncio.run(ejecutar(args, app))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2)
+
+if __name__ == "__main__":
+    main()
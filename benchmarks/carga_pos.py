@@ -0,0 +1,353 @@
+import sys
+import os
+import re
+import time
+import json
+import random
+import asyncio
+import argparse
+import itertools
+import platform
+from collections import Counter
+from datetime import datetime, timedelta
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from benchmarks.comun import (
+    crear_engine_sqlite,
+    crear_engine_url,
+    conectar_app,
+    cerrar_app_en_proceso,
+    percentil,
+    EMAIL_PRUEBA,
+    PASSWORD_PRUEBA
+)
+from benchmarks.datos import leer_referencias, _zipf, ZIPF_PRODUCTOS, ZIPF_SUCURSALES, FIN
+
+# Prueba de carga del mostrador (POS) contra la API en ejecución: cajas virtuales que escanean
+# códigos de barras, consultan stock, facturan y, en menor medida, piden reportes de gestión.
+# Sirve para dimensionar workers de uvicorn y el pool de conexiones antes de la temporada alta:
+# se corre con distintas --concurrencia (o --tasa) y se mira dónde se disparan p95/p99.
+#
+# Los productos, sucursales y el cliente salen de la base (la misma que usa la API), que
+# conviene generar con benchmarks/datos.py. Los códigos se eligen con la misma popularidad
+# de Zipf que el generador: unos pocos productos concentran la mayoría de los escaneos.
+#
+#     python benchmarks/carga_pos.py --db-url "mssql+pyodbc://..." --concurrencia 32 --duracion 120
+#     python benchmarks/carga_pos.py --archivo-db /tmp/ferre_100k.db --tasa 50 --concurrencia 64
+#     python benchmarks/carga_pos.py --archivo-db /tmp/ferre_100k.db --en-proceso --duracion 10
+#
+# Modos:
+# - Cerrado (por defecto): --concurrencia cajas, cada una manda un request, espera la
+#   respuesta y una pausa (--pausa-ms, exponencial) antes del siguiente.
+# - Abierto (--tasa N): llegan N requests por segundo (Poisson), con hasta --concurrencia en
+#   curso. La latencia se mide desde que el request debía salir, así la espera cuando la API
+#   no da abasto también cuenta (sin "coordinated omission").
+#
+# Sale con código 1 si alguna operación supera --max-errores (proporción de respuestas >= 400 o
+# sin respuesta): las latencias de un endpoint que falla no sirven para dimensionar nada. En
+# corridas largas las facturas pueden agotar el stock de los productos más populares (400
+# "Stock insuficiente"); en ese caso hay que regenerar la base o achicar la duración.
+
+# Días de ventas que piden los reportes
+DIAS_REPORTE = 30
+
+def _desde_reporte() -> str:
+    return (FIN - timedelta(days=DIAS_REPORTE)).isoformat()
+
+# Los importes los calcula la API a partir de las líneas
+def armar_factura(rng, refs) -> dict:
+    lineas = {}
+    for _ in range(min(8, 1 + int(rng.expovariate(0.7)))):
+        producto = elegir_producto(rng, refs)
+        lineas[producto["id"]] = (producto, lineas.get(producto["id"], (producto, 0))[1] + rng.choice((1, 1, 1, 2, 3)))
+    return {
+        "id_cliente": refs["cliente"],
+        "id_sucursal": elegir_sucursal(rng, refs),
+        "tipo_factura": "B",
+        "forma_pago": "Contado",
+        "detalles": [
+            {"id_producto": producto["id"], "cantidad": cantidad, "precio_unitario": producto["precio"]}
+            for producto, cantidad in lineas.values()
+        ]
+    }
+
+def elegir_producto(rng, refs) -> dict:
+    return rng.choices(refs["muestra"], cum_weights=refs["zipf_productos"])[0]
+
+def elegir_sucursal(rng, refs) -> int:
+    return rng.choices(refs["sucursales"], cum_weights=refs["zipf_sucursales"])[0]
+
+# (nombre, peso por defecto, método, armado del request a partir del generador y las referencias)
+OPERACIONES = [
+    ("buscar_codigo", 50, "GET", lambda rng, refs: (
+        f"/productos/buscar/{elegir_producto(rng, refs)['codigo']}", None, None)),
+    ("stock_producto", 20, "GET", lambda rng, refs: (
+        f"/productos/{elegir_producto(rng, refs)['id']}/stock", None, None)),
+    ("crear_factura", 15, "POST", lambda rng, refs: ("/facturas/", None, armar_factura(rng, refs))),
+    ("reporte_ventas", 5, "GET", lambda rng, refs: (
+        "/facturas/estadisticas", {"desde": _desde_reporte(), "sucursal_id": elegir_sucursal(rng, refs)}, None)),
+    ("reporte_productos", 4, "GET", lambda rng, refs: (
+        "/detalles-factura/estadisticas/productos", {"desde": _desde_reporte(), "limite": 20}, None)),
+    ("reporte_stock_bajo", 3, "GET", lambda rng, refs: (
+        "/productos/reportes/stock-bajo", {"sucursal_id": elegir_sucursal(rng, refs), "limite": 50}, None)),
+    ("resumen_sucursal", 3, "GET", lambda rng, refs: (
+        f"/inventario/sucursal/{elegir_sucursal(rng, refs)}/resumen", None, None)),
+]
+
+# "buscar_codigo=60,crear_factura=20": reemplaza la mezcla completa (lo que no se nombra no se pide)
+def leer_mezcla(texto: str) -> dict:
+    nombres = {nombre for nombre, _, _, _ in OPERACIONES}
+    mezcla = {}
+    for parte in filter(None, (p.strip() for p in texto.split(","))):
+        nombre, _, peso = parte.partition("=")
+        if nombre not in nombres:
+            raise ValueError(f"Operación desconocida: {nombre} (opciones: {', '.join(sorted(nombres))})")
+        mezcla[nombre] = float(peso or 1)
+    return mezcla
+
+_DB_SERVER_TIMING = re.compile(r"(?:^|,)\s*db;dur=([\d.]+)")
+
+class Medicion:
+    __slots__ = ("latencias", "codigos", "tiempo_db", "con_tiempo_db")
+
+    def __init__(self):
+        self.latencias = []
+        self.codigos = Counter()
+        self.tiempo_db = 0.0
+        self.con_tiempo_db = 0
+
+    def registrar(self, duracion: float, codigo: str, server_timing: str = None):
+        self.latencias.append(duracion)
+        self.codigos[codigo] += 1
+        # Tiempo en la base informado por la API (header Server-Timing, si está activo)
+        coincidencia = _DB_SERVER_TIMING.search(server_timing or "")
+        if coincidencia:
+            self.tiempo_db += float(coincidencia.group(1))
+            self.con_tiempo_db += 1
+
+    def resumen(self, duracion: float) -> dict:
+        latencias = self.latencias
+        errores = sum(cantidad for codigo, cantidad in self.codigos.items() if not codigo.isdigit() or int(codigo) >= 400)
+        return {
+            "requests": len(latencias),
+            "errores": errores,
+            "codigos": dict(self.codigos),
+            "req_s": round(len(latencias) / duracion, 2) if duracion else 0,
+            "p50_ms": round(percentil(latencias, 50) * 1000, 2),
+            "p95_ms": round(percentil(latencias, 95) * 1000, 2),
+            "p99_ms": round(percentil(latencias, 99) * 1000, 2),
+            "max_ms": round(max(latencias) * 1000, 2) if latencias else 0,
+            "db_media_ms": round(self.tiempo_db / self.con_tiempo_db, 2) if self.con_tiempo_db else None
+        }
+
+class Carga:
+    def __init__(self, cliente, headers, refs, mezcla: dict, args):
+        self.cliente = cliente
+        self.headers = headers
+        self.refs = refs
+        self.args = args
+        self.operaciones = [op for op in OPERACIONES if mezcla.get(op[0])]
+        self.pesos = list(itertools.accumulate(mezcla[op[0]] for op in self.operaciones))
+        self.mediciones = {op[0]: Medicion() for op in self.operaciones}
+        self.inicio_medicion = 0.0
+        self.fin = 0.0
+
+    async def request(self, rng, salida: float = None):
+        nombre, _, metodo, armar = rng.choices(self.operaciones, cum_weights=self.pesos)[0]
+        url, params, cuerpo = armar(rng, self.refs)
+        inicio = time.perf_counter()
+        server_timing = None
+        try:
+            respuesta = await self.cliente.request(metodo, url, params=params, json=cuerpo, headers=self.headers)
+            codigo = str(respuesta.status_code)
+            server_timing = respuesta.headers.get("server-timing")
+        except httpx.HTTPError as e:
+            codigo = type(e).__name__
+        fin = time.perf_counter()
+        # En modo abierto la latencia cuenta desde el momento en que el request debía salir
+        desde = salida if salida is not None else inicio
+        if desde >= self.inicio_medicion and fin <= self.fin:
+            self.mediciones[nombre].registrar(fin - desde, codigo, server_timing)
+
+    async def caja(self, semilla: int):
+        rng = random.Random(semilla)
+        pausa = self.args.pausa_ms / 1000
+        while time.perf_counter() < self.fin:
+            await self.request(rng)
+            if pausa:
+                await asyncio.sleep(rng.expovariate(1 / pausa))
+
+    async def llegadas(self, semilla: int):
+        rng = random.Random(semilla)
+        en_curso = asyncio.Semaphore(self.args.concurrencia)
+        tareas = set()
+        salida = time.perf_counter()
+        while True:
+            salida += rng.expovariate(self.args.tasa)
+            if salida >= self.fin:
+                break
+            await asyncio.sleep(max(0.0, salida - time.perf_counter()))
+            # Con todas las conexiones ocupadas se espera acá: ese tiempo también es latencia
+            await en_curso.acquire()
+            tarea = asyncio.create_task(self.request(random.Random(rng.random()), salida))
+            tareas.add(tarea)
+            tarea.add_done_callback(lambda t: (tareas.discard(t), en_curso.release()))
+        if tareas:
+            await asyncio.gather(*tareas)
+
+    async def correr(self):
+        args = self.args
+        self.inicio_medicion = time.perf_counter() + args.calentamiento
+        self.fin = self.inicio_medicion + args.duracion
+        if args.tasa:
+            await self.llegadas(args.semilla)
+        else:
+            await asyncio.gather(*(self.caja(args.semilla + i) for i in range(args.concurrencia)))
+
+    def resultados(self) -> dict:
+        duracion = self.args.duracion
+        total = Medicion()
+        endpoints = {}
+        for nombre, medicion in self.mediciones.items():
+            endpoints[nombre] = medicion.resumen(duracion)
+            total.latencias.extend(medicion.latencias)
+            total.codigos.update(medicion.codigos)
+            total.tiempo_db += medicion.tiempo_db
+            total.con_tiempo_db += medicion.con_tiempo_db
+        return {"total": total.resumen(duracion), "endpoints": endpoints}
+
+def imprimir(resultados: dict):
+    print(f"{'Endpoint':<20} | {'Req':>7} | {'Errores':>7} | {'req/s':>8} | {'p50 ms':>8} | {'p95 ms':>8} | {'p99 ms':>8} | {'máx ms':>8} | {'db ms':>7}")
+    print("-" * 105)
+    filas = list(resultados["endpoints"].items()) + [("TOTAL", resultados["total"])]
+    for nombre, r in filas:
+        db = r["db_media_ms"] if r["db_media_ms"] is not None else "-"
+        print(
+            f"{nombre:<20} | {r['requests']:>7} | {r['errores']:>7} | {r['req_s']:>8} | {r['p50_ms']:>8} | "
+            f"{r['p95_ms']:>8} | {r['p99_ms']:>8} | {r['max_ms']:>8} | {db:>7}"
+        )
+    codigos_error = {
+        nombre: {codigo: n for codigo, n in r["codigos"].items() if not codigo.isdigit() or int(codigo) >= 400}
+        for nombre, r in resultados["endpoints"].items()
+    }
+    for nombre, codigos in codigos_error.items():
+        if codigos:
+            print(f"  {nombre}: {codigos}")
+
+# Operaciones cuya proporción de errores supera el máximo: {nombre: proporción}
+def excedidas(resultados: dict, maximo: float) -> dict:
+    return {
+        nombre: r["errores"] / r["requests"]
+        for nombre, r in resultados["endpoints"].items()
+        if r["requests"] and r["errores"] / r["requests"] > maximo
+    }
+
+def referencias(engine, muestra: int) -> dict:
+    refs = leer_referencias(engine, muestra)
+    if refs is None:
+        sys.exit("La base no tiene productos: generala con benchmarks/datos.py")
+    # La muestra sale ordenada por ID; el generador ya reparte la popularidad al azar entre
+    # los IDs, así que acá alcanza con mezclarla con una semilla fija
+    random.Random(0).shuffle(refs["muestra"])
+    refs["zipf_productos"] = _zipf(len(refs["muestra"]), ZIPF_PRODUCTOS)
+    refs["zipf_sucursales"] = _zipf(len(refs["sucursales"]), ZIPF_SUCURSALES)
+    return refs
+
+async def ejecutar(args, refs, mezcla, app=None) -> dict:
+    limites = httpx.Limits(max_connections=args.concurrencia, max_keepalive_connections=args.concurrencia)
+    if app is not None:
+        transporte = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        cliente = httpx.AsyncClient(transport=transporte, base_url="http://en-proceso", timeout=args.timeout)
+    else:
+        cliente = httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limites)
+
+    async with cliente:
+        respuesta = await cliente.post("/usuarios/login", data={"username": args.email, "password": args.password})
+        respuesta.raise_for_status()
+        headers = {"Authorization": f"Bearer {respuesta.json()['access_token']}"}
+        carga = Carga(cliente, headers, refs, mezcla, args)
+        await carga.correr()
+
+    if app is not None:
+        await cerrar_app_en_proceso()
+    return carga.resultados()
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga del mostrador (POS) contra la API")
+    parser.add_argument("--url", default="http://localhost:8000", help="URL de la API en ejecución")
+    parser.add_argument("--db-url", help="URL de SQLAlchemy de la base que usa la API (para leer productos y sucursales)")
+    parser.add_argument("--archivo-db", help="Base SQLite generada con benchmarks/datos.py")
+    parser.add_argument("--en-proceso", action="store_true", help="Levantar la app en este proceso sobre la base (comparte CPU con el generador)")
+    parser.add_argument("--concurrencia", type=int, default=16, help="Cajas simultáneas (modo cerrado) o máximo de requests en curso (modo abierto)")
+    parser.add_argument("--tasa", type=float, help="Requests por segundo (modo abierto)")
+    parser.add_argument("--duracion", type=float, default=60, help="Segundos medidos")
+    parser.add_argument("--calentamiento", type=float, default=5, help="Segundos iniciales sin medir")
+    parser.add_argument("--pausa-ms", type=float, default=0, help="Pausa media entre requests de una caja (modo cerrado)")
+    parser.add_argument("--mezcla", help="Pesos por operación, por ejemplo buscar_codigo=60,crear_factura=20 (por defecto: "
+                        + ", ".join(f"{nombre}={peso}" for nombre, peso, _, _ in OPERACIONES) + ")")
+    parser.add_argument("--muestra", type=int, default=5000, help="Productos que se leen de la base para armar los requests")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--email", default=EMAIL_PRUEBA)
+    parser.add_argument("--password", default=PASSWORD_PRUEBA)
+    parser.add_argument("--json", help="Archivo donde guardar los resultados")
+    parser.add_argument("--max-errores", type=float, default=0.01, help="Proporción de errores tolerada por operación (0.01 = 1%%)")
+    args = parser.parse_args()
+
+    if bool(args.db_url) == bool(args.archivo_db):
+        parser.error("Indicá --db-url o --archivo-db")
+    if args.archivo_db and not os.path.exists(args.archivo_db):
+        parser.error(f"{args.archivo_db} no existe: generala con benchmarks/datos.py")
+    try:
+        mezcla = leer_mezcla(args.mezcla) if args.mezcla else {nombre: peso for nombre, peso, _, _ in OPERACIONES}
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.db_url:
+        engine = crear_engine_url(args.db_url)
+        url_async = args.db_url.replace("mssql+pyodbc", "mssql+aioodbc")
+    else:
+        ruta = os.path.abspath(args.archivo_db)
+        engine = crear_engine_sqlite(ruta)
+        url_async = f"sqlite+aiosqlite:///{ruta}"
+    refs = referencias(engine, args.muestra)
+
+    app = None
+    if args.en_proceso:
+        from benchmarks.suite import silenciar_consola
+        app = conectar_app(engine, url_async)
+        silenciar_consola()
+
+    modo = f"abierto, {args.tasa} req/s" if args.tasa else "cerrado"
+    print(f"{args.url if app is None else 'en proceso'} - modo {modo} - concurrencia {args.concurrencia} - {args.duracion:.0f}s")
+    resultados = asyncio.run(ejecutar(args, refs, mezcla, app))
+    imprimir(resultados)
+
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({
+                "fecha": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "url": args.url if app is None else "en proceso",
+                "modo": "abierto" if args.tasa else "cerrado",
+                "concurrencia": args.concurrencia,
+                "tasa": args.tasa,
+                "duracion": args.duracion,
+                "mezcla": mezcla,
+                "productos": refs["productos"],
+                **resultados
+            }, f, indent=2, ensure_ascii=False)
+
+    fallidas = excedidas(resultados, args.max_errores)
+    if fallidas:
+        detalle = ", ".join(f"{nombre} {proporcion:.1%}" for nombre, proporcion in fallidas.items())
+        print(f"\nOperaciones con más de {args.max_errores:.1%} de errores: {detalle}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+import sys
+import os
+import time
+import importlib
+import pkgutil
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.schema import CreateTable
+
+from database import Base
+import APP.DB
+
+# Importar todos los modelos para que las relaciones queden configuradas
+def importar_modelos():
+    for modulo in pkgutil.iter_modules(APP.DB.__path__):
+        importlib.import_module(f"APP.DB.{modulo.name}")
+
+# Engine SQLite que hace de reemplazo local de SQL Server
+def crear_engine_sqlite(ruta: str = None):
+    if ruta:
+        return create_engine(
+            f"sqlite:///{ruta}",
+            connect_args={"check_same_thread": False}
+        )
+    return create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+
+# Engine para una base indicada por URL. En SQL Server se activa fast_executemany, que manda
+# cada executemany en un solo paquete de parámetros (la diferencia en cargas masivas es enorme)
+def crear_engine_url(url: str):
+    if url.startswith("mssql"):
+        return create_engine(url, fast_executemany=True)
+    return create_engine(url)
+
+# Crear las tablas de los modelos sobre SQLite
+def crear_esquema(engine):
+    importar_modelos()
+
+    # La tabla real de SQL Server no tiene ID_Inventario en Movimientos_Inventario;
+    # los routers nunca lo cargan, así que en SQLite se deja nullable
+    Base.metadata.tables["Movimientos_inventario"].c.ID_Inventario.nullable = True
+
+    with engine.begin() as conn:
+        for tabla in Base.metadata.sorted_tables:
+            conn.execute(CreateTable(tabla))
+
+    # En SQLite los nombres de índice son globales y sin distinción de mayúsculas,
+    # por eso algunos índices duplicados (index=True + Index explícito) se omiten
+    for tabla in Base.metadata.sorted_tables:
+        for indice in tabla.indexes:
+            try:
+                indice.create(engine)
+            except OperationalError:
+                pass
+
+# Datos mínimos de referencia (sucursal, categoría, unidad, usuario, cliente)
+def sembrar_referencias(db):
+    from APP.DB.Sucursales_model import Sucursales
+    from APP.DB.Categorias_model import Categorias
+    from APP.DB.Unidades_de_medida_model import Unidades_de_medida
+    from APP.DB.Usuarios_model import Usuarios
+    from APP.DB.Clientes_model import Clientes
+
+    sucursal = Sucursales(
+        Nombre="Sucursal Benchmark",
+        Direccion="Av. Siempre Viva 742",
+        Localidad="Córdoba",
+        Provincia="Córdoba"
+    )
+    categoria = Categorias(Nombre="Herramientas", Descripcion="Herramientas manuales")
+    unidad = Unidades_de_medida(Nombre="Unidad", Abreviatura="u")
+    db.add_all([sucursal, categoria, unidad])
+    db.flush()
+
+    usuario = Usuarios(
+        Nombre="Bench",
+        Apellido="Mark",
+        Rol="Admin",
+        Email="bench@ferreteria.com",
+        Contraseña="$2b$12$benchmarkbenchmarkbenchmarkbenchmarkbenchmarkbenchmar",
+        ID_Sucursal=sucursal.ID_Sucursal
+    )
+    cliente = Clientes(
+        Nombre="Consumidor",
+        Apellido="Final",
+        Direccion="Sin dirección",
+        Localidad="Córdoba",
+        Provincia="Córdoba",
+        Telefono="0000000",
+        Limite_Credito=1000000
+    )
+    db.add_all([usuario, cliente])
+    db.commit()
+
+    return {
+        "sucursal": sucursal.ID_Sucursal,
+        "categoria": categoria.ID_Categoria,
+        "unidad": unidad.ID_Unidad_de_medida,
+        "usuario": usuario.ID_Usuario,
+        "cliente": cliente.ID_Cliente
+    }
+
+# Cargar productos con stock en la sucursal indicada
+def sembrar_productos(db, refs: dict, cantidad: int, stock: int = 1000000):
+    from APP.DB.Productos_model import Productos
+    from APP.DB.Inventario_model import Inventario
+
+    productos = [
+        Productos(
+            Nombre=f"Producto {i}",
+            Codigo_Barras=f"779{i:010d}",
+            SKU=f"SKU-{i:06d}",
+            Marca="Genérica",
+            Precio=200,
+            Costo=100,
+            ID_Categoria=refs["categoria"],
+            ID_Unidad_de_medida=refs["unidad"]
+        )
+        for i in range(1, cantidad + 1)
+    ]
+    db.add_all(productos)
+    db.flush()
+
+    db.add_all([
+        Inventario(
+            ID_Producto=p.ID_Producto,
+            ID_Sucursal=refs["sucursal"],
+            Stock_Actual=stock,
+            Stock_Minimo=0,
+            Stock_Maximo=stock * 2,
+            Fecha_Ultimo_Movimiento=datetime.now()
+        )
+        for p in productos
+    ])
+    db.commit()
+    return [p.ID_Producto for p in productos]
+
+# Cuenta las sentencias enviadas a la base (idas y vueltas) y opcionalmente
+# simula la latencia de red de cada una
+class ContadorSQL:
+    def __init__(self, engine, rtt_ms: float = 0.0):
+        self.engine = engine
+        self.rtt = rtt_ms / 1000.0
+        self.sentencias = 0
+        event.listen(engine, "before_cursor_execute", self._antes)
+
+    def _antes(self, conn, cursor, statement, parameters, context, executemany):
+        self.sentencias += 1
+        if self.rtt:
+            time.sleep(self.rtt)
+
+    def reiniciar(self):
+        self.sentencias = 0
+
+    def cerrar(self):
+        event.remove(self.engine, "before_cursor_execute", self._antes)
+
+# Falla con AssertionError si el bloque envía más de "maximo" sentencias a la base.
+# Detecta regresiones N+1 sin depender de tiempos:
+#     with limite_sentencias(engine, 2):
+#         get_descuentos(...)
+@contextmanager
+def limite_sentencias(engine, maximo: int):
+    contador = ContadorSQL(engine)
+    try:
+        yield contador
+    finally:
+        contador.cerrar()
+    if contador.sentencias > maximo:
+        raise AssertionError(
+            f"Se ejecutaron {contador.sentencias} sentencias (máximo permitido {maximo})"
+        )
+
+def crear_sesion(engine):
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Percentil p (0-100) de una lista de valores
+def percentil(valores, p: float):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, max(0, int(round(p / 100.0 * len(ordenados) + 0.5)) - 1))
+    return ordenados[indice]
+
+EMAIL_PRUEBA = "bench@ferreteria.com"
+PASSWORD_PRUEBA = "admin123"
+
+# Levanta la app en el mismo proceso sobre una base SQLite sembrada. La sesión sincrónica
+# y la asíncrona (aiosqlite) apuntan al mismo archivo
+def preparar_app_en_proceso(productos: int = 100):
+    from APP.DB.Usuarios_model import Usuarios
+    from APP.routers.Usuarios_router import get_password_hash
+
+    ruta = os.path.join(tempfile.mkdtemp(), "carga.db")
+    engine = crear_engine_sqlite(ruta)
+    crear_esquema(engine)
+    SessionPrueba = crear_sesion(engine)
+
+    db = SessionPrueba()
+    refs = sembrar_referencias(db)
+    sembrar_productos(db, refs, productos)
+    usuario = db.get(Usuarios, refs["usuario"])
+    usuario.Contraseña = get_password_hash(PASSWORD_PRUEBA)
+    db.commit()
+    db.close()
+
+    return conectar_app(engine, f"sqlite+aiosqlite:///{ruta}")
+
+# Apuntar la app a otra base: la sesión sincrónica por dependency_overrides y la asíncrona
+# cambiando la URL (el engine asíncrono se crea en el primer uso)
+def conectar_app(engine, url_async: str):
+    import main
+    import database
+
+    SessionPrueba = crear_sesion(engine)
+
+    def get_db_prueba():
+        db = SessionPrueba()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    main.app.dependency_overrides[database.get_db] = get_db_prueba
+    database.ASYNC_DATABASE_URL = url_async
+    return main.app
+
+# Cerrar las conexiones del engine asíncrono (aiosqlite deja hilos vivos si no se cierran)
+async def cerrar_app_en_proceso():
+    import database
+    if database.async_engine is not None:
+        await database.async_engine.dispose()
@@ -0,0 +1,266 @@
+import sys
+import os
+import time
+import json
+import random
+import asyncio
+import logging
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import datetime
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from benchmarks.comun import (
+    crear_engine_sqlite,
+    crear_engine_url,
+    crear_esquema,
+    conectar_app,
+    cerrar_app_en_proceso,
+    percentil,
+    EMAIL_PRUEBA,
+    PASSWORD_PRUEBA
+)
+from benchmarks.datos import ESCALAS, volumenes, sembrar_escala, leer_referencias
+
+# Suite reproducible: siembra una base sintética a escala (SQLite local o SQL Server),
+# corre escenarios cronometrados contra los endpoints principales con la app en proceso
+# y guarda los resultados en JSON. Un escenario que recibe una respuesta que no es 2xx se
+# corta y se informa como fallido. Con --comparar marca las regresiones contra una corrida
+# anterior; sale con código 1 si hay alguna o si falló algún escenario.
+#
+#     python benchmarks/suite.py --escala 1k --json resultados/v1.json
+#     python benchmarks/suite.py --escala 1k --json resultados/v2.json --comparar resultados/v1.json
+
+# (nombre, método, armado del request a partir del generador aleatorio y las referencias)
+ESCENARIOS = [
+    ("busqueda_productos", "GET", lambda rng, refs: (
+        "/productos/", {"buscar": rng.choice(refs["muestra"])["nombre"].split()[0], "limit": 20}, None)),
+    ("buscar_por_codigo", "GET", lambda rng, refs: (
+        f"/productos/buscar/{rng.choice(refs['muestra'])['codigo']}", None, None)),
+    ("crear_factura", "POST", lambda rng, refs: ("/facturas/", None, armar_factura(rng, refs))),
+    ("resumen_sucursal", "GET", lambda rng, refs: (
+        f"/inventario/sucursal/{rng.choice(refs['sucursales'])}/resumen", None, None)),
+    ("listado_auditoria", "GET", lambda rng, refs: ("/auditoria/", {"limit": 50}, None)),
+    ("estadisticas_ventas", "GET", lambda rng, refs: ("/facturas/estadisticas", None, None)),
+]
+
+# Los importes los calcula la API a partir de las líneas
+def armar_factura(rng, refs) -> dict:
+    lineas = rng.sample(refs["muestra"], 3)
+    return {
+        "id_cliente": refs["cliente"],
+        "id_sucursal": refs["sucursales"][0],
+        "tipo_factura": "B",
+        "forma_pago": "Contado",
+        "detalles": [
+            {"id_producto": p["id"], "cantidad": 1, "precio_unitario": p["precio"]}
+            for p in lineas
+        ]
+    }
+
+def version_codigo() -> str:
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconocida"
+
+# Engine de la base de benchmark y URL equivalente para la sesión asíncrona
+def preparar_base(args):
+    if args.db_url:
+        engine = crear_engine_url(args.db_url)
+        url_async = args.db_url.replace("mssql+pyodbc", "mssql+aioodbc").replace("sqlite://", "sqlite+aiosqlite://")
+        return engine, url_async, False
+
+    ruta = os.path.abspath(args.archivo_db or os.path.join(tempfile.gettempdir(), f"ferre_benchmark_{args.escala}.db"))
+    existe = os.path.exists(ruta)
+    engine = crear_engine_sqlite(ruta)
+    if not existe:
+        crear_esquema(engine)
+    return engine, f"sqlite+aiosqlite:///{ruta}", existe
+
+# Los logs de la app se siguen escribiendo en logs/app.log (es parte del costo real de cada
+# request), pero los errores y consultas lentas no se mezclan con la tabla de resultados
+def silenciar_consola():
+    import main
+    for handler in main.listener_logging.handlers:
+        if type(handler) is logging.StreamHandler:
+            handler.setLevel(logging.CRITICAL)
+
+def resumir(latencias, codigos, duracion) -> dict:
+    errores = sum(cantidad for codigo, cantidad in codigos.items() if int(codigo) >= 400)
+    return {
+        "requests": len(latencias),
+        "errores": errores,
+        "codigos": codigos,
+        "req_s": round(len(latencias) / duracion, 2) if duracion else 0,
+        "media_ms": round(sum(latencias) / len(latencias) * 1000, 3) if latencias else 0,
+        "p50_ms": round(percentil(latencias, 50) * 1000, 3),
+        "p95_ms": round(percentil(latencias, 95) * 1000, 3),
+        "p99_ms": round(percentil(latencias, 99) * 1000, 3),
+        "max_ms": round(max(latencias) * 1000, 3) if latencias else 0
+    }
+
+# Un escenario que recibe una respuesta de error no mide lo que dice medir: se corta
+class EscenarioFallido(Exception):
+    pass
+
+def verificar_respuesta(metodo, url, respuesta):
+    if not 200 <= respuesta.status_code < 300:
+        raise EscenarioFallido(f"{metodo} {url} -> {respuesta.status_code}: {respuesta.text[:300]}")
+
+async def correr_escenario(cliente, headers, metodo, armar, refs, args, semilla) -> dict:
+    # Cada escenario tiene su propio generador: los requests no cambian si se agregan otros
+    rng = random.Random(semilla)
+    for _ in range(args.calentamiento):
+        url, params, cuerpo = armar(rng, refs)
+        respuesta = await cliente.request(metodo, url, params=params, json=cuerpo, headers=headers)
+        verificar_respuesta(metodo, url, respuesta)
+
+    latencias = []
+    codigos = {}
+    inicio_total = time.perf_counter()
+    for _ in range(args.repeticiones):
+        url, params, cuerpo = armar(rng, refs)
+        inicio = time.perf_counter()
+        respuesta = await cliente.request(metodo, url, params=params, json=cuerpo, headers=headers)
+        latencias.append(time.perf_counter() - inicio)
+        verificar_respuesta(metodo, url, respuesta)
+        codigo = str(respuesta.status_code)
+        codigos[codigo] = codigos.get(codigo, 0) + 1
+    return resumir(latencias, codigos, time.perf_counter() - inicio_total)
+
+async def ejecutar(app, refs, args, seleccion) -> dict:
+    transporte = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    resultados = {}
+    async with httpx.AsyncClient(transport=transporte, base_url="http://benchmark", timeout=300) as cliente:
+        respuesta = await cliente.post("/usuarios/login", data={"username": EMAIL_PRUEBA, "password": PASSWORD_PRUEBA})
+        respuesta.raise_for_status()
+        headers = {"Authorization": f"Bearer {respuesta.json()['access_token']}"}
+
+        for indice, (nombre, metodo, armar) in enumerate(ESCENARIOS):
+            if seleccion and nombre not in seleccion:
+                continue
+            try:
+                resultados[nombre] = await correr_escenario(
+                    cliente, headers, metodo, armar, refs, args, args.semilla + indice
+                )
+            except EscenarioFallido as e:
+                resultados[nombre] = {"fallo": str(e)}
+                print(f"{nombre:<22} | FALLÓ: {e}")
+                continue
+            r = resultados[nombre]
+            print(
+                f"{nombre:<22} | {r['requests']:>5} | {r['errores']:>7} | {r['p50_ms']:>9} | "
+                f"{r['p95_ms']:>9} | {r['p99_ms']:>9} | {r['req_s']:>8}"
+            )
+    await cerrar_app_en_proceso()
+    return resultados
+
+# Regresiones contra una corrida anterior: p50 o p95 peor que el umbral. Los escenarios
+# que fallaron en alguna de las dos corridas se informan pero no se comparan
+def comparar(actual: dict, anterior: dict, umbral: float) -> int:
+    regresiones = 0
+    print(f"\nComparación contra {anterior.get('version')} ({anterior.get('fecha')})")
+    print(f"{'Escenario':<22} | {'p50 antes':>9} | {'p50 ahora':>9} | {'Δ p50':>8} | {'Δ p95':>8} | Estado")
+    print("-" * 80)
+    for nombre, ahora in actual["escenarios"].items():
+        antes = anterior.get("escenarios", {}).get(nombre)
+        if not antes:
+            continue
+        if "fallo" in ahora or "fallo" in antes:
+            print(f"{nombre:<22} | {'':>9} | {'':>9} | {'':>8} | {'':>8} | falló")
+            continue
+        delta_p50 = (ahora["p50_ms"] - antes["p50_ms"]) / antes["p50_ms"] if antes["p50_ms"] else 0
+        delta_p95 = (ahora["p95_ms"] - antes["p95_ms"]) / antes["p95_ms"] if antes["p95_ms"] else 0
+        if delta_p50 > umbral or delta_p95 > umbral:
+            estado = "REGRESIÓN"
+            regresiones += 1
+        else:
+            estado = "ok"
+        print(
+            f"{nombre:<22} | {antes['p50_ms']:>9} | {ahora['p50_ms']:>9} | "
+            f"{delta_p50:>+8.1%} | {delta_p95:>+8.1%} | {estado}"
+        )
+    if anterior.get("volumenes") != actual["volumenes"]:
+        print("Atención: las corridas usan volúmenes distintos")
+    return regresiones
+
+def main():
+    parser = argparse.ArgumentParser(description="Suite de benchmarks sobre una base sintética a escala")
+    parser.add_argument("--escala", choices=list(ESCALAS), default="1k")
+    parser.add_argument("--productos", type=int, help="Reemplaza la cantidad de productos de la escala")
+    parser.add_argument("--ajustes", type=int, help="Reemplaza la cantidad de movimientos de ajuste de la escala")
+    parser.add_argument("--facturas", type=int, help="Reemplaza la cantidad de facturas de la escala")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--db-url", help="URL de SQLAlchemy de una base vacía (por ejemplo SQL Server con el esquema creado)")
+    parser.add_argument("--archivo-db", help="Archivo SQLite (por defecto ferre_benchmark_<escala>.db en el directorio temporal); si existe se reutiliza")
+    parser.add_argument("--repeticiones", type=int, default=50, help="Requests medidos por escenario")
+    parser.add_argument("--calentamiento", type=int, default=5, help="Requests sin medir antes de cada escenario")
+    parser.add_argument("--escenarios", help="Lista separada por comas (por defecto todos)")
+    parser.add_argument("--json", help="Archivo donde guardar los resultados")
+    parser.add_argument("--comparar", help="JSON de una corrida anterior")
+    parser.add_argument("--umbral", type=float, default=0.2, help="Empeoramiento tolerado de p50/p95 (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    cantidades = volumenes(args.escala, productos=args.productos, ajustes=args.ajustes, facturas=args.facturas)
+    engine, url_async, reutilizada = preparar_base(args)
+
+    refs = leer_referencias(engine) if reutilizada or args.db_url else None
+    if refs is None:
+        print(f"Sembrando {cantidades} ...")
+        inicio = time.perf_counter()
+        refs = sembrar_escala(engine, cantidades, args.semilla)
+        print(f"Siembra: {time.perf_counter() - inicio:.1f}s")
+    elif refs["productos"] != cantidades["productos"]:
+        print(f"La base tiene {refs['productos']} productos y la escala pide {cantidades['productos']}; usá otro --archivo-db")
+        sys.exit(2)
+
+    app = conectar_app(engine, url_async)
+    silenciar_consola()
+    seleccion = set(args.escenarios.split(",")) if args.escenarios else None
+
+    print(f"{'Escenario':<22} | {'Req':>5} | {'Errores':>7} | {'p50 ms':>9} | {'p95 ms':>9} | {'p99 ms':>9} | {'req/s':>8}")
+    print("-" * 88)
+    escenarios = asyncio.run(ejecutar(app, refs, args, seleccion))
+
+    resultados = {
+        "version": version_codigo(),
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "motor": engine.dialect.name,
+        "escala": args.escala,
+        "volumenes": cantidades,
+        "semilla": args.semilla,
+        "repeticiones": args.repeticiones,
+        "escenarios": escenarios
+    }
+
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            anterior = json.load(f)
+        if comparar(resultados, anterior, args.umbral):
+            sys.exit(1)
+
+    # Un escenario que falló no tiene tiempos válidos
+    fallidos = [nombre for nombre, r in escenarios.items() if "fallo" in r]
+    if fallidos:
+        print(f"\nEscenarios con respuestas de error: {', '.join(fallidos)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+import sys
+import os
+import inspect
+import argparse
+from datetime import date, datetime, timedelta
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.params import Depends as ParametroDepends
+from pydantic_core import PydanticUndefined
+
+from benchmarks.comun import (
+    crear_engine_sqlite,
+    crear_esquema,
+    crear_sesion,
+    sembrar_referencias,
+    sembrar_productos,
+    limite_sentencias
+)
+from APP.DB.Usuarios_model import Usuarios
+from APP.DB.Descuentos_model import Descuentos
+from APP.DB.Productos_Descuentos_model import Productos_Descuentos
+from APP.DB.Proveedores_model import Proveedores
+from APP.DB.Ordenes_Compra_model import Ordenes_Compra
+from APP.DB.Detalle_OC_model import Detalle_OC
+from APP.DB.Transferencias_Sucursales_model import Transferencias_Sucursales
+from APP.DB.Detalles_Transferencia_model import Detalles_Transferencia
+from APP.DB.Sucursales_model import Sucursales
+
+# Verifica que los endpoints que antes hacían una consulta por fila (N+1) manden la misma
+# cantidad de sentencias con pocas y con muchas filas, y que no pasen de un máximo fijo.
+# Sale con código 1 si alguno se pasa, así que puede correr en cualquier pipeline.
+
+POCOS = 3
+MUCHOS = 30
+
+# Llamar a un handler directamente, completando los parámetros Query/Path con sus valores
+# por defecto y las dependencias con None
+def llamar(funcion, **kwargs):
+    for nombre, parametro in inspect.signature(funcion).parameters.items():
+        if nombre in kwargs:
+            continue
+        defecto = parametro.default
+        if isinstance(defecto, ParametroDepends):
+            kwargs[nombre] = None
+        elif hasattr(defecto, "default"):
+            kwargs[nombre] = None if defecto.default is PydanticUndefined else defecto.default
+        else:
+            kwargs[nombre] = defecto
+    return funcion(**kwargs)
+
+def sembrar(db, refs, ids_producto):
+    sucursal_destino = Sucursales(
+        Nombre="Sucursal Destino",
+        Direccion="Calle Falsa 123",
+        Localidad="Córdoba",
+        Provincia="Córdoba"
+    )
+    proveedor = Proveedores(
+        Nombre="Proveedor",
+        Direccion="Ruta 9 km 700",
+        Localidad="Córdoba",
+        Provincia="Córdoba",
+        Telefono="0000000"
+    )
+    db.add_all([sucursal_destino, proveedor])
+    db.flush()
+
+    # Usuarios con sucursal, para el listado de usuarios
+    db.add_all([
+        Usuarios(
+            Nombre=f"Usuario {i}",
+            Apellido="Prueba",
+            Rol="Vendedor",
+            Email=f"usuario{i}@ferreteria.com",
+            Contraseña="x",
+            ID_Sucursal=refs["sucursal"]
+        )
+        for i in range(MUCHOS)
+    ])
+
+    # Descuentos con productos asociados
+    hoy = date.today()
+    descuentos = {}
+    for cantidad in (POCOS, MUCHOS):
+        descuento = Descuentos(
+            Nombre=f"Descuento {cantidad}",
+            Porcentaje=10,
+            Tipo_Descuento="Porcentaje",
+            Fecha_Inicio=hoy - timedelta(days=1),
+            Fecha_Fin=hoy + timedelta(days=1)
+        )
+        db.add(descuento)
+        db.flush()
+        db.add_all([
+            Productos_Descuentos(ID_Producto=id_producto, ID_Descuento=descuento.ID_Descuento)
+            for id_producto in ids_producto[:cantidad]
+        ])
+        descuentos[cantidad] = descuento.ID_Descuento
+    db.add_all([
+        Descuentos(
+            Nombre=f"Descuento extra {i}",
+            Porcentaje=5,
+            Tipo_Descuento="Porcentaje",
+            Fecha_Inicio=hoy,
+            Fecha_Fin=hoy
+        )
+        for i in range(MUCHOS)
+    ])
+
+    # Órdenes de compra (una recibida antes, para el costo anterior) y transferencias
+    ordenes = {}
+    transferencias = {}
+    for indice, cantidad in enumerate((POCOS, MUCHOS)):
+        anterior = Ordenes_Compra(
+            ID_Proveedor=proveedor.ID_Proveedor,
+            ID_Sucursal=refs["sucursal"],
+            Fecha=datetime.now() - timedelta(days=10 + indice),
+            Subtotal=100,
+            Total=100,
+            ID_Usuario=refs["usuario"],
+            Estado="Recibida"
+        )
+        orden = Ordenes_Compra(
+            ID_Proveedor=proveedor.ID_Proveedor,
+            ID_Sucursal=refs["sucursal"],
+            Subtotal=100,
+            Total=100,
+            ID_Usuario=refs["usuario"]
+        )
+        transferencia = Transferencias_Sucursales(
+            ID_Sucursal_Origen=refs["sucursal"],
+            ID_Sucursal_Destino=sucursal_destino.ID_Sucursal,
+            ID_Usuario_Solicitante=refs["usuario"]
+        )
+        db.add_all([anterior, orden, transferencia])
+        db.flush()
+        for id_producto in ids_producto[:cantidad]:
+            for oc, costo in ((anterior, 90), (orden, 100)):
+                db.add(Detalle_OC(
+                    ID_OC=oc.ID_OC,
+                    ID_Producto=id_producto,
+                    Cantidad=1,
+                    Costo_Unitario=costo,
+                    Subtotal=costo
+                ))
+            db.add(Detalles_Transferencia(
+                ID_Transferencia=transferencia.ID_Transferencia,
+                ID_Producto=id_producto,
+                Cantidad=1
+            ))
+        ordenes[cantidad] = orden.ID_OC
+        transferencias[cantidad] = transferencia.ID_Transferencia
+
+    db.commit()
+    return descuentos, ordenes, transferencias
+
+def main():
+    parser = argparse.ArgumentParser(description="Verificación de consultas N+1")
+    parser.parse_args()
+
+    from APP.routers.Descuentos_router import get_descuentos
+    from APP.routers.Usuarios_router import get_usuarios
+    from APP.routers.Productos_Descuentos_router import get_productos_descuento
+    from APP.routers.Detalle_OC_router import get_detalles_orden
+    from APP.routers.Detalles_Transferencias_router import get_detalles_transferencia
+
+    engine = crear_engine_sqlite()
+    crear_esquema(engine)
+    SessionLocal = crear_sesion(engine)
+
+    db = SessionLocal()
+    refs = sembrar_referencias(db)
+    ids_producto = sembrar_productos(db, refs, MUCHOS)
+    descuentos, ordenes, transferencias = sembrar(db, refs, ids_producto)
+    db.close()
+
+    # (nombre, máximo de sentencias, llamada según la cantidad de filas)
+    casos = [
+        ("GET /descuentos/", 2, lambda db, usuario, n: llamar(
+            get_descuentos, limit=n, db=db, current_user=usuario)),
+        ("GET /descuentos/ (cursor)", 1, lambda db, usuario, n: llamar(
+            get_descuentos, limit=n, paginacion="cursor", db=db, current_user=usuario)),
+        ("GET /usuarios/", 2, lambda db, usuario, n: llamar(
+            get_usuarios, limit=n, db=db, current_user=usuario)),
+        ("GET /productos-descuentos/descuento/{id}", 3, lambda db, usuario, n: llamar(
+            get_productos_descuento, descuento_id=descuentos[n], db=db, current_user=usuario)),
+        ("GET /detalle-oc/orden/{id}", 4, lambda db, usuario, n: llamar(
+            get_detalles_orden, orden_id=ordenes[n], db=db, current_user=usuario)),
+        ("GET /detalles-transferencia/transferencia/{id}", 3, lambda db, usuario, n: llamar(
+            get_detalles_transferencia, transferencia_id=transferencias[n], db=db, current_user=usuario)),
+    ]
+
+    fallas = 0
+    print(f"{'Endpoint':<46} | {POCOS:>5} filas | {MUCHOS:>5} filas | Máx | OK")
+    print("-" * 84)
+    for nombre, maximo, llamada in casos:
+        sentencias = []
+        error = None
+        for n in (POCOS, MUCHOS):
+            db = SessionLocal()
+            usuario = db.get(Usuarios, refs["usuario"])
+            try:
+                with limite_sentencias(engine, maximo) as contador:
+                    llamada(db, usuario, n)
+            except AssertionError as e:
+                error = str(e)
+            finally:
+                db.close()
+            sentencias.append(contador.sentencias)
+
+        ok = error is None and sentencias[0] == sentencias[1]
+        fallas += not ok
+        print(f"{nombre:<46} | {sentencias[0]:>11} | {sentencias[1]:>11} | {maximo:>3} | {'sí' if ok else 'NO'}")
+
+    sys.exit(1 if fallas else 0)
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,129 @@
 from dotenv import load_dotenv
 load_dotenv()
-import os, urllib.parse
-from sqlalchemy import create_engine
+import os, urllib.parse, time, threading
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
-from typing import Generator
+from sqlalchemy.pool import QueuePool
+from typing import Generator, AsyncGenerator
+import importlib.util
+import logging
+from APP.services.Entorno_service import env_bool
+from APP.services.Metricas_service import Histograma, BUCKETS_ESPERA_POOL
+
+# DATABASE_URL permite usar otra base en lugar de SQL Server (por ejemplo sqlite:///./pruebas.db para los tests)
+DATABASE_URL = os.getenv("DATABASE_URL")
 
 # Configuración por defecto si no existe el archivo .env
 conn_str = os.getenv("SQLSERVER_CONN_STR")
 if not conn_str:
     # Configuración por defecto para desarrollo
     conn_str = "Driver={ODBC Driver 17 for SQL Server};Server=localhost;Database=Ferreteriadb;UID=sa;PWD=12345"
-    print("⚠️  Usando configuración por defecto de base de datos. Crea un archivo .env para personalizar.")
+    if not DATABASE_URL:
+        print("⚠️  Usando configuración por defecto de base de datos. Crea un archivo .env para personalizar.")
 
 quoted = urllib.parse.quote_plus(conn_str)
-SQLALCHEMY_DATABASE_URL = f"mssql+pyodbc:///?odbc_connect={quoted}"
+SQLALCHEMY_DATABASE_URL = DATABASE_URL or f"mssql+pyodbc:///?odbc_connect={quoted}"
+ES_SQLITE = SQLALCHEMY_DATABASE_URL.startswith("sqlite")
 
 Base = declarative_base()
 
+# Configuración del engine y del pool de conexiones (ver .env)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "-1"))  # segundos, -1 = sin reciclar
+DB_POOL_PRE_PING = env_bool("DB_POOL_PRE_PING", False)
+DB_ECHO = env_bool("DB_ECHO", False)
+DB_ISOLATION_LEVEL = os.getenv("DB_ISOLATION_LEVEL") or None
+DB_STATEMENT_TIMEOUT = int(os.getenv("DB_STATEMENT_TIMEOUT", "0"))  # segundos, 0 = sin límite
+
+# Métricas de espera del pool: cuánto tardan los requests en conseguir una conexión
+class MetricasPool:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Para /metrics: acumulados que no se reinician (Prometheus espera contadores crecientes)
+        self.histograma_espera = Histograma(BUCKETS_ESPERA_POOL)
+        self.timeouts_totales = 0
+        self.reiniciar()
+
+    def reiniciar(self):
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.espera_total = 0.0
+            self.espera_maxima = 0.0
+
+    def registrar(self, espera: float, timeout: bool = False):
+        with self._lock:
+            if timeout:
+                self.timeouts += 1
+                self.timeouts_totales += 1
+            else:
+                self.checkouts += 1
+            self.histograma_espera.observar(espera)
+            self.espera_total += espera
+            self.espera_maxima = max(self.espera_maxima, espera)
+
+    def resumen(self) -> dict:
+        with self._lock:
+            intentos = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "espera_promedio_ms": round(self.espera_total / intentos * 1000, 3) if intentos else 0.0,
+                "espera_maxima_ms": round(self.espera_maxima * 1000, 3)
+            }
+
+metricas_pool = MetricasPool()
+
+# QueuePool que mide el tiempo de espera de cada checkout
+class PoolConMetricas(QueuePool):
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            conexion = super()._do_get()
+        except Exception:
+            metricas_pool.registrar(time.perf_counter() - inicio, timeout=True)
+            raise
+        metricas_pool.registrar(time.perf_counter() - inicio)
+        return conexion
+
 # Creamos el engine
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
-    fast_executemany=True,   # acelera bulk insert
-    echo=True               # pon True si querés ver el SQL
+    # fast_executemany acelera bulk insert (solo existe en pyodbc); SQLite se usa desde el threadpool
+    **({"connect_args": {"check_same_thread": False}} if ES_SQLITE else {"fast_executemany": True}),
+    echo=DB_ECHO,
+    poolclass=PoolConMetricas,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+    **({"isolation_level": DB_ISOLATION_LEVEL} if DB_ISOLATION_LEVEL else {})
 )
 
+# Timeout por sentencia (pyodbc lo aplica a cada consulta de la conexión)
+if DB_STATEMENT_TIMEOUT > 0:
+    @event.listens_for(engine, "connect")
+    def _configurar_timeout(dbapi_connection, connection_record):
+        dbapi_connection.timeout = DB_STATEMENT_TIMEOUT
+
+# Estado actual del pool de un engine
+def estadisticas_pool(engine_a_medir=None) -> dict:
+    pool = (engine_a_medir or engine).pool
+    datos = {"tipo": type(pool).__name__, "estado": pool.status()}
+    if isinstance(pool, QueuePool):
+        datos.update({
+            "tamaño": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "en_uso": pool.checkedout(),
+            "disponibles": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "timeout_segundos": pool.timeout()
+        })
+    return datos
+
 # Creamos la clase de sesión
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -33,3 +133,61 @@ def get_db() -> Generator:
         yield db
     finally:
         db.close()
+
+# --- Capa asíncrona opcional ---
+# Usa aioodbc contra el mismo SQL Server (o aiosqlite contra el mismo archivo si la base es SQLite).
+# ASYNC_DATABASE_URL permite indicar otra URL explícitamente.
+# Sin driver asíncrono no hay fallback a otra base: las rutas asíncronas leerían de una base
+# distinta a la que escriben las sincrónicas
+logger = logging.getLogger("main.database")
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+if not ASYNC_DATABASE_URL:
+    if ES_SQLITE:
+        # La misma base SQLite que la sesión sincrónica
+        ASYNC_DATABASE_URL = SQLALCHEMY_DATABASE_URL.replace("sqlite", "sqlite+aiosqlite", 1)
+    elif importlib.util.find_spec("aioodbc"):
+        ASYNC_DATABASE_URL = f"mssql+aioodbc:///?odbc_connect={quoted}"
+    else:
+        logger.warning(
+            "No está instalado aioodbc: las rutas que usan la sesión asíncrona van a fallar. "
+            "Instalá aioodbc o definí ASYNC_DATABASE_URL."
+        )
+
+# El engine asíncrono se crea recién cuando se usa por primera vez,
+# así la app arranca igual aunque no haya driver asíncrono instalado
+async_engine = None
+AsyncSessionLocal = None
+
+def get_async_sessionmaker():
+    global async_engine, AsyncSessionLocal
+    if AsyncSessionLocal is None:
+        if not ASYNC_DATABASE_URL:
+            raise RuntimeError(
+                "No hay driver asíncrono para la base configurada: instalá aioodbc "
+                "o definí ASYNC_DATABASE_URL apuntando a la misma base que DATABASE_URL"
+            )
+        from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+        opciones_pool = {}
+        if not ASYNC_DATABASE_URL.startswith("sqlite"):
+            opciones_pool = {
+                "pool_size": DB_POOL_SIZE,
+                "max_overflow": DB_MAX_OVERFLOW,
+                "pool_timeout": DB_POOL_TIMEOUT,
+                "pool_recycle": DB_POOL_RECYCLE,
+                "pool_pre_ping": DB_POOL_PRE_PING
+            }
+            if DB_ISOLATION_LEVEL:
+                opciones_pool["isolation_level"] = DB_ISOLATION_LEVEL
+        async_engine = create_async_engine(ASYNC_DATABASE_URL, echo=DB_ECHO, **opciones_pool)
+        AsyncSessionLocal = async_sessionmaker(
+            async_engine,
+            autoflush=False,
+            expire_on_commit=False
+        )
+    return AsyncSessionLocal
+
+async def get_async_db() -> AsyncGenerator:
+    async with get_async_sessionmaker()() as db:
+        yield db
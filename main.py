@@ -1,37 +1,41 @@
 from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.exceptions import RequestValidationError
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from datetime import datetime
 import time
 import logging
-import traceback
 import os
+import random
+import anyio.to_thread
 from logging.handlers import RotatingFileHandler
 
-# Importar todos los routers
-from APP.routers.Categorias_router import router as categorias_router
-from APP.routers.Unidades_de_medida_router import router as unidades_medida_router
-from APP.routers.Sucursales_router import router as sucursales_router
-from APP.routers.Usuarios_router import router as usuarios_router
-from APP.routers.Productos_router import router as productos_router
-from APP.routers.Clientes_router import router as clientes_router
-from APP.routers.Proveedores_router import router as proveedores_router
-from APP.routers.Inventario_router import router as inventario_router
-from APP.routers.Facturas_Venta_router import router as facturas_venta_router
-from APP.routers.Detalles_Factura_Venta_router import router as detalles_factura_router
-from APP.routers.Pagos_router import router as pagos_router
-from APP.routers.Ordenes_Compra_router import router as ordenes_compra_router
-from APP.routers.Detalle_OC_router import router as detalle_oc_router
-from APP.routers.Movimientos_Inventario_router import router as movimientos_router
-from APP.routers.Garantias_router import router as garantias_router
-from APP.routers.Descuentos_router import router as descuentos_router
-from APP.routers.Productos_Descuentos_router import router as productos_descuentos_router
-from APP.routers.Devoluciones_router import router as devoluciones_router
-from APP.routers.Transferencias_Sucursales_router import router as transferencias_router
-from APP.routers.Detalles_Transferencias_router import router as detalles_transferencias_router
-from APP.routers.Auditoria_Cambios_router import router as auditoria_router
+# Los routers se cargan recién con el primer request a su prefijo (ver Arranque_service)
+from APP.services.Arranque_service import importar_modelos, registrar_routers, instalar_openapi_cacheado
+from APP.services.Metricas_service import (
+    iniciar_metricas_request,
+    finalizar_metricas_request,
+    metricas_http,
+    exponer_metricas,
+    acceso_metricas_permitido
+)
+from APP.services.Logging_service import iniciar_logging_en_segundo_plano
+from APP.services.Busqueda_service import precargar_busqueda
+from APP.services.Codigos_service import precargar_codigos
+from APP.services.Perfilado_service import (
+    PERFILADO_ACTIVO,
+    iniciar_perfil,
+    finalizar_perfil,
+    instrumentar_rutas
+)
+from database import metricas_pool, estadisticas_pool, env_bool
+
+# Máximo de registros esperando a escribirse; si la cola se llena se descartan (y se cuentan)
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Fracción de requests exitosos que se loguean (1 = todos). Los errores siempre se loguean
+LOG_MUESTREO_EXITOS = float(os.getenv("LOG_MUESTREO_EXITOS", "1"))
 
 # Configurar logging mejorado
 def setup_logging():
@@ -66,9 +70,10 @@ def setup_logging():
     file_handler.setFormatter(formatter)
     console_handler.setFormatter(formatter)
     
-    # Agregar handlers
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    # Los handlers escriben desde un hilo de fondo; el logger solo encola
+    cola, listener = iniciar_logging_en_segundo_plano(
+        logger, [file_handler, console_handler], LOG_QUEUE_SIZE
+    )
     
     # Configurar SQLAlchemy logging (solo errores)
     sqlalchemy_logger = logging.getLogger("sqlalchemy.engine")
@@ -78,10 +83,10 @@ def setup_logging():
     passlib_logger = logging.getLogger("passlib")
     passlib_logger.setLevel(logging.WARNING)
     
-    return logger
+    return logger, cola, listener
 
 # Configurar logging
-logger = setup_logging()
+logger, cola_logging, listener_logging = setup_logging()
 
 # Crear la aplicación FastAPI
 app = FastAPI(
@@ -102,6 +107,29 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
+# Tamaño del pool de hilos donde Starlette ejecuta los endpoints sincrónicos
+# (bcrypt y consultas a la base). Por defecto anyio usa 40 hilos
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", "40"))
+
+@app.on_event("startup")
+def configurar_threadpool():
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+
+# Armar el índice de búsqueda de productos en segundo plano
+@app.on_event("startup")
+async def iniciar_busqueda():
+    precargar_busqueda()
+
+# Cargar la tabla de códigos de barras/SKU en segundo plano
+@app.on_event("startup")
+async def iniciar_codigos():
+    precargar_codigos()
+
+# Escribir los logs pendientes antes de terminar
+@app.on_event("shutdown")
+def detener_logging():
+    listener_logging.stop()
+
 # Configurar CORS
 app.add_middleware(
     CORSMiddleware,
@@ -111,52 +139,113 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Middleware para logging de requests (mejorado)
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    start_time = time.time()
-    
-    # Solo loggear requests importantes
-    should_log = (
-        request.url.path not in ["/docs", "/openapi.json", "/favicon.ico", "/"] and
-        not request.url.path.startswith("/static")
-    )
-    
-    try:
-        response = await call_next(request)
-        duration = time.time() - start_time
+# Agregar el header Server-Timing con las métricas de SQL de cada request
+SERVER_TIMING = env_bool("SERVER_TIMING", True)
+
+# Paths que no se loguean
+RUTAS_SIN_LOG = frozenset(["/docs", "/openapi.json", "/favicon.ico", "/", "/metrics"])
+
+# Middleware para logging de requests (mejorado).
+# Es un middleware ASGI puro: a diferencia de @app.middleware("http") (BaseHTTPMiddleware)
+# no crea una tarea ni un stream intermedio por request, y las respuestas en streaming
+# pasan sin quedar retenidas
+class LogRequestsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
         
-        if should_log:
-            logger.info(
-                f"Method: {request.method} - Path: {request.url.path} - "
-                f"Status: {response.status_code} - Duration: {duration:.2f}s"
-            )
+        start_time = time.time()
+        inicio = time.perf_counter()
+        metricas, token = iniciar_metricas_request(scope)
+        perfil, token_perfil = iniciar_perfil(scope) if PERFILADO_ACTIVO else (None, None)
+        metricas_http.en_curso += 1
+        status_code = 500
+        tamano = 0
+        
+        # Solo loggear requests importantes
+        path = scope["path"]
+        should_log = path not in RUTAS_SIN_LOG and not path.startswith("/static")
+        
+        async def send_con_metricas(message):
+            nonlocal status_code, tamano
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if SERVER_TIMING:
+                    valor = metricas.server_timing(time.time() - start_time)
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"server-timing", valor.encode("latin-1"))
+                    ]
+                if perfil is not None:
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"x-perfil-id", perfil.id.encode("ascii"))
+                    ]
+            elif message["type"] == "http.response.body":
+                tamano += len(message.get("body", b""))
+            await send(message)
         
-        return response
-    except Exception as e:
-        duration = time.time() - start_time
-        logger.error(
-            f"Method: {request.method} - Path: {request.url.path} - "
-            f"Error: {str(e)} - Duration: {duration:.2f}s\n"
-            f"Traceback: {traceback.format_exc()}"
-        )
-        raise
+        try:
+            await self.app(scope, receive, send_con_metricas)
+        except Exception as e:
+            duration = time.time() - start_time
+            metricas_http.registrar_respuesta(scope, 500, time.perf_counter() - inicio, None)
+            logger.error(
+                f"Method: {scope['method']} - Path: {path} - "
+                f"Error: {str(e)} - Duration: {duration:.2f}s - "
+                f"SQL: {metricas.sentencias} sentencias, {metricas.tiempo_db * 1000:.1f}ms",
+                exc_info=True
+            )
+            raise
+        else:
+            duration = time.time() - start_time
+            metricas_http.registrar_respuesta(scope, status_code, time.perf_counter() - inicio, tamano)
+            
+            # Los exitosos pueden muestrearse; los errores se loguean siempre
+            if should_log and (
+                status_code >= 400
+                or LOG_MUESTREO_EXITOS >= 1
+                or random.random() < LOG_MUESTREO_EXITOS
+            ):
+                mensaje = (
+                    f"Method: {scope['method']} - Path: {path} - "
+                    f"Status: {status_code} - Duration: {duration:.2f}s - "
+                    f"SQL: {metricas.sentencias} sentencias, {metricas.tiempo_db * 1000:.1f}ms"
+                )
+                if metricas.sentencias:
+                    mensaje += (
+                        f" - Más lenta: {metricas.tiempo_mas_lenta * 1000:.1f}ms "
+                        f"{metricas.sql_mas_lenta_resumida()}"
+                    )
+                logger.info(mensaje)
+        finally:
+            if perfil is not None:
+                finalizar_perfil(perfil, token_perfil, scope, time.perf_counter() - inicio, metricas)
+            metricas_http.en_curso -= 1
+            finalizar_metricas_request(token)
+
+app.add_middleware(LogRequestsMiddleware)
 
 # Manejadores de errores globales
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
+    metricas_http.registrar_error(request, "validacion")
     logger.error(f"Validation error: {exc.errors()}")
     return JSONResponse(
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
         content={
             "detail": "Error de validación",
-            "errors": exc.errors()
+            # Los errores de los validadores traen la excepción original en "ctx"
+            "errors": jsonable_encoder(exc.errors())
         }
     )
 
 @app.exception_handler(IntegrityError)
 async def integrity_exception_handler(request: Request, exc: IntegrityError):
-    logger.error(f"Integrity error: {str(exc)}\n{traceback.format_exc()}")
+    metricas_http.registrar_error(request, "integridad")
+    logger.error(f"Integrity error: {str(exc)}", exc_info=exc)
     return JSONResponse(
         status_code=status.HTTP_409_CONFLICT,
         content={
@@ -167,7 +256,8 @@ async def integrity_exception_handler(request: Request, exc: IntegrityError):
 
 @app.exception_handler(SQLAlchemyError)
 async def sqlalchemy_exception_handler(request: Request, exc: SQLAlchemyError):
-    logger.error(f"Database error: {str(exc)}\n{traceback.format_exc()}")
+    metricas_http.registrar_error(request, "base_de_datos")
+    logger.error(f"Database error: {str(exc)}", exc_info=exc)
     return JSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content={
@@ -178,7 +268,8 @@ async def sqlalchemy_exception_handler(request: Request, exc: SQLAlchemyError):
 
 @app.exception_handler(Exception)
 async def general_exception_handler(request: Request, exc: Exception):
-    logger.error(f"Unexpected error: {str(exc)}\n{traceback.format_exc()}")
+    metricas_http.registrar_error(request, "interno")
+    logger.error(f"Unexpected error: {str(exc)}", exc_info=exc)
     return JSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content={
@@ -187,28 +278,13 @@ async def general_exception_handler(request: Request, exc: Exception):
         }
     )
 
-# Incluir todos los routers
-app.include_router(categorias_router)
-app.include_router(unidades_medida_router)
-app.include_router(sucursales_router)
-app.include_router(usuarios_router)
-app.include_router(productos_router)
-app.include_router(clientes_router)
-app.include_router(proveedores_router)
-app.include_router(inventario_router)
-app.include_router(facturas_venta_router)
-app.include_router(detalles_factura_router)
-app.include_router(pagos_router)
-app.include_router(ordenes_compra_router)
-app.include_router(detalle_oc_router)
-app.include_router(movimientos_router)
-app.include_router(garantias_router)
-app.include_router(descuentos_router)
-app.include_router(productos_descuentos_router)
-app.include_router(devoluciones_router)
-app.include_router(transferencias_router)
-app.include_router(detalles_transferencias_router)
-app.include_router(auditoria_router)
+# Registrar los routers (diferidos salvo CARGA_DIFERIDA_ROUTERS=false). Las rutas de cada
+# router se siguen en el perfilado al cargarse (solo si el perfilado está configurado)
+importar_modelos()
+cargador_routers = registrar_routers(app, al_cargar=instrumentar_rutas)
+
+# /openapi.json desde el archivo precalculado mientras el código no cambie
+instalar_openapi_cacheado(app, cargador_routers)
 
 # Endpoint de estado/salud
 @app.get("/", tags=["Estado"])
@@ -220,6 +296,23 @@ async def root():
         "message": "API de Ferretería funcionando correctamente"
     }
 
+# Métricas en formato Prometheus (latencia por ruta, requests en curso, tamaño de
+# respuestas, errores por tipo y espera del pool de conexiones). Solo con METRICAS_TOKEN o
+# desde METRICAS_REDES, como los endpoints de /sistema solo para admin
+@app.get("/metrics", tags=["Estado"], include_in_schema=False)
+async def metrics(request: Request):
+    if not acceso_metricas_permitido(request.headers.get("authorization"), request.client.host if request.client else None):
+        return JSONResponse(status_code=status.HTTP_403_FORBIDDEN, content={"detail": "Acceso a métricas no permitido"})
+    return PlainTextResponse(
+        exponer_metricas(
+            metricas_pool,
+            estadisticas_pool(),
+            log_descartados=cola_logging.descartados,
+            log_pendientes=cola_logging.pendientes()
+        ),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
 # Endpoint para información del sistema
 @app.get("/info", tags=["Estado"])
 async def info():
@@ -0,0 +1,66 @@
+import os
+import sys
+import tempfile
+
+# La app usa SQL Server; los tests corren sobre un SQLite temporal. Tiene que definirse antes
+# de importar database (los subprocesos que lanzan los tests heredan la variable)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'pruebas.db')}")
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from benchmarks.comun import crear_engine_sqlite, crear_esquema, crear_sesion, sembrar_referencias, conectar_app
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: mediciones de tiempo, se saltean si no hay línea base configurada")
+
+# Base SQLite en un archivo temporal (admite varias conexiones a la vez) con el esquema de los
+# modelos y los datos mínimos de referencia. Devuelve (engine, SessionLocal, refs)
+@pytest.fixture
+def base(tmp_path):
+    engine = crear_engine_sqlite(str(tmp_path / "base.db"))
+    crear_esquema(engine)
+    SessionLocal = crear_sesion(engine)
+
+    db = SessionLocal()
+    refs = sembrar_referencias(db)
+    db.close()
+
+    yield engine, SessionLocal, refs
+    engine.dispose()
+
+# La app en proceso sobre la base de "base", sin los eventos de arranque (no arma el índice
+# de búsqueda ni la tabla de códigos). El cliente HTTP del TestClient llega como "testclient"
+@pytest.fixture
+def cliente(base, monkeypatch):
+    from fastapi.testclient import TestClient
+    import database
+
+    engine, _, _ = base
+    monkeypatch.setattr(database, "ASYNC_DATABASE_URL", database.ASYNC_DATABASE_URL)
+    app = conectar_app(engine, f"sqlite+aiosqlite:///{engine.url.database}")
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+# Corre una corrutina con la sesión asíncrona (aiosqlite) apuntando a la base de "base". El
+# engine asíncrono se cierra en el mismo event loop (aiosqlite deja hilos vivos si no)
+@pytest.fixture
+def correr_async(base, monkeypatch):
+    import asyncio
+    import database
+
+    engine, _, _ = base
+    monkeypatch.setattr(database, "ASYNC_DATABASE_URL", f"sqlite+aiosqlite:///{engine.url.database}")
+    monkeypatch.setattr(database, "async_engine", None)
+    monkeypatch.setattr(database, "AsyncSessionLocal", None)
+
+    async def con_cierre(corrutina):
+        try:
+            return await corrutina
+        finally:
+            if database.async_engine is not None:
+                await database.async_engine.dispose()
+
+    return lambda corrutina: asyncio.run(con_cierre(corrutina))
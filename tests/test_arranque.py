@@ -0,0 +1,29 @@
+import os
+
+import pytest
+
+from benchmarks.arranque import medir, limite_linea_base
+
+# Regresión del arranque contra una medición guardada en la misma máquina (un presupuesto fijo
+# en ms depende de la máquina, así que sin medición el test se saltea):
+#
+#     python benchmarks/arranque.py --json arranque_base.json
+#     ARRANQUE_LINEA_BASE=arranque_base.json python -m pytest -q -m benchmark
+#
+# ARRANQUE_PRESUPUESTO_MS fija un máximo absoluto en lugar de la línea base. Se toma la mejor de
+# ARRANQUE_CORRIDAS corridas para no fallar por un proceso que arrancó con la máquina ocupada
+LINEA_BASE = os.getenv("ARRANQUE_LINEA_BASE")
+PRESUPUESTO_MS = os.getenv("ARRANQUE_PRESUPUESTO_MS")
+TOLERANCIA = float(os.getenv("ARRANQUE_TOLERANCIA", "0.25"))
+CORRIDAS = int(os.getenv("ARRANQUE_CORRIDAS", "3"))
+
+@pytest.mark.benchmark
+@pytest.mark.skipif(not (LINEA_BASE or PRESUPUESTO_MS), reason="sin ARRANQUE_LINEA_BASE ni ARRANQUE_PRESUPUESTO_MS")
+def test_import_de_main_sin_regresion(tmp_path):
+    limite = limite_linea_base(LINEA_BASE, TOLERANCIA) if LINEA_BASE else float(PRESUPUESTO_MS)
+
+    # Igual que arranque.py: la primera corrida deja el OpenAPI en la cache y no se cuenta
+    cache = str(tmp_path / "openapi.json")
+    medir(cache)
+    mejor = min(medir(cache)["import_ms"] for _ in range(CORRIDAS))
+    assert mejor <= limite, f"El import de main tarda {mejor:.1f}ms y el máximo es {limite:.0f}ms"
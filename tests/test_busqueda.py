@@ -0,0 +1,205 @@
+import pytest
+from datetime import datetime
+from sqlalchemy import select, update
+
+from APP.DB.Productos_model import Productos
+from APP.services.Busqueda_service import (
+    IndiceProductos, BuscadorProductos, COLUMNAS, CAMPOS_TITULO, condicion_sql
+)
+
+# El índice de búsqueda tiene que encontrar lo mismo que condicion_sql, la consulta que usan
+# los endpoints cuando el índice no está: con una sola palabra, exactamente los mismos productos;
+# con varias (o con signos en el medio), al menos los que encuentra el ilike del texto entero
+
+CATALOGO = [
+    # Nombre, Marca, Modelo, Descripcion, Codigo_Barras, SKU
+    ("Tornillo autoperforante 8 x 1/2", "Fischer", "TA-8", "Punta mecha, cabeza hexagonal", "7791234567890", "TOR-0812"),
+    ("Destornillador Phillips PH2", "Stanley", "STHT65", "Mango bimaterial", "7799876543210", "DES-PH2"),
+    ("Martillo carpintero 27 mm", "Bahco", "M27", "Cabo de madera", "7790001112223", "MAR-27"),
+    ("Caño termofusión 3/4", "Acqua System", "AS-34", "Tira de 4 m", "7793456789012", "CAN-34"),
+    ("Llave francesa 10 pulgadas", "Bahco", "8070", None, "4001234567895", "LLA-10"),
+    ("Cinta métrica 5 m", "Stanley", "STHT33", "Carcasa de ABS", "7790004567001", "CIN-5"),
+    ("Taladro percutor 13 mm", "Black Decker", "TM500", "Incluye mechas", "7791112223334", "TAL-13"),
+    ("Mecha widia 6 mm", "Ezeta", "W6", "Para hormigón", "7795556667778", "MEC-W6"),
+]
+
+UN_TERMINO = [
+    "tor", "tornillo", "TORNILLO", "ill", "bahco", "stanley", "sth", "hexagonal", "madera",
+    "mm", "mecha", "456789", "4567", "779", "7791234567890", "ph2", "m27",
+]
+VARIOS_TERMINOS = ["tornillo 8", "caño 3/4", "llave 10", "mecha 6 mm", "martillo de", "de m", "tor-08", "tor-"]
+
+@pytest.fixture
+def catalogo(base):
+    engine, SessionLocal, refs = base
+    db = SessionLocal()
+    db.add_all([
+        Productos(
+            Nombre=nombre, Marca=marca, Modelo=modelo, Descripcion=descripcion,
+            Codigo_Barras=codigo_barras, SKU=sku, Precio=200, Costo=100,
+            ID_Categoria=refs["categoria"], ID_Unidad_de_medida=refs["unidad"]
+        )
+        for nombre, marca, modelo, descripcion, codigo_barras, sku in CATALOGO
+    ])
+    db.commit()
+    yield db
+    db.close()
+
+def leer_indice(db) -> IndiceProductos:
+    return IndiceProductos.construir([tuple(fila) for fila in db.execute(select(*COLUMNAS)).all()])
+
+def por_sql(db, texto, campos=None):
+    condicion = condicion_sql(texto) if campos is None else condicion_sql(texto, campos)
+    return set(db.scalars(select(Productos.ID_Producto).where(condicion)))
+
+def por_indice(indice, texto, **opciones):
+    total, ids = indice.buscar(texto, **opciones)
+    assert total == len(ids)
+    return set(ids)
+
+@pytest.mark.parametrize("texto", UN_TERMINO)
+def test_un_termino_igual_que_sql(catalogo, texto):
+    indice = leer_indice(catalogo)
+    assert por_indice(indice, texto) == por_sql(catalogo, texto)
+    assert por_indice(indice, texto, campos=CAMPOS_TITULO) == por_sql(catalogo, texto, CAMPOS_TITULO)
+
+@pytest.mark.parametrize("texto", VARIOS_TERMINOS)
+def test_varios_terminos_incluyen_sql(catalogo, texto):
+    encontrados = por_indice(leer_indice(catalogo), texto)
+    assert encontrados >= por_sql(catalogo, texto)
+    assert encontrados
+
+def test_parte_del_codigo_de_barras(catalogo):
+    indice = leer_indice(catalogo)
+    esperado = catalogo.scalar(select(Productos.ID_Producto).where(Productos.SKU == "TOR-0812"))
+    # Del medio del código, no solo el comienzo
+    assert por_indice(indice, "234567890") == {esperado}
+    # El código exacto sale primero
+    assert indice.buscar("7791234567890")[1][0] == esperado
+
+def test_productos_agregados_despues_de_construir(catalogo, base):
+    _, _, refs = base
+    indice = leer_indice(catalogo)
+    nuevo = Productos(
+        Nombre="Tornillo fix 3", Marca="Fischer", Codigo_Barras="7798888777666", SKU="TOR-FIX3",
+        Precio=10, Costo=5, ID_Categoria=refs["categoria"], ID_Unidad_de_medida=refs["unidad"]
+    )
+    catalogo.add(nuevo)
+    catalogo.commit()
+    indice.agregar(tuple(catalogo.execute(select(*COLUMNAS).where(Productos.ID_Producto == nuevo.ID_Producto)).one()))
+
+    for texto in ("tornillo", "8887", "fix", "fis"):
+        assert por_indice(indice, texto) == por_sql(catalogo, texto)
+    assert por_indice(indice, "tor-") >= por_sql(catalogo, "tor-")
+
+def test_textos_cortos_y_desactualizado_van_a_sql(catalogo, monkeypatch):
+    buscador = BuscadorProductos()
+    monkeypatch.setattr(buscador, "_programar", lambda: None)
+    buscador._instalar(leer_indice(catalogo))
+    assert buscador.buscar("tornillo") is not None
+
+    # Como parte de un código, 1-2 caracteres coincidirían con casi todo
+    assert buscador.buscar("77") is None
+
+    # Después de un cambio masivo, hasta que termine la recarga
+    buscador.aplicar_cambios([("recargar", None)])
+    assert buscador.buscar("tornillo") is None
+    assert buscador.autocompletar("torn", 5) is None
+    buscador._instalar(leer_indice(catalogo))
+    assert buscador.buscar("tornillo") is not None
+
+def ids_por_sku(db, *skus):
+    por_sku = dict(db.execute(select(Productos.SKU, Productos.ID_Producto)).all())
+    return [por_sku[sku] for sku in skus]
+
+def test_relevancia_y_filtros(catalogo, base):
+    _, _, refs = base
+    mecha, taladro, tornillo = ids_por_sku(catalogo, "MEC-W6", "TAL-13", "TOR-0812")
+    catalogo.execute(update(Productos).where(Productos.ID_Producto == taladro).values(Activo=False))
+    catalogo.commit()
+    filas = [tuple(fila) for fila in catalogo.execute(select(*COLUMNAS)).all()]
+    indice = IndiceProductos.construir(filas, ventas={mecha: 10})
+
+    # Los más vendidos primero; con paginación, la ventana pedida
+    total, ids = indice.buscar("mm")
+    assert ids[0] == mecha
+    assert indice.buscar("mm", desde=1, cantidad=1) == (total, ids[1:2])
+
+    # El código exacto va antes que las coincidencias de texto
+    assert indice.buscar("TOR-0812")[1][0] == tornillo
+
+    assert taladro not in por_indice(indice, "mm", activo=True)
+    assert por_indice(indice, "mm", activo=False) == {taladro}
+    assert por_indice(indice, "mm", categoria_id=refs["categoria"]) == set(ids)
+    assert por_indice(indice, "mm", categoria_id=refs["categoria"] + 1) == set()
+
+def test_cambios_confirmados_y_borrados(catalogo, monkeypatch):
+    martillo, = ids_por_sku(catalogo, "MAR-27")
+    buscador = BuscadorProductos()
+    monkeypatch.setattr(buscador, "_programar", lambda: None)
+    buscador._instalar(leer_indice(catalogo))
+
+    fila = dict(catalogo.execute(select(*COLUMNAS).where(Productos.ID_Producto == martillo)).one()._mapping)
+    fila["Nombre"] = "Maza de goma"
+    buscador.aplicar_cambios([("guardar", (fila, False))])
+    assert buscador.buscar("maza") == (1, [martillo])
+    assert buscador.buscar("martillo") == (0, [])
+
+    buscador.aplicar_cambios([("quitar", martillo)])
+    assert buscador.buscar("maza") == (0, [])
+
+def test_carga_y_sincronizacion_asincronas(catalogo, correr_async, monkeypatch):
+    buscador = BuscadorProductos()
+    monkeypatch.setattr(buscador, "_programar", lambda: None)
+    correr_async(buscador.cargar())
+    assert buscador.error is None
+    assert buscador.listo()
+    assert set(buscador.buscar("bahco")[1]) == por_sql(catalogo, "bahco")
+
+    # Un cambio hecho por otro proceso llega al sincronizar, por Fecha_Actualizacion
+    llave, = ids_por_sku(catalogo, "LLA-10")
+    catalogo.execute(
+        update(Productos).where(Productos.ID_Producto == llave)
+        .values(Nombre="Llave inglesa 10 pulgadas", Fecha_Actualizacion=datetime.now())
+    )
+    catalogo.commit()
+    correr_async(buscador.sincronizar())
+    assert buscador.buscar("inglesa") == (1, [llave])
+
+# --- Autocompletado ---
+
+def test_autocompletar_por_prefijo_y_ventas(catalogo):
+    mecha, taladro, stanley = ids_por_sku(catalogo, "MEC-W6", "TAL-13", "CIN-5")
+    catalogo.execute(update(Productos).where(Productos.ID_Producto == taladro).values(Activo=False))
+    catalogo.commit()
+    filas = [tuple(fila) for fila in catalogo.execute(select(*COLUMNAS)).all()]
+    indice = IndiceProductos.construir(filas, ventas={stanley: 7, mecha: 3})
+
+    productos, marcas = indice.autocompletar("sta", 5)
+    assert [p["id"] for p in productos][0] == stanley
+    assert productos[0]["ventas"] == 7
+    assert marcas == [{"marca": "Stanley", "productos": 2, "ventas": 7}]
+
+    # Todos los términos como prefijo de una palabra del título; los inactivos no aparecen
+    assert [p["nombre"] for p in indice.autocompletar("torn fis", 5)[0]] == ["Tornillo autoperforante 8 x 1/2"]
+    assert indice.autocompletar("taladro", 5)[0] == []
+    assert indice.autocompletar("mecha", 5)[0][0]["id"] == mecha
+    assert len(indice.autocompletar("m", 2)[0]) == 2
+
+def test_autocompletar_sin_indice_va_a_sql(catalogo, correr_async, monkeypatch):
+    import database
+    from APP.routers import Productos_router
+
+    buscador = BuscadorProductos()
+    monkeypatch.setattr(buscador, "_programar", lambda: None)
+    monkeypatch.setattr(Productos_router, "buscador_productos", buscador)
+
+    async def autocompletar(texto):
+        async with database.get_async_sessionmaker()() as db:
+            return await Productos_router.autocompletar_productos(texto=texto, limite=5, db=db)
+
+    sugerencias = correr_async(autocompletar("Ba"))
+    assert sugerencias["productos"] == []
+    assert sugerencias["marcas"] == [{"marca": "Bahco", "productos": None, "ventas": None}]
+    nombres = [p["nombre"] for p in correr_async(autocompletar("Ta"))["productos"]]
+    assert nombres == ["Taladro percutor 13 mm"]
@@ -0,0 +1,93 @@
+import json
+import pytest
+from sqlalchemy import update
+
+from benchmarks.comun import sembrar_productos, limite_sentencias
+from APP.DB.Categorias_model import Categorias
+from APP.DB.Productos_model import Productos
+from APP.services.Categorias_service import cache_arbol_categorias, obtener_arbol_serializado
+
+# El árbol sale de una sola consulta y queda cacheado como JSON hasta que se confirme un cambio
+# en las categorías o en la categoría/estado de un producto
+
+@pytest.fixture
+def categorias(base):
+    engine, SessionLocal, refs = base
+    db = SessionLocal()
+    raiz = refs["categoria"]
+    manuales = Categorias(Nombre="Manuales", Categoria_Padre=raiz)
+    cerrada = Categorias(Nombre="Discontinuadas", Categoria_Padre=raiz, Activo=False)
+    db.add_all([manuales, cerrada])
+    db.flush()
+    llaves = Categorias(Nombre="Llaves", Categoria_Padre=manuales.ID_Categoria)
+    huerfana = Categorias(Nombre="Huérfana", Categoria_Padre=cerrada.ID_Categoria)
+    db.add_all([llaves, huerfana])
+    db.commit()
+    ids = {c.Nombre: c.ID_Categoria for c in (manuales, cerrada, llaves, huerfana)}
+    ids["Herramientas"] = raiz
+
+    ids_producto = sembrar_productos(db, refs, 3)
+    db.execute(update(Productos).where(Productos.ID_Producto == ids_producto[0]).values(ID_Categoria=ids["Llaves"]))
+    db.execute(update(Productos).where(Productos.ID_Producto == ids_producto[1]).values(Activo=False))
+    db.commit()
+    db.close()
+
+    cache_arbol_categorias.invalidar()
+    yield engine, SessionLocal, ids, ids_producto
+    cache_arbol_categorias.invalidar()
+
+def leer_arbol(SessionLocal):
+    db = SessionLocal()
+    try:
+        return obtener_arbol_serializado(db)
+    finally:
+        db.close()
+
+def nodos(arbol, profundidad=0):
+    for nodo in arbol:
+        yield nodo["nombre"], profundidad, nodo["productos_count"]
+        yield from nodos(nodo["subcategorias"], profundidad + 1)
+
+def test_arbol_con_una_consulta(categorias):
+    engine, SessionLocal, _, _ = categorias
+    with limite_sentencias(engine, 1):
+        arbol = json.loads(leer_arbol(SessionLocal))
+
+    # Solo productos activos; la rama bajo una categoría inactiva queda cortada
+    assert sorted(nodos(arbol)) == [("Herramientas", 0, 1), ("Llaves", 2, 1), ("Manuales", 1, 0)]
+
+def test_arbol_cacheado_hasta_un_cambio(categorias):
+    engine, SessionLocal, ids, ids_producto = categorias
+    primero = leer_arbol(SessionLocal)
+    with limite_sentencias(engine, 0):
+        assert leer_arbol(SessionLocal) is primero
+
+    # Un cambio deshecho no invalida
+    db = SessionLocal()
+    db.get(Productos, ids_producto[2]).ID_Categoria = ids["Manuales"]
+    db.flush()
+    db.rollback()
+    assert leer_arbol(SessionLocal) is primero
+
+    # Uno confirmado sí
+    db.get(Productos, ids_producto[2]).ID_Categoria = ids["Manuales"]
+    db.commit()
+    db.close()
+    assert ("Manuales", 1, 1) in nodos(json.loads(leer_arbol(SessionLocal)))
+
+def test_cambios_masivos_invalidan(categorias):
+    _, SessionLocal, ids, _ = categorias
+    leer_arbol(SessionLocal)
+    db = SessionLocal()
+    db.execute(update(Categorias).where(Categorias.ID_Categoria == ids["Discontinuadas"]).values(Activo=True))
+    db.commit()
+    db.close()
+    assert ("Huérfana", 2, 0) in nodos(json.loads(leer_arbol(SessionLocal)))
+
+def test_no_guarda_un_arbol_leido_antes_de_invalidar(categorias):
+    _, SessionLocal, _, _ = categorias
+    contenido, generacion = cache_arbol_categorias.obtener()
+    assert contenido is None
+    cache_arbol_categorias.invalidar()
+    cache_arbol_categorias.guardar(b"[]", generacion)
+    assert cache_arbol_categorias.obtener()[0] is None
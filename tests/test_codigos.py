@@ -0,0 +1,97 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import update
+
+from benchmarks.comun import sembrar_productos
+from APP.DB.Productos_model import Productos
+from APP.routers import Productos_router
+from APP.services import Cache_productos_service
+from APP.services.Codigos_service import CacheCodigos
+
+# /productos/buscar/{codigo} sale de la tabla de códigos en memoria. Con la tabla cargada el
+# endpoint se llama con db=None: si fuera a la base fallaría
+
+@pytest.fixture
+def codigos(base, correr_async, monkeypatch):
+    engine, SessionLocal, refs = base
+    db = SessionLocal()
+    ids = sembrar_productos(db, refs, 3)
+    # El SKU del tercero es igual al código de barras del primero
+    db.execute(update(Productos).where(Productos.ID_Producto == ids[2]).values(SKU="7790000000001"))
+    db.commit()
+    db.close()
+
+    cache = CacheCodigos()
+    monkeypatch.setattr(cache, "_programar", lambda: None)
+    monkeypatch.setattr(Productos_router, "cache_codigos", cache)
+    # Solo esta tabla recibe los cambios confirmados (no la del proceso)
+    monkeypatch.setattr(Cache_productos_service, "_suscriptores", [cache])
+    return SessionLocal, ids, cache
+
+def buscar(correr_async, codigo, con_base=True):
+    import database
+
+    async def llamada():
+        if not con_base:
+            return await Productos_router.buscar_por_codigo(codigo, db=None)
+        async with database.get_async_sessionmaker()() as db:
+            return await Productos_router.buscar_por_codigo(codigo, db=db)
+    return correr_async(llamada())
+
+def test_sin_tabla_va_a_la_base(codigos, correr_async):
+    _, ids, cache = codigos
+    assert not cache.lista()
+    assert buscar(correr_async, "SKU-000002")["id_producto"] == ids[1]
+    with pytest.raises(HTTPException) as error:
+        buscar(correr_async, "no-existe")
+    assert error.value.status_code == 404
+
+def test_con_tabla_no_va_a_la_base(codigos, correr_async):
+    _, ids, cache = codigos
+    correr_async(cache.cargar())
+    assert cache.lista()
+
+    producto = buscar(correr_async, "7790000000002", con_base=False)
+    assert producto["id_producto"] == ids[1]
+    assert producto["precio"] == 200 and producto["activo"] is True
+    # Sin distinguir mayúsculas ni espacios alrededor
+    assert buscar(correr_async, " sku-000001 ", con_base=False)["id_producto"] == ids[0]
+    # El código de barras tiene prioridad sobre el mismo SKU de otro producto
+    assert buscar(correr_async, "7790000000001", con_base=False)["id_producto"] == ids[0]
+
+def test_desconocido_se_recuerda(codigos, correr_async):
+    _, _, cache = codigos
+    correr_async(cache.cargar())
+    with pytest.raises(HTTPException):
+        buscar(correr_async, "ilegible")
+    with pytest.raises(HTTPException) as error:
+        buscar(correr_async, "ilegible", con_base=False)
+    assert error.value.status_code == 404
+    assert cache.estadisticas()["hits_negativos"] == 1
+
+def test_cambios_confirmados(codigos, correr_async):
+    SessionLocal, ids, cache = codigos
+    correr_async(cache.cargar())
+
+    db = SessionLocal()
+    producto = db.get(Productos, ids[1])
+    producto.Precio = 250
+    producto.Codigo_Barras = "7799999999999"
+    db.add(Productos(
+        Nombre="Nuevo", Codigo_Barras="7798888888888", Precio=10, Costo=5,
+        ID_Categoria=producto.ID_Categoria, ID_Unidad_de_medida=producto.ID_Unidad_de_medida
+    ))
+    db.commit()
+
+    assert buscar(correr_async, "7799999999999", con_base=False)["precio"] == 250
+    assert buscar(correr_async, "7798888888888", con_base=False)["nombre"] == "Nuevo"
+    # El código anterior ya no apunta al producto (y la base tampoco lo tiene)
+    with pytest.raises(HTTPException):
+        buscar(correr_async, "7790000000002")
+
+    # Un cambio masivo descarta la tabla hasta la próxima carga
+    db.execute(update(Productos).values(Precio=300))
+    db.commit()
+    db.close()
+    assert not cache.lista()
+    assert buscar(correr_async, "7799999999999")["precio"] == 300
@@ -0,0 +1,30 @@
+import pytest
+
+from benchmarks.comun import sembrar_productos
+from benchmarks.bench_concurrencia_stock import ejecutar_ronda
+
+# Ventas en paralelo contra el ledger de inventario, con más pedidos que stock para que
+# haya rechazos. El barrido de throughput por hilos queda en benchmarks/bench_concurrencia_stock.py
+STOCK = 20
+VENTAS = 60
+HILOS = 4
+CANTIDAD = 1
+
+@pytest.mark.parametrize("productos", [1, 3])
+def test_ventas_concurrentes_respetan_el_stock(base, productos):
+    engine, SessionLocal, refs = base
+    db = SessionLocal()
+    ids_producto = sembrar_productos(db, refs, productos, stock=STOCK)
+    db.close()
+
+    r = ejecutar_ronda(SessionLocal, refs, ids_producto, STOCK, VENTAS, HILOS, CANTIDAD)
+    stock_total = STOCK * productos
+
+    # El stock nunca queda negativo y no se vende más de lo que había
+    assert r["stock_minimo"] >= 0
+    assert r["aceptadas"] * CANTIDAD <= stock_total
+    assert r["stock_final"] == stock_total - r["aceptadas"] * CANTIDAD
+
+    # Cada venta aceptada tiene exactamente un movimiento registrado
+    assert r["movimientos"] == r["aceptadas"]
+    assert r["unidades_movidas"] == r["aceptadas"] * CANTIDAD
@@ -0,0 +1,72 @@
+import pytest
+
+from benchmarks.comun import sembrar_productos, limite_sentencias
+from benchmarks.verificar_consultas import POCOS, MUCHOS, llamar, sembrar
+from APP.DB.Usuarios_model import Usuarios
+from APP.routers.Descuentos_router import get_descuentos
+from APP.routers.Usuarios_router import get_usuarios
+from APP.routers.Productos_Descuentos_router import get_productos_descuento
+from APP.routers.Detalle_OC_router import get_detalles_orden
+from APP.routers.Detalles_Transferencias_router import get_detalles_transferencia
+
+# Los endpoints que antes hacían una consulta por fila (N+1) tienen que mandar la misma
+# cantidad de sentencias con POCOS y con MUCHOS registros, sin pasar de un máximo fijo
+
+@pytest.fixture
+def datos(base):
+    engine, SessionLocal, refs = base
+    db = SessionLocal()
+    ids_producto = sembrar_productos(db, refs, MUCHOS)
+    descuentos, ordenes, transferencias = sembrar(db, refs, ids_producto)
+    db.close()
+    return engine, SessionLocal, refs, descuentos, ordenes, transferencias
+
+# Sentencias que manda llamada(db, usuario, n) con POCOS y con MUCHOS registros
+def contar_sentencias(engine, SessionLocal, refs, maximo, llamada):
+    sentencias = []
+    for n in (POCOS, MUCHOS):
+        db = SessionLocal()
+        usuario = db.get(Usuarios, refs["usuario"])
+        try:
+            with limite_sentencias(engine, maximo) as contador:
+                llamada(db, usuario, n)
+        finally:
+            db.close()
+        sentencias.append(contador.sentencias)
+    return sentencias
+
+def test_get_descuentos(datos):
+    engine, SessionLocal, refs, *_ = datos
+    pocos, muchos = contar_sentencias(engine, SessionLocal, refs, 2, lambda db, usuario, n: llamar(
+        get_descuentos, limit=n, db=db, current_user=usuario))
+    assert pocos == muchos
+
+def test_get_descuentos_cursor(datos):
+    engine, SessionLocal, refs, *_ = datos
+    pocos, muchos = contar_sentencias(engine, SessionLocal, refs, 1, lambda db, usuario, n: llamar(
+        get_descuentos, limit=n, paginacion="cursor", db=db, current_user=usuario))
+    assert pocos == muchos
+
+def test_get_usuarios(datos):
+    engine, SessionLocal, refs, *_ = datos
+    pocos, muchos = contar_sentencias(engine, SessionLocal, refs, 2, lambda db, usuario, n: llamar(
+        get_usuarios, limit=n, db=db, current_user=usuario))
+    assert pocos == muchos
+
+def test_get_productos_descuento(datos):
+    engine, SessionLocal, refs, descuentos, _, _ = datos
+    pocos, muchos = contar_sentencias(engine, SessionLocal, refs, 3, lambda db, usuario, n: llamar(
+        get_productos_descuento, descuento_id=descuentos[n], db=db, current_user=usuario))
+    assert pocos == muchos
+
+def test_get_detalles_orden(datos):
+    engine, SessionLocal, refs, _, ordenes, _ = datos
+    pocos, muchos = contar_sentencias(engine, SessionLocal, refs, 4, lambda db, usuario, n: llamar(
+        get_detalles_orden, orden_id=ordenes[n], db=db, current_user=usuario))
+    assert pocos == muchos
+
+def test_get_detalles_transferencia(datos):
+    engine, SessionLocal, refs, _, _, transferencias = datos
+    pocos, muchos = contar_sentencias(engine, SessionLocal, refs, 3, lambda db, usuario, n: llamar(
+        get_detalles_transferencia, transferencia_id=transferencias[n], db=db, current_user=usuario))
+    assert pocos == muchos
@@ -0,0 +1,44 @@
+import pytest
+from decimal import Decimal
+from sqlalchemy import func, select
+
+from benchmarks.comun import crear_engine_sqlite, crear_esquema
+from benchmarks.datos import _valor_sql, leer_script_semilla, sembrar_escala, volumenes
+from APP.DB.Categorias_model import Categorias
+from APP.DB.Productos_model import Productos
+from APP.DB.Unidades_de_medida_model import Unidades_de_medida
+
+# Generador de datos a escala: los valores del script de carga se leen tal cual y las tablas
+# de referencia salen del script sin escalar (lo que crece son productos, facturas, etc.)
+
+def test_valores_del_script():
+    assert _valor_sql("NULL") is None
+    assert _valor_sql("N'Niño'") == "Niño"
+    assert _valor_sql("'O''Brien'") == "O'Brien"
+    assert _valor_sql("-12") == -12
+    assert _valor_sql("3800.00") == Decimal("3800.00")
+    with pytest.raises(ValueError):
+        _valor_sql("NOW")
+
+def test_referencias_salen_del_script(tmp_path):
+    engine = crear_engine_sqlite(str(tmp_path / "escala.db"))
+    crear_esquema(engine)
+    cantidades = volumenes(
+        "1k", productos=100, facturas=20, auditoria=20, ajustes=5, ordenes_compra=2,
+        transferencias=2, clientes=10, proveedores=2
+    )
+    try:
+        sembrar_escala(engine, cantidades)
+        with engine.connect() as conn:
+            contar = lambda columna: conn.execute(select(func.count(columna))).scalar()
+            productos, categorias, unidades = (
+                contar(Productos.ID_Producto), contar(Categorias.ID_Categoria),
+                contar(Unidades_de_medida.ID_Unidad_de_medida)
+            )
+    finally:
+        engine.dispose()
+
+    semilla = leer_script_semilla()
+    assert productos == 100
+    assert categorias == len(semilla["Categorias"])
+    assert unidades == len({fila["Nombre"] for fila in semilla["Unidades_de_medida"]})
@@ -0,0 +1,115 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select, func
+
+from benchmarks.comun import limite_sentencias, sembrar_productos
+from benchmarks.verificar_consultas import llamar
+from APP.DB.Clientes_model import Clientes
+from APP.DB.Detalles_Factura_Venta_model import Detalles_Factura_Venta
+from APP.DB.Facturas_Venta_model import Facturas_Venta
+from APP.DB.Inventario_model import Inventario
+from APP.DB.Usuarios_model import Usuarios
+from APP.routers.Facturas_Venta_router import create_factura
+from APP.routers.Usuarios_router import get_current_user
+from APP.schemas.Facturas_Venta_schema import FacturaVentaCreate
+
+# POST /facturas/: los importes salen de las líneas, el stock se descuenta sumando las líneas
+# del mismo producto y la cantidad de sentencias no depende de cuántas líneas tenga la factura
+
+@pytest.fixture
+def facturas(base):
+    engine, SessionLocal, refs = base
+    db = SessionLocal()
+    ids = sembrar_productos(db, refs, 10, stock=10)
+    db.close()
+    return engine, SessionLocal, refs, ids
+
+def pedido(refs, lineas, forma_pago="Contado"):
+    return {
+        "id_cliente": refs["cliente"],
+        "id_sucursal": refs["sucursal"],
+        "tipo_factura": "B",
+        "forma_pago": forma_pago,
+        "detalles": [
+            {"id_producto": id_producto, "cantidad": cantidad, "precio_unitario": 200, "descuento_unitario": descuento}
+            for id_producto, cantidad, descuento in lineas
+        ]
+    }
+
+def facturar(SessionLocal, refs, lineas, **opciones):
+    db = SessionLocal()
+    try:
+        return llamar(
+            create_factura, db=db, current_user=db.get(Usuarios, refs["usuario"]),
+            factura=FacturaVentaCreate(**pedido(refs, lineas, **opciones))
+        )
+    finally:
+        db.close()
+
+def stock(SessionLocal, ids) -> dict:
+    db = SessionLocal()
+    try:
+        return dict(db.execute(
+            select(Inventario.ID_Producto, Inventario.Stock_Actual).where(Inventario.ID_Producto.in_(ids))
+        ).all())
+    finally:
+        db.close()
+
+def test_factura_de_varias_lineas(facturas, cliente):
+    import main
+
+    _, SessionLocal, refs, ids = facturas
+    db = SessionLocal()
+    usuario = db.get(Usuarios, refs["usuario"])
+    main.app.dependency_overrides[get_current_user] = lambda: usuario
+    db.close()
+
+    # El primer producto va en dos líneas
+    respuesta = cliente.post("/facturas/", json=pedido(refs, [(ids[0], 2, 0), (ids[1], 1, 50), (ids[0], 3, 0)]))
+    assert respuesta.status_code == 200, respuesta.text
+    factura = respuesta.json()
+
+    # Bruto 6 x 200, descuento 50, IVA 21% sobre el neto
+    importes = [float(factura[campo]) for campo in ("subtotal", "descuento", "iva", "total")]
+    assert importes == [1200, 50, 241.5, 1391.5]
+    assert [float(d["subtotal"]) for d in factura["detalles"]] == [400, 150, 600]
+    assert factura["detalles"][0]["producto_codigo"] == "7790000000001"
+    assert float(factura["saldo_pendiente"]) == 0
+    assert stock(SessionLocal, ids[:3]) == {ids[0]: 5, ids[1]: 9, ids[2]: 10}
+
+@pytest.mark.parametrize("lineas", [2, 10])
+def test_sentencias_fijas(facturas, lineas):
+    engine, SessionLocal, refs, ids = facturas
+    # Usuario, cliente, sucursal, productos y stock, factura, detalles, stock, movimientos y la
+    # lectura de los detalles para la respuesta
+    with limite_sentencias(engine, 9):
+        facturar(SessionLocal, refs, [(id_producto, 1, 0) for id_producto in ids[:lineas]])
+    assert set(stock(SessionLocal, ids[:lineas]).values()) == {9}
+
+def test_stock_insuficiente_no_guarda_nada(facturas):
+    _, SessionLocal, refs, ids = facturas
+    # Cada línea alcanza por separado, la suma no
+    with pytest.raises(HTTPException) as error:
+        facturar(SessionLocal, refs, [(ids[0], 6, 0), (ids[1], 1, 0), (ids[0], 5, 0)])
+    assert error.value.status_code == 400
+    assert error.value.detail == "Stock insuficiente para el producto Producto 1"
+
+    assert stock(SessionLocal, ids[:2]) == {ids[0]: 10, ids[1]: 10}
+    db = SessionLocal()
+    try:
+        assert db.scalar(select(func.count()).select_from(Facturas_Venta)) == 0
+        assert db.scalar(select(func.count()).select_from(Detalles_Factura_Venta)) == 0
+    finally:
+        db.close()
+
+def test_cuenta_corriente_suma_el_total_al_saldo(facturas):
+    _, SessionLocal, refs, ids = facturas
+    factura = facturar(SessionLocal, refs, [(ids[0], 1, 0)], forma_pago="Cuenta Corriente")
+    assert factura["total"] == 242
+    assert factura["saldo_pendiente"] == 242
+
+    db = SessionLocal()
+    try:
+        assert db.get(Clientes, refs["cliente"]).Saldo_Actual == 242
+    finally:
+        db.close()
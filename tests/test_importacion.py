@@ -0,0 +1,141 @@
+import io
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+
+from benchmarks.comun import sembrar_productos
+from benchmarks.verificar_consultas import llamar
+from APP.DB.Productos_model import Productos
+from APP.DB.Usuarios_model import Usuarios
+from APP.routers.Productos_router import create_producto
+from APP.schemas.Productos_schema import ProductoCreate
+from APP.services import Cache_productos_service, Importacion_service
+from APP.services.Importacion_service import importar_productos
+
+# Importación de listas de precios: los códigos existentes se actualizan con las columnas del
+# archivo, los nuevos se dan de alta y cada fila con errores se informa sin frenar el resto
+
+class CacheDePrueba:
+    def __init__(self):
+        self.cambios = []
+
+    def aplicar_cambios(self, cambios):
+        self.cambios.extend(cambios)
+
+@pytest.fixture
+def importacion(base, monkeypatch):
+    engine, SessionLocal, refs = base
+    db = SessionLocal()
+    sembrar_productos(db, refs, 2)
+    db.close()
+    cache = CacheDePrueba()
+    monkeypatch.setattr(Cache_productos_service, "_suscriptores", [cache])
+    return SessionLocal, cache
+
+def importar(SessionLocal, contenido, nombre="lista.csv", **opciones):
+    archivo = io.BytesIO(contenido.encode("utf-8") if isinstance(contenido, str) else contenido)
+    db = SessionLocal()
+    try:
+        return importar_productos(db, archivo, nombre, **opciones)
+    finally:
+        db.close()
+
+def productos_por_codigo(SessionLocal) -> dict:
+    db = SessionLocal()
+    try:
+        return {p.Codigo_Barras: p for p in db.scalars(select(Productos))}
+    finally:
+        db.close()
+
+LISTA = (
+    "Código de barras;Nombre;Precio de venta;Costo;Categoría;Unidad;Color\n"
+    "7790000000001;;250,50;120;;;rojo\n"
+    "7791111111111;Pinza universal 8\";1.234,50;900;Herramientas;u;azul\n"
+)
+
+def test_altas_y_actualizaciones_csv(importacion):
+    SessionLocal, cache = importacion
+    resultado = importar(SessionLocal, LISTA)
+
+    assert (resultado["filas"], resultado["insertados"], resultado["actualizados"], resultado["con_errores"]) == (2, 1, 1, 0)
+    assert resultado["columnas_ignoradas"] == ["color"]
+    productos = productos_por_codigo(SessionLocal)
+    # La actualización solo toca las columnas del archivo
+    assert float(productos["7790000000001"].Precio) == 250.5
+    assert productos["7790000000001"].Nombre == "Producto 1"
+    nuevo = productos["7791111111111"]
+    assert (nuevo.Nombre, float(nuevo.Precio), nuevo.Activo) == ('Pinza universal 8"', 1234.5, True)
+    # Una sola recarga de las caches al terminar
+    assert cache.cambios == [("recargar", None)]
+
+def test_simulacion_no_guarda(importacion):
+    SessionLocal, cache = importacion
+    resultado = importar(SessionLocal, LISTA, simular=True)
+    assert (resultado["insertados"], resultado["actualizados"], resultado["simulacion"]) == (1, 1, True)
+    assert "7791111111111" not in productos_por_codigo(SessionLocal)
+    assert cache.cambios == []
+
+def test_errores_por_fila(importacion):
+    SessionLocal, _ = importacion
+    resultado = importar(SessionLocal, (
+        "codigo_barras,nombre,precio,costo,id_categoria,id_unidad_de_medida,activo\n"
+        "7792222222222,Sierra,100,150,1,1,si\n"
+        "7793333333333,Serrucho,300,150,999,1,si\n"
+        "7794444444444,Lima,300,150,1,1,quizas\n"
+        "7795555555555,Escofina,300,150,1,1,no\n"
+        "7795555555555,Escofina repetida,300,150,1,1,no\n"
+        "7796666666666,,300,150,1,1,si\n"
+    ))
+    errores = {e["fila"]: e["errores"] for e in resultado["errores"]}
+    assert (resultado["insertados"], resultado["con_errores"]) == (1, 5)
+    assert errores[2] == ["precio: El precio debe ser mayor al costo"]
+    assert errores[3] == ["id_categoria: no existe o está inactiva"]
+    assert errores[4] == ["activo: valor inválido 'quizas'"]
+    assert errores[6] == ["Código repetido en el archivo (fila 5)"]
+    assert errores[7][0].startswith("nombre:")
+    assert productos_por_codigo(SessionLocal)["7795555555555"].Activo is False
+
+def test_misma_regla_de_precios_que_el_alta(importacion, base):
+    SessionLocal, _ = importacion
+    _, _, refs = base
+    # Solo el precio: se compara con el costo guardado (100)
+    resultado = importar(SessionLocal, "sku;precio\nSKU-000001;90\n")
+    assert resultado["errores"][0]["errores"] == ["precio: El precio debe ser mayor al costo"]
+
+    db = SessionLocal()
+    try:
+        with pytest.raises(HTTPException) as error:
+            llamar(create_producto, db=db, current_user=db.get(Usuarios, refs["usuario"]), producto=ProductoCreate(
+                nombre="Producto nuevo", precio=90, costo=100,
+                id_categoria=refs["categoria"], id_unidad_de_medida=refs["unidad"]
+            ))
+    finally:
+        db.close()
+    assert error.value.detail == "El precio debe ser mayor al costo"
+
+def test_xlsx_y_lotes(importacion, monkeypatch):
+    from openpyxl import Workbook
+
+    SessionLocal, cache = importacion
+    monkeypatch.setattr(Importacion_service, "IMPORTACION_FILAS_POR_LOTE", 2)
+    libro = Workbook()
+    hoja = libro.active
+    hoja.append(["codigo", "nombre", "precio", "costo", "categoria", "unidad de medida"])
+    # Los códigos numéricos llegan como float
+    for i in range(5):
+        hoja.append([7797000000000.0 + i, f"Clavo {i}", 20.5, 10, "herramientas", "Unidad"])
+    archivo = io.BytesIO()
+    libro.save(archivo)
+
+    resultado = importar(SessionLocal, archivo.getvalue(), nombre="lista.xlsx")
+    assert (resultado["insertados"], resultado["con_errores"]) == (5, 0)
+    assert {f"779700000000{i}" for i in range(5)} <= set(productos_por_codigo(SessionLocal))
+    # Tres lotes, una sola recarga
+    assert cache.cambios == [("recargar", None)]
+
+def test_archivo_invalido(importacion):
+    SessionLocal, _ = importacion
+    for contenido, nombre in (("a,b\n1,2\n", "lista.pdf"), ("nombre,precio\nMartillo,10\n", "lista.csv")):
+        with pytest.raises(HTTPException) as error:
+            importar(SessionLocal, contenido, nombre=nombre)
+        assert error.value.status_code == 400
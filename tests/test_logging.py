@@ -0,0 +1,81 @@
+import logging
+import threading
+
+from APP.services.Logging_service import ColaLoggingAcotada, iniciar_logging_en_segundo_plano
+
+# Los loggers solo encolan; el formateo y la escritura pasan en el hilo del listener, y con la
+# cola llena el registro se descarta y se cuenta en lugar de esperar
+
+class HandlerEnMemoria(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.lineas = []
+        self.hilos = set()
+
+    def emit(self, record):
+        self.hilos.add(threading.current_thread().name)
+        self.lineas.append(self.format(record))
+
+def crear_logger(nombre: str) -> logging.Logger:
+    logger = logging.getLogger(f"pruebas.{nombre}")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    logger.handlers.clear()
+    return logger
+
+def test_escribe_desde_el_hilo_de_fondo():
+    logger = crear_logger("fondo")
+    handler = HandlerEnMemoria()
+    handler.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+    cola, listener = iniciar_logging_en_segundo_plano(logger, [handler], 100)
+    try:
+        logger.info("hola %s", "mundo")
+        try:
+            raise ValueError("falla")
+        except ValueError:
+            logger.error("con traceback", exc_info=True)
+    finally:
+        listener.stop()
+
+    assert handler.lineas[0] == "INFO hola mundo"
+    assert handler.lineas[1].startswith("ERROR con traceback\nTraceback")
+    assert "ValueError: falla" in handler.lineas[1]
+    assert threading.current_thread().name not in handler.hilos
+    assert cola.descartados == 0
+
+def test_no_formatea_al_encolar():
+    logger = crear_logger("sin_formatear")
+    cola = ColaLoggingAcotada(10)
+    logger.addHandler(cola)
+    try:
+        raise ValueError("falla")
+    except ValueError:
+        logger.error("valor %d", 5, exc_info=True)
+
+    registro = cola.queue.get_nowait()
+    assert registro.msg == "valor %d"
+    assert registro.args == (5,)
+    assert registro.exc_info is not None
+    assert registro.exc_text is None
+
+def test_cola_llena_descarta_y_cuenta():
+    logger = crear_logger("llena")
+    cola = ColaLoggingAcotada(3)
+    logger.addHandler(cola)
+    for i in range(5):
+        logger.info("registro %d", i)
+
+    assert cola.pendientes() == 3
+    assert cola.descartados == 2
+    assert [cola.queue.get_nowait().args for _ in range(3)] == [(0,), (1,), (2,)]
+
+# Con LOG_MUESTREO_EXITOS=0 no se loguean los requests exitosos; los errores siempre
+def test_muestreo_de_exitos(cliente, monkeypatch, caplog):
+    import main
+    monkeypatch.setattr(main, "LOG_MUESTREO_EXITOS", 0)
+    with caplog.at_level(logging.INFO, logger="main"):
+        assert cliente.get("/categorias/arbol").status_code == 200
+        assert cliente.get("/categorias/999999").status_code == 404
+    accesos = [r.getMessage() for r in caplog.records if r.getMessage().startswith("Method:")]
+    assert len(accesos) == 1
+    assert "Path: /categorias/999999 - Status: 404" in accesos[0]
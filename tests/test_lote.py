@@ -0,0 +1,86 @@
+import pytest
+from datetime import datetime
+from pydantic import ValidationError
+
+from benchmarks.comun import sembrar_productos
+from APP.DB.Inventario_model import Inventario
+from APP.DB.Sucursales_model import Sucursales
+from APP.routers import Productos_router
+from APP.schemas.Productos_schema import ProductosLote, MAX_PRODUCTOS_LOTE
+from APP.services.Codigos_service import CacheCodigos
+from APP.services.Metricas_service import iniciar_metricas_request, finalizar_metricas_request
+
+# POST /productos/lote: los productos vuelven en el orden pedido y la cantidad de sentencias no
+# depende de cuántos se piden (con la tabla de códigos cargada, solo la del stock)
+
+@pytest.fixture
+def lote(base, monkeypatch):
+    engine, SessionLocal, refs = base
+    db = SessionLocal()
+    ids = sembrar_productos(db, refs, 20, stock=5)
+    otra = Sucursales(Nombre="Sucursal 2", Direccion="Calle 2", Localidad="Córdoba", Provincia="Córdoba")
+    db.add(otra)
+    db.flush()
+    db.add(Inventario(
+        ID_Producto=ids[0], ID_Sucursal=otra.ID_Sucursal, Stock_Actual=3, Stock_Minimo=0,
+        Stock_Maximo=10, Fecha_Ultimo_Movimiento=datetime.now()
+    ))
+    db.commit()
+    db.close()
+
+    cache = CacheCodigos()
+    monkeypatch.setattr(cache, "_programar", lambda: None)
+    monkeypatch.setattr(Productos_router, "cache_codigos", cache)
+    return ids, cache
+
+# (respuesta, sentencias enviadas a la base)
+def pedir(correr_async, **pedido):
+    import database
+
+    async def llamada():
+        metricas, token = iniciar_metricas_request()
+        try:
+            async with database.get_async_sessionmaker()() as db:
+                respuesta = await Productos_router.get_productos_lote(ProductosLote(**pedido), db=db)
+        finally:
+            finalizar_metricas_request(token)
+        return respuesta, metricas.sentencias
+    return correr_async(llamada())
+
+def test_orden_repetidos_y_no_encontrados(lote, correr_async):
+    ids, _ = lote
+    respuesta, _ = pedir(
+        correr_async,
+        ids=[ids[3], ids[0], ids[3], 999999],
+        codigos=["SKU-000002", "no-existe", "7790000000005"]
+    )
+    assert [p["solicitado"] for p in respuesta["productos"]] == [ids[3], ids[0], "SKU-000002", "7790000000005"]
+    assert [p["id_producto"] for p in respuesta["productos"]] == [ids[3], ids[0], ids[1], ids[4]]
+    assert respuesta["no_encontrados"] == {"ids": [999999], "codigos": ["no-existe"]}
+
+    primero = respuesta["productos"][1]
+    assert primero["stock_total"] == 8
+    assert sorted(s["stock_actual"] for s in primero["stock_por_sucursal"]) == [3, 5]
+
+@pytest.mark.parametrize("cantidad", [2, 20])
+def test_sentencias_fijas(lote, correr_async, cantidad):
+    ids, cache = lote
+    pedido = {"ids": ids[:cantidad // 2], "codigos": [f"SKU-{i:06d}" for i in range(cantidad // 2 + 1, cantidad + 1)]}
+
+    # Sin la tabla: ids, códigos y stock
+    respuesta, sentencias = pedir(correr_async, **pedido)
+    assert len(respuesta["productos"]) == cantidad
+    assert sentencias == 3
+
+    # Con la tabla cargada solo el stock, o nada
+    correr_async(cache.cargar())
+    assert pedir(correr_async, **pedido)[1] == 1
+    respuesta, sentencias = pedir(correr_async, incluir_stock=False, **pedido)
+    assert sentencias == 0
+    assert "stock_total" not in respuesta["productos"][0]
+
+def test_pedido_vacio_o_demasiado_grande():
+    with pytest.raises(ValidationError):
+        ProductosLote()
+    with pytest.raises(ValidationError):
+        ProductosLote(ids=list(range(1, MAX_PRODUCTOS_LOTE + 2)))
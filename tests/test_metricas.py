@@ -0,0 +1,65 @@
+import re
+import pytest
+
+from APP.services import Metricas_service
+from APP.services.Categorias_service import cache_arbol_categorias
+
+# /metrics en formato Prometheus: series por plantilla de ruta, errores por manejador y acceso
+# solo con METRICAS_TOKEN o desde METRICAS_REDES
+
+TOKEN = "token-de-prueba"
+
+@pytest.fixture
+def con_token(monkeypatch):
+    monkeypatch.setattr(Metricas_service, "METRICAS_TOKEN", TOKEN)
+    return {"Authorization": f"Bearer {TOKEN}"}
+
+def leer_metricas(cliente, headers) -> str:
+    respuesta = cliente.get("/metrics", headers=headers)
+    assert respuesta.status_code == 200
+    assert respuesta.headers["content-type"].startswith("text/plain; version=0.0.4")
+    return respuesta.text
+
+def valor(texto: str, serie: str) -> float:
+    encontrado = re.search(rf"^{re.escape(serie)} (\S+)$", texto, re.MULTILINE)
+    return float(encontrado.group(1)) if encontrado else 0.0
+
+def test_series_por_plantilla_de_ruta(cliente, con_token):
+    cache_arbol_categorias.invalidar()
+    etiquetas = 'metodo="GET",ruta="/categorias/arbol"'
+    antes = leer_metricas(cliente, con_token)
+
+    assert cliente.get("/categorias/arbol").status_code == 200
+    assert cliente.get("/categorias/999999").status_code == 404
+    despues = leer_metricas(cliente, con_token)
+
+    serie = f"ferreteria_http_duracion_segundos_count{{{etiquetas}}}"
+    assert valor(despues, serie) == valor(antes, serie) + 1
+    serie = f'ferreteria_http_respuestas_total{{{etiquetas},codigo="2xx"}}'
+    assert valor(despues, serie) == valor(antes, serie) + 1
+    # El path real no genera series propias
+    assert 'ruta="/categorias/{categoria_id}",codigo="4xx"' in despues
+    assert "/categorias/999999" not in despues
+    assert "ferreteria_db_pool_timeouts_total" in despues
+    assert "ferreteria_log_descartados_total" in despues
+
+def test_errores_por_manejador(cliente, con_token):
+    serie = 'ferreteria_http_errores_total{metodo="GET",ruta="/categorias/",tipo="validacion"}'
+    antes = valor(leer_metricas(cliente, con_token), serie)
+    assert cliente.get("/categorias/", params={"limit": 0}).status_code == 422
+    assert valor(leer_metricas(cliente, con_token), serie) == antes + 1
+
+def test_sin_token_valido_no_responde(cliente, con_token):
+    assert cliente.get("/metrics").status_code == 403
+    assert cliente.get("/metrics", headers={"Authorization": "Bearer otro"}).status_code == 403
+    assert cliente.get("/metrics", headers={"Authorization": TOKEN}).status_code == 403
+
+def test_sin_token_solo_redes_internas(cliente, monkeypatch):
+    monkeypatch.setattr(Metricas_service, "METRICAS_TOKEN", "")
+    permitido = Metricas_service.acceso_metricas_permitido
+    for ip in ("127.0.0.1", "::1", "10.1.2.3", "172.20.0.5", "192.168.1.10"):
+        assert permitido(None, ip)
+    for ip in ("8.8.8.8", "172.32.0.1", "2001:4860::1", None, "testclient"):
+        assert not permitido(None, ip)
+    # El TestClient no llega desde una IP
+    assert cliente.get("/metrics").status_code == 403
@@ -0,0 +1,68 @@
+import logging
+import re
+import pytest
+from fastapi.testclient import TestClient
+
+from main import LogRequestsMiddleware, RUTAS_SIN_LOG
+from APP.services.Metricas_service import metricas_http
+from APP.services.Categorias_service import cache_arbol_categorias
+
+# LogRequestsMiddleware (ASGI puro): Server-Timing con las sentencias del request, tamaño real
+# de las respuestas en streaming, una línea de log por request y el error re-lanzado
+
+def partes_server_timing(valor: str) -> dict:
+    partes = {}
+    for parte in valor.split(", "):
+        nombre, *atributos = parte.split(";")
+        partes[nombre] = dict(atributo.split("=", 1) for atributo in atributos)
+    return partes
+
+def test_server_timing_y_log(cliente, caplog):
+    cache_arbol_categorias.invalidar()
+    with caplog.at_level(logging.INFO, logger="main"):
+        respuesta = cliente.get("/categorias/arbol")
+        cliente.get("/")
+
+    partes = partes_server_timing(respuesta.headers["server-timing"])
+    assert partes["db"]["desc"] == '"1 sentencias"'
+    assert float(partes["total"]["dur"]) >= float(partes["db"]["dur"]) >= float(partes["db-lenta"]["dur"]) > 0
+
+    accesos = [r.getMessage() for r in caplog.records if r.getMessage().startswith("Method:")]
+    assert "/" in RUTAS_SIN_LOG
+    assert len(accesos) == 1
+    assert re.match(r"Method: GET - Path: /categorias/arbol - Status: 200 - Duration: \S+s - SQL: 1 sentencias", accesos[0])
+    assert "Más lenta:" in accesos[0] and "Categorias" in accesos[0]
+
+# App ASGI mínima: responde en varios trozos o falla antes de empezar
+async def app_de_prueba(scope, receive, send):
+    if scope["path"] == "/falla":
+        raise RuntimeError("falla de prueba")
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+    for trozo in (b"uno ", b"dos ", b"tres"):
+        await send({"type": "http.response.body", "body": trozo, "more_body": True})
+    await send({"type": "http.response.body", "body": b""})
+
+@pytest.fixture
+def cliente_minimo():
+    return TestClient(LogRequestsMiddleware(app_de_prueba))
+
+def test_streaming_pasa_entero_y_cuenta_el_tamano(cliente_minimo):
+    serie = metricas_http.ruta("GET", "sin_ruta").tamano
+    antes = (serie.total, serie.suma)
+    respuesta = cliente_minimo.get("/stream")
+
+    assert respuesta.text == "uno dos tres"
+    assert "server-timing" in respuesta.headers
+    assert (serie.total, serie.suma) == (antes[0] + 1, antes[1] + len("uno dos tres"))
+    assert metricas_http.en_curso == 0
+
+def test_error_se_loguea_y_se_relanza(cliente_minimo, caplog):
+    serie = metricas_http.ruta("GET", "sin_ruta").respuestas
+    antes = serie[4]
+    with caplog.at_level(logging.INFO, logger="main"), pytest.raises(RuntimeError):
+        cliente_minimo.get("/falla")
+
+    assert serie[4] == antes + 1
+    assert metricas_http.en_curso == 0
+    error = [r for r in caplog.records if "Error: falla de prueba" in r.getMessage()]
+    assert len(error) == 1 and error[0].exc_info is not None
@@ -0,0 +1,81 @@
+import pytest
+from datetime import date
+
+from benchmarks.comun import sembrar_productos, limite_sentencias
+from benchmarks.verificar_consultas import MUCHOS, llamar, sembrar
+from APP.DB.Descuentos_model import Descuentos
+from APP.routers.Descuentos_router import get_descuentos
+from APP.services import Paginacion_service
+
+# total=estimate reutiliza un COUNT cacheado por consulta (en SQLite no hay metadata de
+# particiones) y total=none no cuenta: la página sale en una sola sentencia
+
+@pytest.fixture
+def descuentos(base):
+    engine, SessionLocal, refs = base
+    db = SessionLocal()
+    sembrar(db, refs, sembrar_productos(db, refs, MUCHOS))
+    db.close()
+    Paginacion_service._totales_cacheados.clear()
+    yield engine, SessionLocal
+    Paginacion_service._totales_cacheados.clear()
+
+def listar(SessionLocal, **filtros):
+    db = SessionLocal()
+    try:
+        return llamar(get_descuentos, db=db, current_user=None, **filtros)
+    finally:
+        db.close()
+
+def agregar_descuento(SessionLocal, tipo="Porcentaje"):
+    db = SessionLocal()
+    db.add(Descuentos(Nombre="Nuevo", Porcentaje=1, Tipo_Descuento=tipo, Fecha_Inicio=date.today(), Fecha_Fin=date.today()))
+    db.commit()
+    db.close()
+
+def test_total_none_no_cuenta(descuentos):
+    engine, SessionLocal = descuentos
+    with limite_sentencias(engine, 1):
+        pagina = listar(SessionLocal, limit=5, modo_total="none")
+    assert pagina["total"] is None
+    assert pagina["paginas"] is None
+    assert len(pagina["items"]) == 5
+
+def test_total_estimate_reutiliza_el_conteo(descuentos):
+    engine, SessionLocal = descuentos
+    exacto = listar(SessionLocal, modo_total="exact")["total"]
+    assert listar(SessionLocal, limit=5, modo_total="estimate")["total"] == exacto
+
+    # Dentro del TTL el total estimado no vuelve a contar (ni ve la fila nueva); el exacto sí
+    agregar_descuento(SessionLocal)
+    with limite_sentencias(engine, 1):
+        pagina = listar(SessionLocal, limit=5, modo_total="estimate")
+    assert pagina["total"] == exacto
+    assert pagina["paginas"] == (exacto + 4) // 5
+    assert listar(SessionLocal, modo_total="exact")["total"] == exacto + 1
+
+    # Sin la entrada cacheada (vencida o desalojada) se cuenta de nuevo
+    Paginacion_service._totales_cacheados.clear()
+    assert listar(SessionLocal, modo_total="estimate")["total"] == exacto + 1
+
+def test_total_estimate_separa_por_filtros(descuentos):
+    _, SessionLocal = descuentos
+    agregar_descuento(SessionLocal, tipo="Monto Fijo")
+    todos = listar(SessionLocal, modo_total="estimate")["total"]
+    monto = listar(SessionLocal, tipo="Monto Fijo", modo_total="estimate")["total"]
+    porcentaje = listar(SessionLocal, tipo="Porcentaje", modo_total="estimate")["total"]
+    assert monto == 1
+    assert porcentaje == todos - 1
+
+# Sin cursor los listados conservan sus claves de primer nivel; next_cursor es la única nueva
+@pytest.mark.parametrize("url, claves", [
+    ("/categorias/", {"total_registros", "pagina_actual", "total_paginas", "categorias"}),
+    ("/sucursales/", {"total_registros", "pagina_actual", "total_paginas", "sucursales"}),
+    ("/unidades-medida/", {"total_registros", "pagina_actual", "total_paginas", "unidades"}),
+])
+def test_claves_sin_cursor(cliente, url, claves):
+    respuesta = cliente.get(url)
+    assert respuesta.status_code == 200
+    pagina = respuesta.json()
+    assert set(pagina) == claves | {"next_cursor"}
+    assert pagina["total_registros"] == 1 and pagina["next_cursor"] is None
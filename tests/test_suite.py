@@ -0,0 +1,26 @@
+import os
+import sys
+import json
+import subprocess
+
+# Humo de benchmarks/suite.py: una corrida chica con todos los escenarios tiene que terminar con
+# código 0 y sin escenarios fallidos (un endpoint que responde con error la hace salir con 1)
+SUITE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "suite.py")
+
+def test_suite_a_escala_chica(tmp_path):
+    salida = tmp_path / "resultados.json"
+    proceso = subprocess.run(
+        [
+            sys.executable, SUITE,
+            "--productos", "200", "--ajustes", "20", "--facturas", "50",
+            "--archivo-db", str(tmp_path / "suite.db"), "--json", str(salida),
+            "--repeticiones", "3", "--calentamiento", "1"
+        ],
+        capture_output=True, text=True, timeout=300
+    )
+    assert proceso.returncode == 0, proceso.stdout + proceso.stderr
+
+    with open(salida, encoding="utf-8") as f:
+        escenarios = json.load(f)["escenarios"]
+    assert "crear_factura" in escenarios
+    assert not [nombre for nombre, r in escenarios.items() if "fallo" in r]
@@ -0,0 +1,137 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import delete, update
+
+from benchmarks.comun import limite_sentencias
+from benchmarks.verificar_consultas import llamar
+from APP.DB.Usuarios_model import Usuarios
+from APP.routers.Usuarios_router import get_current_user, change_usuario_estado, create_access_token
+from APP.services.Usuarios_service import CacheUsuarios, UsuarioAutenticado, cache_usuarios
+
+# get_current_user resuelve el token desde la caché de usuarios: la base se consulta una vez
+# por usuario hasta que venza o se invalide (cualquier alta, cambio o baja confirmada de Usuarios)
+
+@pytest.fixture
+def usuarios(base):
+    engine, SessionLocal, refs = base
+    db = SessionLocal()
+    vendedor = Usuarios(
+        Nombre="Vendedor", Apellido="Prueba", Rol="Vendedor", Email="vendedor@ferreteria.com",
+        Contraseña="x", ID_Sucursal=refs["sucursal"]
+    )
+    db.add(vendedor)
+    db.commit()
+    db.close()
+    cache_usuarios.limpiar()
+    yield engine, SessionLocal, refs
+    cache_usuarios.limpiar()
+
+def autenticar(SessionLocal, email: str):
+    db = SessionLocal()
+    try:
+        return get_current_user(token=create_access_token({"sub": email}), db=db)
+    finally:
+        db.close()
+
+def test_segundo_request_sin_consulta(usuarios):
+    engine, SessionLocal, _ = usuarios
+    with limite_sentencias(engine, 1):
+        primero = autenticar(SessionLocal, "vendedor@ferreteria.com")
+    with limite_sentencias(engine, 0):
+        segundo = autenticar(SessionLocal, "vendedor@ferreteria.com")
+
+    assert segundo is primero
+    assert isinstance(primero, UsuarioAutenticado)
+    assert primero.Rol == "Vendedor"
+    assert not hasattr(primero, "Contraseña")
+
+def test_desactivar_invalida(usuarios):
+    _, SessionLocal, _ = usuarios
+    vendedor = autenticar(SessionLocal, "vendedor@ferreteria.com")
+    admin = autenticar(SessionLocal, "bench@ferreteria.com")
+
+    db = SessionLocal()
+    llamar(change_usuario_estado, usuario_id=vendedor.ID_Usuario, estado=False, current_user=admin, db=db)
+    db.close()
+
+    with pytest.raises(HTTPException) as error:
+        autenticar(SessionLocal, "vendedor@ferreteria.com")
+    assert error.value.status_code == 403
+
+def test_baja_y_alta_con_el_mismo_email(usuarios):
+    _, SessionLocal, refs = usuarios
+    vendedor = autenticar(SessionLocal, "vendedor@ferreteria.com")
+
+    db = SessionLocal()
+    db.delete(db.get(Usuarios, vendedor.ID_Usuario))
+    db.commit()
+    db.close()
+    with pytest.raises(HTTPException) as error:
+        autenticar(SessionLocal, "vendedor@ferreteria.com")
+    assert error.value.status_code == 401
+
+    db = SessionLocal()
+    db.add(Usuarios(
+        Nombre="Otro", Apellido="Prueba", Rol="Supervisor", Email="vendedor@ferreteria.com",
+        Contraseña="x", ID_Sucursal=refs["sucursal"]
+    ))
+    db.commit()
+    db.close()
+    nuevo = autenticar(SessionLocal, "vendedor@ferreteria.com")
+    assert (nuevo.Rol, nuevo.Nombre) != (vendedor.Rol, vendedor.Nombre)
+
+def test_cambio_de_email_masivo_y_rollback(usuarios):
+    _, SessionLocal, _ = usuarios
+    vendedor = autenticar(SessionLocal, "vendedor@ferreteria.com")
+    autenticar(SessionLocal, "bench@ferreteria.com")
+
+    # Un cambio que se deshace no invalida
+    db = SessionLocal()
+    db.get(Usuarios, vendedor.ID_Usuario).Rol = "Admin"
+    db.flush()
+    db.rollback()
+    assert cache_usuarios.obtener("vendedor@ferreteria.com") is vendedor
+
+    # Se invalidan el email anterior y el nuevo
+    db.get(Usuarios, vendedor.ID_Usuario).Email = "ventas@ferreteria.com"
+    db.commit()
+    assert cache_usuarios.obtener("vendedor@ferreteria.com") is None
+    assert cache_usuarios.obtener("bench@ferreteria.com") is not None
+
+    # Un UPDATE/DELETE masivo vacía la caché
+    db.execute(update(Usuarios).values(Apellido="Masivo"))
+    db.commit()
+    assert cache_usuarios.obtener("bench@ferreteria.com") is None
+    autenticar(SessionLocal, "bench@ferreteria.com")
+    db.execute(delete(Usuarios).where(Usuarios.ID_Usuario == vendedor.ID_Usuario))
+    db.commit()
+    db.close()
+    assert cache_usuarios.obtener("bench@ferreteria.com") is None
+
+def test_token_invalido_o_usuario_inexistente(usuarios):
+    _, SessionLocal, _ = usuarios
+    db = SessionLocal()
+    try:
+        for token in ("no-es-un-jwt", create_access_token({"sub": "nadie@ferreteria.com"})):
+            with pytest.raises(HTTPException) as error:
+                get_current_user(token=token, db=db)
+            assert error.value.status_code == 401
+    finally:
+        db.close()
+    assert cache_usuarios.obtener("nadie@ferreteria.com") is None
+
+def test_limite_de_items_y_ttl_cero(usuarios):
+    _, SessionLocal, _ = usuarios
+    db = SessionLocal()
+    filas = db.query(Usuarios).order_by(Usuarios.ID_Usuario).all()
+    db.close()
+
+    cache = CacheUsuarios(ttl=60, max_items=1)
+    cache.guardar(filas[0].Email, filas[0])
+    cache.guardar(filas[1].Email, filas[1])
+    assert cache.obtener(filas[0].Email) is None
+    assert cache.obtener(filas[1].Email).ID_Usuario == filas[1].ID_Usuario
+
+    sin_cache = CacheUsuarios(ttl=0)
+    sin_cache.guardar(filas[0].Email, filas[0])
+    assert sin_cache.obtener(filas[0].Email) is None